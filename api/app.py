@@ -20,7 +20,7 @@ from fastapi import FastAPI, WebSocket, HTTPException, Depends, Header
 
 from fastapi.staticfiles import StaticFiles
 
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -57,6 +57,12 @@ from signal_logger import get_signal_logger
 
 from exchange.account import AccountClient
 
+from utils.tracing import get_tracer
+
+from utils.profiler import configure_profiler, get_profiler
+
+from utils import metrics
+
 import logging
 
 
@@ -1649,6 +1655,15 @@ async def health_check():
     }
 
 
+# Метрики Prometheus (REST, retries, WS reconnects, сигналы MetaLayer, DB commit, features)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Метрики бота в Prometheus text format"""
+
+    return PlainTextResponse(metrics.get_registry().render(), media_type=metrics.CONTENT_TYPE)
+
+
 # Bot Control Endpoints
 
 bot_status = {
@@ -2166,6 +2181,62 @@ async def get_last_order_intent():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/metrics/latency")
+async def get_latency_metrics(limit: int = 20):
+    """
+    Tick-to-order latency по стадиям (observability.latency_tracing)
+
+    Возвращает p50/p95/p99 по стадиям (fetch_market_data, build_features,
+    get_signal, risk_checks, create_order, wait_for_order_fill, total)
+    и последние trace'ы тиков.
+    """
+    tracer = get_tracer()
+    return {
+        "status": "success",
+        "enabled": tracer.enabled,
+        "capacity": tracer.capacity,
+        "stages": tracer.stage_stats(),
+        "traces": tracer.get_traces(limit),
+    }
+
+
+@app.post("/api/metrics/latency/toggle")
+async def toggle_latency_tracing(enabled: bool, reset: bool = False):
+    """Включить/выключить latency tracing без рестарта бота"""
+    tracer = get_tracer()
+    tracer.configure(enabled)
+    if reset:
+        tracer.reset()
+    logger.info(f"Latency tracing {'enabled' if enabled else 'disabled'}")
+    return {"status": "success", "enabled": tracer.enabled}
+
+
+@app.get("/api/profiler")
+async def get_profiler_status():
+    """Статус sampling profiler'а (logs/profiles/*.collapsed)"""
+    return {"status": "success", **get_profiler().get_status()}
+
+
+@app.post("/api/profiler/toggle")
+async def toggle_profiler(enabled: bool, interval_ms: Optional[float] = None):
+    """
+    Включить/выключить sampling profiler без рестарта бота
+
+    При выключении остаток агрегата сбрасывается в файл.
+    """
+    profiler = get_profiler()
+    if enabled and not profiler.is_running:
+        configure_profiler(get_config())
+    if interval_ms:
+        profiler.configure(interval_seconds=interval_ms / 1000)
+    if enabled:
+        profiler.start()
+        last_file = None
+    else:
+        last_file = profiler.stop()
+    return {"status": "success", "running": profiler.is_running, "last_file": last_file}
+
+
 @app.post("/api/bot/run-once")
 async def run_bot_once():
     """
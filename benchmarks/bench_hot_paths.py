@@ -0,0 +1,229 @@
+"""
+Бенчмарки горячих путей сигнального пайплайна и валидации.
+
+Замеряется только возвращённый фабрикой callable; подготовка данных и
+объектов в замер не входит. DataFrame копируется внутри замера там, где
+метод мутирует вход (стоимость copy() на 1000 строк пренебрежимо мала).
+"""
+
+from decimal import Decimal
+
+from benchmarks import datasets
+from benchmarks.harness import benchmark, register
+from data.features import FeaturePipeline
+from data.indicators import TechnicalIndicators
+
+
+# ==================== Features / indicators ====================
+
+
+@benchmark("features.build_features")
+def bench_build_features():
+    pipeline = FeaturePipeline()
+    df = datasets.candles(1000)
+    return lambda: pipeline.build_features(df.copy(), is_testnet=True)
+
+
+@benchmark("features.build_features_lazy")
+def bench_build_features_lazy():
+    from strategy.meta_layer import MetaLayer
+    from strategy.trend_pullback import TrendPullbackStrategy
+
+    # Trend-режим legacy роутинга: граф без percentile-узлов, нужных только Breakout
+    pipeline = FeaturePipeline()
+    MetaLayer([TrendPullbackStrategy()], use_mtf=False, use_weighted_routing=False).attach_feature_pipeline(pipeline)
+    df = datasets.candles(1000)
+    return lambda: pipeline.build_features(df.copy(), is_testnet=True)
+
+
+@benchmark("klines.full_parse")
+def bench_klines_full_parse():
+    from data.candle_buffer import klines_to_frame
+
+    # Прежний путь тика: 500 свечей -> DataFrame -> фильтр выбросов -> последние 200
+    candles = datasets.klines(500)
+    return lambda: klines_to_frame(candles).tail(200).copy()
+
+
+@benchmark("klines.ring_buffer_merge")
+def bench_klines_ring_buffer_merge():
+    from data.candle_buffer import CandleRingBuffer
+
+    # Установившийся режим: limit=3 (прошлый бар, новый бар, запас) в буфер на 500
+    candles = datasets.klines(501)
+    buffer = CandleRingBuffer(500, "60")
+    buffer.load(candles[1:])
+    tail = candles[:3]
+    return lambda: (buffer.merge(tail), buffer.to_frame(200))
+
+
+@benchmark("timeframe_cache.add_candle_latest")
+def bench_timeframe_cache_add_candle_latest():
+    import pandas as pd
+
+    from data.timeframe_cache import TimeframeCache
+
+    # Тик MTF: обновление формирующейся 1m свечи и последние 1m/5m/15m для check_confluence
+    df = datasets.candles(500).copy()
+    df["timestamp"] = pd.date_range("2024-01-01", periods=len(df), freq="1min")
+    cache = TimeframeCache()
+    cache.seed("1", df)
+    last = df.iloc[-1].to_dict()
+
+    def run():
+        cache.add_candle("1", last)
+        return [cache.get_latest(tf) for tf in ("1", "5", "15")]
+
+    return run
+
+
+@benchmark("instruments.normalize_order")
+def bench_instruments_normalize_order():
+    from unittest.mock import Mock
+
+    from exchange.instruments import InstrumentsManager
+
+    # Нормализация и проверка ордера: целые тики/шаги вместо Decimal quantize
+    client = Mock()
+    client.get.return_value = {"retCode": 0, "result": {"list": [{
+        "symbol": "BTCUSDT",
+        "priceFilter": {"tickSize": "0.1"},
+        "lotSizeFilter": {"qtyStep": "0.001", "minOrderQty": "0.001", "maxOrderQty": "100", "minNotionalValue": "5"},
+    }]}}
+    manager = InstrumentsManager(client)
+    manager.load_instruments()
+    prices = [42123.456 + i * 0.37 for i in range(100)]
+    return lambda: [manager.normalize_order("BTCUSDT", price, 0.01234) for price in prices]
+
+
+INDICATOR_METHODS = sorted(
+    name for name in vars(TechnicalIndicators) if name.startswith(("calculate_", "detect_"))
+)
+
+
+def _indicator_factory(method_name):
+    def factory():
+        method = getattr(TechnicalIndicators, method_name)
+        df = datasets.candles(1000)
+        return lambda: method(df.copy())
+
+    return factory
+
+
+for _method in INDICATOR_METHODS:
+    register(f"indicators.{_method}", _indicator_factory(_method))
+
+
+# ==================== MetaLayer ====================
+
+
+@benchmark("meta_layer.get_signal")
+def bench_meta_layer_get_signal():
+    from strategy.breakout import BreakoutStrategy
+    from strategy.mean_reversion import MeanReversionStrategy
+    from strategy.meta_layer import MetaLayer
+    from strategy.trend_pullback import TrendPullbackStrategy
+
+    meta_layer = MetaLayer([TrendPullbackStrategy(), BreakoutStrategy(), MeanReversionStrategy()], use_mtf=False)
+    df = datasets.features(500)
+    return lambda: meta_layer.get_signal(df, {"symbol": "BTCUSDT"})
+
+
+@benchmark("strategies.generate_signals")
+def bench_strategies_generate_signals():
+    from strategy.breakout import BreakoutStrategy
+    from strategy.mean_reversion import MeanReversionStrategy
+    from strategy.trend_pullback import TrendPullbackStrategy
+
+    strategies = [TrendPullbackStrategy(), BreakoutStrategy(), MeanReversionStrategy()]
+    df = datasets.features(1000)
+    features = {"symbol": "BTCUSDT", "spread_percent": 0.1}
+
+    def run():
+        for strategy in strategies:
+            strategy.generate_signals(df, features)
+
+    return run
+
+
+# ==================== Orderbook ====================
+
+
+@benchmark("orderbook.apply_deltas")
+def bench_orderbook_deltas():
+    from exchange.streams import OrderbookStream
+
+    messages = datasets.orderbook_messages(levels=200, deltas=500)
+    stream = OrderbookStream("BTCUSDT", 200, on_orderbook=lambda ob: None, testnet=True)
+
+    def run():
+        stream._handle_message(messages["snapshot"])
+        for message in messages["deltas"]:
+            stream._handle_message(message)
+
+    return run
+
+
+# ==================== Backtest / validation ====================
+
+
+def _close_up_strategy(df):
+    latest = df.iloc[-1]
+    if latest["close"] > latest["open"]:
+        return {
+            "side": "BUY",
+            "qty": Decimal("0.1"),
+            "stop_loss_price": Decimal(str(latest["low"])) * Decimal("0.95"),
+            "take_profit_price": Decimal(str(latest["high"])) * Decimal("1.05"),
+        }
+    return None
+
+
+def _momentum_signals(df):
+    signals = {}
+    closes = df["close"].to_numpy()
+    for i in range(1, len(df) - 1):
+        if closes[i] > closes[i - 1]:
+            signals[i] = {"type": "long", "qty": Decimal("1")}
+        elif closes[i] < closes[i - 1]:
+            signals[i] = {"type": "close"}
+    return signals
+
+
+@benchmark("backtest.run_backtest", rounds=3)
+def bench_run_backtest():
+    from execution.backtest_runner import BacktestRunner
+
+    runner = BacktestRunner()
+    df = datasets.candles(300)
+    return lambda: runner.run_backtest(df, _close_up_strategy, symbol="BTCUSDT", name="bench")
+
+
+@benchmark("validation.validate_on_data", rounds=3)
+def bench_validate_on_data():
+    from validation.validation_engine import ValidationEngine
+
+    df = datasets.candles(500)
+
+    def run():
+        engine = ValidationEngine(_momentum_signals, "Momentum")
+        return engine.validate_on_data(df, period_type="train")
+
+    return run
+
+
+@benchmark("validation.run_sweep", rounds=3)
+def bench_run_sweep():
+    from validation.parameter_sweep import ParameterConfig, ParameterRange, ParameterSweep, ParameterType
+    from validation.validation_engine import ValidationEngine
+
+    config = ParameterConfig()
+    config.add_parameter(ParameterRange("atr_period", ParameterType.INTEGER, 10, 20, 10))
+    config.add_parameter(ParameterRange("volatility_multiplier", ParameterType.FLOAT, 1.5, 2.0, 0.5))
+    df = datasets.candles(300)
+
+    def run():
+        sweep = ParameterSweep(lambda params: None, "Momentum", config)
+        return sweep.run_sweep(df, ValidationEngine(_momentum_signals, "Momentum"))
+
+    return run
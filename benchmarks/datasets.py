@@ -0,0 +1,77 @@
+"""
+Фиксированные синтетические датасеты для бенчмарков.
+
+Все свечи - HistoricalDataLoader.generate_sample_data (random.seed(42)),
+стакан - детерминированный генератор с numpy seed. Датасеты кэшируются,
+вызывающий код получает копию.
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from execution.backtest_runner import HistoricalDataLoader
+
+
+@lru_cache(maxsize=None)
+def _candles(num_candles: int) -> pd.DataFrame:
+    return HistoricalDataLoader.generate_sample_data(
+        num_candles=num_candles,
+        start_price=Decimal("40000"),
+        volatility=Decimal("0.01"),
+    )
+
+
+def candles(num_candles: int = 1000) -> pd.DataFrame:
+    """OHLCV (timestamp, open, high, low, close, volume)"""
+    return _candles(num_candles).copy()
+
+
+def klines(num_candles: int = 500) -> List[List[str]]:
+    """Те же свечи в формате ответа get_kline (result.list, новые первыми)"""
+    df = _candles(num_candles)
+    rows = [
+        [str(ts.value // 1_000_000), str(o), str(h), str(lo), str(c), str(v), str(v * c)]
+        for ts, o, h, lo, c, v in zip(df["timestamp"], df["open"], df["high"], df["low"], df["close"], df["volume"])
+    ]
+    return rows[::-1]
+
+
+@lru_cache(maxsize=None)
+def _features(num_candles: int) -> pd.DataFrame:
+    from data.features import FeaturePipeline
+
+    return FeaturePipeline().build_features(candles(num_candles), is_testnet=True)
+
+
+def features(num_candles: int = 500) -> pd.DataFrame:
+    """Свечи с полным набором признаков FeaturePipeline"""
+    return _features(num_candles).copy()
+
+
+def orderbook_messages(levels: int = 200, deltas: int = 500, seed: int = 7) -> Dict[str, Any]:
+    """Snapshot стакана на levels уровней и поток delta (обновления и удаления уровней)"""
+    rng = np.random.default_rng(seed)
+    mid = 40000.0
+    tick = 0.5
+
+    bids = [[f"{mid - tick * (i + 1):.1f}", f"{rng.uniform(0.1, 5):.3f}"] for i in range(levels)]
+    asks = [[f"{mid + tick * (i + 1):.1f}", f"{rng.uniform(0.1, 5):.3f}"] for i in range(levels)]
+    snapshot = {"topic": "orderbook.200.BTCUSDT", "type": "snapshot", "data": {"b": bids, "a": asks, "u": 1}}
+
+    messages: List[Dict[str, Any]] = []
+    for u in range(2, deltas + 2):
+        updates = {}
+        for side in ("b", "a"):
+            sign = -1 if side == "b" else 1
+            offsets = rng.integers(1, levels + 20, size=5)
+            updates[side] = [
+                [f"{mid + sign * tick * int(o):.1f}", "0" if rng.random() < 0.2 else f"{rng.uniform(0.1, 5):.3f}"]
+                for o in offsets
+            ]
+        messages.append({"topic": "orderbook.200.BTCUSDT", "type": "delta", "data": {**updates, "u": u}})
+
+    return {"snapshot": snapshot, "deltas": messages}
@@ -0,0 +1,204 @@
+"""
+Минимальный harness для бенчмарков горячих путей (asv-style, без зависимостей).
+
+Бенчмарк - фабрика: готовит данные (не замеряется) и возвращает
+callable без аргументов, который замеряется rounds раз:
+
+    @benchmark("features.build_features")
+    def bench_build_features():
+        pipeline = FeaturePipeline()
+        df = candles(1000)
+        return lambda: pipeline.build_features(df.copy())
+
+Результаты сравниваются с baseline JSON по медиане. Чтобы baseline с
+другой машины был сопоставим, времена нормируются на калибровочный
+прогон (чистый Python + numpy), снятый в том же запуске.
+"""
+
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class Benchmark:
+    name: str
+    factory: Callable[[], Callable[[], object]]
+    rounds: int = 5
+    warmup: int = 1
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    median_s: float
+    min_s: float
+    max_s: float
+    stdev_s: float
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline_s: Optional[float]
+    current_s: Optional[float]
+    ratio: Optional[float]
+    status: str  # ok / regression / improved / new / missing
+
+
+_REGISTRY: Dict[str, Benchmark] = {}
+
+
+def register(name: str, factory: Callable, rounds: int = 5, warmup: int = 1) -> None:
+    """Зарегистрировать бенчмарк (для регистрации в цикле)"""
+    if name in _REGISTRY:
+        raise ValueError(f"Benchmark {name} already registered")
+    _REGISTRY[name] = Benchmark(name, factory, rounds, warmup)
+
+
+def benchmark(name: str, rounds: int = 5, warmup: int = 1):
+    """Декоратор регистрации бенчмарка"""
+
+    def decorator(factory):
+        register(name, factory, rounds, warmup)
+        return factory
+
+    return decorator
+
+
+def get_benchmarks(pattern: Optional[str] = None) -> List[Benchmark]:
+    return [b for name, b in sorted(_REGISTRY.items()) if not pattern or pattern in name]
+
+
+def run_benchmark(bench: Benchmark, rounds: Optional[int] = None) -> BenchmarkResult:
+    """Подготовить данные фабрикой и замерить callable rounds раз"""
+    func = bench.factory()
+    for _ in range(bench.warmup):
+        func()
+
+    timings = []
+    for _ in range(rounds or bench.rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return BenchmarkResult(
+        name=bench.name,
+        rounds=len(timings),
+        median_s=statistics.median(timings),
+        min_s=min(timings),
+        max_s=max(timings),
+        stdev_s=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    )
+
+
+def calibrate(rounds: int = 5) -> float:
+    """Медиана фиксированной нагрузки: масштаб скорости машины"""
+    data = np.random.default_rng(0).random(200_000)
+
+    def workload():
+        total = 0
+        for i in range(200_000):
+            total += i * i
+        np.sort(data)
+        return total
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        workload()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+# ==================== Baseline ====================
+
+
+def build_report(results: List[BenchmarkResult], calibration_s: float) -> Dict:
+    return {
+        "version": BASELINE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_s": calibration_s,
+        "results": {r.name: r.to_dict() for r in results},
+    }
+
+
+def save_report(report: Dict, path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_report(path: str) -> Optional[Dict]:
+    if not Path(path).exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in {path}: {report.get('version')}")
+    return report
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.25, normalize: bool = True) -> List[Comparison]:
+    """
+    Сравнить отчёт с baseline по медианам.
+
+    ratio = current / baseline (с поправкой на калибровку, если normalize);
+    ratio > 1 + threshold - регрессия, ratio < 1 - threshold - ускорение.
+    """
+    scale = 1.0
+    if normalize and current.get("calibration_s") and baseline.get("calibration_s"):
+        scale = baseline["calibration_s"] / current["calibration_s"]
+
+    current_results = current.get("results", {})
+    baseline_results = baseline.get("results", {})
+    comparisons = []
+
+    for name in sorted(set(current_results) | set(baseline_results)):
+        cur = current_results.get(name)
+        base = baseline_results.get(name)
+        if base is None:
+            comparisons.append(Comparison(name, None, cur["median_s"], None, "new"))
+            continue
+        if cur is None:
+            comparisons.append(Comparison(name, base["median_s"], None, None, "missing"))
+            continue
+
+        ratio = cur["median_s"] * scale / base["median_s"] if base["median_s"] > 0 else 1.0
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        comparisons.append(Comparison(name, base["median_s"], cur["median_s"], ratio, status))
+
+    return comparisons
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    def ms(value: Optional[float]) -> str:
+        return f"{value * 1000:10.2f}" if value is not None else f"{'-':>10}"
+
+    width = max([len(c.name) for c in comparisons] + [9])
+    lines = [f"{'benchmark':<{width}}  {'base ms':>10}  {'cur ms':>10}  {'ratio':>6}  status"]
+    for c in comparisons:
+        ratio = f"{c.ratio:6.2f}" if c.ratio is not None else f"{'-':>6}"
+        lines.append(f"{c.name:<{width}}  {ms(c.baseline_s)}  {ms(c.current_s)}  {ratio}  {c.status}")
+    return "\n".join(lines)
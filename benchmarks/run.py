@@ -0,0 +1,102 @@
+"""
+Запуск бенчмарков и сравнение с baseline.
+
+    python -m benchmarks.run                     # сравнить с benchmarks/baseline.json
+    python -m benchmarks.run --save              # перезаписать baseline
+    python -m benchmarks.run -k indicators       # только совпадающие по имени
+    python -m benchmarks.run --threshold 0.5     # допуск замедления 50%
+
+Код выхода 1, если хотя бы один бенчмарк медленнее baseline больше threshold.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from benchmarks import harness
+
+DEFAULT_BASELINE = str(Path(__file__).parent / "baseline.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Hot path benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON")
+    parser.add_argument("--save", action="store_true", help="Save results as the new baseline")
+    parser.add_argument("--output", help="Also write current results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown (0.25 = +25%%)")
+    parser.add_argument("--rounds", type=int, help="Override rounds per benchmark")
+    parser.add_argument("-k", dest="pattern", help="Run benchmarks whose name contains this substring")
+    parser.add_argument("--no-normalize", action="store_true", help="Compare raw timings without calibration")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # Логи (INFO и WARNING фильтров стратегий) в горячих циклах искажают замеры
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.WARNING)
+    try:
+        return run(args)
+    finally:
+        logging.disable(previous_disable)
+
+
+def run(args) -> int:
+    import benchmarks.bench_hot_paths  # noqa: F401 - регистрация бенчмарков
+
+    benches = harness.get_benchmarks(args.pattern)
+    if not benches:
+        print(f"No benchmarks match {args.pattern!r}")
+        return 1
+
+    calibration_s = harness.calibrate()
+    results = []
+    for bench in benches:
+        result = harness.run_benchmark(bench, rounds=args.rounds)
+        print(f"{bench.name:<45} {result.median_s * 1000:10.2f} ms  (min {result.min_s * 1000:.2f})")
+        results.append(result)
+
+    report = harness.build_report(results, calibration_s)
+    if args.output:
+        harness.save_report(report, args.output)
+
+    if args.save:
+        if args.pattern:
+            # Частичный прогон обновляет только свои записи baseline, приведённые
+            # к калибровке baseline (остальные записи замерены относительно неё)
+            baseline = harness.load_report(args.baseline) or report
+            scale = baseline["calibration_s"] / calibration_s
+            for name, result in report["results"].items():
+                baseline["results"][name] = {
+                    key: value * scale if key.endswith("_s") else value for key, value in result.items()
+                }
+            report = baseline
+        harness.save_report(report, args.baseline)
+        print(f"\nBaseline saved: {args.baseline}")
+        return 0
+
+    baseline = harness.load_report(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save to create one")
+        return 0
+
+    if args.pattern:
+        baseline = dict(baseline, results={
+            name: r for name, r in baseline["results"].items() if args.pattern in name
+        })
+
+    comparisons = harness.compare(report, baseline, args.threshold, normalize=not args.no_normalize)
+    print()
+    print(harness.format_comparisons(comparisons))
+
+    regressions = [c for c in comparisons if c.status == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,11 +16,18 @@ Flow:
    b. Создаёт TradingBot с этими стратегиями
    c. Запускает TradingBot в отдельном потоке
 3. Все TradingBot работают параллельно, с собственными стратегиями
+4. Рыночные данные и признаки всех символов считает один
+   SharedMarketDataService (shared_market_data=True), боты читают свой срез
+
+execution_mode="processes": символы делятся на num_shards процессов
+(bot.shard_supervisor), внутри процесса - тот же потоковый режим. Kill switch,
+лимиты риска и запись в БД общие для всех шардов, упавший шард перезапускается.
 """
 
+import os
 import threading
 import time
-from typing import List, Dict, Optional, Any, Callable
+from typing import List, Dict, Optional, Any, Callable, Set
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
@@ -28,6 +35,10 @@ import json
 from logger import setup_logger
 from bot.trading_bot import TradingBot
 from bot.strategy_factory import StrategyFactory
+from bot.shard_supervisor import ShardSpec, ShardSupervisor, partition_symbols
+from data.market_data_service import SharedMarketDataService
+from data.timeframe_cache import MTF_INTERVALS
+from storage.database import Database
 
 logger = setup_logger(__name__)
 
@@ -42,6 +53,11 @@ class MultiSymbolConfig:
     max_concurrent: int = 5  # Максимум одновременных ботов
     check_interval: int = 30  # Интервал проверки здоровья в секундах
     stop_on_error: bool = False  # Остановить все если один упал
+    shared_market_data: bool = True  # Один проход REST + признаков на все символы
+    execution_mode: str = "threads"  # "threads" или "processes" (шарды по процессам)
+    num_shards: Optional[int] = None  # None - min(cpu_count, len(symbols))
+    max_restarts: int = 3  # Перезапусков упавшего шарда
+    shard_start_method: str = "spawn"  # multiprocessing start method шардов
 
 
 class MultiSymbolBot:
@@ -65,10 +81,13 @@ class MultiSymbolBot:
         self.is_running = False
         self.errors: Dict[str, list] = {symbol: [] for symbol in config.symbols}
         self.stats: Dict[str, dict] = {symbol: {} for symbol in config.symbols}
+        self.market_data_service: Optional[SharedMarketDataService] = None
+        self.db: Optional[Database] = None  # Передаётся ботам (в шарде - ShardDatabase)
+        self.supervisor: Optional[ShardSupervisor] = None
         
         logger.info(f"MultiSymbolBot initialized for symbols: {config.symbols}")
         logger.info(f"  Mode: {config.mode}, Testnet: {config.testnet}")
-        logger.info(f"  Max concurrent: {config.max_concurrent}")
+        logger.info(f"  Max concurrent: {config.max_concurrent}, Execution: {config.execution_mode}")
     
     def initialize(self) -> bool:
         """
@@ -83,6 +102,9 @@ class MultiSymbolBot:
         logger.info("Initializing MultiSymbolBot")
         logger.info("=" * 70)
         
+        if self.config.execution_mode == "processes":
+            return self._initialize_shards()
+        
         try:
             for symbol in self.config.symbols:
                 logger.info(f"\n[{symbol}] Creating strategies (per-symbol)...")
@@ -97,17 +119,22 @@ class MultiSymbolBot:
                 
                 # Создаём TradingBot для этого символа
                 logger.info(f"[{symbol}] Creating TradingBot...")
+                extra = {"db": self.db} if self.db is not None else {}
                 bot = TradingBot(
                     mode=self.config.mode,
                     strategies=strategies,  # ВАЖНОЕ: new instances!
                     symbol=symbol,
                     testnet=self.config.testnet,
                     config=self.config_manager,
+                    **extra,
                 )
                 
                 self.bots[symbol] = bot
                 logger.info(f"[{symbol}] TradingBot initialized (strategies={len(strategies)})")
             
+            if self.config.shared_market_data and self.bots:
+                self._attach_market_data_service()
+            
             logger.info("\n" + "=" * 70)
             logger.info(f"✓ All {len(self.bots)} TradingBot instances initialized")
             logger.info("=" * 70)
@@ -118,6 +145,70 @@ class MultiSymbolBot:
             logger.error(f"Failed to initialize MultiSymbolBot: {e}", exc_info=True)
             return False
     
+    def _initialize_shards(self) -> bool:
+        """Разбить символы по шардам; боты создаются в процессах шардов при start()"""
+        num_shards = self.config.num_shards or min(os.cpu_count() or 1, len(self.config.symbols))
+        specs = [
+            ShardSpec(
+                shard_id=shard_id,
+                symbols=symbols,
+                mode=self.config.mode,
+                testnet=self.config.testnet,
+                shared_market_data=self.config.shared_market_data,
+                strategy_builder=self.strategy_builder,
+                config_manager=self.config_manager,
+            )
+            for shard_id, symbols in enumerate(partition_symbols(self.config.symbols, num_shards))
+        ]
+        try:
+            self.supervisor = ShardSupervisor(
+                specs,
+                db=self.db,
+                max_restarts=self.config.max_restarts,
+                start_method=self.config.shard_start_method,
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize shards: {e}", exc_info=True)
+            return False
+        
+        for spec in specs:
+            logger.info(f"[shard {spec.shard_id}] Symbols: {spec.symbols}")
+        logger.info(f"✓ {len(specs)} shards prepared for {len(self.config.symbols)} symbols")
+        return True
+    
+    def _attach_market_data_service(self) -> None:
+        """Общий сервис данных/признаков; при ошибке боты работают со своими REST вызовами"""
+        first = next(iter(self.bots.values()))
+        meta_layer = first.meta_layer
+        try:
+            service = SharedMarketDataService(
+                first.market_client,
+                list(self.bots),
+                config=first.config,
+                testnet=self.config.testnet,
+                required_features=self._required_features,
+                mtf_intervals=MTF_INTERVALS if meta_layer.use_mtf and meta_layer.timeframe_cache else (),
+            )
+        except Exception as e:
+            logger.warning(f"Shared market data disabled: {e}")
+            return
+
+        self.market_data_service = service
+        for bot in self.bots.values():
+            bot.market_data_service = service
+        logger.info(f"Shared market data service attached to {len(self.bots)} bots")
+
+    def _required_features(self) -> Optional[Set[str]]:
+        """Объединение требований MetaLayer всех ботов (None - хотя бы одному нужны все признаки)"""
+        required: Set[str] = set()
+        for bot in self.bots.values():
+            meta_layer = bot.meta_layer
+            bot_required = meta_layer.required_features() if meta_layer.feature_pipeline is not None else None
+            if bot_required is None:
+                return None
+            required |= bot_required
+        return required
+    
     def start(self) -> bool:
         """
         Запустить все TradingBot в отдельных потоках.
@@ -125,7 +216,7 @@ class MultiSymbolBot:
         Returns:
             True если все запустились, False если ошибка
         """
-        if not self.bots:
+        if not self.bots and not self.supervisor:
             logger.error("No bots initialized. Call initialize() first")
             return False
         
@@ -133,6 +224,9 @@ class MultiSymbolBot:
             logger.warning("MultiSymbolBot is already running")
             return False
         
+        if self.supervisor:
+            return self._start_shards()
+        
         logger.info("=" * 70)
         logger.info("Starting MultiSymbolBot threads")
         logger.info("=" * 70)
@@ -183,6 +277,24 @@ class MultiSymbolBot:
             self.is_running = False
             return False
     
+    def _start_shards(self) -> bool:
+        """Запустить процессы шардов и монитор здоровья"""
+        try:
+            self.supervisor.start()
+        except Exception as e:
+            logger.error(f"Failed to start shards: {e}", exc_info=True)
+            return False
+        
+        self.is_running = True
+        monitor_thread = threading.Thread(
+            target=self._monitor_health,
+            name="MultiSymbolHealthMonitor",
+            daemon=True,
+        )
+        monitor_thread.start()
+        logger.info(f"✓ {len(self.supervisor.shards)} shard processes started")
+        return True
+    
     def _run_bot_thread(self, symbol: str, bot: TradingBot):
         """
         Запускает TradingBot в потоке, обрабатывает ошибки.
@@ -218,6 +330,10 @@ class MultiSymbolBot:
             logger.info("Health Check")
             logger.info("=" * 70)
             
+            if self.supervisor:
+                self._check_shards()
+                continue
+            
             for symbol in self.config.symbols:
                 thread = self.threads.get(symbol)
                 bot = self.bots.get(symbol)
@@ -234,6 +350,26 @@ class MultiSymbolBot:
         
         logger.info("Health monitor thread finished")
     
+    def _check_shards(self):
+        """Health check шардов: перезапуск упавших, статусы символов из отчётов шардов"""
+        supervisor = self.supervisor
+        supervisor.poll()
+        
+        for shard_id, shard in supervisor.shard_report().items():
+            status = "🟢 ALIVE" if shard["is_alive"] else "🔴 DEAD"
+            logger.info(f"[shard {shard_id}] {status} | pid={shard['pid']} | Restarts: {shard['restarts']}")
+        
+        for symbol, symbol_report in supervisor.symbol_reports().items():
+            status = "🟢 ALIVE" if symbol_report["is_running"] else "🔴 DEAD"
+            logger.info(f"[{symbol}] {status} | Errors: {symbol_report['error_count']}")
+        
+        if supervisor.shared.kill_switch_active():
+            logger.critical(f"Global kill switch active: {supervisor.shared.kill_reason}")
+            self.stop()
+        elif not supervisor.alive_shards():
+            logger.error("All shards finished")
+            self.stop()
+    
     def stop(self):
         """Остановить все ботов"""
         if not self.is_running:
@@ -243,6 +379,9 @@ class MultiSymbolBot:
         logger.info("Stopping MultiSymbolBot")
         logger.info("=" * 70)
         
+        if self.supervisor:
+            self.supervisor.stop()
+        
         # Останавливаем каждый бот
         for symbol, bot in self.bots.items():
             logger.info(f"[{symbol}] Stopping bot...")
@@ -259,6 +398,9 @@ class MultiSymbolBot:
             if thread.is_alive():
                 logger.warning(f"[{symbol}] Thread did not terminate within timeout")
         
+        if self.market_data_service:
+            self.market_data_service.close()
+        
         self.is_running = False
         logger.info("\n" + "=" * 70)
         logger.info("MultiSymbolBot stopped")
@@ -292,6 +434,12 @@ class MultiSymbolBot:
             
             report["symbols"][symbol] = symbol_report
         
+        if self.supervisor:
+            self.supervisor.drain_status()
+            report["symbols"] = self.supervisor.symbol_reports()
+            report["shards"] = self.supervisor.shard_report()
+            report["risk"] = self.supervisor.shared.snapshot()
+        
         return report
 
 
@@ -0,0 +1,245 @@
+"""
+Планировщик главного цикла TradingBot.
+
+Вместо фиксированных пауз (10с между итерациями, 5с на том же баре, 60с
+под circuit breaker, 30с в cooldown) цикл спит до ближайшего события:
+- закрытие бара по времени биржи: BarClock считает границы баров от
+  локальных часов со смещением BybitRestClient._sync_server_time;
+- срок периодической задачи мониторинга (SL/TP, сверка позиции, метрики),
+  у каждой свой интервал;
+- wake(event) из потока WS: задачи, подписанные на событие, выполняются
+  сразу, не дожидаясь своего интервала.
+
+    scheduler = LoopScheduler(BarClock(interval_ms("60"), offset_ms=lambda: client.time_offset_ms))
+    scheduler.add_bar_task("signal", evaluate)   # evaluate() -> False: бар ещё не отдан биржей
+    scheduler.add_task("positions", 10, check_levels, wake_on=("position",))
+    scheduler.run(lambda: bot.is_running)
+
+Задача бара запускается через bar_grace секунд после границы и повторяется
+каждые bar_retry секунд, пока не вернёт True (биржа отдаёт новую свечу с
+небольшой задержкой). Задержка от закрытия бара до сигнала пишется в
+гистограмму bar_close_to_signal_seconds (record_signal_latency).
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from data.candle_buffer import DAY_MS, MINUTE_MS, interval_ms
+from logger import setup_logger
+from utils import metrics
+
+logger = setup_logger(__name__)
+
+
+SIGNAL_LATENCY_SECONDS = metrics.histogram(
+    "bar_close_to_signal_seconds",
+    "Задержка от закрытия бара (время биржи) до сигнала MetaLayer",
+    ("symbol",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0),
+)
+
+# Недельные свечи Bybit открываются в понедельник 00:00 UTC (1970-01-05)
+WEEK_ANCHOR_MS = 4 * DAY_MS
+
+
+class BarClock:
+    """Границы баров по времени биржи (локальное время + смещение сервера)"""
+
+    def __init__(
+        self,
+        bar_ms: int,
+        offset_ms: Union[int, Callable[[], int]] = 0,
+        time_fn: Callable[[], float] = time.time,
+        anchor_ms: int = 0,
+    ):
+        """
+        Args:
+            bar_ms: Длительность бара (interval_ms)
+            offset_ms: Смещение server - local в мс или функция, читающая
+                актуальное смещение после пересинхронизации
+            time_fn: Источник локального времени (секунды)
+            anchor_ms: Начало отсчёта баров (WEEK_ANCHOR_MS для недельных)
+        """
+        self.bar_ms = bar_ms
+        self._offset = offset_ms
+        self._time = time_fn
+        self.anchor_ms = anchor_ms
+
+    @classmethod
+    def for_interval(cls, kline_interval: str, **kwargs) -> "BarClock":
+        anchor = WEEK_ANCHOR_MS if str(kline_interval) == "W" else 0
+        return cls(interval_ms(kline_interval), anchor_ms=anchor, **kwargs)
+
+    @property
+    def offset_ms(self) -> int:
+        return int(self._offset() if callable(self._offset) else self._offset)
+
+    def now_ms(self) -> int:
+        """Текущее время биржи"""
+        return int(self._time() * 1000) + self.offset_ms
+
+    def bar_open_ms(self, now_ms: Optional[int] = None) -> int:
+        """Открытие текущего (формирующегося) бара"""
+        now_ms = self.now_ms() if now_ms is None else now_ms
+        return now_ms - (now_ms - self.anchor_ms) % self.bar_ms
+
+    def next_close_ms(self, now_ms: Optional[int] = None) -> int:
+        """Закрытие текущего бара (открытие следующего)"""
+        return self.bar_open_ms(now_ms) + self.bar_ms
+
+
+@dataclass
+class ScheduledTask:
+    """Задача планировщика: периодическая (interval) или по закрытию бара (interval=None)"""
+
+    name: str
+    fn: Callable[[], Any]
+    interval: Optional[float]
+    wake_on: Tuple[str, ...] = ()
+    due: float = 0.0  # monotonic время следующего запуска
+    runs: int = 0
+
+
+class LoopScheduler:
+    """Однопоточный цикл задач бота с пробуждением по событиям"""
+
+    def __init__(
+        self,
+        clock: BarClock,
+        bar_grace: float = 0.5,
+        bar_retry: float = 1.0,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            clock: Часы баров биржи
+            bar_grace: Пауза после закрытия бара перед оценкой (секунды)
+            bar_retry: Повтор задачи бара, пока биржа не отдала новую свечу
+            monotonic: Источник монотонного времени
+        """
+        self.clock = clock
+        self.bar_grace = bar_grace
+        self.bar_retry = bar_retry
+        self._monotonic = monotonic
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self._wake = threading.Event()
+        self._events_lock = threading.Lock()
+        self._events: Set[str] = set()
+        # Закрытие бара, который сейчас оценивает задача бара (None - стартовая оценка)
+        self.bar_close_ms: Optional[int] = None
+        self._bar_boundary: Optional[int] = None
+        self._startup = False
+        self.last_signal_latency: Optional[float] = None
+
+    def add_task(
+        self,
+        name: str,
+        interval: float,
+        fn: Callable[[], Any],
+        wake_on: Iterable[str] = (),
+        run_immediately: bool = True,
+    ) -> ScheduledTask:
+        """Периодическая задача: каждые interval секунд и по событиям wake_on"""
+        now = self._monotonic()
+        task = ScheduledTask(name, fn, float(interval), tuple(wake_on), now if run_immediately else now + interval)
+        self.tasks[name] = task
+        return task
+
+    def add_bar_task(self, name: str, fn: Callable[[], Any], wake_on: Iterable[str] = ()) -> ScheduledTask:
+        """
+        Задача по закрытию бара. Первый запуск - сразу (оценка на старте).
+        fn() возвращает False, если нужно повторить через bar_retry секунд.
+        """
+        task = ScheduledTask(name, fn, None, tuple(wake_on), self._monotonic())
+        self.tasks[name] = task
+        self._bar_boundary = self.clock.bar_open_ms()
+        self._startup = True
+        return task
+
+    def wake(self, event: str = "wake") -> None:
+        """Разбудить цикл (потокобезопасно); задачи с event в wake_on выполнятся сразу"""
+        with self._events_lock:
+            self._events.add(event)
+        self._wake.set()
+
+    def _take_events(self) -> Set[str]:
+        with self._events_lock:
+            events, self._events = self._events, set()
+        return events
+
+    def _seconds_to_boundary(self, boundary_ms: int) -> float:
+        return (boundary_ms - self.clock.now_ms()) / 1000.0 + self.bar_grace
+
+    def _schedule_next_bar(self, task: ScheduledTask, now: float) -> None:
+        self._bar_boundary = self.clock.next_close_ms()
+        task.due = now + max(0.0, self._seconds_to_boundary(self._bar_boundary))
+
+    def run_pending(self) -> List[str]:
+        """
+        Выполнить задачи, срок которых наступил или чьё событие пришло.
+
+        Returns:
+            Имена выполненных задач
+        """
+        events = self._take_events()
+        executed = []
+
+        for task in list(self.tasks.values()):
+            now = self._monotonic()
+            woken = bool(events.intersection(task.wake_on))
+            if now < task.due and not woken:
+                continue
+
+            if task.interval is not None:
+                task.fn()
+                task.runs += 1
+                task.due = self._monotonic() + task.interval
+                executed.append(task.name)
+                continue
+
+            self.bar_close_ms = None if self._startup else self._bar_boundary
+            done = task.fn()
+            task.runs += 1
+            executed.append(task.name)
+            now = self._monotonic()
+            if done is False and self.clock.next_close_ms() - self._bar_boundary <= self.clock.bar_ms:
+                # Тот же бар: биржа ещё не отдала новую свечу или данные не получены
+                task.due = now + self.bar_retry
+            else:
+                self._startup = False
+                self._schedule_next_bar(task, now)
+
+        return executed
+
+    def next_wait(self) -> float:
+        """Секунды до ближайшей задачи"""
+        if not self.tasks:
+            return 1.0
+        return max(0.0, min(task.due for task in self.tasks.values()) - self._monotonic())
+
+    def run(self, is_running: Callable[[], bool]) -> None:
+        """Цикл до is_running() == False; stop() бота будит цикл через wake()"""
+        while is_running():
+            # Сброс до run_pending: wake() во время задач не теряется
+            self._wake.clear()
+            self.run_pending()
+            if not is_running():
+                break
+            self._wake.wait(self.next_wait())
+
+    def record_signal_latency(self, symbol: str) -> Optional[float]:
+        """
+        Задержка от закрытия оцениваемого бара до текущего момента (время
+        биржи) в гистограмму bar_close_to_signal_seconds.
+
+        Returns:
+            Секунды или None для стартовой оценки (бар закрылся до запуска)
+        """
+        if self.bar_close_ms is None:
+            return None
+        latency = max(0.0, (self.clock.now_ms() - self.bar_close_ms) / 1000.0)
+        SIGNAL_LATENCY_SECONDS.observe(latency, symbol=symbol)
+        self.last_signal_latency = latency
+        return latency
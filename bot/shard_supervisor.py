@@ -0,0 +1,690 @@
+"""
+Шардированный режим MultiSymbolBot: символы делятся между процессами.
+
+Расчёт признаков и сигналов - CPU-bound pandas/Python; в потоках он
+упирается в GIL, и 20 символов на 8 ядрах используют около одного ядра.
+В режиме execution_mode="processes" MultiSymbolBot делит символы на
+num_shards групп (round-robin), каждая группа работает в своём процессе
+как обычный MultiSymbolBot в потоковом режиме.
+
+Общее состояние шардов создаёт супервизор и передаёт процессам при старте:
+- SharedRiskState: флаг kill switch, дневной PnL, сделки за день, открытые
+  позиции по шардам, реализованный PnL по символам и пик equity в shared
+  memory (multiprocessing.Value/Array)
+- share_risk_state() подменяет в каждом боте KillSwitch, RiskLimits и в live
+  режиме KillSwitchManager и AdvancedRiskLimits (risk monitor) на общие:
+  аварийное закрытие в одном шарде останавливает и закрывает символы
+  остальных, дневной убыток и просадка считаются по всему аккаунту
+- DatabaseWriter: единственный писатель SQLite в процессе супервизора;
+  ShardDatabase шарда отправляет save_*/update_* в его очередь, а читает
+  своим соединением (WAL)
+- очередь статусов: шард раз в report_interval публикует get_report()
+  по своим символам, MultiSymbolBot агрегирует их
+
+    supervisor = ShardSupervisor(specs, max_restarts=3)
+    supervisor.start()
+    supervisor.poll()            # статусы шардов + перезапуск упавших
+    supervisor.symbol_reports()
+    supervisor.stop()
+
+Упавший шард (ненулевой exitcode) перезапускается до max_restarts раз, пока
+не активирован общий kill switch. При start_method="spawn" (по умолчанию)
+strategy_builder и config_manager передаются в шард через pickle, поэтому
+builder должен быть функцией уровня модуля, а не замыканием.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from logger import setup_logger
+from risk.kill_switch import KillSwitch
+from risk.limits import RiskLimits
+from storage.database import Database
+
+logger = setup_logger(__name__)
+
+
+# Методы Database, которые пишут в БД и выполняются писателем супервизора
+WRITE_METHODS = tuple(sorted(name for name in vars(Database) if name.startswith(("save_", "update_"))))
+
+
+def partition_symbols(symbols: List[str], num_shards: int) -> List[List[str]]:
+    """Round-robin разбиение символов на непустые шарды"""
+    num_shards = max(1, min(num_shards, len(symbols)))
+    return [list(symbols[i::num_shards]) for i in range(num_shards)]
+
+
+class SharedRiskState:
+    """Глобальные счётчики риска и флаг kill switch в shared memory"""
+
+    REASON_SIZE = 256
+
+    def __init__(self, num_shards: int, ctx: Optional[Any] = None, symbols: Sequence[str] = ()):
+        ctx = ctx or mp.get_context("spawn")
+        self.symbols = list(symbols)
+        self.lock = ctx.Lock()
+        self.kill_flag = ctx.Value("b", 0, lock=False)
+        self.kill_reason_buffer = ctx.Array("c", self.REASON_SIZE, lock=False)
+        self.daily_pnl = ctx.Value("d", 0.0, lock=False)
+        self.trades_today = ctx.Value("i", 0, lock=False)
+        self.positions = ctx.Array("i", num_shards, lock=False)
+        # Дневной реализованный PnL по символам (risk monitor бота) и пик equity аккаунта
+        self.realized_pnl = ctx.Array("d", max(1, len(self.symbols)), lock=False)
+        self.peak_equity = ctx.Value("d", 0.0, lock=False)
+
+    def activate_kill_switch(self, reason: str) -> None:
+        with self.lock:
+            self.kill_reason_buffer.value = reason.encode("utf-8", "replace")[: self.REASON_SIZE - 1]
+            self.kill_flag.value = 1
+
+    def reset_kill_switch(self) -> None:
+        with self.lock:
+            self.kill_flag.value = 0
+            self.kill_reason_buffer.value = b""
+
+    def kill_switch_active(self) -> bool:
+        return bool(self.kill_flag.value)
+
+    @property
+    def kill_reason(self) -> str:
+        return self.kill_reason_buffer.value.decode("utf-8", "replace")
+
+    def add_pnl(self, pnl: float) -> float:
+        with self.lock:
+            self.daily_pnl.value += pnl
+            return self.daily_pnl.value
+
+    def add_trade(self) -> int:
+        with self.lock:
+            self.trades_today.value += 1
+            return self.trades_today.value
+
+    def reset_daily(self) -> None:
+        with self.lock:
+            self.daily_pnl.value = 0.0
+            self.trades_today.value = 0
+            for i in range(len(self.realized_pnl)):
+                self.realized_pnl[i] = 0.0
+
+    def set_realized_pnl(self, symbol: str, pnl: float) -> float:
+        """Записать дневной реализованный PnL символа, вернуть сумму по всем символам"""
+        with self.lock:
+            if symbol not in self.symbols:
+                return sum(self.realized_pnl) + pnl
+            self.realized_pnl[self.symbols.index(symbol)] = pnl
+            return sum(self.realized_pnl)
+
+    def update_peak_equity(self, equity: float) -> float:
+        with self.lock:
+            if equity > self.peak_equity.value:
+                self.peak_equity.value = equity
+            return self.peak_equity.value
+
+    def set_positions(self, shard_id: int, count: int) -> None:
+        with self.lock:
+            self.positions[shard_id] = count
+
+    def open_positions(self) -> int:
+        with self.lock:
+            return sum(self.positions)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "kill_switch_active": bool(self.kill_flag.value),
+                "kill_reason": self.kill_reason_buffer.value.decode("utf-8", "replace"),
+                "daily_pnl": self.daily_pnl.value,
+                "trades_today": self.trades_today.value,
+                "open_positions": sum(self.positions),
+                "realized_pnl_today": sum(self.realized_pnl),
+                "peak_equity": self.peak_equity.value,
+            }
+
+
+class SharedKillSwitch(KillSwitch):
+    """KillSwitch шарда: активация в одном шарде видна всем через SharedRiskState"""
+
+    def __init__(self, db: Database, shared: SharedRiskState, **kwargs):
+        super().__init__(db, **kwargs)
+        self.shared = shared
+
+    def activate(self, reason: str):
+        self.shared.activate_kill_switch(reason)
+        super().activate(reason)
+
+    def check_status(self) -> bool:
+        if self.shared.kill_switch_active():
+            self.is_activated = True
+            return True
+        return super().check_status()
+
+    def reset(self, confirmation: str):
+        if not super().reset(confirmation):
+            return False
+        self.shared.reset_kill_switch()
+        return True
+
+
+class SharedKillSwitchManager:
+    """
+    KillSwitchManager бота (live) поверх SharedRiskState: активация публикует
+    общий флаг, can_trade() учитывает его, sync() закрывает символы шарда,
+    если kill switch активировал другой шард. Остальное - у обёрнутого менеджера.
+    """
+
+    def __init__(self, manager: Any, shared: SharedRiskState):
+        self.manager = manager
+        self.shared = shared
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.manager, name)
+
+    def activate(self, reason: str = "Manual activation", **kwargs) -> Dict:
+        if not self.shared.kill_switch_active():
+            self.shared.activate_kill_switch(reason)
+        return self.manager.activate(reason, **kwargs)
+
+    def can_trade(self) -> bool:
+        return not self.shared.kill_switch_active() and self.manager.can_trade()
+
+    def sync(self) -> Optional[Dict]:
+        """Отменить ордера и закрыть позиции шарда после глобальной активации"""
+        if self.shared.kill_switch_active() and not self.manager.is_halted:
+            return self.manager.activate(f"Global kill switch: {self.shared.kill_reason}")
+        return None
+
+    def reset(self) -> None:
+        self.shared.reset_kill_switch()
+        self.manager.reset()
+
+
+class SharedAdvancedRiskLimits:
+    """
+    AdvancedRiskLimits бота (live) поверх SharedRiskState: дневной убыток
+    проверяется по реализованному PnL всех символов, просадка - от общего
+    пика equity. Остальное - у обёрнутых лимитов.
+    """
+
+    def __init__(self, limits: Any, shared: SharedRiskState, symbol: str):
+        self.limits = limits
+        self.shared = shared
+        self.symbol = symbol
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.limits, name)
+
+    def evaluate(self, state: Dict) -> Tuple[Any, Dict]:
+        state = dict(state)
+        state["realized_pnl_today"] = self.shared.set_realized_pnl(
+            self.symbol, float(state.get("realized_pnl_today", 0))
+        )
+        if state.get("current_equity"):
+            peak = Decimal(str(self.shared.update_peak_equity(float(state["current_equity"]))))
+            if peak > self.limits.max_equity:
+                self.limits.max_equity = peak
+        return self.limits.evaluate(state)
+
+
+class SharedRiskLimits(RiskLimits):
+    """
+    RiskLimits шарда: дневной PnL, сделки за день и число открытых позиций
+    считаются по всем шардам. Экспозиция на символ остаётся локальной -
+    символ принадлежит ровно одному шарду.
+    """
+
+    def __init__(self, db: Database, shared: SharedRiskState, shard_id: int, **kwargs):
+        super().__init__(db, **kwargs)
+        self.shared = shared
+        self.shard_id = shard_id
+        self._sync()
+
+    @classmethod
+    def from_limits(cls, limits: RiskLimits, shared: SharedRiskState, shard_id: int) -> "SharedRiskLimits":
+        """Общие лимиты с параметрами существующего RiskLimits бота"""
+        return cls(
+            limits.db,
+            shared,
+            shard_id,
+            max_daily_loss_percent=limits.max_daily_loss_percent,
+            max_drawdown_percent=limits.max_drawdown_percent,
+            max_trades_per_day=limits.max_trades_per_day,
+            max_concurrent_positions=limits.max_concurrent_positions,
+            max_exposure_per_symbol_percent=limits.max_exposure_per_symbol_percent,
+        )
+
+    def _sync(self) -> None:
+        self.daily_pnl = self.shared.daily_pnl.value
+        self.trades_today = self.shared.trades_today.value
+
+    def check_limits(self, account_balance: float, proposed_trade: Dict[str, Any]) -> Dict[str, Any]:
+        self._sync()
+        result = super().check_limits(account_balance, proposed_trade)
+
+        local = len(self.current_positions)
+        total = self.shared.open_positions() - self.shared.positions[self.shard_id] + local
+        if local < self.max_concurrent_positions <= total:
+            violation = f"Max concurrent positions exceeded (all shards): {total} >= {self.max_concurrent_positions}"
+            logger.warning(f"Risk limits violated: {[violation]}")
+            result = {"allowed": False, "violations": result["violations"] + [violation]}
+
+        return result
+
+    def update_daily_stats(self, pnl: float):
+        self.daily_pnl = self.shared.add_pnl(pnl)
+        logger.debug(f"Daily PnL updated (all shards): {self.daily_pnl:.2f}")
+
+    def increment_trade_count(self):
+        self.trades_today = self.shared.add_trade()
+        logger.debug(f"Trade count (all shards): {self.trades_today}/{self.max_trades_per_day}")
+
+    def add_position(self, position: Dict[str, Any]):
+        super().add_position(position)
+        self.shared.set_positions(self.shard_id, len(self.current_positions))
+
+    def remove_position(self, symbol: str):
+        super().remove_position(symbol)
+        self.shared.set_positions(self.shard_id, len(self.current_positions))
+
+    def reset_daily_stats(self):
+        super().reset_daily_stats()
+        self.shared.reset_daily()
+
+
+class DatabaseWriter:
+    """Единственный писатель SQLite: выполняет save_*/update_* шардов по очереди"""
+
+    def __init__(self, db: Database, requests: Any, responses: Dict[int, Any]):
+        self.db = db
+        self.requests = requests
+        self.responses = responses
+        self.writes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ShardDatabaseWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                request = self.requests.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self.handle(*request)
+
+    def handle(self, shard_id: int, call_id: Any, method: str, args: tuple, kwargs: dict) -> None:
+        result, error = None, None
+        try:
+            if method not in WRITE_METHODS:
+                raise AttributeError(f"Database.{method} is not a write method")
+            result = getattr(self.db, method)(*args, **kwargs)
+            self.writes += 1
+        except Exception as e:
+            logger.error(f"[DB writer] shard {shard_id} {method} failed: {e}")
+            error = f"{type(e).__name__}: {e}"
+
+        response_queue = self.responses.get(shard_id)
+        if response_queue is not None:
+            response_queue.put((call_id, result, error))
+
+
+class ShardDatabase(Database):
+    """Database шарда: чтение своим соединением, запись через DatabaseWriter супервизора"""
+
+    def __init__(
+        self,
+        requests: Any,
+        responses: Any,
+        shard_id: int,
+        db_path: str = "storage/bot_state.db",
+        timeout: float = 30.0,
+    ):
+        super().__init__(db_path)
+        self._requests = requests
+        self._responses = responses
+        self._shard_id = shard_id
+        self._timeout = timeout
+        self._call_lock = threading.Lock()
+        self._calls = itertools.count()
+
+    def _remote_call(self, method: str, args: tuple, kwargs: dict) -> Any:
+        with self._call_lock:
+            # pid в id вызова: после перезапуска шарда старые ответы в очереди не совпадут
+            call_id = (os.getpid(), next(self._calls))
+            self._requests.put((self._shard_id, call_id, method, args, kwargs))
+            deadline = time.monotonic() + self._timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        raise queue.Empty
+                    reply_id, result, error = self._responses.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"DB writer did not answer {method} within {self._timeout}s")
+                if reply_id == call_id:
+                    break
+
+        if error:
+            raise RuntimeError(f"DB writer failed on {method}: {error}")
+        return result
+
+
+def _remote_write(name: str) -> Callable:
+    def method(self, *args, **kwargs):
+        return self._remote_call(name, args, kwargs)
+
+    method.__name__ = name
+    method.__doc__ = getattr(Database, name).__doc__
+    return method
+
+
+for _name in WRITE_METHODS:
+    setattr(ShardDatabase, _name, _remote_write(_name))
+
+
+def share_risk_state(bot: Any, shared: SharedRiskState, shard_id: int) -> None:
+    """
+    Заменить компоненты риска бота на общие для всех шардов: KillSwitch,
+    RiskLimits (позиции и PnL из private WS бота) и в live режиме
+    KillSwitchManager и AdvancedRiskLimits, в том числе внутри RiskMonitorService.
+    """
+    kill_switch = bot.kill_switch
+    bot.kill_switch = SharedKillSwitch(
+        bot.db,
+        shared,
+        max_consecutive_errors=kill_switch.max_consecutive_errors,
+        cooldown_minutes=kill_switch.cooldown_minutes,
+    )
+    bot.risk_limits = SharedRiskLimits.from_limits(bot.risk_limits, shared, shard_id)
+
+    risk_monitor = getattr(bot, "risk_monitor", None)
+    if getattr(bot, "kill_switch_manager", None) is not None:
+        bot.kill_switch_manager = SharedKillSwitchManager(bot.kill_switch_manager, shared)
+        if risk_monitor is not None:
+            risk_monitor.kill_switch_manager = bot.kill_switch_manager
+    if getattr(bot, "advanced_risk_limits", None) is not None:
+        bot.advanced_risk_limits = SharedAdvancedRiskLimits(bot.advanced_risk_limits, shared, bot.symbol)
+        if risk_monitor is not None:
+            risk_monitor.advanced_risk_limits = bot.advanced_risk_limits
+
+
+def sync_global_kill_switch(bots: Any) -> int:
+    """
+    Закрыть символы шарда после активации общего kill switch в другом шарде.
+
+    Returns:
+        Число ботов, чей KillSwitchManager выполнил аварийное закрытие
+    """
+    flattened = 0
+    for bot in bots:
+        manager = getattr(bot, "kill_switch_manager", None)
+        if isinstance(manager, SharedKillSwitchManager) and manager.sync() is not None:
+            flattened += 1
+    return flattened
+
+
+@dataclass
+class ShardSpec:
+    """Описание шарда: его символы и параметры MultiSymbolBot внутри процесса"""
+
+    shard_id: int
+    symbols: List[str]
+    mode: str = "paper"
+    testnet: bool = True
+    shared_market_data: bool = True
+    strategy_builder: Optional[Callable[[], List]] = None
+    config_manager: Optional[Any] = None
+    db_path: str = "storage/bot_state.db"
+    report_interval: float = 5.0
+
+
+@dataclass
+class ShardChannels:
+    """Очереди и общая память, которые супервизор передаёт шарду"""
+
+    shared: SharedRiskState
+    db_requests: Any
+    db_responses: Any
+    status: Any
+    stop_event: Any
+
+
+def run_shard(spec: ShardSpec, channels: ShardChannels) -> None:
+    """
+    Точка входа процесса шарда: MultiSymbolBot в потоковом режиме по символам
+    шарда с общими kill switch, лимитами и писателем БД.
+
+    Завершается с кодом 1, если все боты шарда упали без kill switch и без
+    команды остановки (супервизор перезапустит шард).
+    """
+    from bot.multi_symbol_bot import MultiSymbolBot, MultiSymbolConfig
+
+    shard = f"[shard {spec.shard_id}]"
+    logger.info(f"{shard} Starting in pid {os.getpid()} for {spec.symbols}")
+
+    orchestrator = MultiSymbolBot(
+        MultiSymbolConfig(
+            symbols=spec.symbols,
+            mode=spec.mode,
+            testnet=spec.testnet,
+            max_concurrent=len(spec.symbols),
+            shared_market_data=spec.shared_market_data,
+        ),
+        strategy_builder=spec.strategy_builder,
+        config_manager=spec.config_manager,
+    )
+    orchestrator.db = ShardDatabase(channels.db_requests, channels.db_responses, spec.shard_id, spec.db_path)
+
+    if not orchestrator.initialize():
+        raise SystemExit(1)
+    for bot in orchestrator.bots.values():
+        share_risk_state(bot, channels.shared, spec.shard_id)
+    if not orchestrator.start():
+        raise SystemExit(1)
+
+    crashed = False
+    try:
+        while not channels.stop_event.is_set():
+            channels.status.put((spec.shard_id, os.getpid(), orchestrator.get_report()))
+            if channels.shared.kill_switch_active():
+                logger.critical(f"{shard} Global kill switch active: {channels.shared.kill_reason}")
+                sync_global_kill_switch(orchestrator.bots.values())
+                break
+            if not any(thread.is_alive() for thread in orchestrator.threads.values()):
+                crashed = True
+                logger.error(f"{shard} All bot threads finished")
+                break
+            channels.stop_event.wait(spec.report_interval)
+    finally:
+        orchestrator.stop()
+        channels.status.put((spec.shard_id, os.getpid(), orchestrator.get_report()))
+
+    if crashed and not channels.shared.kill_switch_active():
+        raise SystemExit(1)
+
+
+@dataclass
+class ShardState:
+    """Состояние шарда на стороне супервизора"""
+
+    spec: ShardSpec
+    process: Optional[Any] = None
+    restarts: int = 0
+    gave_up: bool = False
+    report: Dict[str, Any] = field(default_factory=dict)
+    last_report_at: Optional[str] = None
+
+
+class ShardSupervisor:
+    """Запускает процессы шардов, собирает их статусы и перезапускает упавшие"""
+
+    def __init__(
+        self,
+        specs: List[ShardSpec],
+        db: Optional[Database] = None,
+        max_restarts: int = 3,
+        start_method: str = "spawn",
+        target: Callable[[ShardSpec, ShardChannels], None] = run_shard,
+    ):
+        self.ctx = mp.get_context(start_method)
+        self.start_method = start_method
+        self.target = target
+        self.max_restarts = max_restarts
+        self.shards: Dict[int, ShardState] = {spec.shard_id: ShardState(spec) for spec in specs}
+        self.shared = SharedRiskState(
+            max(self.shards, default=-1) + 1,
+            self.ctx,
+            symbols=[symbol for spec in specs for symbol in spec.symbols],
+        )
+        self.stop_event = self.ctx.Event()
+        self.status_queue = self.ctx.Queue()
+        self.db_requests = self.ctx.Queue()
+        self.db_responses = {shard_id: self.ctx.Queue() for shard_id in self.shards}
+        self.db = db
+        self.writer: Optional[DatabaseWriter] = None
+        self.is_running = False
+
+    def _channels(self, shard_id: int) -> ShardChannels:
+        return ShardChannels(
+            shared=self.shared,
+            db_requests=self.db_requests,
+            db_responses=self.db_responses[shard_id],
+            status=self.status_queue,
+            stop_event=self.stop_event,
+        )
+
+    def start(self) -> None:
+        if self.start_method != "fork":
+            for state in self.shards.values():
+                try:
+                    pickle.dumps(state.spec)
+                except Exception as e:
+                    raise ValueError(
+                        f"Shard {state.spec.shard_id} spec is not picklable for '{self.start_method}' start "
+                        f"(strategy_builder must be a module-level function): {e}"
+                    ) from e
+
+        self.writer = DatabaseWriter(self.db or Database(), self.db_requests, self.db_responses)
+        self.writer.start()
+        self.stop_event.clear()
+        for shard_id in self.shards:
+            self._spawn(shard_id)
+        self.is_running = True
+
+    def _spawn(self, shard_id: int) -> None:
+        state = self.shards[shard_id]
+        process = self.ctx.Process(
+            target=self.target,
+            args=(state.spec, self._channels(shard_id)),
+            name=f"TradingShard-{shard_id}",
+            daemon=False,
+        )
+        process.start()
+        state.process = process
+        logger.info(f"[shard {shard_id}] Process {process.pid} started for {state.spec.symbols}")
+
+    def drain_status(self) -> None:
+        """Забрать опубликованные шардами отчёты"""
+        while True:
+            try:
+                shard_id, pid, report = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            state = self.shards.get(shard_id)
+            if state is not None:
+                state.report = report
+                state.last_report_at = datetime.now().isoformat()
+
+    def poll(self) -> List[int]:
+        """
+        Обновить статусы и перезапустить упавшие шарды.
+
+        Returns:
+            shard_id перезапущенных шардов
+        """
+        self.drain_status()
+        restarted = []
+        if not self.is_running or self.stop_event.is_set() or self.shared.kill_switch_active():
+            return restarted
+
+        for shard_id, state in self.shards.items():
+            process = state.process
+            if process is None or process.is_alive() or process.exitcode == 0:
+                continue
+            if state.restarts >= self.max_restarts:
+                if not state.gave_up:
+                    logger.critical(f"[shard {shard_id}] Crashed (exitcode={process.exitcode}), restart limit reached")
+                    state.gave_up = True
+                continue
+            state.restarts += 1
+            logger.error(
+                f"[shard {shard_id}] Crashed (exitcode={process.exitcode}), "
+                f"restarting ({state.restarts}/{self.max_restarts})"
+            )
+            self._spawn(shard_id)
+            restarted.append(shard_id)
+        return restarted
+
+    def alive_shards(self) -> List[int]:
+        return [shard_id for shard_id, state in self.shards.items() if state.process and state.process.is_alive()]
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self.stop_event.set()
+        deadline = time.monotonic() + timeout
+        for shard_id, state in self.shards.items():
+            process = state.process
+            if process is None:
+                continue
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"[shard {shard_id}] Did not stop within timeout, terminating")
+                process.terminate()
+                process.join(timeout=5)
+        self.drain_status()
+        if self.writer:
+            self.writer.stop()
+        self.is_running = False
+
+    def shard_report(self) -> Dict[int, Dict[str, Any]]:
+        report = {}
+        for shard_id, state in self.shards.items():
+            process = state.process
+            report[shard_id] = {
+                "symbols": list(state.spec.symbols),
+                "pid": process.pid if process else None,
+                "is_alive": bool(process and process.is_alive()),
+                "exitcode": process.exitcode if process else None,
+                "restarts": state.restarts,
+                "last_report_at": state.last_report_at,
+            }
+        return report
+
+    def symbol_reports(self) -> Dict[str, Dict[str, Any]]:
+        """Последние отчёты по символам всех шардов; символ мёртвого шарда - не running"""
+        reports = {}
+        for state in self.shards.values():
+            alive = bool(state.process and state.process.is_alive())
+            published = state.report.get("symbols", {})
+            for symbol in state.spec.symbols:
+                symbol_report = dict(published.get(symbol, {"error_count": 0, "errors": []}))
+                symbol_report["is_running"] = alive and symbol_report.get("is_running", False)
+                symbol_report["shard"] = state.spec.shard_id
+                reports[symbol] = symbol_report
+        return reports
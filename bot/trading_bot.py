@@ -40,6 +40,8 @@ from exchange.instruments import InstrumentsManager, normalize_order
 
 from storage.position_state import PositionStateManager
 
+from exchange.order_events import OrderEventBus
+
 from execution.stop_loss_tp_manager import StopLossTakeProfitManager, StopLossTPConfig
 from execution.scaled_entry import ScaledEntryManager, ScaledEntryConfig
 
@@ -61,6 +63,10 @@ from execution.trade_metrics import TradeMetricsCalculator, EquityCurve
 
 from data.features import FeaturePipeline
 
+from data.feature_row import FEATURE_ROW_KEY, FeatureRow
+from data.candle_buffer import CandleRingBuffer, fetch_klines
+from data.timeframe_cache import MTF_INTERVALS, mtf_fetch_intervals
+
 from strategy.meta_layer import MetaLayer
 
 from risk import PositionSizer, RiskLimits, CircuitBreaker, KillSwitch
@@ -71,10 +77,16 @@ from risk.volatility_position_sizer import VolatilityPositionSizer, VolatilityPo
 
 from risk.risk_monitor import RiskMonitorService, RiskMonitorConfig
 
+from risk.account_ledger import AccountLedger, execution_realized_pnl
+
 from execution import OrderManager, PositionManager
 
 from utils import retry_api_call
 
+from utils.tracing import get_tracer, traced
+
+from bot.scheduler import BarClock, LoopScheduler
+
 from logger import setup_logger
 
 from signal_logger import get_signal_logger
@@ -105,6 +117,8 @@ class TradingBot:
 
         config: Optional[ConfigManager] = None,
 
+        db: Optional[Database] = None,
+
     ):
         """
 
@@ -120,6 +134,8 @@ class TradingBot:
 
             config: ConfigManager для параметров из JSON (опционально)
 
+            db: Database (опционально; шард MultiSymbolBot передаёт ShardDatabase)
+
         """
 
         self.mode = mode
@@ -140,7 +156,7 @@ class TradingBot:
 
         logger.info(f"Initializing TradingBot in {mode.upper()} mode...")
 
-        self.db = Database()
+        self.db = db if db is not None else Database()
 
         self.market_client = MarketDataClient(testnet=testnet)
 
@@ -183,7 +199,23 @@ class TradingBot:
 
         if mode == "live":
 
-            self.instruments_manager = InstrumentsManager(rest_client, category="linear")
+            self.instruments_manager = InstrumentsManager(
+
+                rest_client,
+
+                category="linear",
+
+                cache_path=self.config.get(
+
+                    "instruments.cache_path", "storage/instruments_{network}_{category}.json"
+
+                ).format(network="testnet" if testnet else "mainnet", category="linear"),
+
+                cache_ttl=float(self.config.get("instruments.cache_ttl_seconds", 3600)),
+
+                background_refresh=bool(self.config.get("instruments.background_refresh", True)),
+
+            )
 
             # Загружаем информацию об инструментах при старте
 
@@ -207,11 +239,27 @@ class TradingBot:
 
             self.position_state_manager = None
 
+        # Шина событий private WS: fills и позиции по push вместо REST поллинга.
+
+        # Сам PrivateWebSocket запускается в run() (см. _start_private_ws)
+
+        if mode == "live":
+
+            self.order_event_bus = OrderEventBus()
+
+            self.position_state_manager.attach_event_bus(self.order_event_bus)
+
+        else:
+
+            self.order_event_bus = None
+
+        self.private_ws = None
+
         # ВАЖНО: Сначала создаём OrderManager и PositionManager (до SL/TP manager)
 
         if mode == "live":
 
-            self.order_manager = OrderManager(rest_client, self.db)
+            self.order_manager = OrderManager(rest_client, self.db, event_bus=self.order_event_bus)
 
             self.position_manager = PositionManager(self.order_manager)
 
@@ -299,6 +347,7 @@ class TradingBot:
                 order_manager=self.order_manager,
                 db=self.db,
                 allowed_symbols=allowed_symbols,
+                event_bus=self.order_event_bus,
             )
 
             logger.info("Kill switch manager initialized for emergency shutdown")
@@ -331,6 +380,7 @@ class TradingBot:
                 db=self.db,
                 symbol=symbol,
                 reconcile_interval=60,  # Сверка каждые 60 секунд
+                full_snapshot_interval=self.config.get("execution.reconcile_full_snapshot_seconds", 900),
             )
             logger.info("Reconciliation service initialized")
         else:
@@ -349,6 +399,15 @@ class TradingBot:
                 max_total_notional=float(self.config.get("risk_monitor.max_total_notional", 100000.0)),
             )
             
+            # Локальное состояние аккаунта из private WS: проверки лимитов без REST
+            self.account_ledger = AccountLedger(
+                symbol=symbol,
+                checksum_interval_seconds=int(
+                    self.config.get("risk_monitor.ledger_checksum_interval_seconds", 300)
+                ),
+            )
+            self.account_ledger.attach(self.order_event_bus)
+
             self.risk_monitor = RiskMonitorService(
                 account_client=self.account_client,
                 kill_switch_manager=self.kill_switch_manager,
@@ -356,6 +415,7 @@ class TradingBot:
                 db=self.db,
                 symbol=symbol,
                 config=risk_monitor_config,
+                account_ledger=self.account_ledger,
             )
             logger.info(
                 f"[Risk Monitor] max_daily_loss={risk_monitor_config.max_daily_loss_percent}%, "
@@ -365,6 +425,7 @@ class TradingBot:
                 f"interval={risk_monitor_config.monitor_interval_seconds}s"
             )
         else:
+            self.account_ledger = None
             self.risk_monitor = None
 
         # Инициализируем обработчик сигналов для позиций (flip/add/ignore)
@@ -435,6 +496,10 @@ class TradingBot:
             regime_scorer_config=regime_scorer_config,
         )
 
+        # Граф признаков: пайплайн считает только то, что читают стратегии и фильтры MetaLayer
+        if bool(self.config.get("meta_layer.lazy_features", True)):
+            self.meta_layer.attach_feature_pipeline(self.pipeline)
+
 
         # Risk
 
@@ -475,6 +540,18 @@ class TradingBot:
 
         self.risk_limits = RiskLimits(self.db)
 
+        # Позиции и реализованный PnL символа из private WS -> self.risk_limits
+        # (лимит позиций и дневной убыток); обработчики читают текущий
+        # self.risk_limits, поэтому замена на SharedRiskLimits в шарде работает
+
+        self._risk_limits_exec_ids: set = set()
+
+        if self.order_event_bus is not None:
+
+            self.order_event_bus.subscribe_positions(self._on_position_for_limits)
+
+            self.order_event_bus.subscribe_executions(self._on_execution_for_limits)
+
         self.circuit_breaker = CircuitBreaker()
         
         # Initialize KillSwitch with config parameters
@@ -515,7 +592,13 @@ class TradingBot:
 
             self.paper_simulator = PaperTradingSimulator(paper_config)
 
-            self.equity_curve = EquityCurve()
+            # Опционально: append-only файл кривой для анализа сессии после остановки
+
+            self.equity_curve = EquityCurve(
+
+                persist_path=self.config.get("paper_trading.equity_curve_path")
+
+            )
 
             logger.info(f"[Paper Trading] initial_balance=${float(paper_config.initial_balance):.2f}, maker_fee={float(paper_config.maker_commission)*100:.03f}%")
         
@@ -523,6 +606,40 @@ class TradingBot:
         self.evaluate_on_bar_close = bool(self.config.get("execution.evaluate_on_bar_close", True))
         self._last_bar_timestamp: Optional[int] = None  # Timestamp последнего обработанного бара
 
+        # Tick-to-order latency tracing (глобальный tracer, /api/metrics/latency)
+        self.tracer = get_tracer()
+        if self.config.get("observability.latency_tracing", False):
+            self.tracer.configure(True, int(self.config.get("observability.latency_trace_buffer", 1000)))
+
+        # Запись REST ответов и WS сообщений для офлайн replay (data.market_recorder)
+        self.market_recorder = None
+        if self.config.get("observability.market_recorder_enabled", False):
+            import os
+            from data.market_recorder import MarketDataRecorder, RecordingMarketDataClient
+
+            recorder_dir = os.path.join(
+                self.config.get("observability.market_recorder_dir", "storage/recordings"),
+                f"{self.symbol}_{time.strftime('%Y%m%d_%H%M%S')}",
+            )
+            self.market_recorder = MarketDataRecorder(
+                recorder_dir,
+                max_segment_bytes=int(self.config.get("observability.market_recorder_segment_mb", 64)) * 1024 * 1024,
+            )
+            self.market_client = RecordingMarketDataClient(self.market_client, self.market_recorder)
+
+        # Общий сервис данных и признаков MultiSymbolBot (data.market_data_service)
+        self.market_data_service = None
+
+        # Свечи основного таймфрейма (data.candle_buffer), создаётся при первом запросе
+        self.candle_buffer: Optional[CandleRingBuffer] = None
+
+        # Планировщик главного цикла (bot.scheduler), создаётся в run()
+        self.scheduler: Optional[LoopScheduler] = None
+        self._scheduler_ws_subscribed = False
+        self._last_market_data: Optional[Dict[str, Any]] = None
+        self._last_market_data_at = 0.0
+        self._last_features_df: Optional[pd.DataFrame] = None
+
         logger.info("TradingBot initialized successfully")
 
     def _is_new_bar(self, df: pd.DataFrame) -> bool:
@@ -605,6 +722,10 @@ class TradingBot:
                 logger.error(f"Initial reconciliation failed: {e}", exc_info=True)
                 # Продолжаем работу даже если сверка не удалась
 
+        # Запускаем private WS для push-обновлений ордеров и позиций (для live режима)
+        if self.mode == "live":
+            self._start_private_ws()
+
         # Запускаем Risk Monitor для реал-тайм проверки лимитов (для live режима)
         if self.mode == "live" and self.risk_monitor:
             logger.info("Starting risk monitoring...")
@@ -629,495 +750,629 @@ class TradingBot:
 
         try:
 
-            while self.is_running:
+            # Оценка по закрытию бара и мониторинг со своими интервалами (bot.scheduler)
 
-                # 1. Получаем данные
+            self.scheduler = self._build_scheduler()
 
-                data = self._fetch_market_data()
+            self.scheduler.run(lambda: self.is_running)
 
-                if not data:
+        except KeyboardInterrupt:
 
-                    time.sleep(5)
+            logger.info("\n🛑 Received stop signal, shutting down...")
 
-                    continue
+            self.stop()
 
-                # 2. Строим фичи
-                
-                # Ограничиваем размер df для оптимизации (NEW)
-                df_limited = self._limit_df_for_indicators(data["df"])
-                
-                orderbook_sanity_max_deviation_pct = float(
-                    self.config.get("market_data.orderbook_sanity_max_deviation_pct", 3.0)
-                )
-                
-                # Get kline_interval for adaptive anomaly detection thresholds
-                kline_interval_minutes = int(self.config.get("market_data.kline_interval", "60"))
-                is_testnet = self.testnet
+        except Exception as e:
 
-                df_with_features = self.pipeline.build_features(
+            logger.error(f"Critical error in main loop: {e}", exc_info=True)
 
-                    df_limited, 
-                    orderbook=data.get("orderbook"),
-                    orderbook_sanity_max_deviation_pct=orderbook_sanity_max_deviation_pct,
-                    kline_interval_minutes=kline_interval_minutes,
-                    is_testnet=is_testnet
+            # Activate kill switch for emergency shutdown
 
-                )
+            if self.mode == "live" and self.kill_switch_manager:
 
-                features = data.get("orderflow_features", {})
-                
-                # TASK-001: Гарантируем наличие symbol в features
-                features["symbol"] = self.symbol
-                
-                # TASK-002: Гарантируем наличие orderflow features в features
-                # Orderflow features (spread_percent, depth_imbalance, etc.) вычисляются в build_features()
-                # и добавляются в df_with_features, но могут быть потеряны если orderbook_resp был недоступен.
-                # Извлекаем их из последней строки df для гарантии наличия.
-                import pandas as pd
-                latest_row = df_with_features.iloc[-1]
-                for key in ["spread_percent", "depth_imbalance", "liquidity_concentration", "midprice"]:
-                    if key not in features or features.get(key) is None:
-                        if key in latest_row.index and pd.notna(latest_row[key]):
-                            features[key] = float(latest_row[key])
-                        else:
-                            # Fallback значения если нет в df
-                            if key == "spread_percent":
-                                features[key] = 0.01  # Оптимистичное значение по умолчанию
-                            elif key == "depth_imbalance":
-                                features[key] = 0.0
-                            elif key == "liquidity_concentration":
-                                features[key] = 0.5
-                            elif key == "midprice":
-                                features[key] = float(latest_row.get("close", 0))
+                logger.critical("Activating emergency kill switch due to critical error!")
 
-                # 3. Проверяем circuit breaker
+                result = self.kill_switch_manager.activate(f"Critical error: {str(e)}")
 
-                if not self.circuit_breaker.is_trading_allowed():
+                if result["success"]:
 
-                    logger.warning(
+                    logger.critical(
 
-                        f"Trading halted by circuit breaker: {self.circuit_breaker.break_reason}"
+                        f"Emergency shutdown complete: {result['orders_cancelled']} orders cancelled, "
+
+                        f"{result['positions_closed']} positions closed"
 
                     )
 
-                    time.sleep(60)
+            else:
 
-                    continue
-                
-                # 3b. Check kill switch cooldown
-                if self.kill_switch.is_in_cooldown():
-                    logger.warning("⏸️  Bot in cooldown - skipping trading actions")
-                    time.sleep(30)  # Sleep and continue monitoring
-                    continue
+                self.kill_switch.activate(f"Critical error: {str(e)}")
 
-                # 4. Получаем сигнал от стратегий
-                
-                # Bar-close execution check (NEW)
-                if self.evaluate_on_bar_close:
-                    if not self._is_new_bar(df_with_features):
-                        # Тот же бар - пропускаем генерацию сигнала
-                        time.sleep(5)  # Короткая пауза
-                        continue
+            self.stop()
 
-                # Provide runtime flags to MetaLayer/NoTradeZones
-                if not features:
-                    features = {}
-                features["is_testnet"] = bool(self.testnet)
-                features["allow_anomaly_on_testnet"] = bool(self.config.get("meta_layer.allow_anomaly_on_testnet", True))
+    def _server_time_offset_ms(self) -> int:
+        """Смещение времени биржи из BybitRestClient (0, если клиент его не знает)"""
 
-                signal = self.meta_layer.get_signal(df_with_features, features)
+        offset = getattr(getattr(self.market_client, "client", None), "time_offset_ms", 0)
 
-                if signal:
+        return offset if isinstance(offset, int) else 0
 
-                    # Логируем сгенерированный сигнал
+    def _build_scheduler(self) -> LoopScheduler:
+        """
+        Планировщик главного цикла.
+
+        Задачи:
+        - signal: оценка стратегий на закрытии бара по времени биржи
+          (или каждые signal_interval_seconds при evaluate_on_bar_close=False)
+        - positions: SL/TP, breakeven/trailing, paper SL/TP по последней цене
+        - position_sync: сверка позиции с биржей (live)
+        - metrics, time_sync: метрики и пересинхронизация времени сервера
+        positions и position_sync выполняются сразу по событиям private WS.
+        """
 
-                    signal_logger.log_signal_generated(
+        kline_interval = str(self.config.get("market_data.kline_interval", "60"))
 
-                        strategy_name=signal.get("strategy", "Unknown"),
+        try:
 
-                        symbol=self.symbol,
+            clock = BarClock.for_interval(kline_interval, offset_ms=self._server_time_offset_ms)
 
-                        direction=signal.get("signal", "unknown").upper(),
+        except ValueError:
 
-                        confidence=signal.get("confidence", 0),
+            clock = BarClock.for_interval("60", offset_ms=self._server_time_offset_ms)
 
-                        price=signal.get("entry_price", 0),
+        scheduler = LoopScheduler(
+            clock,
+            bar_grace=float(self.config.get("scheduler.bar_close_grace_seconds", 0.5)),
+            bar_retry=float(self.config.get("scheduler.bar_retry_seconds", 1.0)),
+        )
 
-                        reasons=signal.get("reasons", []),
+        if self.evaluate_on_bar_close:
 
-                        values=signal.get("values", {}),
+            scheduler.add_bar_task("signal", self._evaluate_bar)
 
-                    )
-                    
-                    # Сохраняем последний df для доступа в _process_signal
-                    
-                    self.latest_df = df_with_features
+        else:
 
-                    self._process_signal(signal)
+            scheduler.add_task("signal", float(self.config.get("scheduler.signal_interval_seconds", 10)), self._evaluate_bar)
 
-                else:
+        ws_events = ("position", "execution")
 
-                    # Логируем отладочную информацию - нет сигналов
+        scheduler.add_task(
+            "positions",
+            float(self.config.get("scheduler.positions_interval_seconds", 10)),
+            self._monitor_positions,
+            wake_on=ws_events,
+            run_immediately=False,
+        )
 
-                    signal_logger.log_debug_info(
+        if self.mode == "live" and self.position_state_manager:
 
-                        category="market_analysis",
+            scheduler.add_task(
+                "position_sync",
+                float(self.config.get("scheduler.position_sync_interval_seconds", 30)),
+                self._sync_position_state,
+                wake_on=ws_events,
+                run_immediately=False,
+            )
 
-                        symbol=self.symbol,
+        scheduler.add_task("metrics", float(self.config.get("scheduler.metrics_interval_seconds", 60)), self._update_metrics)
 
-                        last_close=float(df_with_features.iloc[-1]["close"]),
+        client = getattr(self.market_client, "client", None)
 
-                        no_signal_reason="No strategy triggered",
+        if hasattr(client, "_sync_server_time"):
 
-                    )
+            scheduler.add_task(
+                "time_sync",
+                float(self.config.get("scheduler.time_sync_interval_seconds", 3600)),
+                client._sync_server_time,
+                run_immediately=False,
+            )
 
-                # 5. Обновляем метрики
+        if self.order_event_bus is not None and not self._scheduler_ws_subscribed:
 
-                self._update_metrics()
+            # Подписка один раз на бота: слушатели будят текущий self.scheduler
 
-                # 6. Обновляем position_manager для breakeven/trailing/time_stop
-                if self.mode == "live" and self.position_manager and data.get("df") is not None:
-                    current_price = float(df_with_features.iloc[-1]["close"])
-                    
-                    # Обновляем каждую активную позицию
-                    for symbol in list(self.position_manager.active_positions.keys()):
-                        # Получаем текущий размер позиции из position_state_manager
-                        current_size = 0  # Default: no position
-                        if self.position_state_manager and self.position_state_manager.has_position():
-                            pos = self.position_state_manager.get_position()
-                            if pos and pos.symbol == symbol:
-                                current_size = float(pos.qty)
-                        
-                        # Обновляем позицию (запускает проверки breakeven/trailing/time_stop)
-                        self.position_manager.update_position(symbol, current_price, current_size)
+            self.order_event_bus.subscribe_positions(lambda _: self._wake_scheduler("position"))
 
-                # 7. Проверяем SL/TP уровни и виртуальные триггеры (если в live mode)
+            self.order_event_bus.subscribe_executions(lambda _: self._wake_scheduler("execution"))
 
-                if self.mode == "live" and self.sl_tp_manager and data.get("df") is not None:
+            self._scheduler_ws_subscribed = True
 
-                    current_price = Decimal(str(df_with_features.iloc[-1]["close"]))
+        logger.info(
+            f"Scheduler: bar={kline_interval}, offset={clock.offset_ms}ms, tasks={list(scheduler.tasks)}"
+        )
 
-                    current_atr = df_with_features.iloc[-1].get("atr")
+        return scheduler
 
-                    # Проверяем все активные позиции на SL/TP триггеры
+    def _wake_scheduler(self, event: str) -> None:
 
-                    for (
+        if self.scheduler is not None:
 
-                        position_id,
+            self.scheduler.wake(event)
 
-                        sl_tp_levels,
+    def _evaluate_bar(self) -> bool:
+        """
+        Задача "signal": данные, признаки и сигнал стратегий.
 
-                    ) in self.sl_tp_manager.get_all_active_levels().items():
+        Returns:
+            False, если данных нет или биржа ещё не отдала новый бар
+            (планировщик повторит через bar_retry секунд)
+        """
 
-                        # Проверяем виртуальные уровни
+        # Trace тика: span'ы стадий от данных до ордера
+        self.tracer.start_trace(self.symbol)
 
-                        triggered, trigger_type = self.sl_tp_manager.check_virtual_levels(
+        if self.market_recorder:
+            self.market_recorder.mark_tick(self.symbol)
 
-                            position_id=position_id,
+        # 1. Получаем данные
 
-                            current_price=current_price,
+        with self.tracer.span("fetch_market_data"):
+            data = self._fetch_market_data()
 
-                            current_qty=sl_tp_levels.entry_qty,
+        if not data:
 
-                        )
+            return False
 
-                        if triggered:
+        self._last_market_data = data
 
-                            # SL или TP триггернут - нужно закрыть позицию
+        self._last_market_data_at = time.monotonic()
 
-                            logger.warning(
+        # Проверка лимитов на каждом тике: при живом account ledger это O(1) чтения без REST
 
-                                f"SL/TP triggered: {trigger_type.upper()} for {position_id} "
+        if self.mode == "live" and self.risk_monitor and self.risk_monitor.uses_account_ledger:
 
-                                f"@ {current_price} (SL={sl_tp_levels.sl_price}, TP={sl_tp_levels.tp_price})"
+            self.risk_monitor.run_monitoring_check()
 
-                            )
+        # 2. Строим фичи
+        
+        # Ограничиваем размер df для оптимизации (NEW)
+        df_limited = self._limit_df_for_indicators(data["df"])
+        
+        orderbook_sanity_max_deviation_pct = float(
+            self.config.get("market_data.orderbook_sanity_max_deviation_pct", 3.0)
+        )
+        
+        # Get kline_interval for adaptive anomaly detection thresholds
+        kline_interval_minutes = int(self.config.get("market_data.kline_interval", "60"))
+        is_testnet = self.testnet
+
+        with self.tracer.span("build_features"):
+            # Признаки уже посчитаны общим сервисом MultiSymbolBot
+            df_with_features = data.get("features")
+            if df_with_features is None:
+                df_with_features = self.pipeline.build_features(
+
+                    df_limited, 
+                    orderbook=data.get("orderbook"),
+                    orderbook_sanity_max_deviation_pct=orderbook_sanity_max_deviation_pct,
+                    kline_interval_minutes=kline_interval_minutes,
+                    is_testnet=is_testnet
 
-                            # TODO: Выполнить market close ордер
+                )
 
-                            self.sl_tp_manager.close_position_levels(position_id)
+        self._last_features_df = df_with_features
 
-                        # Обновляем trailing stop при благоприятном ценовом движении
+        features = data.get("orderflow_features", {})
+        
+        # TASK-001: Гарантируем наличие symbol в features
+        features["symbol"] = self.symbol
+        
+        # TASK-002: Гарантируем наличие orderflow features в features
+        # Orderflow features (spread_percent, depth_imbalance, etc.) вычисляются в build_features()
+        # и добавляются в df_with_features, но могут быть потеряны если orderbook_resp был недоступен.
+        # Извлекаем их из последней строки df для гарантии наличия.
+        latest_row = FeatureRow.latest(df_with_features)
+        for key in ["spread_percent", "depth_imbalance", "liquidity_concentration", "midprice"]:
+            if key not in features or features.get(key) is None:
+                if key in latest_row and pd.notna(latest_row[key]):
+                    features[key] = float(latest_row[key])
+                else:
+                    # Fallback значения если нет в df
+                    if key == "spread_percent":
+                        features[key] = 0.01  # Оптимистичное значение по умолчанию
+                    elif key == "depth_imbalance":
+                        features[key] = 0.0
+                    elif key == "liquidity_concentration":
+                        features[key] = 0.5
+                    elif key == "midprice":
+                        features[key] = float(latest_row.get("close", 0))
 
-                        if current_atr:
+        # 3. Проверяем circuit breaker (бар пропускается, следующая оценка - на следующем баре)
 
-                            self.sl_tp_manager.update_trailing_stop(
+        if not self.circuit_breaker.is_trading_allowed():
 
-                                position_id=position_id,
+            logger.warning(
 
-                                current_price=current_price,
+                f"Trading halted by circuit breaker: {self.circuit_breaker.break_reason}"
 
-                            )
+            )
+
+            return True
+        
+        # 3b. Check kill switch cooldown
+        if self.kill_switch.is_in_cooldown():
+            logger.warning("⏸️  Bot in cooldown - skipping trading actions")
+            return True
 
-                # 6a. Проверяем SL/TP для paper mode (E1)
+        # 4. Получаем сигнал от стратегий
+        
+        # Bar-close execution check (NEW)
+        if self.evaluate_on_bar_close:
+            if not self._is_new_bar(df_with_features):
+                # Тот же бар - биржа ещё не отдала новую свечу
+                return False
+
+        # Provide runtime flags to MetaLayer/NoTradeZones
+        if not features:
+            features = {}
+        features["is_testnet"] = bool(self.testnet)
+        features["allow_anomaly_on_testnet"] = bool(self.config.get("meta_layer.allow_anomaly_on_testnet", True))
+        features[FEATURE_ROW_KEY] = latest_row
+
+        with self.tracer.span("get_signal"):
+            signal = self.meta_layer.get_signal(df_with_features, features)
 
-                if self.mode == "paper" and data.get("d") is not None:
+        if self.scheduler is not None and self.evaluate_on_bar_close:
 
-                    current_price = Decimal(str(data["d"].iloc[-1]["close"]))
+            latency = self.scheduler.record_signal_latency(self.symbol)
 
-                    # Обновить цены позиций
+            if latency is not None:
 
-                    self.paper_simulator.update_market_prices({self.symbol: current_price})
+                logger.info(f"[BAR_CLOSE] Signal evaluated {latency * 1000:.0f}ms after bar close")
 
-                    # Проверить SL/TP триггеры
+        if signal:
 
-                    triggered = self.paper_simulator.check_sl_tp(current_price)
+            # Логируем сгенерированный сигнал
 
-                    for symbol, trigger_type in triggered.items():
+            signal_logger.log_signal_generated(
 
-                        # Закрыть позицию по SL/TP
+                strategy_name=signal.get("strategy", "Unknown"),
 
-                        success, msg = self.paper_simulator.close_position_on_trigger(
+                symbol=self.symbol,
 
-                            symbol=symbol,
+                direction=signal.get("signal", "unknown").upper(),
 
-                            trigger_type=trigger_type,
+                confidence=signal.get("confidence", 0),
 
-                            exit_price=current_price,
+                price=signal.get("entry_price", 0),
 
-                        )
+                reasons=signal.get("reasons", []),
 
-                        if success:
+                values=signal.get("values", {}),
 
-                            logger.info(f"Paper: Position closed by {trigger_type.upper()}: {msg}")
+            )
+            
+            # Сохраняем последний df для доступа в _process_signal
+            
+            self.latest_df = df_with_features
 
-                            # Записать в БД
+            with self.tracer.span("process_signal"):
+                self._process_signal(signal)
 
-                            self.db.save_signal(
+        else:
 
-                                strategy="SL/TP",
+            # Логируем отладочную информацию - нет сигналов
 
-                                symbol=symbol,
+            signal_logger.log_debug_info(
 
-                                signal_type=f"close_{trigger_type}",
+                category="market_analysis",
 
-                                price=float(current_price),
+                symbol=self.symbol,
 
-                                metadata={"trigger": trigger_type},
+                last_close=float(latest_row["close"]),
 
-                            )
+                no_signal_reason="No strategy triggered",
 
-                    # Записать точку на equity curve
+            )
 
-                    equity = self.paper_simulator.get_equity()
+        self.tracer.finish_trace()
 
-                    self.equity_curve.add_point(time.time(), equity)
+        return True
 
-                # 7. Синхронизируем состояние позиции с биржей (если в live mode)
+    def _monitor_positions(self) -> None:
+        """
+        Задача "positions": breakeven/trailing/time_stop, SL/TP (live) и
+        paper SL/TP по последней цене. Данные моложе интервала задачи
+        переиспользуются после оценки бара, иначе запрашиваются заново.
+        """
 
-                if self.mode == "live" and self.position_state_manager:
+        has_live_positions = self.mode == "live" and (
+            (self.position_manager and self.position_manager.active_positions)
+            or (self.sl_tp_manager and self.sl_tp_manager.get_all_active_levels())
+        )
 
-                    if self.position_state_manager.has_position():
+        if not has_live_positions and self.mode != "paper":
 
-                        sync_success = self.position_state_manager.sync_with_exchange()
+            return
 
-                        if not sync_success:
+        max_age = float(self.config.get("scheduler.positions_interval_seconds", 10))
 
-                            logger.warning("Position state sync failed")
+        data = self._last_market_data
 
-                        # Проверяем валидность позиции (критические ошибки)
+        if data is None or time.monotonic() - self._last_market_data_at >= max_age:
 
-                        is_valid, error_msg = self.position_state_manager.validate_position()
+            data = self._fetch_market_data()
 
-                        if not is_valid:
+            if not data:
 
-                            logger.error(f"Position validation failed: {error_msg}")
+                return
 
-                            # Закрываем позицию если есть критические ошибки
+            self._last_market_data = data
 
-                            self.position_state_manager.close_position()
+            self._last_market_data_at = time.monotonic()
 
-                # Пауза перед следующей итерацией
+        price_df = data.get("features")
 
-                time.sleep(10)  # 10 секунд
+        if price_df is None:
 
-        except KeyboardInterrupt:
+            price_df = data.get("df")
 
-            logger.info("\n🛑 Received stop signal, shutting down...")
+        if price_df is None or price_df.empty:
 
-            self.stop()
+            return
 
-        except Exception as e:
+        last_close = float(price_df["close"].iloc[-1])
+
+        # 6. Обновляем position_manager для breakeven/trailing/time_stop
+        if self.mode == "live" and self.position_manager:
+            # Обновляем каждую активную позицию
+            for symbol in list(self.position_manager.active_positions.keys()):
+                # Получаем текущий размер позиции из position_state_manager
+                current_size = 0  # Default: no position
+                if self.position_state_manager and self.position_state_manager.has_position():
+                    pos = self.position_state_manager.get_position()
+                    if pos and pos.symbol == symbol:
+                        current_size = float(pos.qty)
+                
+                # Обновляем позицию (запускает проверки breakeven/trailing/time_stop)
+                self.position_manager.update_position(symbol, last_close, current_size)
 
-            logger.error(f"Critical error in main loop: {e}", exc_info=True)
+        # 7. Проверяем SL/TP уровни и виртуальные триггеры (если в live mode)
 
-            # Activate kill switch for emergency shutdown
+        if self.mode == "live" and self.sl_tp_manager:
 
-            if self.mode == "live" and self.kill_switch_manager:
+            current_price = Decimal(str(last_close))
 
-                logger.critical("Activating emergency kill switch due to critical error!")
+            features_df = self._last_features_df
 
-                result = self.kill_switch_manager.activate(f"Critical error: {str(e)}")
+            current_atr = features_df["atr"].iloc[-1] if features_df is not None and "atr" in features_df else None
 
-                if result["success"]:
+            # Проверяем все активные позиции на SL/TP триггеры
 
-                    logger.critical(
+            for (
 
-                        f"Emergency shutdown complete: {result['orders_cancelled']} orders cancelled, "
+                position_id,
 
-                        f"{result['positions_closed']} positions closed"
+                sl_tp_levels,
+
+            ) in self.sl_tp_manager.get_all_active_levels().items():
+
+                # Проверяем виртуальные уровни
+
+                triggered, trigger_type = self.sl_tp_manager.check_virtual_levels(
+
+                    position_id=position_id,
+
+                    current_price=current_price,
+
+                    current_qty=sl_tp_levels.entry_qty,
+
+                )
+
+                if triggered:
+
+                    # SL или TP триггернут - нужно закрыть позицию
+
+                    logger.warning(
+
+                        f"SL/TP triggered: {trigger_type.upper()} for {position_id} "
+
+                        f"@ {current_price} (SL={sl_tp_levels.sl_price}, TP={sl_tp_levels.tp_price})"
 
                     )
 
-            else:
+                    # TODO: Выполнить market close ордер
 
-                self.kill_switch.activate(f"Critical error: {str(e)}")
+                    self.sl_tp_manager.close_position_levels(position_id)
 
-            self.stop()
+                # Обновляем trailing stop при благоприятном ценовом движении
 
-    def _fetch_market_data(self) -> Optional[Dict[str, Any]]:
-        """Получить рыночные данные с retry logic для всех данных"""
+                if current_atr:
 
-        try:
+                    self.sl_tp_manager.update_trailing_stop(
 
-            import pandas as pd
+                        position_id=position_id,
 
-            # Главный таймфрейм - 1h
+                        current_price=current_price,
 
-            kline_interval = str(self.config.get("market_data.kline_interval", "60"))
-            kline_limit = int(self.config.get("market_data.kline_limit", 500))
-            
-            # Валидация интервала (Bybit V5 требует строгий формат)
-            valid_intervals = ["1", "3", "5", "15", "30", "60", "120", "240", "360", "720", "D", "M", "W"]
-            if kline_interval not in valid_intervals:
-                logger.warning(f"Invalid kline_interval '{kline_interval}', using '60' (1h)")
-                kline_interval = "60"
-            
-            logger.debug(f"Fetching kline: symbol={self.symbol}, interval={kline_interval} (type: {type(kline_interval)}), limit={kline_limit}")
+                    )
 
-            try:
+        # 6a. Проверяем SL/TP для paper mode (E1)
 
-                kline_resp = retry_api_call(
+        if self.mode == "paper":
 
-                    self.market_client.get_kline,
+            current_price = Decimal(str(last_close))
 
-                    self.symbol,
+            # Обновить цены позиций
+
+            self.paper_simulator.update_market_prices({self.symbol: current_price})
+
+            # Проверить SL/TP триггеры
+
+            triggered = self.paper_simulator.check_sl_tp(current_price)
+
+            for symbol, trigger_type in triggered.items():
+
+                # Закрыть позицию по SL/TP
 
-                    interval=kline_interval,
+                success, msg = self.paper_simulator.close_position_on_trigger(
 
-                    limit=kline_limit,
+                    symbol=symbol,
 
-                    max_retries=2,
+                    trigger_type=trigger_type,
+
+                    exit_price=current_price,
 
                 )
 
-            except Exception as e:
+                if success:
 
-                logger.error(f"Kline retry failed: {e}", exc_info=True)
+                    logger.info(f"Paper: Position closed by {trigger_type.upper()}: {msg}")
 
-                return None
+                    # Записать в БД
 
-            if not kline_resp or kline_resp.get("retCode") != 0:
+                    self.db.save_signal(
 
-                logger.warning(f"Failed to fetch kline data: {kline_resp}")
+                        strategy="SL/TP",
 
-                return None
+                        symbol=symbol,
 
-            candles = kline_resp.get("result", {}).get("list", [])
+                        signal_type=f"close_{trigger_type}",
 
-            if not candles:
+                        price=float(current_price),
 
-                logger.warning("No kline candles received")
+                        metadata={"trigger": trigger_type},
 
-                return None
+                    )
 
-            df = pd.DataFrame(
+            # Записать точку на equity curve
 
-                candles,
+            equity = self.paper_simulator.get_equity()
 
-                columns=["timestamp", "open", "high", "low", "close", "volume", "turnover"],
+            self.equity_curve.add_point(int(time.time() * 1000), equity)
 
-            )
+    def _sync_position_state(self) -> None:
+        """Задача "position_sync": сверка позиции с биржей (live)"""
 
-            for col in ["open", "high", "low", "close", "volume"]:
+        if not self.position_state_manager.has_position():
 
-                df[col] = df[col].astype(float)
+            return
 
-            # Sort by timestamp and set as DatetimeIndex for VWAP calculation
-            df["timestamp"] = pd.to_datetime(df["timestamp"].astype(float), unit="ms")
-            df = df.sort_values("timestamp").set_index("timestamp")
-            
-            # Clean extreme data outliers from testnet (e.g., BTC=1.6M)
-            # Filter OHLC values that deviate > 3x from median
-            for col in ["open", "high", "low", "close"]:
-                median = df[col].median()
-                # Keep values within 3x of median
-                mask = (df[col] > median / 3) & (df[col] < median * 3)
-                outliers = (~mask).sum()
-                if outliers > 0:
-                    logger.warning(f"⚠️  Found {outliers} outliers in {col} (median={median:.2f}), replacing with interpolation")
-                    # Replace outliers with NaN then interpolate
-                    df.loc[~mask, col] = np.nan
-                    df[col] = df[col].interpolate(method='linear', limit_direction='both')
+        sync_success = self.position_state_manager.sync_with_exchange()
 
+        if not sync_success:
 
-            logger.debug(f"Loaded {len(df)} candles for 1h timeframe")
+            logger.warning("Position state sync failed")
 
-            # Загрузить данные для других таймфреймов в кэш (для MTF)
+        # Проверяем валидность позиции (критические ошибки)
 
-            if self.meta_layer.use_mtf and self.meta_layer.timeframe_cache:
+        is_valid, error_msg = self.position_state_manager.validate_position()
 
-                timeframes = [("1", "1m"), ("5", "5m"), ("15", "15m"), ("240", "4h")]
+        if not is_valid:
 
-                for interval, tf_name in timeframes:
+            logger.error(f"Position validation failed: {error_msg}")
 
-                    try:
+            # Закрываем позицию если есть критические ошибки
 
-                        tf_resp = retry_api_call(
+            self.position_state_manager.close_position()
 
-                            self.market_client.get_kline,
+    def _fetch_shared_market_data(self) -> Optional[Dict[str, Any]]:
+        """Снимок символа из общего SharedMarketDataService (без собственных REST вызовов)"""
 
-                            self.symbol,
+        data = self.market_data_service.get_market_data(self.symbol)
 
-                            interval=interval,
+        if not data:
 
-                            limit=100,
+            logger.warning(f"No shared market data for {self.symbol}")
 
-                            max_retries=1,
+            return None
 
-                        )
+        if self.meta_layer.use_mtf and self.meta_layer.timeframe_cache:
+
+            for interval, frame in data.get("mtf_frames", {}).items():
+
+                self.meta_layer.timeframe_cache.seed(interval, frame)
+
+        self.circuit_breaker.update_data_timestamp()
 
-                        if tf_resp and tf_resp.get("retCode") == 0:
+        return data
 
-                            tf_candles = tf_resp.get("result", {}).get("list", [])
+    def _fetch_market_data(self) -> Optional[Dict[str, Any]]:
+        """Получить рыночные данные с retry logic для всех данных"""
 
-                            if tf_candles:
+        if getattr(self, "market_data_service", None) is not None:
 
-                                # Добавить последнюю свечу в кэш
+            return self._fetch_shared_market_data()
 
-                                last_candle = tf_candles[0]
+        try:
+
+            import pandas as pd
 
-                                candle_dict = {
+            # Главный таймфрейм - 1h
 
-                                    "timestamp": last_candle[0],
+            kline_interval = str(self.config.get("market_data.kline_interval", "60"))
+            kline_limit = int(self.config.get("market_data.kline_limit", 500))
+            
+            # Валидация интервала (Bybit V5 требует строгий формат)
+            valid_intervals = ["1", "3", "5", "15", "30", "60", "120", "240", "360", "720", "D", "M", "W"]
+            if kline_interval not in valid_intervals:
+                logger.warning(f"Invalid kline_interval '{kline_interval}', using '60' (1h)")
+                kline_interval = "60"
+            
+            # Кольцевой буфер свечей: полный запрос kline_limit только при первой загрузке
+            # и разрыве, дальше - только новые свечи (limit=2-3), формирующийся бар на месте
 
-                                    "open": float(last_candle[1]),
+            buffer = self.candle_buffer
 
-                                    "high": float(last_candle[2]),
+            if buffer is None or buffer.interval != kline_interval or buffer.capacity != kline_limit:
 
-                                    "low": float(last_candle[3]),
+                buffer = CandleRingBuffer(kline_limit, kline_interval)
 
-                                    "close": float(last_candle[4]),
+                if self.config.get("market_data.incremental_klines", True):
 
-                                    "volume": float(last_candle[5]),
+                    self.candle_buffer = buffer
 
-                                }
+            now_ms = int(time.time() * 1000) + self._server_time_offset_ms()
 
-                                self.meta_layer.timeframe_cache.add_candle(interval, candle_dict)
+            logger.debug(
+                f"Fetching kline: symbol={self.symbol}, interval={kline_interval}, "
+                f"limit={buffer.fetch_limit(now_ms) or kline_limit}"
+            )
 
-                                logger.debug(
+            # DatetimeIndex по возрастанию, выбросы testnet заменены интерполяцией
+            df = fetch_klines(self.market_client, self.symbol, buffer, now_ms)
 
-                                    f"Loaded {len(tf_candles)} candles for {tf_name} timeframe"
+            if df is None:
 
-                                )
+                return None
 
-                        else:
+            logger.debug(f"Loaded {len(df)} candles for 1h timeframe")
 
-                            logger.debug(f"Failed to fetch {tf_name} data")
+            # Таймфреймы MTF: основной буфер - в кэш без копирования, запрашиваются
+
+            # только интервалы, которые не агрегируются из имеющихся (1m; 5m/15m из 1m, 4h из 1h)
+
+            if self.meta_layer.use_mtf and self.meta_layer.timeframe_cache:
+
+                timeframe_cache = self.meta_layer.timeframe_cache
+
+                timeframe_cache.attach(kline_interval, buffer)
+
+                for interval in mtf_fetch_intervals(MTF_INTERVALS, kline_interval):
+
+                    try:
+
+                        tf_df = fetch_klines(
+
+                            self.market_client,
+
+                            self.symbol,
+
+                            timeframe_cache.buffer(interval),
+
+                            now_ms,
+
+                            max_retries=1,
+
+                        )
+
+                        if tf_df is None:
+
+                            logger.debug(f"Failed to fetch {interval} data")
 
                     except Exception as e:
 
-                        logger.debug(f"Error fetching {tf_name} data: {e}")
+                        logger.debug(f"Error fetching {interval} data: {e}")
 
             else:
 
@@ -1485,10 +1740,11 @@ class TradingBot:
                     
                     estimated_notional = estimated_qty * signal.get("entry_price", 0)
                     
-                    can_open, reason = self.risk_monitor.can_open_new_position(
-                        new_position_notional=estimated_notional,
-                        new_position_price=signal.get("entry_price", 0)
-                    )
+                    with self.tracer.span("risk_checks"):
+                        can_open, reason = self.risk_monitor.can_open_new_position(
+                            new_position_notional=estimated_notional,
+                            new_position_price=signal.get("entry_price", 0)
+                        )
                     
                     if not can_open:
                         logger.warning(f"Signal rejected by position limits: {reason}")
@@ -1552,7 +1808,9 @@ class TradingBot:
 
                     # Получаем текущий realized PnL за день
 
-                    realized_pnl_today = Decimal("0")  # TODO: Get from trade journal
+                    # Последнее значение risk monitor (в шарде - по всем символам через SharedAdvancedRiskLimits)
+
+                    realized_pnl_today = self.risk_monitor.last_realized_pnl_today if self.risk_monitor else Decimal("0")
 
                     # Текущий equity
 
@@ -1576,7 +1834,8 @@ class TradingBot:
 
                     # Evaluate risk
 
-                    risk_decision, risk_details = self.advanced_risk_limits.evaluate(risk_state)
+                    with self.tracer.span("risk_checks"):
+                        risk_decision, risk_details = self.advanced_risk_limits.evaluate(risk_state)
 
                     logger.info(
 
@@ -2024,13 +2283,14 @@ class TradingBot:
 
                 }
 
-                limits_check = self.risk_limits.check_limits(
+                with self.tracer.span("risk_checks"):
+                    limits_check = self.risk_limits.check_limits(
 
-                    account_balance=account_balance,
+                        account_balance=account_balance,
 
-                    proposed_trade=proposed_trade,
+                        proposed_trade=proposed_trade,
 
-                )
+                    )
 
                 if not limits_check.get("allowed", False):
 
@@ -2102,18 +2362,19 @@ class TradingBot:
                 if order_type == "Limit" and post_only:
                     time_in_force = "PostOnly"
 
-                order_result = self.order_manager.create_order(
-                    category="linear",
-                    symbol=self.symbol,
-                    side=side,
-                    order_type=order_type,
-                    qty=float(normalized_qty),  # Используем нормализованное количество
-                    price=float(normalized_price) if order_type == "Limit" else None,
-                    time_in_force=time_in_force,
-                    order_link_id=order_link_id,
-                    stop_loss=sl_price,  # ← Выставляем SL вместе с ордером
-                    take_profit=tp_price,  # ← Выставляем TP вместе с ордером
-                )
+                with self.tracer.span("create_order"):
+                    order_result = self.order_manager.create_order(
+                        category="linear",
+                        symbol=self.symbol,
+                        side=side,
+                        order_type=order_type,
+                        qty=float(normalized_qty),  # Используем нормализованное количество
+                        price=float(normalized_price) if order_type == "Limit" else None,
+                        time_in_force=time_in_force,
+                        order_link_id=order_link_id,
+                        stop_loss=sl_price,  # ← Выставляем SL вместе с ордером
+                        take_profit=tp_price,  # ← Выставляем TP вместе с ордером
+                    )
 
                 # order_result теперь OrderResult, проверяем success вместо retCode
                 if order_result.success:
@@ -2251,12 +2512,90 @@ class TradingBot:
 
                 logger.error(f"Error processing live signal: {e}", exc_info=True)
 
+    def _on_position_for_limits(self, position_data: Dict[str, Any]) -> None:
+        """Position push символа: открытая позиция заменяет запись в risk_limits, size 0 - удаляет"""
+
+        if position_data.get("symbol") != self.symbol:
+
+            return
+
+        size = float(position_data.get("size") or 0)
+
+        self.risk_limits.remove_position(self.symbol)
+
+        if size > 0 and position_data.get("side"):
+
+            self.risk_limits.add_position({
+                "symbol": self.symbol,
+                "side": position_data["side"],
+                "size": size,
+                "value": float(position_data.get("positionValue") or size * float(position_data.get("avgPrice") or 0)),
+            })
+
+    def _on_execution_for_limits(self, exec_data: Dict[str, Any]) -> None:
+        """Execution push символа: реализованный PnL (closedPnl - fee) один раз на execId"""
+
+        if exec_data.get("symbol") != self.symbol:
+
+            return
+
+        exec_id = exec_data.get("execId")
+
+        if exec_id:
+
+            if exec_id in self._risk_limits_exec_ids:
+
+                return
+
+            self._risk_limits_exec_ids.add(exec_id)
+
+        pnl = float(execution_realized_pnl(exec_data))
+
+        if pnl:
+
+            self.risk_limits.update_daily_stats(pnl)
+
+    def _start_private_ws(self):
+        """Запустить PrivateWebSocket, публикующий ордера/позиции в order_event_bus"""
+        from config import Config
+
+        if not self.config.get("execution.private_ws_enabled", True):
+            logger.info("Private WebSocket disabled, order fills are polled via REST")
+            return
+        if not Config.BYBIT_API_KEY or not Config.BYBIT_API_SECRET:
+            logger.warning("API keys missing, private WebSocket not started")
+            return
+
+        try:
+            from exchange.private_ws import PrivateWebSocket
+
+            self.private_ws = PrivateWebSocket(
+                api_key=Config.BYBIT_API_KEY,
+                api_secret=Config.BYBIT_API_SECRET,
+                on_order=lambda order: None,
+                on_position=lambda position: None,
+                testnet=self.testnet,
+                event_bus=self.order_event_bus,
+            )
+            self.private_ws.client.recorder = getattr(self, "market_recorder", None)
+            self.private_ws.start()
+            logger.info("Private WebSocket started for order/position events")
+        except Exception as e:
+            # Не критично: без стрима работает REST fallback
+            logger.error(f"Failed to start private WebSocket: {e}", exc_info=True)
+            self.private_ws = None
+
+    @traced("wait_for_order_fill")
     def _wait_for_order_fill(self, order_id: str, timeout_seconds: int = 30) -> bool:
         """        
         Ждёт исполнения ордера перед установкой SL/TP.
         
         Критично для предотвращения ошибки Bybit 110013:
         "can not set tp/sl/ts for zero position"
+
+        Сначала ждёт push из private WS (order_event_bus) - реакция за
+        миллисекунды. REST поллинг используется только если стрим неактивен
+        или push не пришёл до таймаута.
         
         Args:
             order_id: ID ордера
@@ -2266,11 +2605,35 @@ class TradingBot:
             True если ордер исполнен (Filled), False если timeout или ошибка
         """
         import time
+        from exchange.order_events import FINAL_ORDER_STATUSES
+        
+        deadline = time.time() + timeout_seconds
+        bus = self.order_event_bus
+
+        # Ждём push порциями, чтобы заметить разрыв стрима
+        while bus is not None and bus.is_active and time.time() < deadline:
+            order = bus.wait_for_order(order_id, min(1.0, deadline - time.time()), FINAL_ORDER_STATUSES)
+            if order is not None:
+                order_status = order.get("orderStatus", "")
+                if order_status == "Filled":
+                    logger.info(f"✓ Order {order_id} filled successfully (ws)")
+                    return True
+                logger.warning(f"Order {order_id} status: {order_status}")
+                return False
+
+        return self._poll_order_fill_rest(order_id, deadline)
+
+    def _poll_order_fill_rest(self, order_id: str, deadline: float) -> bool:
+        """
+        REST fallback для _wait_for_order_fill: поллинг /v5/order/realtime до deadline.
+
+        Хотя бы один запрос выполняется даже если deadline уже прошёл.
+        """
+        import time
         
-        start_time = time.time()
         check_interval = 0.5  # Проверяем каждые 500ms
         
-        while time.time() - start_time < timeout_seconds:
+        while True:
             try:
                 # Получаем статус ордера через REST API
                 from execution.order_result import OrderResult
@@ -2309,11 +2672,13 @@ class TradingBot:
                 
             except Exception as e:
                 logger.debug(f"Error checking order status: {e}")
-            
+
+            if time.time() + check_interval >= deadline:
+                break
             time.sleep(check_interval)
         
         # Timeout
-        logger.warning(f"Timeout waiting for order {order_id} to fill after {timeout_seconds}s")
+        logger.warning(f"Timeout waiting for order {order_id} to fill")
         return False
 
     def _update_metrics(self):
@@ -2363,6 +2728,8 @@ class TradingBot:
 
         )
 
+        downsampled_ts, downsampled_equity = self.equity_curve.downsample(max_points=1000)
+
         return {
 
             "account": account_summary,
@@ -2449,12 +2816,18 @@ class TradingBot:
 
             "equity_curve": {
 
-                "timestamps": self.equity_curve.timestamps,
+                # Прореженная кривая для графика дашборда (min/max по бакетам)
+
+                "timestamps": downsampled_ts,
 
-                "equity_values": self.equity_curve.equity_values,
+                "equity_values": downsampled_equity,
+
+                "points_total": len(self.equity_curve),
 
                 "max_equity": float(self.equity_curve.max_equity),
 
+                "current_drawdown": self.equity_curve.current_drawdown,
+
             },
 
         }
@@ -2479,6 +2852,9 @@ class TradingBot:
             }
         """
         logger.info("[RUN_SINGLE_TICK] Starting single tick execution")
+
+        if getattr(self, "market_recorder", None):
+            self.market_recorder.mark_tick(self.symbol)
         
         try:
             # 1. Получаем данные
@@ -2499,21 +2875,23 @@ class TradingBot:
                 self.config.get("market_data.orderbook_sanity_max_deviation_pct", 3.0)
             )
             
-            df_with_features = self.pipeline.build_features(
-                df_limited,
-                orderbook=data.get("orderbook"),
-                orderbook_sanity_max_deviation_pct=orderbook_sanity_max_deviation_pct
-            )
+            df_with_features = data.get("features")
+            if df_with_features is None:
+                df_with_features = self.pipeline.build_features(
+                    df_limited,
+                    orderbook=data.get("orderbook"),
+                    orderbook_sanity_max_deviation_pct=orderbook_sanity_max_deviation_pct
+                )
             
             features = data.get("orderflow_features", {})
             features["symbol"] = self.symbol
             
             # Извлекаем orderflow features из последней строки
             import pandas as pd
-            latest_row = df_with_features.iloc[-1]
+            latest_row = FeatureRow.latest(df_with_features)
             for key in ["spread_percent", "depth_imbalance", "liquidity_concentration", "midprice"]:
                 if key not in features or features.get(key) is None:
-                    if key in latest_row.index and pd.notna(latest_row[key]):
+                    if key in latest_row and pd.notna(latest_row[key]):
                         features[key] = float(latest_row[key])
             
             # 3. Проверяем circuit breaker
@@ -2537,6 +2915,7 @@ class TradingBot:
             features["allow_anomaly_on_testnet"] = bool(
                 self.config.get("meta_layer.allow_anomaly_on_testnet", True)
             )
+            features[FEATURE_ROW_KEY] = latest_row
             
             signal = self.meta_layer.get_signal(df_with_features, features)
             
@@ -2623,15 +3002,26 @@ class TradingBot:
         logger.info("Stopping bot...")
 
         self.is_running = False
+
+        self._wake_scheduler("stop")
         
         # Остановить reconciliation service если запущен
         if self.mode == "live" and self.reconciliation_service:
             self.reconciliation_service.stop_loop()
             logger.info("Reconciliation service stopped")
+
+        # Остановить private WS если запущен
+        if self.private_ws:
+            self.private_ws.stop()
+            self.private_ws = None
+            logger.info("Private WebSocket stopped")
         
         # Остановить risk monitor если запущен
         if self.mode == "live" and self.risk_monitor:
             self.risk_monitor.stop_monitoring()
             logger.info("Risk monitor stopped")
 
+        if getattr(self, "market_recorder", None):
+            self.market_recorder.close()
+
         logger.info("Bot stopped successfully")
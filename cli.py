@@ -86,6 +86,8 @@ def main():
 
         print("  stream     - Test WebSocket streams")
 
+        print("             --record-orderbook  write the book to storage/orderbook/ for backtest replay")
+
         print("  state      - Test state recovery")
 
         print("  features   - Test feature pipeline")
@@ -104,6 +106,8 @@ def main():
 
         print("  live       - Run live trading (REAL MONEY)")
 
+        print("             --profile  sample thread stacks into logs/profiles/")
+
         print("\nEmergency:")
 
         print("  kill       - Activate emergency kill switch (closes all positions)")
@@ -380,6 +384,16 @@ def stream_test():
 
         orderbook_stream = OrderbookStream(symbol, 50, on_orderbook, testnet)
 
+        # Запись стакана для BacktestConfig.orderbook_path
+
+        orderbook_recorder = None
+
+        if "--record-orderbook" in sys.argv:
+
+            orderbook_recorder = _orderbook_recorder(symbol, testnet)
+
+            orderbook_recorder.attach(orderbook_stream)
+
         orderbook_stream.start()
 
         # Graceful shutdown при Ctrl+C
@@ -392,6 +406,10 @@ def stream_test():
 
             orderbook_stream.stop()
 
+            if orderbook_recorder:
+
+                orderbook_recorder.close()
+
             logger.info(f"Total klines received: {kline_count[0]}")
 
             logger.info(f"Total orderbook updates: {orderbook_count[0]}")
@@ -417,6 +435,28 @@ def stream_test():
         return 1
 
 
+def _orderbook_recorder(symbol, testnet):
+    """OrderbookRecorder для stream --record-orderbook (tickSize/qtyStep из instruments-info)"""
+
+    from datetime import datetime
+
+    from exchange.instrument_registry import InstrumentSpec
+
+    from exchange.market_data import MarketDataClient
+
+    from execution.orderbook_replay import OrderbookRecorder
+
+    response = MarketDataClient(testnet=testnet).get_instruments_info(category="linear", symbol=symbol)
+
+    spec = InstrumentSpec.from_api(response["result"]["list"][0])
+
+    path = f"storage/orderbook/{symbol}_{datetime.now():%Y%m%d_%H%M%S}.obr"
+
+    logger.info(f"Recording orderbook to {path}")
+
+    return OrderbookRecorder(path, symbol, float(spec.tick_size), float(spec.qty_step), depth=50)
+
+
 def state_recovery_test():
     """Тест восстановления состояния (требует API ключи)"""
 
@@ -508,11 +548,15 @@ def features_test():
 
         from config.settings import ConfigManager
 
-        testnet = ConfigManager().is_testnet()
+        from data.feature_cache import FeatureCache
+
+        cli_config = ConfigManager()
+
+        testnet = cli_config.is_testnet()
 
         market_client = MarketDataClient(testnet=testnet)
 
-        pipeline = FeaturePipeline()
+        pipeline = FeaturePipeline(cache=FeatureCache.from_config(cli_config))
 
         # Получаем исторические данные
 
@@ -965,11 +1009,15 @@ def strategy_test():
 
         from config.settings import ConfigManager
 
-        testnet = ConfigManager().is_testnet()
+        from data.feature_cache import FeatureCache
+
+        cli_config = ConfigManager()
+
+        testnet = cli_config.is_testnet()
 
         market_client = MarketDataClient(testnet=testnet)
 
-        pipeline = FeaturePipeline()
+        pipeline = FeaturePipeline(cache=FeatureCache.from_config(cli_config))
 
         # Получаем данные
 
@@ -1120,13 +1168,17 @@ def backtest_command():
 
         import pandas as pd
 
+        from data.feature_cache import FeatureCache
+
         # Получаем данные
 
         testnet = config.is_testnet()
 
         market_client = MarketDataClient(testnet=testnet)
 
-        pipeline = FeaturePipeline()
+        # Повторный backtest на тех же свечах берёт признаки из кэша
+
+        pipeline = FeaturePipeline(cache=FeatureCache.from_config(ConfigManager()))
 
         symbol = "BTCUSDT"
 
@@ -1274,6 +1326,22 @@ def backtest_command():
         return 1
 
 
+def _start_profiler_if_requested(config):
+    """Запустить sampling profiler, если передан флаг --profile"""
+
+    if "--profile" not in sys.argv:
+
+        return None
+
+    from utils.profiler import configure_profiler
+
+    profiler = configure_profiler(config)
+
+    profiler.start()
+
+    return profiler
+
+
 def paper_command():
     """Запуск paper trading"""
 
@@ -1303,7 +1371,17 @@ def paper_command():
 
         bot = TradingBot(mode="paper", strategies=strategies, testnet=testnet, config=config)
 
-        bot.run()
+        profiler = _start_profiler_if_requested(config)
+
+        try:
+
+            bot.run()
+
+        finally:
+
+            if profiler:
+
+                profiler.stop()
 
         return 0
 
@@ -1353,7 +1431,17 @@ def live_command():
 
         bot = TradingBot(mode="live", strategies=strategies, testnet=testnet, config=config)
 
-        bot.run()
+        profiler = _start_profiler_if_requested(config)
+
+        try:
+
+            bot.run()
+
+        finally:
+
+            if profiler:
+
+                profiler.stop()
 
         return 0
 
@@ -120,6 +120,8 @@ class ConfigManager:
 
                 "kline_limit": 500,
 
+                "incremental_klines": True,  # Кольцевой буфер свечей: после первой загрузки запрашиваются только новые
+
                 "orderbook_depth": 50,
 
                 "data_refresh_interval": 12,
@@ -138,6 +140,24 @@ class ConfigManager:
 
             },
 
+            "scheduler": {
+
+                "bar_close_grace_seconds": 0.5,  # Пауза после закрытия бара (время биржи) до запроса свечей
+
+                "bar_retry_seconds": 1.0,  # Повтор, пока биржа не отдала новую свечу
+
+                "signal_interval_seconds": 10,  # Интервал оценки при evaluate_on_bar_close=False
+
+                "positions_interval_seconds": 10,  # SL/TP, trailing, paper SL/TP (+ сразу по WS событиям)
+
+                "position_sync_interval_seconds": 30,  # Сверка позиции с биржей (live)
+
+                "metrics_interval_seconds": 60,
+
+                "time_sync_interval_seconds": 3600,  # Пересинхронизация времени сервера
+
+            },
+
             "risk_management": {
 
                 "position_risk_percent": 1.0,
@@ -196,6 +216,8 @@ class ConfigManager:
 
                 "use_mtf": True,
 
+                "lazy_features": True,  # Считать только признаки, которые читают включённые стратегии
+
                 "mtf_timeframes": ["1m", "5m", "15m", "60m", "240m", "D"],
 
                 "mtf_score_threshold": 0.6,
@@ -272,6 +294,30 @@ class ConfigManager:
 
                 "partial_exit_percent": 0.5,
 
+                "private_ws_enabled": True,  # Push-события ордеров/позиций вместо REST поллинга
+
+                "reconcile_full_snapshot_seconds": 900,  # Полная сверка позиций/ордеров (между ними - инкрементальная)
+
+            },
+
+            "feature_cache": {
+
+                "enabled": True,
+
+                "dir": "storage/feature_cache",
+
+                "max_size_mb": 512,
+
+            },
+
+            "instruments": {
+
+                "cache_path": "storage/instruments_{network}_{category}.json",  # Реестр tickSize/qtyStep для мгновенного старта
+
+                "cache_ttl_seconds": 3600,  # Старше - обновление в фоне
+
+                "background_refresh": True,
+
             },
 
             "logging": {
@@ -284,6 +330,26 @@ class ConfigManager:
 
             },
 
+            "observability": {
+
+                "latency_tracing": False,  # Tick-to-order span'ы (/api/metrics/latency)
+
+                "latency_trace_buffer": 1000,  # Сколько последних тиков хранить
+
+                "profiler_interval_ms": 10,  # Sampling profiler (--profile): период снятия стеков
+
+                "profiler_flush_seconds": 60,  # Как часто писать logs/profiles/*.collapsed
+
+                "profiler_max_files": 20,  # Ротация: сколько последних файлов хранить
+
+                "market_recorder_enabled": False,  # Запись REST/WS входа бота для replay
+
+                "market_recorder_dir": "storage/recordings",
+
+                "market_recorder_segment_mb": 64,  # Размер сегмента до ротации
+
+            },
+
             "api": {
 
                 "retry_max_attempts": 3,
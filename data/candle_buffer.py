@@ -0,0 +1,329 @@
+"""
+Кольцевой буфер свечей символа с инкрементальной подгрузкой.
+
+Раньше каждый тик запрашивал kline_limit=500 свечей, заново строил
+DataFrame, сортировал, конвертировал timestamps и прогонял фильтр
+выбросов по всему окну. CandleRingBuffer хранит последние capacity свечей
+в предвыделенных NumPy колонках:
+
+    buffer = CandleRingBuffer(capacity=500, interval="60")
+    df = fetch_klines(market_client, "BTCUSDT", buffer, now_ms)   # 1-й раз: 500 свечей
+    df = fetch_klines(market_client, "BTCUSDT", buffer, now_ms)   # дальше: limit=2-3
+
+- fetch_limit(now_ms): сколько свечей запросить - новые бары с последней
+  сохранённой + последняя сохранённая (её финальные значения); None - нужна
+  полная загрузка (буфер пуст или разрыв больше буфера)
+- merge(candles): новые свечи дописываются (вытесняя самые старые), уже
+  известные (формирующийся бар) заменяются на месте; фильтр выбросов
+  (> 3x от медианы буфера) применяется только к этим строкам
+- to_frame(): OHLCV DataFrame как у klines_to_frame
+
+Выброс в новой строке заменяется значением предыдущей свечи (при полной
+загрузке хвост окна интерполируется так же - limit_direction="both").
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from logger import setup_logger
+from utils import retry_api_call
+
+logger = setup_logger(__name__)
+
+
+KLINE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume", "turnover"]
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+MINUTE_MS = 60_000
+DAY_MS = 1440 * MINUTE_MS
+
+
+def interval_ms(kline_interval: str) -> int:
+    """
+    Длительность бара Bybit V5 в миллисекундах.
+
+    Месячный бар ("M") не фиксированной длины - считается за сутки:
+    границы проверяются раз в сутки, лишние свечи в запросе безвредны.
+    """
+    interval = str(kline_interval)
+    if interval.isdigit():
+        return int(interval) * MINUTE_MS
+    if interval in ("D", "M"):
+        return DAY_MS
+    if interval == "W":
+        return 7 * DAY_MS
+    raise ValueError(f"Unsupported kline interval: {kline_interval}")
+
+
+def klines_to_frame(candles: List[List[Any]]) -> pd.DataFrame:
+    """
+    Ответ get_kline (result.list, новые свечи первыми) -> OHLCV DataFrame
+    с DatetimeIndex по возрастанию. Выбросы OHLC (> 3x от медианы,
+    бывают на testnet) заменяются интерполяцией.
+    """
+    df = pd.DataFrame(candles, columns=KLINE_COLUMNS)
+
+    for col in ["open", "high", "low", "close", "volume", "turnover"]:
+        df[col] = df[col].astype(float)
+
+    # Sort by timestamp and set as DatetimeIndex for VWAP calculation
+    df["timestamp"] = pd.to_datetime(df["timestamp"].astype(float), unit="ms")
+    df = df.sort_values("timestamp").set_index("timestamp")
+
+    # Clean extreme data outliers from testnet (e.g., BTC=1.6M)
+    # Filter OHLC values that deviate > 3x from median
+    for col in PRICE_COLUMNS:
+        median = df[col].median()
+        # Keep values within 3x of median
+        mask = (df[col] > median / 3) & (df[col] < median * 3)
+        outliers = (~mask).sum()
+        if outliers > 0:
+            logger.warning(f"⚠️  Found {outliers} outliers in {col} (median={median:.2f}), replacing with interpolation")
+            # Replace outliers with NaN then interpolate
+            df.loc[~mask, col] = np.nan
+            df[col] = df[col].interpolate(method="linear", limit_direction="both")
+
+    return df
+
+
+class CandleRingBuffer:
+    """Последние capacity свечей одного символа/интервала в NumPy колонках"""
+
+    COLUMNS = ("open", "high", "low", "close", "volume", "turnover")
+
+    def __init__(self, capacity: int, interval: str):
+        """
+        Args:
+            capacity: Сколько свечей хранить (market_data.kline_limit)
+            interval: Интервал Bybit ("1", "60", "D", ...)
+        """
+        self.capacity = int(capacity)
+        self.interval = str(interval)
+        self.bar_ms = interval_ms(self.interval)
+        self.timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self.columns: Dict[str, np.ndarray] = {name: np.zeros(self.capacity) for name in self.COLUMNS}
+        self.size = 0
+        self._start = 0
+        # Статистика: полные загрузки и строки, разобранные инкрементально
+        self.full_loads = 0
+        self.merged_rows = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _slot(self, i: int) -> int:
+        """Позиция i-й свечи от самой старой"""
+        return (self._start + i) % self.capacity
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Открытие последней сохранённой (обычно формирующейся) свечи, мс"""
+        if self.size == 0:
+            return None
+        return int(self.timestamps[self._slot(self.size - 1)])
+
+    def clear(self) -> None:
+        self.size = 0
+        self._start = 0
+
+    def fetch_limit(self, now_ms: int) -> Optional[int]:
+        """
+        limit для следующего get_kline.
+
+        Returns:
+            Новые бары + 1 (последняя сохранённая свеча) + 1 (запас на границе
+            бара), None - нужна полная загрузка
+        """
+        if self.size == 0:
+            return None
+        missing = max(0, (now_ms - self.last_timestamp) // self.bar_ms)
+        limit = int(missing) + 2
+        return limit if limit < self.capacity else None
+
+    def load(self, candles: List[List[Any]]) -> None:
+        """Полная загрузка: klines_to_frame по всему ответу, в буфер - последние capacity"""
+        self.load_frame(klines_to_frame(candles))
+
+    def load_frame(self, df: pd.DataFrame) -> None:
+        """
+        Заменить содержимое последними capacity строками OHLCV DataFrame
+        (DatetimeIndex или колонка "timestamp"; отсутствующие колонки - нули)
+        """
+        df = df.tail(self.capacity)
+        n = len(df)
+        if "timestamp" in df.columns:
+            timestamps = pd.DatetimeIndex(pd.to_datetime(df["timestamp"]))
+        else:
+            timestamps = pd.DatetimeIndex(df.index)
+        self._start = 0
+        self.size = n
+        self.timestamps[:n] = timestamps.as_unit("ms").asi8
+        for name in self.COLUMNS:
+            self.columns[name][:n] = df[name].to_numpy(dtype=float) if name in df.columns else 0.0
+        self.full_loads += 1
+
+    def update(self, ts: int, values: Dict[str, Any]) -> bool:
+        """
+        Одна свеча за O(1): новее последней - дописывается, та же - заменяется
+        на месте (формирующийся бар). Без фильтра выбросов.
+
+        Returns:
+            False, если свеча старше буфера
+        """
+        last = self.last_timestamp
+        if last is None or ts > last:
+            slot = self._append(ts)
+        elif ts == last:
+            slot = self._slot(self.size - 1)
+        else:
+            slot = self._find(ts)
+            if slot is None:
+                return False
+        for name in self.COLUMNS:
+            self.columns[name][slot] = float(values.get(name) or 0.0)
+        return True
+
+    def merge(self, candles: List[List[Any]]) -> bool:
+        """
+        Дописать новые свечи и заменить известные на месте.
+
+        Returns:
+            False, если ответ не перекрывается с буфером (пропущены свечи -
+            нужна полная загрузка)
+        """
+        if not candles:
+            return True
+        if self.size == 0:
+            self.load(candles)
+            return True
+
+        rows = sorted((int(float(c[0])), c) for c in candles)
+        last = self.last_timestamp
+        if rows[0][0] > last:
+            return False
+
+        # Порядок строк для медианы не важен: пока буфер не заполнен, _start = 0
+        medians = {name: float(np.median(self.columns[name][: self.size])) for name in PRICE_COLUMNS}
+        for ts, candle in rows:
+            if ts > last:
+                slot = self._append(ts)
+                last = ts
+            else:
+                slot = self._find(ts)
+                if slot is None:
+                    continue
+            self._write(slot, candle, medians)
+            self.merged_rows += 1
+        return True
+
+    def _append(self, ts: int) -> int:
+        if self.size < self.capacity:
+            slot = self._slot(self.size)
+            self.size += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+        self.timestamps[slot] = ts
+        return slot
+
+    def _find(self, ts: int) -> Optional[int]:
+        """Позиция свечи ts; поиск с конца - заменяются только последние бары"""
+        steps = (self.last_timestamp - ts) // self.bar_ms
+        if 0 <= steps < self.size:
+            slot = self._slot(self.size - 1 - steps)
+            if self.timestamps[slot] == ts:
+                return slot
+        for i in range(self.size - 1, -1, -1):
+            slot = self._slot(i)
+            stored = self.timestamps[slot]
+            if stored == ts:
+                return slot
+            if stored < ts:
+                return None
+        return None
+
+    def _write(self, slot: int, candle: List[Any], medians: Dict[str, float]) -> None:
+        previous = (slot - 1) % self.capacity
+        has_previous = slot != self._start
+        for offset, name in enumerate(self.COLUMNS, start=1):
+            value = float(candle[offset]) if offset < len(candle) else 0.0
+            median = medians.get(name)
+            if median is not None and not (median / 3 < value < median * 3) and has_previous:
+                replacement = self.columns[name][previous]
+                logger.warning(
+                    f"⚠️  Outlier in new {name}={value} (median={median:.2f}), replaced with {replacement}"
+                )
+                value = replacement
+            self.columns[name][slot] = value
+
+    def arrays(self, last: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Копии timestamps (мс) и колонок последних last свечей по возрастанию времени"""
+        n = self.size if last is None else min(last, self.size)
+        slots = (self._start + np.arange(self.size - n, self.size)) % self.capacity
+        return self.timestamps[slots], {name: self.columns[name][slots] for name in self.COLUMNS}
+
+    def to_frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """OHLCV DataFrame (DatetimeIndex "timestamp" по возрастанию), копия последних last свечей"""
+        timestamps, columns = self.arrays(last)
+        return candles_frame(timestamps, columns)
+
+
+def candles_frame(timestamps: np.ndarray, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Колонки свечей -> OHLCV DataFrame с DatetimeIndex "timestamp" (как klines_to_frame)"""
+    return pd.DataFrame(
+        columns,
+        index=pd.DatetimeIndex(pd.to_datetime(timestamps, unit="ms"), name="timestamp"),
+    )
+
+
+def fetch_klines(
+    market_client: Any,
+    symbol: str,
+    buffer: CandleRingBuffer,
+    now_ms: int,
+    max_retries: int = 2,
+) -> Optional[pd.DataFrame]:
+    """
+    Свечи символа через буфер: полная загрузка (buffer.capacity свечей) или
+    только новые свечи. Если инкрементальный ответ не перекрывается с
+    буфером, выполняется полная загрузка.
+
+    Returns:
+        OHLCV DataFrame всех свечей буфера или None при ошибке запроса
+    """
+    limit = buffer.fetch_limit(now_ms)
+
+    for _ in range(2):
+        try:
+            resp = retry_api_call(
+                market_client.get_kline,
+                symbol,
+                interval=buffer.interval,
+                limit=limit or buffer.capacity,
+                max_retries=max_retries,
+            )
+        except Exception as e:
+            logger.error(f"[{symbol}] Kline retry failed: {e}", exc_info=True)
+            return None
+
+        if not resp or resp.get("retCode") != 0:
+            logger.warning(f"[{symbol}] Failed to fetch kline data: {resp}")
+            return None
+
+        candles = resp.get("result", {}).get("list", [])
+        if not candles:
+            logger.warning(f"[{symbol}] No kline candles received")
+            return None
+
+        if limit is None:
+            buffer.load(candles)
+            break
+        if buffer.merge(candles):
+            break
+
+        logger.info(f"[{symbol}] Kline gap after {buffer.last_timestamp}, reloading {buffer.capacity} candles")
+        limit = None
+
+    return buffer.to_frame()
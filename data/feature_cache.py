@@ -0,0 +1,318 @@
+"""
+Feature Cache: content-addressed кэш результатов FeaturePipeline.
+
+Бэктесты, ParameterSweep, validate_str*.py и cli.py features_test многократно
+пересчитывают признаки на одних и тех же исторических свечах. Кэш хранит
+результат OHLCV-части build_features на диске и отдаёт его повторно.
+
+Ключ кэша:
+- хэш входных OHLCV данных (значения всех колонок, без индекса)
+- параметры пайплайна (kline_interval_minutes, is_testnet, ...)
+- версия кода пайплайна (FEATURE_PIPELINE_VERSION + хэш исходников)
+
+Особенности:
+- Хранение в Parquet (pyarrow), fallback на pickle если pyarrow не установлен
+- LRU-вытеснение по бюджету диска (max_size_mb)
+- Только полное совпадение входа: часть признаков не каузальна (квантильный
+  клиппинг ATR, atr_percentile, vol_regime, OBV, ...) - дописанная свеча
+  меняет значения на всей истории, склейка префикса с хвостом не равна
+  холодному расчёту
+
+Использование:
+    from data.feature_cache import FeatureCache
+    from data.features import FeaturePipeline
+
+    pipeline = FeaturePipeline(cache=FeatureCache())
+    df = pipeline.build_features(df)  # второй вызов на тех же данных - из кэша
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+# Parquet требует pyarrow - если его нет, используем pickle
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+DEFAULT_CACHE_DIR = "storage/feature_cache"
+
+INDEX_FILENAME = "index.json"
+
+
+class FeatureCache:
+    """
+    Дисковый кэш признаков с ключом по содержимому данных.
+
+    Индекс (index.json) хранит для каждой записи размер, число строк
+    и время последнего доступа (LRU).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_size_mb: float = 512.0,
+        code_version: Optional[str] = None,
+    ):
+        """
+        Args:
+            cache_dir: Директория кэша (по умолчанию рядом с БД в storage/)
+            max_size_mb: Бюджет диска, при превышении вытесняются старые записи
+            code_version: Версия кода пайплайна (по умолчанию из data.features)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.code_version = code_version or _default_code_version()
+        self.fmt = "parquet" if _HAS_PYARROW else "pickle"
+
+        self._lock = threading.RLock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+
+        logger.info(
+            f"FeatureCache initialized: dir={self.cache_dir}, "
+            f"budget={max_size_mb:.0f}MB, format={self.fmt}, entries={len(self._index)}"
+        )
+
+    @classmethod
+    def from_config(cls, config) -> Optional["FeatureCache"]:
+        """
+        Создать кэш из секции feature_cache конфигурации.
+
+        Returns:
+            FeatureCache или None если кэш выключен
+        """
+        if not config.get("feature_cache.enabled", True):
+            return None
+        return cls(
+            cache_dir=config.get("feature_cache.dir", DEFAULT_CACHE_DIR),
+            max_size_mb=config.get("feature_cache.max_size_mb", 512.0),
+        )
+
+    # ------------------------------------------------------------------
+    # Ключи
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def row_hashes(df: pd.DataFrame) -> np.ndarray:
+        """Хэш каждой строки входных данных (uint64, без учёта индекса)"""
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    def _params_fingerprint(self, df: pd.DataFrame, params: Dict[str, Any]) -> str:
+        """Отпечаток всего, кроме самих данных: колонки, параметры, версия кода"""
+        payload = json.dumps(
+            {
+                "columns": [str(c) for c in df.columns],
+                "params": params,
+                "code_version": self.code_version,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _make_key(row_hashes: np.ndarray, fingerprint: str) -> str:
+        h = hashlib.blake2b(digest_size=20)
+        h.update(fingerprint.encode())
+        h.update(np.ascontiguousarray(row_hashes).tobytes())
+        return h.hexdigest()
+
+    def make_key(self, df: pd.DataFrame, params: Optional[Dict[str, Any]] = None) -> str:
+        """Ключ кэша для данных + параметров"""
+        return self._make_key(self.row_hashes(df), self._params_fingerprint(df, params or {}))
+
+    # ------------------------------------------------------------------
+    # Основной API
+    # ------------------------------------------------------------------
+
+    def get_or_build(
+        self,
+        df: pd.DataFrame,
+        build_fn: Callable[[pd.DataFrame], pd.DataFrame],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> pd.DataFrame:
+        """
+        Получить признаки из кэша или посчитать через build_fn.
+
+        Args:
+            df: Входные OHLCV данные
+            build_fn: Функция расчёта признаков (df -> df с признаками)
+            params: Параметры пайплайна, влияющие на результат
+
+        Returns:
+            DataFrame с признаками (индекс совпадает с df)
+        """
+        if len(df) == 0:
+            return build_fn(df)
+
+        params = params or {}
+        hashes = self.row_hashes(df)
+        fingerprint = self._params_fingerprint(df, params)
+        key = self._make_key(hashes, fingerprint)
+
+        cached = self._read(key)
+        if cached is not None:
+            self.hits += 1
+            cached.index = df.index
+            logger.debug(f"FeatureCache hit: {key[:12]} ({len(df)} rows)")
+            return cached
+
+        self.misses += 1
+        result = build_fn(df.copy())
+        self._write(key, result, n_rows=len(df))
+        return result
+
+    def clear(self) -> None:
+        """Удалить все записи кэша"""
+        with self._lock:
+            for key in list(self._index.keys()):
+                self._remove(key)
+            self._save_index()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        with self._lock:
+            total_bytes = sum(e.get("bytes", 0) for e in self._index.values())
+            return {
+                "entries": len(self._index),
+                "size_mb": total_bytes / (1024 * 1024),
+                "max_size_mb": self.max_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "format": self.fmt,
+            }
+
+    # ------------------------------------------------------------------
+    # Хранение
+    # ------------------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        ext = "parquet" if self.fmt == "parquet" else "pkl"
+        return self.cache_dir / f"{key}.{ext}"
+
+    def _read(self, key: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = self.cache_dir / entry["file"]
+
+        try:
+            if path.suffix == ".parquet":
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"FeatureCache: failed to read {path.name}: {e}")
+            with self._lock:
+                self._remove(key)
+                self._save_index()
+            return None
+
+        with self._lock:
+            if key in self._index:
+                self._index[key]["last_access"] = time.time()
+                self._save_index()
+        return df
+
+    def _write(
+        self,
+        key: str,
+        df: pd.DataFrame,
+        n_rows: int,
+    ) -> None:
+        path = self._path(key)
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            stored = df.reset_index(drop=True)
+            if self.fmt == "parquet":
+                stored.columns = [str(c) for c in stored.columns]
+                stored.to_parquet(tmp_path, index=False)
+            else:
+                stored.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"FeatureCache: failed to write {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._index[key] = {
+                "file": path.name,
+                "bytes": path.stat().st_size,
+                "n_rows": n_rows,
+                "last_access": time.time(),
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self) -> None:
+        """LRU-вытеснение до бюджета диска (вызывается под lock)"""
+        total = sum(e.get("bytes", 0) for e in self._index.values())
+        if total <= self.max_bytes:
+            return
+
+        by_age: List[str] = sorted(self._index, key=lambda k: self._index[k]["last_access"])
+        for key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key].get("bytes", 0)
+            self._remove(key)
+            logger.debug(f"FeatureCache evicted {key[:12]}")
+
+    def _remove(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry:
+            (self.cache_dir / entry["file"]).unlink(missing_ok=True)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        path = self.cache_dir / INDEX_FILENAME
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"FeatureCache index unreadable, starting empty: {e}")
+            return {}
+        # Записи без файла на диске - мусор после сбоя
+        return {k: v for k, v in index.items() if (self.cache_dir / v["file"]).exists()}
+
+    def _save_index(self) -> None:
+        path = self.cache_dir / INDEX_FILENAME
+        tmp_path = path.with_name(INDEX_FILENAME + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+
+
+def _default_code_version() -> str:
+    """
+    Версия кода пайплайна: FEATURE_PIPELINE_VERSION + хэш исходников модулей
+    признаков, чтобы правка индикатора инвалидировала кэш автоматически.
+    """
+    from data import features, indicators, column_normalizer
+
+    h = hashlib.blake2b(digest_size=8)
+    for module in (features, indicators, column_normalizer):
+        try:
+            h.update(Path(module.__file__).read_bytes())
+        except OSError:
+            h.update(module.__name__.encode())
+    return f"{features.FEATURE_PIPELINE_VERSION}-{h.hexdigest()}"
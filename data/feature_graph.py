@@ -0,0 +1,99 @@
+"""
+Граф зависимостей признаков FeaturePipeline.
+
+Каждый узел считает группу колонок (outputs) из уже посчитанных колонок
+(depends_on) и входных OHLCV. Узлы перечислены в порядке полного расчёта,
+он же топологический: зависимость узла всегда объявлена раньше него.
+
+    graph = FeatureGraph(nodes)
+    plan = graph.resolve({"atr_percentile"})   # [atr, atr_percentile]
+    df = graph.run(df, plan, params)
+
+resolve() возвращает транзитивное замыкание узлов, нужных для запрошенных
+колонок, в порядке полного расчёта (колонки в df идут в том же порядке,
+что и при полном расчёте). Колонки, которые граф не производит (OHLCV,
+timestamp, orderflow из стакана), считаются внешними и пропускаются.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+
+NodeFn = Callable[[pd.DataFrame, Dict[str, Any]], pd.DataFrame]
+
+
+@dataclass(frozen=True)
+class FeatureNode:
+    """Узел графа: функция расчёта группы колонок"""
+
+    name: str
+    outputs: Tuple[str, ...]
+    compute: NodeFn
+    depends_on: Tuple[str, ...] = ()
+
+
+class FeatureGraph:
+    """DAG узлов признаков с разрешением транзитивных зависимостей"""
+
+    def __init__(self, nodes: Sequence[FeatureNode]):
+        self.nodes: Tuple[FeatureNode, ...] = tuple(nodes)
+        self._producers: Dict[str, FeatureNode] = {}
+        self._positions: Dict[str, int] = {}
+
+        for position, node in enumerate(self.nodes):
+            if node.name in self._positions:
+                raise ValueError(f"Duplicate feature node: {node.name}")
+            for column in node.depends_on:
+                producer = self._producers.get(column)
+                if producer is None and self._is_produced_later(column, position):
+                    raise ValueError(f"Feature node {node.name} depends on {column} computed after it")
+            self._positions[node.name] = position
+            for column in node.outputs:
+                if column in self._producers:
+                    raise ValueError(f"Column {column} produced by {self._producers[column].name} and {node.name}")
+                self._producers[column] = node
+
+    def _is_produced_later(self, column: str, position: int) -> bool:
+        return any(column in node.outputs for node in self.nodes[position + 1:])
+
+    @property
+    def columns(self) -> FrozenSet[str]:
+        """Все колонки, которые производит граф"""
+        return frozenset(self._producers)
+
+    def producer(self, column: str) -> Optional[FeatureNode]:
+        return self._producers.get(column)
+
+    def resolve(self, columns: Optional[Iterable[str]] = None) -> List[FeatureNode]:
+        """
+        Узлы, нужные для колонок columns, с зависимостями.
+
+        Args:
+            columns: Требуемые колонки (None - все узлы графа)
+
+        Returns:
+            Узлы в порядке полного расчёта
+        """
+        if columns is None:
+            return list(self.nodes)
+
+        needed = set()
+        stack = [self._producers[c] for c in columns if c in self._producers]
+        while stack:
+            node = stack.pop()
+            if node.name in needed:
+                continue
+            needed.add(node.name)
+            stack.extend(self._producers[c] for c in node.depends_on if c in self._producers)
+
+        return [node for node in self.nodes if node.name in needed]
+
+    @staticmethod
+    def run(df: pd.DataFrame, nodes: Iterable[FeatureNode], params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Посчитать узлы по порядку"""
+        params = params or {}
+        for node in nodes:
+            df = node.compute(df, params)
+        return df
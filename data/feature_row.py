@@ -0,0 +1,143 @@
+"""
+Компактный снимок последнего бара DataFrame признаков.
+
+df.iloc[-1] на фрейме с 80+ колонками смешанных типов материализует новый
+pandas Series (~80 мкс) на каждый вызов, а поиск по нему идёт через Index.
+FeatureRow строится один раз за тик: значения последней строки - один
+object-массив, смещения колонок - dict, общий для всех фреймов с тем же
+набором колонок.
+
+    row = FeatureRow.latest(df, features)
+    row["close"], row.get("adx", 0), row.ema_20, "vwap" in row
+
+Интерфейс повторяет нужную часть pd.Series (get, [], in, атрибуты), поэтому
+стратегии и MetaLayer используют его вместо df.iloc[-1] без других изменений.
+Снимок только для чтения и привязан к исходному фрейму: если фрейм заменён,
+удлинён или получил новые колонки, latest() строит новый. Изменение значений
+на месте (df.loc[...] = ...) не отслеживается - после него нужен FeatureRow(df).
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+
+FEATURE_ROW_KEY = "feature_row"
+
+_MISSING = object()
+
+# Смещения колонок по кортежу имён: набор колонок пайплайна стабилен между тиками
+_offsets_cache: Dict[Tuple, Dict[Any, int]] = {}
+_offsets_lock = threading.Lock()
+
+# Последний построенный снимок (однослотовый кэш для вызывающих без features)
+_last_row: Optional["FeatureRow"] = None
+
+
+def _column_offsets(columns: pd.Index) -> Dict[Any, int]:
+    key = tuple(columns)
+    offsets = _offsets_cache.get(key)
+    if offsets is None:
+        offsets = {}
+        for i, name in enumerate(key):
+            offsets.setdefault(name, i)  # дубликаты колонок: первая, как у Series.get
+        with _offsets_lock:
+            if len(_offsets_cache) > 64:
+                _offsets_cache.clear()
+            _offsets_cache[key] = offsets
+    return offsets
+
+
+class FeatureRow:
+    """Read-only снимок последней строки DataFrame признаков"""
+
+    __slots__ = ("_values", "_offsets", "_name", "_length", "_columns", "_source")
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: DataFrame признаков (непустой)
+        """
+        if len(df) == 0:
+            raise IndexError("FeatureRow requires a non-empty DataFrame")
+        set_slot = object.__setattr__
+        set_slot(self, "_values", df.iloc[-1:].to_numpy(dtype=object)[0])
+        set_slot(self, "_offsets", _column_offsets(df.columns))
+        set_slot(self, "_name", df.index[-1])
+        set_slot(self, "_length", len(df))
+        set_slot(self, "_columns", df.columns)
+        set_slot(self, "_source", weakref.ref(df))
+
+    @classmethod
+    def latest(cls, df: pd.DataFrame, features: Optional[Dict[str, Any]] = None) -> "FeatureRow":
+        """
+        Снимок последнего бара df: из features["feature_row"] или кэша, если он
+        построен для этого же фрейма, иначе новый.
+        """
+        global _last_row
+
+        if features:
+            row = features.get(FEATURE_ROW_KEY)
+            if row is not None and row.matches(df):
+                return row
+        row = _last_row
+        if row is not None and row.matches(df):
+            return row
+        row = cls(df)
+        _last_row = row
+        return row
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """Построен ли снимок для этого фрейма в его текущем виде"""
+        return (
+            self._source() is df
+            and len(df) == self._length
+            and df.columns is self._columns
+            and df.index[-1] == self._name
+        )
+
+    @property
+    def name(self) -> Any:
+        """Метка индекса бара (как Series.name у df.iloc[-1])"""
+        return self._name
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        offset = self._offsets.get(key)
+        if offset is None:
+            return default
+        return self._values[offset]
+
+    def keys(self) -> Iterator[Any]:
+        return iter(self._offsets)
+
+    def to_dict(self) -> Dict[Any, Any]:
+        return {key: self._values[offset] for key, offset in self._offsets.items()}
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(f"FeatureRow has no column {name!r}")
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("FeatureRow is read-only")
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __repr__(self) -> str:
+        return f"FeatureRow(name={self._name!r}, columns={len(self._offsets)})"
+
@@ -19,6 +19,13 @@ Feature pipeline: агрегация всех признаков для стра
 
 7. Data Quality
 
+
+Блоки 1, 2, 3, 7 разбиты на узлы графа зависимостей (data.feature_graph).
+
+set_required_features() ограничивает расчёт колонками, которые читают
+
+потребители, и их зависимостями (atr_percentile -> atr_percent -> atr).
+
 """
 
 
@@ -26,18 +33,101 @@ import pandas as pd
 
 import numpy as np
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 from data.indicators import TechnicalIndicators
 
+from data.feature_graph import FeatureGraph, FeatureNode
+
 from data.column_normalizer import normalize_column_names, ensure_required_columns
 
+from data.feature_row import FeatureRow
+
 from logger import setup_logger
 
+from utils import metrics
+
 
 logger = setup_logger(__name__)
 
 
+FEATURE_BUILD_SECONDS = metrics.histogram(
+    "feature_build_duration_seconds", "Длительность FeaturePipeline.build_features"
+)
+
+
+# Версия логики признаков: увеличивать при изменении формул (инвалидирует FeatureCache)
+
+FEATURE_PIPELINE_VERSION = "1"
+
+
+# Колонки, которые build_features гарантирует всегда (считаются при любом наборе требований)
+
+REQUIRED_COLUMNS = (
+
+    "close",
+
+    "adx",
+
+    "rsi",
+
+    "atr",
+
+    "atr_percent",
+
+    "ema_10",
+
+    "ema_20",
+
+    "ema_50",
+
+    "ema_200",
+
+    "sma_20",
+
+    "sma_50",
+
+    "volume_zscore",
+
+    "realized_vol",
+
+)
+
+
+BOLLINGER_COLUMNS = ("BBU_20_2.0", "BBM_20_2.0", "BBL_20_2.0")
+
+
+# Узлы графа по блокам (для calculate_*_features)
+
+TREND_NODES = ("ema", "sma", "ema_20_slope", "adx", "rsi", "market_structure", "price_above_ema")
+
+VOLATILITY_NODES = (
+
+    "atr",
+
+    "realized_vol",
+
+    "bollinger",
+
+    "bb_width_pct_change",
+
+    "atr_slope",
+
+    "bb_width_percentile",
+
+    "atr_percentile",
+
+    "bb_expansion",
+
+    "atr_expansion",
+
+    "vol_regime",
+
+)
+
+VOLUME_NODES = ("volume_stats", "obv", "vwap", "volume_ratio", "volume_percentile")
+
+
 class FeaturePipeline:
 
     """
@@ -46,11 +136,216 @@ class FeaturePipeline:
 
     """
 
-    def __init__(self):
+    def __init__(self, cache=None):
+        """
+
+        Args:
+
+            cache: FeatureCache для переиспользования OHLCV-признаков (опционально)
+
+        """
 
         self.indicators = TechnicalIndicators()
 
-        logger.info("FeaturePipeline initialized")
+        self.cache = cache
+
+        self.last_row: Optional[FeatureRow] = None
+
+        # Граф признаков: по умолчанию считаются все узлы (см. set_required_features)
+
+        self.graph = FeatureGraph(self._feature_nodes())
+
+        self.required_features = None
+
+        self._active_nodes: List[FeatureNode] = list(self.graph.nodes)
+
+        self._last_params: Dict[str, Any] = {"kline_interval_minutes": 1, "is_testnet": True}
+
+        logger.info(f"FeaturePipeline initialized (cache={'on' if cache else 'off'})")
+
+    def _feature_nodes(self) -> List[FeatureNode]:
+        """
+
+        Узлы графа признаков в порядке полного расчёта (блоки 1, 2, 3, 7).
+
+        """
+
+        return [
+
+            # 1. Trend & Structure
+
+            FeatureNode("ema", ("ema_10", "ema_20", "ema_50", "ema_200"), self._compute_ema),
+
+            FeatureNode("sma", ("sma_20", "sma_50"), self._compute_sma),
+
+            FeatureNode("ema_20_slope", ("ema_20_slope",), self._compute_ema_slope, ("ema_20",)),
+
+            FeatureNode("adx", ("adx", "dmp", "dmn"), self._compute_adx),
+
+            FeatureNode("rsi", ("rsi",), self._compute_rsi),
+
+            FeatureNode("market_structure", ("swing_high", "swing_low", "structure"), self._compute_market_structure),
+
+            FeatureNode(
+
+                "price_above_ema",
+
+                ("price_above_ema20", "price_above_ema50"),
+
+                self._compute_price_above_ema,
+
+                ("ema_20", "ema_50"),
+
+            ),
+
+            # 2. Volatility
+
+            FeatureNode("atr", ("atr", "atr_percent"), self._compute_atr),
+
+            FeatureNode("realized_vol", ("returns", "realized_vol"), self._compute_realized_vol),
+
+            FeatureNode("bollinger", BOLLINGER_COLUMNS + ("bb_width", "bb_percent"), self._compute_bollinger),
+
+            FeatureNode("bb_width_pct_change", ("bb_width_pct_change",), self._compute_bb_width_pct_change, ("bb_width",)),
+
+            FeatureNode("atr_slope", ("atr_slope",), self._compute_atr_slope, ("atr",)),
+
+            FeatureNode("bb_width_percentile", ("bb_width_percentile",), self._compute_bb_width_percentile, ("bb_width",)),
+
+            FeatureNode("atr_percentile", ("atr_percentile",), self._compute_atr_percentile, ("atr_percent",)),
+
+            FeatureNode("bb_expansion", ("bb_expansion",), self._compute_bb_expansion, ("bb_width",)),
+
+            FeatureNode("atr_expansion", ("atr_expansion",), self._compute_atr_expansion, ("atr",)),
+
+            FeatureNode("vol_regime", ("vol_regime",), self._compute_vol_regime, ("atr_percent",)),
+
+            # 3. Volume
+
+            FeatureNode("volume_stats", ("volume_sma", "volume_zscore", "volume_impulse"), self._compute_volume_stats),
+
+            FeatureNode("obv", ("obv",), self._compute_obv),
+
+            FeatureNode("vwap", ("vwap", "vwap_distance"), self._compute_vwap),
+
+            FeatureNode("volume_ratio", ("volume_ratio",), self._compute_volume_ratio, ("volume_sma",)),
+
+            FeatureNode("volume_percentile", ("volume_percentile",), self._compute_volume_percentile),
+
+            # 7. Data quality
+
+            FeatureNode(
+
+                "anomalies",
+
+                ("anomaly_wick", "anomaly_low_volume", "anomaly_gap", "has_anomaly"),
+
+                self._compute_anomalies,
+
+            ),
+
+            FeatureNode(
+
+                "liquidation_wicks",
+
+                ("liquidation_wick", "candle_range_atr", "wick_ratio"),
+
+                self._compute_liquidation_wicks,
+
+                ("atr",),
+
+            ),
+
+        ]
+
+    def _run_block(self, df: pd.DataFrame, names: Tuple[str, ...], params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+
+        return self.graph.run(df, [node for node in self.graph.nodes if node.name in names], params)
+
+    def set_required_features(self, columns: Optional[Iterable[str]] = None) -> bool:
+        """
+
+        Ограничить расчёт колонками, которые читают потребители (стратегии,
+
+        RegimeScorer, NoTradeZones), и их зависимостями.
+
+
+        Args:
+
+            columns: Требуемые колонки (None - считать все признаки)
+
+
+        Returns:
+
+            True, если набор узлов изменился
+
+        """
+
+        if columns is None:
+
+            required = None
+
+            nodes = list(self.graph.nodes)
+
+        else:
+
+            required = frozenset(columns) | frozenset(REQUIRED_COLUMNS)
+
+            nodes = self.graph.resolve(required)
+
+        changed = [node.name for node in nodes] != [node.name for node in self._active_nodes]
+
+        self.required_features = required
+
+        self._active_nodes = nodes
+
+        if changed:
+
+            skipped = [node.name for node in self.graph.nodes if node not in nodes]
+
+            logger.info(
+
+                f"Feature DAG: {len(nodes)}/{len(self.graph.nodes)} nodes active"
+
+                + (f", skipped: {', '.join(skipped)}" if skipped else "")
+
+            )
+
+        return changed
+
+    @property
+    def active_nodes(self) -> List[str]:
+
+        return [node.name for node in self._active_nodes]
+
+    def extend_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+
+        Досчитать на уже построенном фрейме активные узлы, колонок которых в нём нет
+
+        (например, после включения стратегии в середине тика). Фрейм меняется на месте.
+
+        """
+
+        missing = [node for node in self._active_nodes if not set(node.outputs) <= set(df.columns)]
+
+        if not missing or len(df) == 0:
+
+            return df
+
+        logger.debug(f"Feature DAG: computing {[node.name for node in missing]} on demand")
+
+        result = self.graph.run(df, missing, self._last_params)
+
+        if result is not df:
+
+            # Узел вернул новый фрейм (pd.concat) - переносим колонки в исходный
+
+            for column in result.columns.difference(df.columns, sort=False):
+
+                df[column] = result[column]
+
+        return df
 
     def calculate_trend_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -74,29 +369,39 @@ class FeaturePipeline:
 
         logger.debug("Calculating trend features...")
 
-        # EMA
+        return self._run_block(df, TREND_NODES)
+
+    def _compute_ema(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        df = self.indicators.calculate_ema(df, periods=[10, 20, 50, 200])
+        return self.indicators.calculate_ema(df, periods=[10, 20, 50, 200])
 
-        # SMA
+    def _compute_sma(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        df = self.indicators.calculate_sma(df, periods=[20, 50])
+        return self.indicators.calculate_sma(df, periods=[20, 50])
+
+    def _compute_ema_slope(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
         # Slope EMA (угол наклона)
 
         df["ema_20_slope"] = df["ema_20"].diff(5) / 5  # Изменение за 5 периодов
 
-        # ADX
+        return df
+
+    def _compute_adx(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        df = self.indicators.calculate_adx(df)
+        return self.indicators.calculate_adx(df)
+
+    def _compute_rsi(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
         # RSI (Relative Strength Index) - для импульса и mean reversion
 
-        df = self.indicators.calculate_rsi(df)
+        return self.indicators.calculate_rsi(df)
+
+    def _compute_market_structure(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        # Market structure
+        return self.indicators.detect_market_structure(df)
 
-        df = self.indicators.detect_market_structure(df)
+    def _compute_price_above_ema(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
         # Тренд: цена относительно EMA
 
@@ -126,9 +431,13 @@ class FeaturePipeline:
 
         logger.debug("Calculating volatility features...")
 
-        # ATR
+        return self._run_block(df, VOLATILITY_NODES)
+
+    def _compute_atr(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
+        return self.indicators.calculate_atr(df)
 
-        df = self.indicators.calculate_atr(df)
+    def _compute_realized_vol(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
         # Реализованная волатильность (rolling std returns)
 
@@ -136,9 +445,13 @@ class FeaturePipeline:
 
         df["realized_vol"] = df["returns"].rolling(20).std() * np.sqrt(20)  # 20-период
 
-        # Bollinger Bands
+        return df
+
+    def _compute_bollinger(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        df = self.indicators.calculate_bollinger_bands(df)
+        return self.indicators.calculate_bollinger_bands(df)
+
+    def _compute_bb_width_pct_change(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
         # STR-004: BB width change (для определения сужения)
 
@@ -150,6 +463,10 @@ class FeaturePipeline:
 
             df["bb_width_pct_change"] = 0.0
 
+        return df
+
+    def _compute_atr_slope(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
         # STR-004: ATR slope (рост волатильности)
 
         if "atr" in df.columns:
@@ -160,6 +477,10 @@ class FeaturePipeline:
 
             df["atr_slope"] = 0.0
 
+        return df
+
+    def _compute_bb_width_percentile(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
         # STR-006: Squeeze detection (BB width percentile)
 
         if "bb_width" in df.columns:
@@ -184,6 +505,10 @@ class FeaturePipeline:
 
             df["bb_width_percentile"] = 0.0
 
+        return df
+
+    def _compute_atr_percentile(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
         # STR-006: ATR percentile для squeeze
 
         if "atr_percent" in df.columns:
@@ -208,6 +533,10 @@ class FeaturePipeline:
 
             df["atr_percentile"] = 0.0
 
+        return df
+
+    def _compute_bb_expansion(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
         # STR-006: Expansion detection (рост после сжатия)
 
         # BB expansion: рост BB width за последние 3 бара
@@ -220,6 +549,10 @@ class FeaturePipeline:
 
             df["bb_expansion"] = 0.0
 
+        return df
+
+    def _compute_atr_expansion(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
         # ATR expansion: рост ATR за последние 3 бара
 
         if "atr" in df.columns:
@@ -230,6 +563,10 @@ class FeaturePipeline:
 
             df["atr_expansion"] = 0.0
 
+        return df
+
+    def _compute_vol_regime(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
         # Volatility regime классификация
 
         atr_mean = df["atr_percent"].rolling(100).mean()
@@ -264,17 +601,21 @@ class FeaturePipeline:
 
         logger.debug("Calculating volume features...")
 
-        # Volume features
+        return self._run_block(df, VOLUME_NODES)
+
+    def _compute_volume_stats(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
+        return self.indicators.calculate_volume_features(df)
 
-        df = self.indicators.calculate_volume_features(df)
+    def _compute_obv(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        # OBV
+        return self.indicators.calculate_obv(df)
 
-        df = self.indicators.calculate_obv(df)
+    def _compute_vwap(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
-        # VWAP
+        return self.indicators.calculate_vwap(df)
 
-        df = self.indicators.calculate_vwap(df)
+    def _compute_volume_ratio(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
 
         # STR-006: Volume confirmation features
 
@@ -288,7 +629,19 @@ class FeaturePipeline:
 
             df["volume_ratio"] = df["volume"] / df["volume_sma"].replace(0, 1)
 
-            # Volume percentile (в топ 20% за последние 100 баров)
+        else:
+
+            df["volume_sma"] = 0.0
+
+            df["volume_ratio"] = 1.0
+
+        return df
+
+    def _compute_volume_percentile(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
+        # Volume percentile (в топ 20% за последние 100 баров)
+
+        if "volume" in df.columns:
 
             df["volume_percentile"] = (
 
@@ -308,10 +661,6 @@ class FeaturePipeline:
 
         else:
 
-            df["volume_sma"] = 0.0
-
-            df["volume_ratio"] = 1.0
-
             df["volume_percentile"] = 0.0
 
         return df
@@ -696,6 +1045,34 @@ class FeaturePipeline:
 
         return df
 
+    def _compute_anomalies(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
+        return self.detect_data_anomalies(
+
+            df, kline_interval_minutes=params["kline_interval_minutes"], is_testnet=params["is_testnet"]
+
+        )
+
+    def _compute_liquidation_wicks(self, df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+
+        # STR-002: Liquidation wicks detection
+
+        return self.detect_liquidation_wicks(df)
+
+    def _build_candle_features(
+
+        self, df: pd.DataFrame, kline_interval_minutes: int, is_testnet: bool
+
+    ) -> pd.DataFrame:
+        """Блоки, которые считаются только из OHLCV (trend, volatility, volume, data quality)"""
+
+        # Активные узлы графа: все или замыкание требований потребителей
+
+        params = {"kline_interval_minutes": kline_interval_minutes, "is_testnet": is_testnet}
+
+        return self.graph.run(df, self._active_nodes, params)
+
+    @FEATURE_BUILD_SECONDS.timed()
     def build_features(
 
         self,
@@ -745,25 +1122,31 @@ class FeaturePipeline:
 
         logger.info("Building features...")
 
-        # 1. Trend
+        self._last_params = {"kline_interval_minutes": kline_interval_minutes, "is_testnet": is_testnet}
+
+        # Блоки 1, 2, 3, 7 зависят только от свечей - их можно брать из кэша
+
+        if self.cache is not None:
+
+            cache_params = dict(self._last_params)
 
-        df = self.calculate_trend_features(df)
+            if self.required_features is not None:
 
-        # 2. Volatility
+                cache_params["nodes"] = self.active_nodes
 
-        df = self.calculate_volatility_features(df)
+            df = self.cache.get_or_build(
 
-        # 3. Volume
+                df,
 
-        df = self.calculate_volume_features(df)
+                lambda frame: self._build_candle_features(frame, kline_interval_minutes, is_testnet),
 
-        # 7. Data quality
+                params=cache_params,
 
-        df = self.detect_data_anomalies(df, kline_interval_minutes=kline_interval_minutes, is_testnet=is_testnet)
+            )
 
-        # 7b. STR-002: Liquidation wicks detection
+        else:
 
-        df = self.detect_liquidation_wicks(df)
+            df = self._build_candle_features(df, kline_interval_minutes, is_testnet)
 
         # 4. Order Flow (если есть стакан)
 
@@ -805,37 +1188,13 @@ class FeaturePipeline:
 
         # Гарантировать наличие обязательных колонок
 
-        required_columns = [
-
-            "close",
-
-            "adx",
-
-            "rsi",
-
-            "atr",
-
-            "atr_percent",
-
-            "ema_10",
+        df = ensure_required_columns(df, list(REQUIRED_COLUMNS))
 
-            "ema_20",
+        # Снимок последнего бара строится один раз за тик и переиспользуется
 
-            "ema_50",
-
-            "ema_200",
-
-            "sma_20",
-
-            "sma_50",
-
-            "volume_zscore",
-
-            "realized_vol",
-
-        ]
+        # MetaLayer, NoTradeZones, RegimeScorer и стратегиями (FeatureRow.latest)
 
-        df = ensure_required_columns(df, required_columns)
+        self.last_row = FeatureRow.latest(df) if len(df) else None
 
         logger.info(f"Features built: {len(df.columns)} columns, {len(df)} rows")
 
@@ -0,0 +1,371 @@
+"""
+Общий сервис рыночных данных и признаков для MultiSymbolBot.
+
+Без него каждый TradingBot в своём потоке делает ~7 REST вызовов за тик и
+считает FeaturePipeline сам - N копий pandas-работы конкурируют за GIL.
+Сервис делает один проход на все символы:
+
+1. Один get_tickers(category="linear") на все инструменты: lastPrice для
+   sanity check стакана и деривативы (markPrice, indexPrice, openInterest,
+   fundingRate) вместо четырёх вызовов на символ
+2. Свечи и стаканы символов - параллельно (I/O отпускает GIL)
+3. Признаки - одним FeaturePipeline в одном потоке: свечи без изменений
+   берутся из in-memory кэша, граф считает объединение требований ботов
+4. Результат - стек (symbol × time × feature) float64 (FeatureTensor);
+   бот получает свой срез как DataFrame
+
+    service = SharedMarketDataService(market_client, ["BTCUSDT", "ETHUSDT"], config)
+    data = service.get_market_data("BTCUSDT")   # формат TradingBot._fetch_market_data
+    service.tensor.cross_section("atr_percent")  # последние значения по символам
+
+Снимок обновляется не чаще max_age_seconds: боты, пришедшие в пределах
+окна, получают один и тот же проход.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data.candle_buffer import CandleRingBuffer, fetch_klines
+from data.features import FeaturePipeline
+from data.timeframe_cache import DEFAULT_CAPACITY as MTF_CAPACITY, mtf_fetch_intervals
+from logger import setup_logger
+from utils import metrics, retry_api_call
+
+
+logger = setup_logger(__name__)
+
+
+REFRESH_SECONDS = metrics.histogram(
+    "shared_market_data_refresh_seconds", "Длительность прохода SharedMarketDataService по всем символам"
+)
+
+
+
+class MemoryFeatureCache:
+    """
+    In-memory аналог FeatureCache.get_or_build: результат по хэшу свечей.
+
+    Символ, у которого с прошлого прохода не изменилась ни одна свеча,
+    не пересчитывается.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+
+    @staticmethod
+    def _key(df: pd.DataFrame, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_or_build(
+        self,
+        df: pd.DataFrame,
+        build_fn: Callable[[pd.DataFrame], pd.DataFrame],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> pd.DataFrame:
+        key = self._key(df, params or {})
+        cached = self._entries.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return cached.copy()
+
+        self.misses += 1
+        result = build_fn(df.copy())
+        self._entries[key] = result.copy()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+
+class FeatureTensor:
+    """
+    Признаки всех символов одним массивом (symbol × time × feature).
+
+    Ряды выровнены по правому краю (последний бар - последний индекс времени),
+    более короткие истории дополнены NaN слева. Нечисловые колонки и исходные
+    dtype хранятся отдельно и восстанавливаются в frame().
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        self.symbols: List[str] = list(frames)
+        self.columns: List[str] = []
+        seen: Set[str] = set()
+        self._numeric: Dict[str, List[str]] = {}
+        self._extras: Dict[str, pd.DataFrame] = {}
+        self._dtypes: Dict[str, Dict[str, Any]] = {}
+        self._order: Dict[str, List[str]] = {}
+        self._indexes: Dict[str, pd.Index] = {}
+
+        for symbol, frame in frames.items():
+            numeric = [c for c in frame.columns if frame[c].dtype.kind in "biuf"]
+            self._numeric[symbol] = numeric
+            self._extras[symbol] = frame[[c for c in frame.columns if frame[c].dtype.kind not in "biuf"]]
+            self._dtypes[symbol] = {c: frame[c].dtype for c in numeric if frame[c].dtype != np.float64}
+            self._order[symbol] = list(frame.columns)
+            self._indexes[symbol] = frame.index
+            for column in numeric:
+                if column not in seen:
+                    seen.add(column)
+                    self.columns.append(column)
+
+        self._column_index = {column: i for i, column in enumerate(self.columns)}
+        length = max((len(frame) for frame in frames.values()), default=0)
+        self.values = np.full((len(self.symbols), length, len(self.columns)), np.nan)
+
+        for i, (symbol, frame) in enumerate(frames.items()):
+            if len(frame) == 0:
+                continue
+            numeric = self._numeric[symbol]
+            positions = [self._column_index[c] for c in numeric]
+            self.values[i][length - len(frame):, positions] = frame[numeric].to_numpy(dtype=float)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._indexes
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Срез символа как DataFrame (копия, с исходными колонками и dtype)"""
+        i = self.symbols.index(symbol)
+        index = self._indexes[symbol]
+        names = self._numeric[symbol]
+        block = self.values[i, self.values.shape[1] - len(index):, :][:, [self._column_index[c] for c in names]]
+
+        df = pd.DataFrame(block, index=index, columns=names)
+        if self._dtypes[symbol]:
+            df = df.astype(self._dtypes[symbol])
+        extras = self._extras[symbol]
+        if len(extras.columns):
+            df = pd.concat([df, extras], axis=1)
+        return df[self._order[symbol]]
+
+    def cross_section(self, column: str) -> pd.Series:
+        """Значение колонки на последнем баре по всем символам"""
+        return pd.Series(self.values[:, -1, self._column_index[column]], index=self.symbols, name=column)
+
+
+class SharedMarketDataService:
+    """Один проход REST + признаки на все символы MultiSymbolBot"""
+
+    def __init__(
+        self,
+        market_client,
+        symbols: Sequence[str],
+        config=None,
+        testnet: bool = True,
+        pipeline: Optional[FeaturePipeline] = None,
+        required_features: Optional[Callable[[], Optional[Set[str]]]] = None,
+        mtf_intervals: Sequence[str] = (),
+        max_age_seconds: Optional[float] = None,
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            market_client: MarketDataClient (общий для всех символов)
+            symbols: Символы
+            config: ConfigManager (market_data.* как у TradingBot)
+            testnet: Пороги аномалий testnet
+            pipeline: FeaturePipeline (по умолчанию - с in-memory кэшем)
+            required_features: Объединение требований ботов к признакам (None - все)
+            mtf_intervals: Интервалы MTF для timeframe_cache ботов
+            max_age_seconds: Возраст снимка, после которого проход повторяется
+            max_workers: Параллельные REST запросы свечей и стаканов
+        """
+        get = config.get if config is not None else (lambda key, default=None: default)
+
+        self.market_client = market_client
+        self.symbols = list(symbols)
+        self.testnet = testnet
+        self.kline_interval = str(get("market_data.kline_interval", "60"))
+        self.kline_limit = int(get("market_data.kline_limit", 500))
+        self.max_candles = int(get("market_data.max_candles_for_indicators", 200))
+        self.orderbook_sanity_max_deviation_pct = float(get("market_data.orderbook_sanity_max_deviation_pct", 3.0))
+        self.max_age_seconds = float(
+            max_age_seconds if max_age_seconds is not None else get("market_data.shared_max_age_seconds", 5)
+        )
+        self.pipeline = pipeline or FeaturePipeline(cache=MemoryFeatureCache(max_entries=4 * len(self.symbols)))
+        self.required_features = required_features
+        self.mtf_intervals = tuple(mtf_intervals)
+        self._mtf_fetch_intervals = mtf_fetch_intervals(self.mtf_intervals, self.kline_interval)
+        self._mtf_buffers: Dict[Tuple[str, str], CandleRingBuffer] = {}
+
+        self.incremental_klines = bool(get("market_data.incremental_klines", True))
+        self._candle_buffers: Dict[str, CandleRingBuffer] = {}
+
+        self.tensor: Optional[FeatureTensor] = None
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.symbols))), thread_name_prefix="md")
+
+        logger.info(
+            f"SharedMarketDataService initialized for {len(self.symbols)} symbols "
+            f"(interval={self.kline_interval}, max_age={self.max_age_seconds}s)"
+        )
+
+    # ==================== Публичный API ====================
+
+    def get_market_data(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Данные символа в формате TradingBot._fetch_market_data плюс "features"
+        (DataFrame с признаками) и "mtf_frames" (свечи для TimeframeCache). Проход по всем символам
+        выполняется, если снимок старше max_age_seconds.
+        """
+        with self._lock:
+            if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.max_age_seconds:
+                self.refresh()
+            snapshot = self._snapshots.get(symbol)
+            tensor = self.tensor
+
+        if snapshot is None or tensor is None or symbol not in tensor:
+            return None
+        # Копии: бот дописывает в features symbol и снимок бара, MetaLayer - недостающие колонки
+        return dict(
+            snapshot,
+            orderflow_features=dict(snapshot["orderflow_features"]),
+            features=tensor.frame(symbol),
+        )
+
+    @REFRESH_SECONDS.timed()
+    def refresh(self) -> None:
+        """Один проход: тикеры, свечи и стаканы, признаки всех символов"""
+        tickers = self._fetch_tickers()
+        raw = dict(zip(self.symbols, self._pool.map(self._fetch_symbol, self.symbols)))
+
+        if self.required_features is not None:
+            self.pipeline.set_required_features(self.required_features())
+
+        snapshots: Dict[str, Dict[str, Any]] = {}
+        frames: Dict[str, pd.DataFrame] = {}
+        for symbol in self.symbols:
+            symbol_data = raw[symbol]
+            if symbol_data is None:
+                continue
+            try:
+                snapshots[symbol], frames[symbol] = self._build_symbol(symbol, symbol_data, tickers.get(symbol))
+            except Exception as e:
+                logger.error(f"[{symbol}] Shared feature build failed: {e}", exc_info=True)
+
+        self.tensor = FeatureTensor(frames)
+        self._snapshots = snapshots
+        self._refreshed_at = time.monotonic()
+        logger.debug(f"Shared market data refreshed: {len(frames)}/{len(self.symbols)} symbols")
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    # ==================== REST ====================
+
+    def _fetch_tickers(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            resp = retry_api_call(self.market_client.get_tickers, category="linear", max_retries=2)
+        except Exception as e:
+            logger.warning(f"Batched tickers fetch failed: {e}")
+            return {}
+        if not resp or resp.get("retCode") != 0:
+            return {}
+        wanted = set(self.symbols)
+        return {t["symbol"]: t for t in resp.get("result", {}).get("list", []) if t.get("symbol") in wanted}
+
+    def _fetch_symbol(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Свечи, стакан и MTF свечи символа (выполняется в пуле потоков)"""
+        df = self._fetch_candles(symbol)
+        if df is None:
+            return None
+
+        orderbook = None
+        orderbook_resp = retry_api_call(self.market_client.get_orderbook, symbol, limit=50, max_retries=2)
+        if orderbook_resp and orderbook_resp.get("retCode") == 0:
+            result = orderbook_resp.get("result", {})
+            orderbook = {"bids": result.get("b", []), "asks": result.get("a", [])}
+
+        # MTF: только интервалы, которые не агрегируются из основного (1m), инкрементально
+        mtf_frames = {}
+        for interval in self._mtf_fetch_intervals:
+            buffer = self._mtf_buffers.get((symbol, interval))
+            if buffer is None:
+                buffer = self._mtf_buffers[(symbol, interval)] = CandleRingBuffer(MTF_CAPACITY, interval)
+            try:
+                tf_df = fetch_klines(self.market_client, symbol, buffer, int(time.time() * 1000), max_retries=1)
+            except Exception as e:
+                logger.debug(f"[{symbol}] Error fetching {interval} data: {e}")
+                continue
+            if tf_df is not None:
+                mtf_frames[interval] = tf_df
+
+        return {"df": df, "orderbook": orderbook, "mtf_frames": mtf_frames}
+
+    def _fetch_candles(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Свечи символа: через кольцевой буфер (только новые свечи) или полным запросом"""
+        buffer = self._candle_buffers.get(symbol)
+        if buffer is None:
+            buffer = CandleRingBuffer(self.kline_limit, self.kline_interval)
+            if self.incremental_klines:
+                self._candle_buffers[symbol] = buffer
+        return fetch_klines(self.market_client, symbol, buffer, int(time.time() * 1000))
+
+    # ==================== Признаки ====================
+
+    @staticmethod
+    def _derivatives_from_ticker(ticker: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        derivatives = {}
+        if not ticker:
+            return derivatives
+        for field, key in (
+            ("markPrice", "mark_price"),
+            ("indexPrice", "index_price"),
+            ("openInterest", "open_interest"),
+            ("fundingRate", "funding_rate"),
+        ):
+            try:
+                if ticker.get(field) not in (None, ""):
+                    derivatives[key] = float(ticker[field])
+            except (TypeError, ValueError):
+                pass
+        if "open_interest" in derivatives:
+            derivatives["oi_change"] = 0
+        return derivatives
+
+    def _build_symbol(self, symbol: str, raw: Dict[str, Any], ticker: Optional[Dict[str, Any]]):
+        df = raw["df"]
+        if len(df) > self.max_candles:
+            df = df.tail(self.max_candles).copy()
+
+        orderbook = raw["orderbook"]
+        orderflow_features = {}
+        if orderbook:
+            last_price = float(ticker["lastPrice"]) if ticker and ticker.get("lastPrice") else None
+            orderflow_features = self.pipeline.calculate_orderflow_features(orderbook, ticker_last_price=last_price)
+
+        features = self.pipeline.build_features(
+            df,
+            orderbook=orderbook,
+            orderbook_sanity_max_deviation_pct=self.orderbook_sanity_max_deviation_pct,
+            kline_interval_minutes=int(self.kline_interval) if self.kline_interval.isdigit() else 1440,
+            is_testnet=self.testnet,
+        )
+
+        # Свечи основного интервала - источник агрегации 4h в TimeframeCache бота
+        mtf_frames = dict(raw["mtf_frames"])
+        if self.mtf_intervals:
+            mtf_frames[self.kline_interval] = df
+
+        snapshot = {
+            "df": df,
+            "orderbook": orderbook,
+            "orderflow_features": orderflow_features,
+            "derivatives_data": self._derivatives_from_ticker(ticker),
+            "mtf_frames": mtf_frames,
+        }
+        return snapshot, features
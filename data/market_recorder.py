@@ -0,0 +1,347 @@
+"""
+Детерминированная запись и replay рыночных данных живого цикла.
+
+Recorder пишет всё, что потребляет TradingBot: ответы MarketDataClient
+(REST) и сообщения WebSocket (private WS -> order_event_bus), с временем
+получения, в append-only сегменты:
+
+    <dir>/segment_000001.rec, segment_000002.rec, ...
+    запись = [uint32 big-endian длина][zlib(JSON)]
+
+Записи: {"seq", "ts" (time.time_ns), "kind": "rest"|"ws"|"tick", ...}.
+Маркер "tick" ставится в начале каждого тика бота и делит поток на тики.
+Оборванная последняя запись (crash) при чтении отбрасывается.
+
+Replay:
+
+    harness = ReplayHarness(bot, "storage/recordings/2026-10-18")
+    results = harness.run()            # как можно быстрее
+    results = harness.run(speed=1.0)   # в записанном темпе
+
+ReplayMarketDataClient подменяет bot.market_client: ответы отдаются из
+записи по методу в порядке вызовов внутри тика, WS сообщения тика
+доставляются обработчикам в исходном порядке относительно REST ответов.
+"""
+
+import asyncio
+import copy
+import json
+import struct
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+RECORD_HEADER = struct.Struct(">I")
+SEGMENT_GLOB = "segment_*.rec"
+
+
+class ReplayExhausted(Exception):
+    """В записи нет ответа на запрошенный вызов"""
+
+
+# ==================== Сегменты ====================
+
+
+class SegmentWriter:
+    """Append-only запись length-prefixed сжатых записей с ротацией по размеру"""
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024, compresslevel: int = 6):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.compresslevel = compresslevel
+        self._file = None
+        self._segment_index = self._last_segment_index()
+
+    def _last_segment_index(self) -> int:
+        segments = sorted(self.directory.glob(SEGMENT_GLOB))
+        return int(segments[-1].stem.split("_")[1]) if segments else 0
+
+    def _open_next_segment(self) -> None:
+        if self._file:
+            self._file.close()
+        # Всегда новый сегмент: хвост прошлого запуска мог оборваться посреди записи
+        self._segment_index += 1
+        path = self.directory / f"segment_{self._segment_index:06d}.rec"
+        self._file = open(path, "ab")
+
+    def append(self, record: Dict[str, Any]) -> None:
+        payload = zlib.compress(
+            json.dumps(record, separators=(",", ":"), default=str).encode("utf-8"), self.compresslevel
+        )
+        if self._file is None or self._file.tell() >= self.max_segment_bytes:
+            self._open_next_segment()
+        self._file.write(RECORD_HEADER.pack(len(payload)))
+        self._file.write(payload)
+
+    def flush(self) -> None:
+        if self._file:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def read_records(directory: str) -> Iterator[Dict[str, Any]]:
+    """Все записи всех сегментов по порядку (оборванный хвост сегмента пропускается)"""
+    for path in sorted(Path(directory).glob(SEGMENT_GLOB)):
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                (length,) = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    logger.warning(f"Truncated record at the end of {path.name}, skipped")
+                    break
+                yield json.loads(zlib.decompress(payload))
+
+
+# ==================== Запись ====================
+
+
+class MarketDataRecorder:
+    """Потокобезопасная запись REST ответов, WS сообщений и маркеров тиков"""
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self._writer = SegmentWriter(directory, max_segment_bytes)
+        self._lock = threading.Lock()
+        self._seq = 0
+        logger.info(f"MarketDataRecorder writing to {directory}")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._seq += 1
+            record["seq"] = self._seq
+            record["ts"] = time.time_ns()
+            self._writer.append(record)
+
+    def record_rest(
+        self,
+        method: str,
+        args: tuple,
+        kwargs: Dict[str, Any],
+        response: Any = None,
+        error: Optional[str] = None,
+    ) -> None:
+        record = {"kind": "rest", "method": method, "args": list(args), "kwargs": kwargs, "response": response}
+        if error is not None:
+            record["error"] = error
+        self._append(record)
+
+    def record_ws(self, stream: str, message: Any) -> None:
+        self._append({"kind": "ws", "stream": stream, "message": message})
+
+    def mark_tick(self, symbol: Optional[str] = None) -> None:
+        """Начало тика; предыдущий тик сбрасывается на диск"""
+        self._append({"kind": "tick", "symbol": symbol})
+        with self._lock:
+            self._writer.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._writer.close()
+
+
+class RecordingMarketDataClient:
+    """Прокси MarketDataClient: каждый get_* вызов пишется в recorder"""
+
+    def __init__(self, client, recorder: MarketDataRecorder):
+        self._client = client
+        self._recorder = recorder
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not (name.startswith("get_") and callable(attr)):
+            return attr
+
+        @wraps(attr)
+        def recorded(*args, **kwargs):
+            try:
+                response = attr(*args, **kwargs)
+            except Exception as e:
+                self._recorder.record_rest(name, args, kwargs, error=str(e))
+                raise
+            self._recorder.record_rest(name, args, kwargs, response)
+            return response
+
+        return recorded
+
+
+# ==================== Replay ====================
+
+
+class ReplayMarketDataClient:
+    """
+    Замена MarketDataClient, отдающая записанные ответы.
+
+    Тик за тиком (advance_tick): внутри тика ответы выдаются по методу в
+    порядке записи. speed=None - без задержек, speed=1.0 - в записанном
+    темпе, 2.0 - вдвое быстрее.
+    """
+
+    def __init__(
+        self,
+        records: List[Dict[str, Any]],
+        speed: Optional[float] = None,
+        ws_handlers: Optional[Dict[str, Callable[[Any], None]]] = None,
+    ):
+        self.speed = speed
+        self.ws_handlers = ws_handlers or {}
+        self._ticks = self._split_ticks(records)
+        self._tick_index = -1
+        self._queues: Dict[str, Deque[Dict]] = {}
+        self._pending_ws: Deque[Dict] = deque()
+        self._first_ts: Optional[int] = records[0]["ts"] if records else None
+        self._started_at: Optional[float] = None
+        self.current_symbol: Optional[str] = None
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> "ReplayMarketDataClient":
+        return cls(list(read_records(directory)), **kwargs)
+
+    @staticmethod
+    def _split_ticks(records: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        ticks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        for record in records:
+            if record["kind"] == "tick":
+                if current:
+                    ticks.append(current)
+                current = [record]
+            else:
+                current.append(record)
+        if current:
+            ticks.append(current)
+        return ticks
+
+    @property
+    def tick_count(self) -> int:
+        return len(self._ticks)
+
+    def advance_tick(self) -> bool:
+        """Перейти к следующему тику записи (False - запись закончилась)"""
+        self._flush_ws()
+        self._tick_index += 1
+        if self._tick_index >= len(self._ticks):
+            return False
+
+        tick = self._ticks[self._tick_index]
+        self._queues = defaultdict(deque)
+        self._pending_ws = deque()
+        self.current_symbol = None
+        for record in tick:
+            if record["kind"] == "rest":
+                self._queues[record["method"]].append(record)
+            elif record["kind"] == "ws":
+                self._pending_ws.append(record)
+            else:
+                self.current_symbol = record.get("symbol")
+                self._pace(record["ts"])
+        return True
+
+    def _pace(self, ts: int) -> None:
+        if not self.speed or self._first_ts is None:
+            return
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+        target = self._started_at + (ts - self._first_ts) / 1e9 / self.speed
+        delay = target - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _dispatch_ws_until(self, seq: Optional[int]) -> None:
+        while self._pending_ws and (seq is None or self._pending_ws[0]["seq"] < seq):
+            record = self._pending_ws.popleft()
+            self._pace(record["ts"])
+            handler = self.ws_handlers.get(record["stream"])
+            if handler:
+                handler(copy.deepcopy(record["message"]))
+
+    def _flush_ws(self) -> None:
+        self._dispatch_ws_until(None)
+
+    def _serve(self, method: str) -> Any:
+        queue = self._queues.get(method)
+        if not queue:
+            raise ReplayExhausted(f"No recorded {method} response left in tick {self._tick_index}")
+        record = queue.popleft()
+        self._dispatch_ws_until(record["seq"])
+        self._pace(record["ts"])
+        if "error" in record:
+            raise Exception(record["error"])
+        return copy.deepcopy(record["response"])
+
+    def __getattr__(self, name: str):
+        if not name.startswith("get_"):
+            raise AttributeError(name)
+
+        def replayed(*args, **kwargs):
+            return self._serve(name)
+
+        replayed.__name__ = name
+        return replayed
+
+
+class ReplayHarness:
+    """Прогон записанного дня через TradingBot.run_single_tick без сети"""
+
+    def __init__(self, bot, directory: str):
+        """
+        Args:
+            bot: Сконструированный TradingBot (переводится в dry-run)
+            directory: Каталог с сегментами записи
+        """
+        self.bot = bot
+        self.directory = directory
+
+    def _private_ws_handler(self) -> Callable[[Any], None]:
+        from exchange.private_ws import PrivateWebSocket
+
+        # Не запускается: только разбор сообщений и публикация в order_event_bus
+        private_ws = PrivateWebSocket(
+            api_key="replay",
+            api_secret="replay",
+            on_order=lambda order: None,
+            on_position=lambda position: None,
+            event_bus=getattr(self.bot, "order_event_bus", None),
+        )
+        return private_ws._handle_message
+
+    def run(self, speed: Optional[float] = None, max_ticks: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Прогнать тики записи.
+
+        Returns:
+            Результаты run_single_tick по тикам
+        """
+        client = ReplayMarketDataClient.from_directory(
+            self.directory,
+            speed=speed,
+            ws_handlers={"private": self._private_ws_handler()},
+        )
+        self.bot.market_client = client
+        self.bot._dry_run_mode = True
+
+        logger.info(f"Replaying {client.tick_count} ticks from {self.directory}")
+        results = []
+        while client.advance_tick():
+            results.append(asyncio.run(self.bot.run_single_tick()))
+            if max_ticks and len(results) >= max_ticks:
+                break
+        client.advance_tick()  # доставить хвост WS сообщений последнего тика
+        return results
@@ -5,12 +5,32 @@ Multi-timeframe cache для хранения данных разных тайм
 
 Используется для фильтрации сигналов на основе согласованности разных ТФ.
 
+
+Каждый таймфрейм - CandleRingBuffer фиксированной ёмкости (колонки NumPy):
+
+- seed(timeframe, candles): начальная загрузка (ответ get_kline или DataFrame)
+
+- add_candle(timeframe, candle): O(1) - новая свеча или замена формирующейся
+
+- attach(timeframe, buffer): общий буфер без копирования (свечи основного ТФ бота)
+
+
+Таймфрейм без своего буфера агрегируется на лету из самого крупного
+
+хранимого ТФ, на который он делится (5m/15m из 1m, 4h из 1h), поэтому
+
+для MTF достаточен один REST запрос 1m свечей (mtf_fetch_intervals).
+
 """
 
 
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
 import pandas as pd
 
-from typing import Dict, Optional, Any
+from data.candle_buffer import CandleRingBuffer, candles_frame, interval_ms
 
 from logger import setup_logger
 
@@ -18,56 +38,242 @@ from logger import setup_logger
 logger = setup_logger(__name__)
 
 
+MTF_INTERVALS = ("1", "5", "15", "240")
+
+DEFAULT_CAPACITY = 500
+
+EMA_PERIOD = 20
+
+# Недельные и месячные бары не агрегируются: другая привязка и длина
+
+NON_UNIFORM_INTERVALS = ("W", "M")
+
+
+def to_ms(timestamp: Any) -> int:
+    """Время свечи (мс числом/строкой, pd.Timestamp, datetime) -> мс"""
+
+    if isinstance(timestamp, (int, np.integer)):
+
+        return int(timestamp)
+
+    if isinstance(timestamp, (str, float, np.floating)):
+
+        try:
+
+            return int(float(timestamp))
+
+        except ValueError:
+
+            pass
+
+    return int(pd.Timestamp(timestamp).value // 1_000_000)
+
+
+def resample_source(timeframe: str, available: Iterable[str]) -> Optional[str]:
+    """Самый крупный из available таймфреймов, из которого агрегируется timeframe"""
+
+    if timeframe in NON_UNIFORM_INTERVALS:
+
+        return None
+
+    target = interval_ms(timeframe)
+
+    candidates = [
+
+        tf for tf in available
+
+        if tf != timeframe and tf not in NON_UNIFORM_INTERVALS and target % interval_ms(tf) == 0
+
+    ]
+
+    return max(candidates, key=interval_ms, default=None)
+
+
+def mtf_fetch_intervals(intervals: Iterable[str], main_interval: str) -> List[str]:
+    """
+    Интервалы MTF, которые нужно запрашивать у биржи: остальные агрегируются
+
+    из них или из основного интервала (MTF_INTERVALS при "60" -> ["1"]).
+    """
+
+    available = [str(main_interval)]
+
+    fetch = []
+
+    for interval in sorted(map(str, intervals), key=interval_ms):
+
+        if interval in available or resample_source(interval, available) is not None:
+
+            continue
+
+        fetch.append(interval)
+
+        available.append(interval)
+
+    return fetch
+
+
+def resample_arrays(
+
+    timestamps: np.ndarray, columns: Dict[str, np.ndarray], bar_ms: int
+
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Агрегировать свечи (по возрастанию времени) в бары bar_ms.
+
+
+    Неполный первый бар (источник начинается не с его границы) отбрасывается,
+
+    последний бар - формирующийся, как у биржи.
+    """
+
+    buckets = timestamps - timestamps % bar_ms
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]) if len(buckets) else np.array([], dtype=int)
+
+    if len(starts) and timestamps[0] != buckets[0]:
+
+        starts = starts[1:]
+
+    if len(starts) == 0:
+
+        return np.array([], dtype=np.int64), {name: np.array([]) for name in columns}
+
+    ends = np.r_[starts[1:], len(timestamps)] - 1
+
+    resampled = {
+
+        "open": columns["open"][starts],
+
+        "high": np.maximum.reduceat(columns["high"], starts),
+
+        "low": np.minimum.reduceat(columns["low"], starts),
+
+        "close": columns["close"][ends],
+
+        "volume": np.add.reduceat(columns["volume"], starts),
+
+        "turnover": np.add.reduceat(columns["turnover"], starts),
+
+    }
+
+    return buckets[starts], resampled
+
+
 class TimeframeCache:
 
     """Кэш данных для разных таймфреймов"""
 
-    def __init__(self):
-        """Инициализация кэша"""
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+
+        Инициализация кэша
+
 
-        self.cache: Dict[str, pd.DataFrame] = {}
+        Args:
+
+            capacity: Сколько свечей хранить на таймфрейм
+
+        """
+
+        self.capacity = capacity
+
+        self.buffers: Dict[str, CandleRingBuffer] = {}
 
         logger.info("TimeframeCache initialized")
 
+    def buffer(self, timeframe: str) -> CandleRingBuffer:
+        """Буфер таймфрейма (создаётся пустым при первом обращении)"""
+
+        timeframe = str(timeframe)
+
+        buffer = self.buffers.get(timeframe)
+
+        if buffer is None:
+
+            buffer = self.buffers[timeframe] = CandleRingBuffer(self.capacity, timeframe)
+
+        return buffer
+
+    def attach(self, timeframe: str, buffer: CandleRingBuffer) -> None:
+        """Использовать внешний буфер (например, свечи основного ТФ бота) без копирования"""
+
+        self.buffers[str(timeframe)] = buffer
+
+    def seed(self, timeframe: str, candles: Any) -> None:
+        """
+
+        Начальная (или полная) загрузка таймфрейма.
+
+
+        Args:
+
+            timeframe: Таймфрейм
+
+            candles: Ответ get_kline (result.list, новые первыми) или OHLCV DataFrame
+
+        """
+
+        if candles is None or len(candles) == 0:
+
+            return
+
+        buffer = self.buffer(timeframe)
+
+        if isinstance(candles, pd.DataFrame):
+
+            buffer.load_frame(candles)
+
+        else:
+
+            buffer.load(candles)
+
     def add_candle(self, timeframe: str, candle: Dict) -> None:
         """
 
         Добавить свечу в кэш для конкретного таймфрейма.
 
 
+        Свеча с тем же timestamp, что последняя, заменяет её на месте
+
+        (обновления формирующегося бара), более новая - дописывается.
+
+
         Args:
 
             timeframe: Таймфрейм (1, 5, 15, 60, 240, D и т.д.)
 
-            candle: Данные свечи (open, high, low, close, volume и т.д.)
+            candle: Данные свечи (timestamp, open, high, low, close, volume и т.д.)
 
         """
 
-        if timeframe not in self.cache:
+        if candle.get("timestamp") is None:
 
-            self.cache[timeframe] = pd.DataFrame()
+            logger.debug(f"Candle without timestamp for {timeframe} ignored")
 
-        df = self.cache[timeframe]
+            return
 
-        # Если свеча уже существует, обновляем её (в случае обновлений)
+        self.buffer(timeframe).update(to_ms(candle["timestamp"]), candle)
 
-        if len(df) > 0 and df.iloc[-1]["timestamp"] == candle.get("timestamp"):
+    def _arrays(self, timeframe: str) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
 
-            df.iloc[-1] = candle
+        timeframe = str(timeframe)
 
-        else:
+        buffer = self.buffers.get(timeframe)
 
-            # Добавляем новую свечу
+        if buffer is not None and len(buffer) > 0:
 
-            df = pd.concat([df, pd.DataFrame([candle])], ignore_index=True)
+            return buffer.arrays()
 
-        # Ограничиваем размер кэша (последние 500 свечей)
+        source = resample_source(timeframe, [tf for tf, b in self.buffers.items() if len(b) > 0])
 
-        if len(df) > 500:
+        if source is None:
+
+            return None
 
-            df = df.iloc[-500:]
+        timestamps, columns = resample_arrays(*self.buffers[source].arrays(), interval_ms(timeframe))
 
-        self.cache[timeframe] = df
+        return (timestamps, columns) if len(timestamps) else None
 
     def get_latest(self, timeframe: str) -> Optional[Dict]:
         """
@@ -75,6 +281,11 @@ class TimeframeCache:
         Получить последнюю свечу для таймфрейма.
 
 
+        При истории не короче EMA_PERIOD в свечу добавляется ema_20
+
+        (тренд ТФ для check_confluence).
+
+
         Args:
 
             timeframe: Таймфрейм
@@ -86,11 +297,25 @@ class TimeframeCache:
 
         """
 
-        if timeframe not in self.cache or len(self.cache[timeframe]) == 0:
+        arrays = self._arrays(timeframe)
+
+        if arrays is None:
 
             return None
 
-        return self.cache[timeframe].iloc[-1].to_dict()
+        timestamps, columns = arrays
+
+        latest: Dict[str, Any] = {"timestamp": int(timestamps[-1])}
+
+        latest.update({name: float(values[-1]) for name, values in columns.items()})
+
+        if len(timestamps) >= EMA_PERIOD:
+
+            close = pd.Series(columns["close"])
+
+            latest["ema_20"] = float(close.ewm(span=EMA_PERIOD, adjust=False).mean().iloc[-1])
+
+        return latest
 
     def get_dataframe(self, timeframe: str) -> Optional[pd.DataFrame]:
         """
@@ -105,11 +330,13 @@ class TimeframeCache:
 
         Returns:
 
-            DataFrame или None
+            OHLCV DataFrame (DatetimeIndex "timestamp") или None
 
         """
 
-        return self.cache.get(timeframe)
+        arrays = self._arrays(timeframe)
+
+        return candles_frame(*arrays) if arrays is not None else None
 
     def check_confluence(
 
@@ -314,6 +541,6 @@ class TimeframeCache:
     def clear(self) -> None:
         """Очистить весь кэш"""
 
-        self.cache.clear()
+        self.buffers.clear()
 
         logger.info("Timeframe cache cleared")
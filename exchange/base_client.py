@@ -18,6 +18,10 @@ import time
 
 import hmac
 
+import threading
+
+from contextlib import contextmanager
+
 import hashlib
 
 import requests
@@ -30,10 +34,21 @@ from logger import setup_logger
 
 from config import Config
 
+from utils import metrics
+
 
 logger = setup_logger(__name__)
 
 
+REST_REQUESTS = metrics.counter(
+    "bybit_rest_requests_total", "REST запросы к Bybit по endpoint и исходу", ("method", "endpoint", "status")
+)
+REST_RETRIES = metrics.counter("bybit_rest_retries_total", "Повторы REST запросов в _request", ("endpoint",))
+REST_LATENCY = metrics.histogram(
+    "bybit_rest_request_duration_seconds", "Длительность HTTP запроса к Bybit", ("method", "endpoint")
+)
+
+
 class BybitRestClient:
 
     """
@@ -73,6 +88,17 @@ class BybitRestClient:
 
         self._min_request_interval = 0.1  # 100ms между запросами
 
+        # Приоритетная полоса (kill switch): запросы в ней не ждут интервал,
+        # обычные запросы ждут, пока приоритетные не завершатся
+
+        self._rate_lock = threading.Lock()
+
+        self._priority_idle = threading.Condition(self._rate_lock)
+
+        self._priority_inflight = 0
+
+        self._priority_local = threading.local()
+
         # Смещение времени для синхронизации с сервером
 
         self._time_offset = 0
@@ -184,13 +210,76 @@ class BybitRestClient:
     def _rate_limit_wait(self):
         """Простая защита от rate-limit: ждём минимальный интервал между запросами"""
 
-        elapsed = time.time() - self._last_request_time
+        if getattr(self._priority_local, "active", False):
+
+            # Приоритетная полоса: без ожидания, но занимаем слот
+
+            with self._rate_lock:
+
+                self._last_request_time = max(self._last_request_time, time.time())
+
+            return
+
+        with self._priority_idle:
+
+            self._priority_idle.wait_for(lambda: self._priority_inflight == 0, timeout=5.0)
+
+            # Резервируем слот под lock, спим снаружи - потоки не толкаются
+
+            slot = max(time.time(), self._last_request_time + self._min_request_interval)
+
+            self._last_request_time = slot
+
+        delay = slot - time.time()
+
+        if delay > 0:
+
+            time.sleep(delay)
+
+    @contextmanager
+    def priority_lane(self):
+        """
+
+        Выполнять запросы текущего потока в приоритетной полосе.
+
 
-        if elapsed < self._min_request_interval:
+        Используется аварийными операциями (kill switch): их запросы не ждут
 
-            time.sleep(self._min_request_interval - elapsed)
+        интервал rate-limit, а обычные запросы придерживаются, пока
 
-        self._last_request_time = time.time()
+        приоритетные не завершатся.
+
+        """
+
+        with self._rate_lock:
+
+            self._priority_inflight += 1
+
+        outer = getattr(self._priority_local, "active", False)
+
+        self._priority_local.active = True
+
+        try:
+
+            yield
+
+        finally:
+
+            self._priority_local.active = outer
+
+            with self._rate_lock:
+
+                self._priority_inflight -= 1
+
+                if self._priority_inflight == 0:
+
+                    self._priority_idle.notify_all()
+
+    @property
+    def time_offset_ms(self) -> int:
+        """Смещение времени сервера относительно локального (мс, из _sync_server_time)"""
+
+        return self._time_offset
 
     def _sync_server_time(self):
         """Синхронизация времени с сервером Bybit для правильной подписи"""
@@ -351,12 +440,20 @@ class BybitRestClient:
 
         # Retry логика
 
+        method_label = method.upper()
+
         for attempt in range(retry_count):
 
+            if attempt > 0:
+
+                REST_RETRIES.inc(endpoint=endpoint)
+
             try:
 
                 self._rate_limit_wait()
 
+                started = time.perf_counter()
+
                 if method.upper() == "GET":
 
                     # GET: URL уже содержит query string, не передаем params
@@ -378,6 +475,8 @@ class BybitRestClient:
 
                     raise ValueError(f"Unsupported HTTP method: {method}")
 
+                REST_LATENCY.observe(time.perf_counter() - started, method=method_label, endpoint=endpoint)
+
                 response.raise_for_status()
 
                 data = response.json()
@@ -390,6 +489,8 @@ class BybitRestClient:
 
                 if ret_code != 0:
 
+                    REST_REQUESTS.inc(method=method_label, endpoint=endpoint, status="api_error")
+
                     # Логируем детали для отладки auth ошибок
                     if ret_code in [10001, 10003, 10004]:  # Auth errors
                         logger.error(
@@ -430,10 +531,14 @@ class BybitRestClient:
 
                 logger.debug(f"Request success: {method} {endpoint} (attempt {attempt + 1})")
 
+                REST_REQUESTS.inc(method=method_label, endpoint=endpoint, status="ok")
+
                 return data
 
             except requests.exceptions.RequestException as e:
 
+                REST_REQUESTS.inc(method=method_label, endpoint=endpoint, status="http_error")
+
                 logger.warning(f"Request failed (attempt {attempt + 1}/{retry_count}): {e}")
 
                 if attempt == retry_count - 1:
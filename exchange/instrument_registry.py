@@ -0,0 +1,274 @@
+"""
+Реестр параметров инструментов с целочисленной арифметикой шагов.
+
+InstrumentsManager раньше на каждый normalize_price/normalize_qty/validate_order
+доставал Decimal из словаря и делал Decimal(str(x)) / step -> quantize.
+InstrumentSpec считает для символа один раз:
+
+- price_scale / qty_scale: число знаков после запятой сетки цены/количества
+- tick_units / step_units: tickSize и qtyStep в единицах 10^-scale (int)
+- минималы (minOrderQty, maxOrderQty, minNotional) в тех же единицах
+
+После этого округление - float -> int тиков -> Decimal(int).scaleb(-scale),
+а проверка минималов для значений на сетке - сравнение int:
+
+    spec = InstrumentSpec.from_api(item)              # priceFilter / lotSizeFilter
+    spec.round_price(42123.456)                        # Decimal("42123.5")
+    spec.check_units(spec.price_ticks(p) * spec.tick_units, spec.qty_steps(q) * spec.step_units)
+
+Значения вне сетки (validate_order с сырыми price/qty) проверяются через
+Decimal, как раньше. InstrumentRegistry сохраняет сырые строковые
+параметры всех символов на диск (JSON) для мгновенного старта.
+"""
+
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+# Шум float при переводе в тики/единицы (30000.125 * 100 = 3000012.4999999995):
+# относительная ошибка умножения и repr-округления входа - несколько 1e-16.
+# Результат в пределах шума от границы округления решается через Decimal.
+FLOAT_NOISE = 1e-14
+
+REGISTRY_FORMAT_VERSION = 1
+
+
+def decimal_places(value: Decimal) -> int:
+    """Знаков после запятой (0 для целых и шагов вида 10)"""
+    return max(0, -value.normalize().as_tuple().exponent)
+
+
+def to_units(value: Union[Decimal, str], scale: int) -> int:
+    """Точный перевод Decimal/строки в единицы 10^-scale"""
+    return int(Decimal(value).scaleb(scale))
+
+
+def float_units(value: float, scale: int) -> Optional[int]:
+    """
+    float в единицы 10^-scale, если value лежит на сетке (в пределах
+    FLOAT_NOISE), иначе None.
+    """
+    scaled = value * 10**scale
+    units = round(scaled)
+    if abs(scaled - units) <= FLOAT_NOISE * abs(scaled):
+        return int(units)
+    return None
+
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    """Параметры инструмента с предвычисленными целочисленными шагами"""
+
+    symbol: str
+    tick_size: Decimal
+    qty_step: Decimal
+    min_order_qty: Decimal
+    max_order_qty: Decimal
+    min_notional: Decimal
+    price_scale: int
+    qty_scale: int
+    tick_units: int
+    step_units: int
+    min_qty_units: int
+    max_qty_units: int
+    # minNotional в единицах 10^-(price_scale + qty_scale): сравнивается с price_units * qty_units
+    min_notional_units: int
+    # Тиков/шагов на единицу цены/количества (float): price * ticks_per_price -> тики
+    ticks_per_price: float = field(init=False, repr=False, compare=False)
+    steps_per_qty: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "ticks_per_price", 10**self.price_scale / self.tick_units)
+        object.__setattr__(self, "steps_per_qty", 10**self.qty_scale / self.step_units)
+
+    @classmethod
+    def from_params(
+        cls,
+        symbol: str,
+        tick_size: Union[str, Decimal],
+        qty_step: Union[str, Decimal],
+        min_order_qty: Union[str, Decimal] = "0",
+        max_order_qty: Union[str, Decimal] = "0",
+        min_notional: Union[str, Decimal] = "0",
+    ) -> "InstrumentSpec":
+        tick, step = Decimal(tick_size), Decimal(qty_step)
+        min_qty, max_qty, notional = Decimal(min_order_qty), Decimal(max_order_qty), Decimal(min_notional)
+        price_scale = decimal_places(tick)
+        qty_scale = max(decimal_places(step), decimal_places(min_qty), decimal_places(max_qty))
+        # qty_scale покрывает знаки минималов - они точны в единицах; minNotional
+        # округляется вверх: notional_units < ceil(x) <=> notional < x для целых units
+        return cls(
+            symbol=symbol,
+            tick_size=tick,
+            qty_step=step,
+            min_order_qty=min_qty,
+            max_order_qty=max_qty,
+            min_notional=notional,
+            price_scale=price_scale,
+            qty_scale=qty_scale,
+            tick_units=to_units(tick, price_scale),
+            step_units=to_units(step, qty_scale),
+            min_qty_units=to_units(min_qty, qty_scale),
+            max_qty_units=to_units(max_qty, qty_scale),
+            min_notional_units=math.ceil(notional.scaleb(price_scale + qty_scale)),
+        )
+
+    @classmethod
+    def from_api(cls, instrument: Dict[str, Any]) -> "InstrumentSpec":
+        """Элемент result.list ответа /v5/market/instruments-info"""
+        price_filter = instrument.get("priceFilter", {})
+        lot_size_filter = instrument.get("lotSizeFilter", {})
+        return cls.from_params(
+            instrument["symbol"],
+            price_filter.get("tickSize", "0.01"),
+            lot_size_filter.get("qtyStep", "0.001"),
+            lot_size_filter.get("minOrderQty", "0"),
+            lot_size_filter.get("maxOrderQty", "0"),
+            lot_size_filter.get("minNotionalValue", "0"),
+        )
+
+    def to_params(self) -> Dict[str, str]:
+        """Сырые параметры для сохранения на диск (from_params(**...))"""
+        return {
+            "symbol": self.symbol,
+            "tick_size": str(self.tick_size),
+            "qty_step": str(self.qty_step),
+            "min_order_qty": str(self.min_order_qty),
+            "max_order_qty": str(self.max_order_qty),
+            "min_notional": str(self.min_notional),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Формат InstrumentsManager.get_instrument (tickSize, qtyStep, ... как Decimal)"""
+        return {
+            "symbol": self.symbol,
+            "tickSize": self.tick_size,
+            "qtyStep": self.qty_step,
+            "minOrderQty": self.min_order_qty,
+            "maxOrderQty": self.max_order_qty,
+            "minNotional": self.min_notional,
+            "basePrecision": decimal_places(self.qty_step),
+            "quotePrecision": self.price_scale,
+        }
+
+    # ==================== Округление ====================
+
+    def price_ticks(self, price: float) -> int:
+        """Ближайшее число тиков (ROUND_HALF_UP - от нуля на середине), как Decimal(str(price))"""
+        shifted = abs(price * self.ticks_per_price) + 0.5
+        ticks = math.floor(shifted)
+        if shifted - ticks <= FLOAT_NOISE * shifted or ticks + 1 - shifted <= FLOAT_NOISE * shifted:
+            # Цена на середине тика (в пределах шума float) - точное решение
+            return int((Decimal(repr(price)) / self.tick_size).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        return ticks if price >= 0 else -ticks
+
+    def qty_steps(self, qty: float) -> int:
+        """Число шагов количества с округлением к нулю (ROUND_DOWN), как Decimal(str(qty))"""
+        steps = abs(qty * self.steps_per_qty)
+        whole = math.floor(steps)
+        if steps - whole <= FLOAT_NOISE * steps or whole + 1 - steps <= FLOAT_NOISE * steps:
+            # Количество на сетке или рядом - точное решение
+            return int((Decimal(repr(qty)) / self.qty_step).quantize(Decimal(1), rounding=ROUND_DOWN))
+        return whole if qty >= 0 else -whole
+
+    def round_price(self, price: float) -> Decimal:
+        return Decimal(self.price_ticks(price) * self.tick_units).scaleb(-self.price_scale)
+
+    def round_qty(self, qty: float) -> Decimal:
+        return Decimal(self.qty_steps(qty) * self.step_units).scaleb(-self.qty_scale)
+
+    # ==================== Проверка минималов ====================
+
+    def check_units(self, price_units: int, qty_units: int) -> Tuple[bool, str]:
+        """Проверка ордера на сетке: цена и количество в единицах 10^-scale"""
+        if qty_units < self.min_qty_units:
+            qty = float(Decimal(qty_units).scaleb(-self.qty_scale))
+            return False, f"Qty {qty} < minOrderQty {self.min_order_qty} for {self.symbol}"
+        if price_units * qty_units < self.min_notional_units:
+            notional = Decimal(price_units * qty_units).scaleb(-(self.price_scale + self.qty_scale))
+            return False, f"Notional {notional} < minNotional {self.min_notional} for {self.symbol}"
+        if self.max_qty_units > 0 and qty_units > self.max_qty_units:
+            qty = float(Decimal(qty_units).scaleb(-self.qty_scale))
+            return False, f"Qty {qty} > maxOrderQty {self.max_order_qty} for {self.symbol}"
+        return True, ""
+
+    def validate(self, price: float, qty: float) -> Tuple[bool, str]:
+        """Проверка сырых price/qty: int-путь на сетке, иначе Decimal"""
+        price_units = float_units(price, self.price_scale)
+        qty_units = float_units(qty, self.qty_scale)
+        if price_units is not None and qty_units is not None:
+            return self.check_units(price_units, qty_units)
+
+        qty_decimal = Decimal(str(qty))
+        price_decimal = Decimal(str(price))
+        if qty_decimal < self.min_order_qty:
+            return False, f"Qty {qty} < minOrderQty {self.min_order_qty} for {self.symbol}"
+        notional = qty_decimal * price_decimal
+        if notional < self.min_notional:
+            return False, f"Notional {notional} < minNotional {self.min_notional} for {self.symbol}"
+        if self.max_order_qty > 0 and qty_decimal > self.max_order_qty:
+            return False, f"Qty {qty} > maxOrderQty {self.max_order_qty} for {self.symbol}"
+        return True, ""
+
+
+class InstrumentRegistry:
+    """Неизменяемый снимок параметров всех символов категории"""
+
+    def __init__(self, specs: Dict[str, InstrumentSpec], category: str = "linear", loaded_at: Optional[float] = None):
+        self.specs = specs
+        self.category = category
+        self.loaded_at = loaded_at if loaded_at is not None else time.time()
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.specs
+
+    def get(self, symbol: str) -> Optional[InstrumentSpec]:
+        return self.specs.get(symbol)
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.loaded_at
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Атомарная запись JSON (tmp + os.replace)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        payload = {
+            "version": REGISTRY_FORMAT_VERSION,
+            "category": self.category,
+            "loaded_at": self.loaded_at,
+            "instruments": [spec.to_params() for spec in self.specs.values()],
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], category: str = "linear") -> Optional["InstrumentRegistry"]:
+        """Реестр с диска или None (нет файла, другая категория/версия, битый JSON)"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") != REGISTRY_FORMAT_VERSION or payload.get("category") != category:
+                return None
+            specs = {item["symbol"]: InstrumentSpec.from_params(**item) for item in payload["instruments"]}
+        except (OSError, ValueError, KeyError, TypeError, ArithmeticError) as e:
+            logger.warning(f"Instrument registry {path} unreadable, ignoring: {e}")
+            return None
+        return cls(specs, category, loaded_at=float(payload.get("loaded_at", 0.0)))
@@ -5,7 +5,9 @@
 
 Функции:
 
-- Кэширование instrument info с минимизацией API запросов
+- Кэширование instrument info с минимизацией API запросов (реестр на диске,
+
+  фоновое обновление, все страницы instruments-info по курсору)
 
 - Получение параметров округления для цены/количества
 
@@ -23,11 +25,15 @@
 """
 
 
+import threading
+
 import time
 
 from typing import Dict, Any, Optional
 
-from decimal import Decimal, ROUND_HALF_UP, ROUND_DOWN
+from decimal import Decimal
+
+from exchange.instrument_registry import InstrumentRegistry, InstrumentSpec
 
 from logger import setup_logger
 
@@ -35,6 +41,10 @@ from logger import setup_logger
 logger = setup_logger(__name__)
 
 
+# Страниц instruments-info по 1000 (защита от зацикливания курсора)
+MAX_INSTRUMENT_PAGES = 20
+
+
 # Fallback значения для популярных символов (если instruments-info не работает на testnet)
 # Значения взяты из реальных спецификаций Bybit для perpetual futures
 DEFAULT_INSTRUMENT_PARAMS = {
@@ -86,11 +96,31 @@ class InstrumentsManager:
 
     Получает параметры округления (tickSize, qtyStep) и минималы (minOrderQty, minNotional)
 
-    один раз при инициализации, затем использует кэш.
+    один раз при инициализации, затем использует кэш (InstrumentRegistry
+
+    с целочисленными шагами). Реестр сохраняется в cache_path и при старте
+
+    читается с диска; устаревший реестр обновляется в фоновом потоке,
+
+    вызовы normalize_* продолжают работать на старом.
 
     """
 
-    def __init__(self, rest_client, category: str = "linear"):
+    def __init__(
+
+        self,
+
+        rest_client,
+
+        category: str = "linear",
+
+        cache_path: Optional[str] = None,
+
+        cache_ttl: float = 3600,
+
+        background_refresh: bool = True,
+
+    ):
         """
 
         Args:
@@ -99,127 +129,134 @@ class InstrumentsManager:
 
             category: Категория инструментов (linear, inverse, spot)
 
+            cache_path: JSON файл реестра для мгновенного старта (None - без диска)
+
+            cache_ttl: Возраст кэша (секунды), после которого он обновляется
+
+            background_refresh: Обновлять устаревший кэш в фоне, а не в вызове
+
         """
 
         self.client = rest_client
 
         self.category = category
 
+        self.cache_path = cache_path
+
+        self.background_refresh = background_refresh
+
         self.instruments_cache: Dict[str, Dict[str, Any]] = {}
 
+        self.registry: Optional[InstrumentRegistry] = None
+
         self._cache_time = 0
 
-        self._cache_ttl = 3600  # 1 час
+        self._cache_ttl = cache_ttl  # 1 час
 
-    def _get_all_instruments(self) -> Dict[str, Dict[str, Any]]:
+        self._refresh_lock = threading.Lock()
+
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def _get_all_instruments(self) -> Dict[str, InstrumentSpec]:
         """
 
         Получить информацию о всех инструментах из Bybit API.
 
 
+        Страницы по limit=1000 запрашиваются по nextPageCursor до конца списка.
+
+
         Returns:
 
-            Dict с информацией об инструментах по символу
+            Dict InstrumentSpec по символу
 
         """
 
         try:
 
-            response = self.client.get(
+            instruments: Dict[str, InstrumentSpec] = {}
+
+            cursor = ""
 
-                "/v5/market/instruments-info",
+            for page in range(MAX_INSTRUMENT_PAGES):
 
-                params={
+                params = {
 
                     "category": self.category,
 
                     "limit": 1000,  # Максимум за один запрос
 
-                },
-
-                signed=False,
+                }
 
-            )
+                if cursor:
 
-            if response.get("retCode") != 0:
+                    params["cursor"] = cursor
 
-                error_msg = response.get('retMsg', '')
-                logger.error(f"Failed to get instruments: {error_msg}")
-                
-                # Fallback: используем дефолтные значения для популярных символов
-                if "Illegal category" in error_msg or response.get("retCode") == 10001:
-                    logger.warning("instruments-info failed (likely testnet issue), using DEFAULT_INSTRUMENT_PARAMS fallback")
-                    instruments = {}
-                    for symbol, params in DEFAULT_INSTRUMENT_PARAMS.items():
-                        instruments[symbol] = {
-                            "symbol": symbol,
-                            "tickSize": Decimal(params["tickSize"]),
-                            "qtyStep": Decimal(params["qtyStep"]),
-                            "minOrderQty": Decimal(params["minOrderQty"]),
-                            "maxOrderQty": Decimal(params["maxOrderQty"]),
-                            "minNotional": Decimal(params["minNotional"]),
-                            "basePrecision": params["basePrecision"],
-                            "quotePrecision": params["quotePrecision"],
-                        }
-                        logger.info(f"Using fallback params for {symbol}")
-                    return instruments
-                
-                return {}
+                response = self.client.get("/v5/market/instruments-info", params=params, signed=False)
 
-            instruments = {}
+                if response.get("retCode") != 0:
 
-            for instrument in response.get("result", {}).get("list", []):
+                    error_msg = response.get('retMsg', '')
+                    logger.error(f"Failed to get instruments (page {page + 1}): {error_msg}")
 
-                symbol = instrument.get("symbol", "")
+                    # Fallback: используем дефолтные значения для популярных символов
+                    if page == 0 and ("Illegal category" in error_msg or response.get("retCode") == 10001):
+                        logger.warning("instruments-info failed (likely testnet issue), using DEFAULT_INSTRUMENT_PARAMS fallback")
+                        instruments = {}
+                        for symbol, params in DEFAULT_INSTRUMENT_PARAMS.items():
+                            instruments[symbol] = InstrumentSpec.from_params(
+                                symbol,
+                                params["tickSize"],
+                                params["qtyStep"],
+                                params["minOrderQty"],
+                                params["maxOrderQty"],
+                                params["minNotional"],
+                            )
+                            logger.info(f"Using fallback params for {symbol}")
+                        return instruments
 
-                if not symbol:
+                    # Неполный список не подменяет кэш
+                    return {}
 
-                    continue
+                result = response.get("result", {})
 
-                # Получаем фильтры напрямую из API response
-                price_filter = instrument.get("priceFilter", {})
-                lot_size_filter = instrument.get("lotSizeFilter", {})
+                for instrument in result.get("list", []):
 
-                # Используем значения напрямую из фильтров (не scale!)
-                tick_size = price_filter.get("tickSize", "0.01")
-                qty_step = lot_size_filter.get("qtyStep", "0.001")
-                min_order_qty = lot_size_filter.get("minOrderQty", "0")
-                max_order_qty = lot_size_filter.get("maxOrderQty", "0")
-                min_notional = lot_size_filter.get("minNotionalValue", "0")
+                    symbol = instrument.get("symbol", "")
 
-                instruments[symbol] = {
+                    if not symbol:
 
-                    "symbol": symbol,
+                        continue
 
-                    "tickSize": Decimal(tick_size),
+                    spec = InstrumentSpec.from_api(instrument)
 
-                    "qtyStep": Decimal(qty_step),
+                    instruments[symbol] = spec
 
-                    "minOrderQty": Decimal(min_order_qty),
+                    logger.debug(
 
-                    "maxOrderQty": Decimal(max_order_qty),
+                        f"Loaded instrument {symbol}: "
 
-                    "minNotional": Decimal(min_notional),
+                        f"tickSize={spec.tick_size}, "
 
-                    "basePrecision": len(qty_step.split('.')[-1]) if '.' in qty_step else 0,
+                        f"qtyStep={spec.qty_step}, "
 
-                    "quotePrecision": len(tick_size.split('.')[-1]) if '.' in tick_size else 0,
+                        f"minOrderQty={spec.min_order_qty}, "
 
-                }
+                        f"minNotional={spec.min_notional}"
 
-                logger.debug(
+                    )
 
-                    f"Loaded instrument {symbol}: "
+                next_cursor = result.get("nextPageCursor") or ""
 
-                    f"tickSize={instruments[symbol]['tickSize']}, "
+                if not next_cursor or next_cursor == cursor:
 
-                    f"qtyStep={instruments[symbol]['qtyStep']}, "
+                    break
 
-                    f"minOrderQty={instruments[symbol]['minOrderQty']}, "
+                cursor = next_cursor
 
-                    f"minNotional={instruments[symbol]['minNotional']}"
+            else:
 
-                )
+                logger.warning(f"Instruments pagination stopped after {MAX_INSTRUMENT_PAGES} pages")
 
             return instruments
 
@@ -252,12 +289,104 @@ class InstrumentsManager:
 
         return Decimal(10) ** (-scale)
 
+    def _set_registry(self, registry: InstrumentRegistry) -> None:
+
+        # Новые объекты целиком: читатели из других потоков видят старый или новый снимок
+
+        self.instruments_cache = {symbol: spec.to_dict() for symbol, spec in registry.specs.items()}
+
+        self.registry = registry
+
+        self._cache_time = registry.loaded_at
+
+    def _load_from_disk(self) -> bool:
+
+        if not self.cache_path:
+
+            return False
+
+        registry = InstrumentRegistry.load(self.cache_path, self.category)
+
+        if registry is None or len(registry) == 0:
+
+            return False
+
+        self._set_registry(registry)
+
+        logger.info(f"Loaded {len(registry)} instruments from {self.cache_path} (age {registry.age():.0f}s)")
+
+        return True
+
+    def _refresh(self) -> bool:
+        """Загрузить все инструменты из API, заменить кэш и сохранить на диск"""
+
+        instruments = self._get_all_instruments()
+
+        if not instruments:
+
+            logger.warning("No instruments loaded")
+
+            return False
+
+        registry = InstrumentRegistry(instruments, self.category)
+
+        self._set_registry(registry)
+
+        logger.info(f"Loaded {len(instruments)} instruments into cache")
+
+        if self.cache_path:
+
+            try:
+
+                registry.save(self.cache_path)
+
+            except OSError as e:
+
+                logger.warning(f"Failed to save instruments to {self.cache_path}: {e}")
+
+        return True
+
+    def refresh_in_background(self) -> bool:
+        """
+
+        Запустить обновление кэша в фоновом потоке.
+
+
+        Returns:
+
+            False, если обновление уже выполняется
+
+        """
+
+        with self._refresh_lock:
+
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+
+                return False
+
+            self._refresh_thread = threading.Thread(
+
+                target=self._refresh, name=f"instruments-refresh-{self.category}", daemon=True
+
+            )
+
+            self._refresh_thread.start()
+
+        return True
+
     def load_instruments(self, force_refresh: bool = False) -> bool:
         """
 
         Загрузить информацию об инструментах в кэш.
 
 
+        Порядок: свежий кэш -> реестр с диска -> запрос к API. Устаревший
+
+        кэш (старше _cache_ttl) при background_refresh остаётся в работе,
+
+        обновление идёт в фоне.
+
+
         Args:
 
             force_refresh: Выполнить обновление даже если кэш свежий
@@ -269,41 +398,66 @@ class InstrumentsManager:
 
         """
 
-        current_time = time.time()
+        if not force_refresh:
+
+            if not self.instruments_cache:
 
-        # Проверяем TTL кэша
+                self._load_from_disk()
 
-        if (
+            if self.instruments_cache:
 
-            not force_refresh
+                if (time.time() - self._cache_time) < self._cache_ttl:
 
-            and self.instruments_cache
+                    logger.debug(f"Using cached instruments ({len(self.instruments_cache)} symbols)")
 
-            and (current_time - self._cache_time) < self._cache_ttl
+                    return True
 
-        ):
+                if self.background_refresh:
 
-            logger.debug(f"Using cached instruments ({len(self.instruments_cache)} symbols)")
+                    self.refresh_in_background()
 
-            return True
+                    return True
 
         logger.info(f"Loading instruments for category={self.category}")
 
-        instruments = self._get_all_instruments()
+        return self._refresh()
 
-        if not instruments:
+    def get_spec(self, symbol: str) -> Optional[InstrumentSpec]:
+        """
 
-            logger.warning("No instruments loaded")
+        Параметры инструмента с целочисленными шагами (горячий путь normalize_*).
 
-            return False
 
-        self.instruments_cache = instruments
+        Args:
 
-        self._cache_time = current_time
+            symbol: Торговая пара
 
-        logger.info(f"Loaded {len(instruments)} instruments into cache")
 
-        return True
+        Returns:
+
+            InstrumentSpec или None если не найдено
+
+        """
+
+        registry = self.registry
+
+        if registry is None:
+
+            logger.warning("Instruments cache is empty, try calling load_instruments()")
+
+            return None
+
+        if self.background_refresh and (time.time() - self._cache_time) >= self._cache_ttl:
+
+            self.refresh_in_background()
+
+        spec = registry.get(symbol)
+
+        if spec is None:
+
+            logger.warning(f"Instrument {symbol} not found in cache")
+
+        return spec
 
     def get_instrument(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
@@ -344,6 +498,9 @@ class InstrumentsManager:
         Округлить цену согласно tickSize инструмента.
 
 
+        Округление к ближайшему кратному tickSize (ROUND_HALF_UP) в целых тиках.
+
+
         Args:
 
             symbol: Торговая пара
@@ -357,25 +514,13 @@ class InstrumentsManager:
 
         """
 
-        instrument = self.get_instrument(symbol)
+        spec = self.get_spec(symbol)
 
-        if not instrument:
+        if spec is None:
 
             return None
 
-        price_decimal = Decimal(str(price))
-
-        tick_size = instrument["tickSize"]
-
-        # Округляем к ближайшему кратному tickSize
-
-        normalized = (price_decimal / tick_size).quantize(
-
-            Decimal("1"), rounding=ROUND_HALF_UP
-
-        ) * tick_size
-
-        return normalized
+        return spec.round_price(float(price))
 
     def normalize_qty(self, symbol: str, qty: float) -> Optional[Decimal]:
         """
@@ -383,6 +528,9 @@ class InstrumentsManager:
         Округлить количество согласно qtyStep инструмента.
 
 
+        Округление вниз (ROUND_DOWN), чтобы не превысить доступное количество.
+
+
         Args:
 
             symbol: Торговая пара
@@ -396,21 +544,13 @@ class InstrumentsManager:
 
         """
 
-        instrument = self.get_instrument(symbol)
+        spec = self.get_spec(symbol)
 
-        if not instrument:
+        if spec is None:
 
             return None
 
-        qty_decimal = Decimal(str(qty))
-
-        qty_step = instrument["qtyStep"]
-
-        # Округляем вниз (ROUND_DOWN) чтобы не превысить доступное количество
-
-        normalized = (qty_decimal / qty_step).quantize(Decimal("1"), rounding=ROUND_DOWN) * qty_step
-
-        return normalized
+        return spec.round_qty(float(qty))
 
     def validate_order(self, symbol: str, price: float, qty: float) -> tuple[bool, str]:
         """
@@ -433,61 +573,13 @@ class InstrumentsManager:
 
         """
 
-        instrument = self.get_instrument(symbol)
+        spec = self.get_spec(symbol)
 
-        if not instrument:
+        if spec is None:
 
             return False, f"Instrument {symbol} not found"
 
-        qty_decimal = Decimal(str(qty))
-
-        price_decimal = Decimal(str(price))
-
-        # Проверяем минимальное количество
-
-        min_order_qty = instrument["minOrderQty"]
-
-        if qty_decimal < min_order_qty:
-
-            return (
-
-                False,
-
-                f"Qty {qty} < minOrderQty {min_order_qty} for {symbol}",
-
-            )
-
-        # Проверяем минимальный notional (qty * price)
-
-        notional = qty_decimal * price_decimal
-
-        min_notional = instrument["minNotional"]
-
-        if notional < min_notional:
-
-            return (
-
-                False,
-
-                f"Notional {notional} < minNotional {min_notional} for {symbol}",
-
-            )
-
-        # Проверяем максимальное количество
-
-        max_order_qty = instrument["maxOrderQty"]
-
-        if max_order_qty > 0 and qty_decimal > max_order_qty:
-
-            return (
-
-                False,
-
-                f"Qty {qty} > maxOrderQty {max_order_qty} for {symbol}",
-
-            )
-
-        return True, ""
+        return spec.validate(float(price), float(qty))
 
     def normalize_order(
 
@@ -501,7 +593,7 @@ class InstrumentsManager:
 
         Этап 1: Округление price по tickSize и qty по qtyStep
 
-        Этап 2: Валидация против минималов
+        Этап 2: Валидация против минималов (сравнение целых тиков/шагов)
 
 
         Args:
@@ -521,27 +613,23 @@ class InstrumentsManager:
 
         """
 
-        # Нормализуем цену и количество
-
-        normalized_price = self.normalize_price(symbol, price)
+        spec = self.get_spec(symbol)
 
-        if normalized_price is None:
+        if spec is None:
 
             return None, None, f"Cannot normalize price for {symbol}"
 
-        normalized_qty = self.normalize_qty(symbol, qty)
+        price_units = spec.price_ticks(float(price)) * spec.tick_units
 
-        if normalized_qty is None:
+        qty_units = spec.qty_steps(float(qty)) * spec.step_units
 
-            return None, None, f"Cannot normalize qty for {symbol}"
+        normalized_price = Decimal(price_units).scaleb(-spec.price_scale)
 
-        # Валидируем нормализованные значения
+        normalized_qty = Decimal(qty_units).scaleb(-spec.qty_scale)
 
-        is_valid, error_msg = self.validate_order(
-
-            symbol, float(normalized_price), float(normalized_qty)
+        # Валидируем нормализованные значения
 
-        )
+        is_valid, error_msg = spec.check_units(price_units, qty_units)
 
         if not is_valid:
 
@@ -0,0 +1,209 @@
+"""
+Шина событий ордеров/исполнений/позиций из private WebSocket.
+
+PrivateWebSocket публикует сюда каждый push из топиков order, execution,
+position и wallet. Потребители ждут нужного состояния ордера без REST поллинга:
+
+- wait_for_order(): блокирует до терминального статуса ордера (Filled,
+  Cancelled, ...) через per-orderId threading.Event - реакция за миллисекунды
+- get_order() / get_order_by_link_id(): последнее известное состояние ордера
+- subscribe_positions() / subscribe_executions() / subscribe_orders() /
+  subscribe_wallet(): callback на каждый push соответствующего топика
+
+Шина знает, активен ли стрим (is_active). Пока стрим не аутентифицирован
+или переподключается, потребители должны использовать REST fallback.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+# Статусы ордера Bybit V5, после которых ордер больше не изменится
+FINAL_ORDER_STATUSES = {"Filled", "Cancelled", "Rejected", "Deactivated", "PartiallyFilledCanceled"}
+
+# Активные статусы (ордер ещё на бирже)
+ACTIVE_ORDER_STATUSES = {"New", "PartiallyFilled", "Untriggered"}
+
+
+class _OrderWaiter:
+    """Ожидание одного ордера до одного из статусов"""
+
+    def __init__(self, statuses: Set[str]):
+        self.statuses = statuses
+        self.event = threading.Event()
+        self.order: Optional[Dict[str, Any]] = None
+
+
+class OrderEventBus:
+    """
+    Потокобезопасное хранилище последних событий ордеров с ожиданием по orderId.
+    """
+
+    def __init__(self, max_orders: int = 5000):
+        """
+        Args:
+            max_orders: Сколько последних ордеров держать в памяти
+        """
+        self.max_orders = max_orders
+
+        self._lock = threading.Lock()
+        self._orders: Dict[str, Dict[str, Any]] = {}  # orderId -> последний push
+        self._link_ids: Dict[str, str] = {}  # orderLinkId -> orderId
+        self._waiters: Dict[str, List[_OrderWaiter]] = {}  # orderId -> ожидающие
+        self._position_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._execution_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._order_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._wallet_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+        self.active = False
+        self.last_event_at: Optional[float] = None
+
+    # ==================== Publishing (WS thread) ====================
+
+    def set_active(self, active: bool) -> None:
+        """Отметить стрим активным (аутентифицирован) или нет (разрыв)"""
+        if self.active != active:
+            logger.info(f"Order event stream {'active' if active else 'inactive'}")
+        self.active = active
+
+    @property
+    def is_active(self) -> bool:
+        return self.active
+
+    def publish_order(self, order_data: Dict[str, Any]) -> None:
+        """Обновление ордера из топика order"""
+        order_id = order_data.get("orderId")
+        if not order_id:
+            return
+
+        status = order_data.get("orderStatus", "")
+        with self._lock:
+            self._orders[order_id] = order_data
+            link_id = order_data.get("orderLinkId")
+            if link_id:
+                self._link_ids[link_id] = order_id
+            self._trim()
+
+            waiters = self._waiters.get(order_id, [])
+            released = [w for w in waiters if status in w.statuses]
+            if released:
+                self._waiters[order_id] = [w for w in waiters if w not in released]
+                if not self._waiters[order_id]:
+                    del self._waiters[order_id]
+            self.last_event_at = time.time()
+
+        for waiter in released:
+            waiter.order = order_data
+            waiter.event.set()
+
+        for listener in list(self._order_listeners):
+            self._notify(listener, order_data)
+
+    def publish_execution(self, execution_data: Dict[str, Any]) -> None:
+        """Исполнение из топика execution"""
+        self.last_event_at = time.time()
+        for listener in list(self._execution_listeners):
+            self._notify(listener, execution_data)
+
+    def publish_position(self, position_data: Dict[str, Any]) -> None:
+        """Обновление позиции из топика position"""
+        self.last_event_at = time.time()
+        for listener in list(self._position_listeners):
+            self._notify(listener, position_data)
+
+    def publish_wallet(self, wallet_data: Dict[str, Any]) -> None:
+        """Обновление баланса из топика wallet"""
+        self.last_event_at = time.time()
+        for listener in list(self._wallet_listeners):
+            self._notify(listener, wallet_data)
+
+    # ==================== Consuming ====================
+
+    def subscribe_positions(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Подписаться на обновления позиций"""
+        self._position_listeners.append(callback)
+
+    def subscribe_executions(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Подписаться на исполнения"""
+        self._execution_listeners.append(callback)
+
+    def subscribe_orders(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Подписаться на обновления ордеров"""
+        self._order_listeners.append(callback)
+
+    def subscribe_wallet(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Подписаться на обновления баланса"""
+        self._wallet_listeners.append(callback)
+
+    def get_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """Последнее известное состояние ордера"""
+        with self._lock:
+            return self._orders.get(order_id)
+
+    def get_order_by_link_id(self, order_link_id: str) -> Optional[Dict[str, Any]]:
+        """Последнее известное состояние ордера по orderLinkId"""
+        with self._lock:
+            order_id = self._link_ids.get(order_link_id)
+            return self._orders.get(order_id) if order_id else None
+
+    def wait_for_order(
+        self,
+        order_id: str,
+        timeout: float,
+        statuses: Optional[Set[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ждать, пока ордер не перейдёт в один из статусов.
+
+        Args:
+            order_id: ID ордера
+            timeout: Максимальное время ожидания (сек)
+            statuses: Целевые статусы (по умолчанию FINAL_ORDER_STATUSES)
+
+        Returns:
+            Данные ордера из push или None при таймауте
+        """
+        statuses = statuses or FINAL_ORDER_STATUSES
+        waiter = _OrderWaiter(statuses)
+
+        with self._lock:
+            # Push мог прийти раньше, чем мы начали ждать
+            known = self._orders.get(order_id)
+            if known and known.get("orderStatus") in statuses:
+                return known
+            self._waiters.setdefault(order_id, []).append(waiter)
+
+        if waiter.event.wait(timeout):
+            return waiter.order
+
+        with self._lock:
+            waiters = self._waiters.get(order_id, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[order_id]
+        return None
+
+    def _trim(self) -> None:
+        """Удалить самые старые ордера сверх max_orders (под lock)"""
+        excess = len(self._orders) - self.max_orders
+        if excess <= 0:
+            return
+        for order_id in list(self._orders)[:excess]:
+            if order_id in self._waiters:
+                continue
+            order = self._orders.pop(order_id)
+            self._link_ids.pop(order.get("orderLinkId", ""), None)
+
+    @staticmethod
+    def _notify(listener: Callable[[Dict[str, Any]], None], data: Dict[str, Any]) -> None:
+        try:
+            listener(data)
+        except Exception as e:
+            logger.error(f"Order event listener failed: {e}", exc_info=True)
@@ -13,6 +13,8 @@ Private WebSocket для Bybit V5: ордера и позиции.
 
 - Execution stream: https://bybit-exchange.github.io/docs/v5/ws/private/execution
 
+- Wallet stream: https://bybit-exchange.github.io/docs/v5/ws/private/wallet
+
 """
 
 
@@ -28,6 +30,8 @@ from typing import Callable, Dict, Any, List, Optional
 
 from exchange.websocket_client import BybitWebSocketClient
 
+from exchange.order_events import OrderEventBus
+
 from logger import setup_logger
 
 
@@ -58,6 +62,8 @@ class PrivateWebSocket:
 
         testnet: bool = True,
 
+        event_bus: Optional[OrderEventBus] = None,
+
     ):
         """
 
@@ -75,6 +81,8 @@ class PrivateWebSocket:
 
             testnet: Использовать testnet
 
+            event_bus: Шина событий ордеров (создаётся если не передана)
+
         """
 
         self.api_key = api_key
@@ -92,6 +100,10 @@ class PrivateWebSocket:
         self.positions_state: Dict[str, Dict] = {}  # symbol -> position data
         self.executions_history: List[Dict] = []  # История fills
 
+        # Шина событий: ожидание fills и реакция на позиции без REST поллинга
+
+        self.event_bus = event_bus or OrderEventBus()
+
         # Private WS URL
 
         ws_url = (
@@ -176,6 +188,7 @@ class PrivateWebSocket:
         """Callback при переподключении - повторная аутентификация"""
         logger.info("Reconnected, re-authenticating...")
         self.authenticated = False
+        self.event_bus.set_active(False)
         time.sleep(1)  # Даём время на стабилизацию соединения
         self._authenticate()
 
@@ -190,6 +203,8 @@ class PrivateWebSocket:
 
                 self.authenticated = True
 
+                self.event_bus.set_active(True)
+
                 logger.info("✓ Private WebSocket authenticated")
 
                 # Подписываемся на топики после аутентификации
@@ -228,6 +243,8 @@ class PrivateWebSocket:
                 if order_id:
                     self.orders_state[order_id] = order_data
                     logger.debug(f"Order update: {order_id} - {order_data.get('orderStatus')}")
+
+                self.event_bus.publish_order(order_data)
                 
                 # Вызываем callback
                 self.on_order(order_data)
@@ -242,6 +259,8 @@ class PrivateWebSocket:
                 if symbol:
                     self.positions_state[symbol] = position_data
                     logger.debug(f"Position update: {symbol} - size={position_data.get('size')}")
+
+                self.event_bus.publish_position(position_data)
                 
                 # Вызываем callback
                 self.on_position(position_data)
@@ -261,14 +280,24 @@ class PrivateWebSocket:
                     f"{execution_data.get('side')} {execution_data.get('execQty')} @ {execution_data.get('execPrice')}"
                 )
                 
+                self.event_bus.publish_execution(execution_data)
+
                 # Вызываем callback если есть
                 if self.on_execution:
                     self.on_execution(execution_data)
 
+        # Данные баланса
+
+        if topic == "wallet":
+
+            for wallet_data in data.get("data", []):
+
+                self.event_bus.publish_wallet(wallet_data)
+
     def _subscribe_to_topics(self):
         """Подписка на приватные топики после аутентификации"""
 
-        topics = ["order", "position", "execution"]
+        topics = ["order", "position", "execution", "wallet"]
 
         self.client.subscribe(topics)
 
@@ -328,4 +357,6 @@ class PrivateWebSocket:
     def stop(self):
         """Остановка private WS"""
 
+        self.event_bus.set_active(False)
+
         self.client.stop()
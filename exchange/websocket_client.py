@@ -20,14 +20,21 @@ import threading
 
 from typing import Callable, Optional, Dict, Any
 
+from urllib.parse import urlparse
+
 import websocket
 
 from logger import setup_logger
 
+from utils import metrics
+
 
 logger = setup_logger(__name__)
 
 
+WS_RECONNECTS = metrics.counter("bybit_ws_reconnects_total", "Переподключения WebSocket по stream", ("stream",))
+
+
 class BybitWebSocketClient:
 
     """
@@ -76,6 +83,10 @@ class BybitWebSocketClient:
 
         self.ping_interval = 20  # Bybit рекомендует каждые 20 сек
 
+        # MarketDataRecorder (data.market_recorder): запись входящих сообщений для replay
+
+        self.recorder = None
+
         logger.info(f"WebSocket client initialized: {ws_url}")
 
     def _on_open(self, ws):
@@ -109,6 +120,10 @@ class BybitWebSocketClient:
 
                 return
 
+            if self.recorder:
+
+                self.recorder.record_ws(self.stream_label, data)
+
             # Передаём данные в пользовательский callback
 
             self.on_message_callback(data)
@@ -140,6 +155,8 @@ class BybitWebSocketClient:
 
         self.reconnect_count += 1
 
+        WS_RECONNECTS.inc(stream=self.stream_label)
+
         delay = min(2**self.reconnect_count, self.max_reconnect_delay)
 
         logger.info(f"Reconnecting in {delay} seconds (attempt {self.reconnect_count})...")
@@ -150,6 +167,14 @@ class BybitWebSocketClient:
 
             self.start()
 
+    @property
+    def stream_label(self) -> str:
+        """Метка stream для метрик: путь URL без /v5 (public/linear, private)"""
+
+        path = urlparse(self.ws_url).path.strip("/")
+
+        return path[3:] if path.startswith("v5/") else (path or "unknown")
+
     def _send_ping(self):
         """Отправка ping для keep-alive"""
 
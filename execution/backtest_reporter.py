@@ -338,6 +338,225 @@ class BacktestMetricsReporter:
 
         )
 
+    @staticmethod
+    def add_monte_carlo(result: Dict[str, Any], config: "Any" = None) -> "Any":
+        """
+
+        Посчитать Monte Carlo по сделкам бэктеста и приложить к результату.
+
+
+        После вызова generate_html_report и export_to_json включают
+
+        перцентили drawdown и вероятность разорения.
+
+
+        Args:
+
+            result: Result dict from BacktestRunner.run_backtest()
+
+            config: MonteCarloConfig (опционально)
+
+
+        Returns:
+
+            MonteCarloResult
+
+        """
+
+        from execution.monte_carlo import MonteCarloSimulator
+
+        initial_balance = result["simulator"].initial_balance
+
+        mc = MonteCarloSimulator(config).run_on_trades(result["trades"], initial_balance)
+
+        result["monte_carlo"] = mc
+
+        return mc
+
+    @staticmethod
+    def format_monte_carlo_table(mc: "Any") -> "Any":
+        """
+
+        Форматировать перцентили Monte Carlo в таблицу.
+
+
+        Args:
+
+            mc: MonteCarloResult
+
+
+        Returns:
+
+            DataFrame (строки - метрики, колонки - перцентили)
+
+        """
+
+        import pandas as pd
+
+        rows = [
+
+            ("Max Drawdown $", mc.max_drawdown_dollars, "${:.2f}"),
+
+            ("Max Drawdown %", mc.max_drawdown_percent, "{:.2f}"),
+
+            ("Final Equity $", mc.final_equity, "${:.2f}"),
+
+            ("Total Return %", mc.total_return_percent, "{:.2f}"),
+
+        ]
+
+        data = []
+
+        for name, pcts, fmt in rows:
+
+            row = {"Metric": name}
+
+            row.update({p: fmt.format(v) for p, v in pcts.items()})
+
+            data.append(row)
+
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def regime_attribution(trades: "Any", df: "Any", regimes: "Any" = None) -> "Any":
+        """
+
+        Атрибуция сделок к режимам рынка по бару входа.
+
+
+        Сделка относится к последнему бару с timestamp <= entry_time.
+
+        Режимы - RegimeScorer.score_regimes(df) (считаются, если не переданы).
+
+
+        Args:
+
+            trades: Сделки с entry_time и pnl (/ pnl_after_commission)
+
+            df: DataFrame бэктеста с timestamp и признаками
+
+            regimes: Результат score_regimes(df) (опционально)
+
+
+        Returns:
+
+            DataFrame: строка на режим (Bars, Bars %, Trades, Win %, PnL, Avg PnL, Profit Factor)
+
+        """
+
+        import numpy as np
+
+        import pandas as pd
+
+        if "timestamp" not in df.columns:
+
+            raise ValueError("regime_attribution requires a timestamp column")
+
+        if regimes is None:
+
+            from strategy.regime_scorer import RegimeScorer
+
+            regimes = RegimeScorer().score_regimes(df)
+
+        labels = regimes["regime_label"].to_numpy()
+
+        # Целочисленный timestamp - мс (get_kline), а не наносекунды по умолчанию pandas
+
+        timestamps = df["timestamp"]
+
+        unit = "ms" if pd.api.types.is_numeric_dtype(timestamps) else None
+
+        bar_times = pd.to_datetime(timestamps, unit=unit).to_numpy()
+
+        rows = {}
+
+        for label in labels:
+
+            rows.setdefault(label, {"bars": 0, "pnl": []})["bars"] += 1
+
+        for trade in trades:
+
+            entry = pd.Timestamp(trade.entry_time).to_datetime64()
+
+            pos = int(np.searchsorted(bar_times, entry, side="right")) - 1
+
+            label = labels[pos] if pos >= 0 else "before_start"
+
+            pnl = getattr(trade, "pnl_after_commission", trade.pnl)
+
+            rows.setdefault(label, {"bars": 0, "pnl": []})["pnl"].append(float(pnl))
+
+        data = []
+
+        for label, row in rows.items():
+
+            pnl = np.array(row["pnl"], dtype=float)
+
+            gross_win = pnl[pnl > 0].sum()
+
+            gross_loss = -pnl[pnl < 0].sum()
+
+            data.append(
+
+                {
+
+                    "Regime": label,
+
+                    "Bars": row["bars"],
+
+                    "Bars %": row["bars"] / len(labels) * 100 if len(labels) else 0.0,
+
+                    "Trades": len(pnl),
+
+                    "Win %": (pnl > 0).mean() * 100 if len(pnl) else 0.0,
+
+                    "PnL $": pnl.sum(),
+
+                    "Avg PnL $": pnl.mean() if len(pnl) else 0.0,
+
+                    "Profit Factor": (
+
+                        gross_win / gross_loss if gross_loss > 0 else (float("inf") if gross_win > 0 else 0.0)
+
+                    ),
+
+                }
+
+            )
+
+        return pd.DataFrame(data).sort_values(["Trades", "Bars"], ascending=False, ignore_index=True)
+
+    @staticmethod
+    def add_regime_attribution(result: Dict[str, Any], df: "Any", regimes: "Any" = None) -> "Any":
+        """
+
+        Посчитать атрибуцию сделок бэктеста к режимам и приложить к результату.
+
+
+        После вызова generate_html_report и export_to_json включают таблицу по режимам.
+
+
+        Args:
+
+            result: Result dict from BacktestRunner.run_backtest()
+
+            df: DataFrame, на котором шёл бэктест (с признаками для RegimeScorer)
+
+            regimes: Результат RegimeScorer.score_regimes(df) (опционально)
+
+
+        Returns:
+
+            DataFrame атрибуции (см. regime_attribution)
+
+        """
+
+        attribution = BacktestMetricsReporter.regime_attribution(result["trades"], df, regimes)
+
+        result["regime_attribution"] = attribution
+
+        return attribution
+
     @staticmethod
     def generate_html_report(
 
@@ -442,6 +661,36 @@ class BacktestMetricsReporter:
 
             html_parts.append(metrics_df.to_html(index=False))
 
+            # Monte Carlo распределения (если посчитаны через add_monte_carlo)
+
+            if result.get("monte_carlo") is not None:
+
+                mc = result["monte_carlo"]
+
+                html_parts.append(
+
+                    f"<h3>Monte Carlo ({mc.method}, {mc.n_paths} paths x {mc.n_trades} trades)</h3>"
+
+                )
+
+                html_parts.append(f"<p>Ruin probability: {mc.ruin_probability * 100:.2f}%</p>")
+
+                mc_df = BacktestMetricsReporter.format_monte_carlo_table(mc)
+
+                html_parts.append(mc_df.to_html(index=False))
+
+            # Сделки по режимам рынка (если посчитаны через add_regime_attribution)
+
+            if result.get("regime_attribution") is not None:
+
+                html_parts.append("<h3>Performance by Regime</h3>")
+
+                html_parts.append(
+
+                    result["regime_attribution"].to_html(index=False, float_format=lambda v: f"{v:.2f}")
+
+                )
+
         html_parts.extend(
 
             [
@@ -580,6 +829,20 @@ class BacktestMetricsReporter:
 
         }
 
+        if result.get("monte_carlo") is not None:
+
+            output_dict["monte_carlo"] = result["monte_carlo"].to_dict()
+
+        if result.get("regime_attribution") is not None:
+
+            output_dict["regime_attribution"] = [
+
+                {key: (None if isinstance(value, float) and value == float("inf") else value) for key, value in row.items()}
+
+                for row in result["regime_attribution"].to_dict(orient="records")
+
+            ]
+
         json_str = json.dumps(output_dict, indent=2)
 
         with open(output_path, "w") as f:
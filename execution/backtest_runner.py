@@ -44,6 +44,8 @@ from datetime import datetime
 
 from decimal import Decimal
 
+import numbers
+
 from typing import Dict, Tuple, Optional, Any, Callable
 
 import logging
@@ -85,6 +87,42 @@ class BacktestConfig:
 
     timeframe: str = "1h"  # 1h, 4h, 1d и т.д.
 
+    # Запись стакана OrderbookRecorder (cli.py stream --record-orderbook): market fills
+
+    # проходят по стакану на время бара вместо bps slippage модели
+
+    orderbook_path: Optional[str] = None
+
+
+def _bar_time_ms(row: "Any", idx: int) -> int:
+    """Время бара в мс для EquityCurve (номер бара, если timestamp не распознан)"""
+
+    ts = row.get("timestamp") if hasattr(row, "get") else None
+
+    if isinstance(ts, (pd.Timestamp, datetime)):
+
+        return int(pd.Timestamp(ts).value // 1_000_000)
+
+    if isinstance(ts, numbers.Real) and not pd.isna(ts):
+
+        return int(ts)
+
+    return int(idx)
+
+
+def _bar_datetime(ts: "Any") -> Optional[datetime]:
+    """Время бара для часов симулятора: Timestamp/datetime или мс (как в get_kline); None если не распознано"""
+
+    if isinstance(ts, (pd.Timestamp, datetime)):
+
+        return pd.Timestamp(ts).to_pydatetime()
+
+    if isinstance(ts, numbers.Real) and not pd.isna(ts):
+
+        return pd.Timestamp(int(ts), unit="ms").to_pydatetime()
+
+    return None
+
 
 class HistoricalDataLoader:
 
@@ -535,7 +573,23 @@ class BacktestRunner:
 
         )
 
-        simulator = PaperTradingSimulator(paper_config)
+        # Время fills и сделок - время текущего бара (сделки привязываются к барам истории)
+
+        current_bar_time = [None]
+
+        simulator = PaperTradingSimulator(paper_config, clock=lambda: current_bar_time[0] or datetime.utcnow())
+
+        replay = None
+
+        if self.config.orderbook_path:
+
+            from execution.orderbook_replay import OrderbookReplayEngine
+
+            replay = OrderbookReplayEngine.load(self.config.orderbook_path)
+
+            simulator.orderbook_replay = replay
+
+            logger.info(f"Market fills replayed from orderbook recording {self.config.orderbook_path}")
 
         equity_curve = EquityCurve()
 
@@ -547,6 +601,14 @@ class BacktestRunner:
 
         for idx, row in df.iterrows():
 
+            current_bar_time[0] = _bar_datetime(row.get("timestamp"))
+
+            # Стакан на момент бара - до ордеров этого бара
+
+            if replay is not None:
+
+                replay.advance_to(_bar_time_ms(row, idx))
+
             # Преобразовать row в DataFrame для strategy_func
 
             df_up_to_now = df.iloc[: idx + 1].copy()
@@ -617,7 +679,7 @@ class BacktestRunner:
 
             equity = simulator.get_equity()
 
-            equity_curve.add_point(idx, equity)
+            equity_curve.add_point(_bar_time_ms(row, idx), equity)
 
             # Проверить SL/TP
 
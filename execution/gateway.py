@@ -212,3 +212,63 @@ class IExecutionGateway(ABC):
             List исполнений
         """
         pass
+    
+    # ==================== Batch операции ====================
+    #
+    # Реализация по умолчанию - последовательные одиночные вызовы.
+    # BybitLiveGateway переопределяет их batch эндпоинтами Bybit V5.
+    
+    def place_orders_batch(
+        self,
+        category: str,
+        orders: List[Dict[str, Any]],
+    ) -> List[OrderResult]:
+        """
+        Разместить несколько ордеров.
+        
+        Args:
+            category: Категория
+            orders: Описания ордеров (аргументы place_order в виде dict,
+                    без category)
+            
+        Returns:
+            OrderResult на каждый ордер, в том же порядке
+        """
+        return [self.place_order(category=category, **order) for order in orders]
+    
+    def amend_orders_batch(
+        self,
+        category: str,
+        amendments: List[Dict[str, Any]],
+    ) -> List[OrderResult]:
+        """
+        Изменить несколько ордеров.
+        
+        Args:
+            category: Категория
+            amendments: symbol, order_id/order_link_id и изменяемые поля
+            
+        Returns:
+            OrderResult на каждый элемент, в том же порядке
+        """
+        return [
+            OrderResult.error_result(f"Amend not supported by {type(self).__name__}")
+            for _ in amendments
+        ]
+    
+    def cancel_orders_batch(
+        self,
+        category: str,
+        cancels: List[Dict[str, Any]],
+    ) -> List[OrderResult]:
+        """
+        Отменить несколько ордеров.
+        
+        Args:
+            category: Категория
+            cancels: symbol и order_id/order_link_id
+            
+        Returns:
+            OrderResult на каждый элемент, в том же порядке
+        """
+        return [self.cancel_order(category=category, **cancel) for cancel in cancels]
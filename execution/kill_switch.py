@@ -20,9 +20,26 @@ Activation scenarios:
 
 2. Automatic on critical errors (risk limit breached, connection loss, etc.)
 
+
+Cancels and reduce-only closes are fanned out across symbols in parallel
+
+(rate limiter priority lane), then flat state is verified via private stream
+
+position pushes (REST polling fallback). Per-symbol time-to-flat is stored
+
+in the activation history.
+
 """
 
 
+import threading
+
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from contextlib import nullcontext
+
 from datetime import datetime
 
 from decimal import Decimal
@@ -80,6 +97,9 @@ class KillSwitchManager:
         order_manager=None,  # Optional[OrderManager], avoid circular import
         db: Optional[Database] = None,
         allowed_symbols: Optional[List[str]] = None,
+        event_bus=None,  # Optional[OrderEventBus] - position pushes for flat check
+        max_workers: int = 8,
+        flat_timeout_seconds: float = 5.0,
     ):
         """
 
@@ -96,6 +116,12 @@ class KillSwitchManager:
 
             allowed_symbols: List of allowed trading symbols (optional)
 
+            event_bus: OrderEventBus with private stream position pushes (optional)
+
+            max_workers: Max parallel cancel/close requests
+
+            flat_timeout_seconds: How long to wait for positions to become flat
+
         """
 
         self.client = client
@@ -120,6 +146,20 @@ class KillSwitchManager:
 
         self.cancelled_orders: List[Dict] = []
 
+        self.max_workers = max(1, max_workers)
+
+        self.flat_timeout_seconds = flat_timeout_seconds
+
+        self.event_bus = event_bus
+
+        # symbol -> perf_counter() момента, когда push показал size == 0
+        self._flat_cond = threading.Condition()
+        self._flat_seen_at: Dict[str, float] = {}
+        self._awaiting_flat: set = set()
+
+        if event_bus is not None:
+            event_bus.subscribe_positions(self._on_position_push)
+
     def activate(
 
         self,
@@ -191,6 +231,8 @@ class KillSwitchManager:
 
         activation_time = datetime.now()
 
+        started = time.perf_counter()
+
         errors: List[str] = []
 
         logger.critical(
@@ -203,10 +245,17 @@ class KillSwitchManager:
 
         )
 
-        # Step 1: Cancel all pending orders
-
         cancelled_count = 0
 
+        closed_count = 0
+
+        time_to_flat: Dict[str, Optional[float]] = {}
+
+        # Cancel/close requests go through the rate limiter priority lane (_fan_out);
+        # the flat wait is outside it so other REST callers are not held back
+
+        # Step 1: Cancel all pending orders
+
         if cancel_orders:
 
             cancelled_count, cancel_errors = self._cancel_all_orders(symbols)
@@ -215,11 +264,9 @@ class KillSwitchManager:
 
         # Step 2: Close all open positions
 
-        closed_count = 0
-
         if close_positions:
 
-            closed_count, close_errors = self._close_all_positions(symbols)
+            closed_count, close_errors, time_to_flat = self._close_all_positions(symbols, started)
 
             errors.extend(close_errors)
 
@@ -255,6 +302,10 @@ class KillSwitchManager:
 
             "positions_closed": closed_count,
 
+            "time_to_flat": time_to_flat,
+
+            "duration_seconds": round(time.perf_counter() - started, 4),
+
             "errors": errors,
 
             "success": len(errors) == 0,
@@ -285,6 +336,8 @@ class KillSwitchManager:
 
             "positions_closed": closed_count,
 
+            "time_to_flat": time_to_flat,
+
             "errors": errors,
 
         }
@@ -318,7 +371,8 @@ class KillSwitchManager:
             if not symbols_to_cancel:
                 # Get symbols from open positions
                 try:
-                    positions = self._get_open_positions()
+                    with self._priority_lane():
+                        positions = self._get_open_positions()
                     symbols_from_positions = list(set([p.get("symbol") for p in positions if p.get("symbol")]))
                     
                     # Combine with allowed_symbols if available
@@ -333,11 +387,9 @@ class KillSwitchManager:
                     # Fallback to allowed_symbols only
                     symbols_to_cancel = self.allowed_symbols if self.allowed_symbols else []
 
-            # Cancel orders for each symbol
+            # Cancel orders for all symbols in parallel
             if symbols_to_cancel:
-                for symbol in symbols_to_cancel:
-
-                    cancelled, symbol_errors = self._cancel_orders_for_symbol(symbol)
+                for cancelled, symbol_errors in self._fan_out(self._cancel_orders_for_symbol, symbols_to_cancel):
 
                     cancelled_count += cancelled
 
@@ -423,20 +475,27 @@ class KillSwitchManager:
 
         return cancelled_count, errors
 
-    def _close_all_positions(self, symbols: Optional[List[str]] = None) -> Tuple[int, List[str]]:
+    def _close_all_positions(
+        self,
+        symbols: Optional[List[str]] = None,
+        started: Optional[float] = None,
+    ) -> Tuple[int, List[str], Dict[str, Optional[float]]]:
         """
 
-        Close all open positions using market orders.
+        Close all open positions using market orders (in parallel) and verify flat state.
 
 
         Args:
 
             symbols: List of symbols (None = all)
 
+            started: perf_counter() of activation start (time-to-flat origin)
+
 
         Returns:
 
-            Tuple of (count_closed, list_of_errors)
+            Tuple of (count_closed, list_of_errors, time_to_flat per symbol in seconds,
+            None if the position was not confirmed flat)
 
         """
 
@@ -444,23 +503,53 @@ class KillSwitchManager:
 
         closed_count = 0
 
+        time_to_flat: Dict[str, Optional[float]] = {}
+
+        started = started if started is not None else time.perf_counter()
+
         try:
 
             # Get all positions
 
-            positions = self._get_open_positions(symbols)
+            with self._priority_lane():
+                positions = self._get_open_positions(symbols)
+
+            closing = [p.get("symbol") for p in positions]
+
+            with self._flat_cond:
+                for symbol in closing:
+                    self._flat_seen_at.pop(symbol, None)
+                self._awaiting_flat.update(closing)
+
+            try:
+                closed_symbols = []
+
+                for position, (closed, pos_errors) in zip(positions, self._fan_out(self._close_position, positions)):
+
+                    if closed:
+
+                        closed_count += 1
 
-            for position in positions:
+                        closed_symbols.append(position.get("symbol"))
 
-                closed, pos_errors = self._close_position(position)
+                    errors.extend(pos_errors)
 
-                if closed:
+                if closed_symbols:
 
-                    closed_count += 1
+                    time_to_flat = self._verify_flat(closed_symbols, started)
 
-                errors.extend(pos_errors)
+                    for symbol, seconds in time_to_flat.items():
 
-            logger.warning(f"Closed {closed_count} positions, errors: {len(errors)}")
+                        if seconds is None:
+
+                            errors.append(f"Position {symbol} not flat after {self.flat_timeout_seconds}s")
+            finally:
+                with self._flat_cond:
+                    self._awaiting_flat.difference_update(closing)
+
+            logger.warning(
+                f"Closed {closed_count} positions, errors: {len(errors)}, time to flat: {time_to_flat}"
+            )
 
         except Exception as e:
 
@@ -470,7 +559,111 @@ class KillSwitchManager:
 
             errors.append(error_msg)
 
-        return closed_count, errors
+        return closed_count, errors, time_to_flat
+
+    def _fan_out(self, func, items: List) -> List:
+        """Run func(item) for every item in parallel under the rate limiter priority lane."""
+
+        if not items:
+            return []
+
+        def run(item):
+            with self._priority_lane():
+                return func(item)
+
+        if len(items) == 1 or self.max_workers == 1:
+            return [run(item) for item in items]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(items)), thread_name_prefix="kill-switch"
+        ) as executor:
+            return list(executor.map(run, items))
+
+    def _priority_lane(self):
+        """Priority lane of the REST client rate limiter (no-op for clients without it)."""
+
+        if isinstance(self.client, BybitRestClient):
+            return self.client.priority_lane()
+
+        return nullcontext()
+
+    def _on_position_push(self, position_data: Dict) -> None:
+        """Position push from private stream: remember when a closing symbol became flat."""
+
+        symbol = position_data.get("symbol")
+
+        try:
+            size = float(position_data.get("size") or 0)
+        except (TypeError, ValueError):
+            return
+
+        with self._flat_cond:
+            if symbol in self._awaiting_flat and size == 0 and symbol not in self._flat_seen_at:
+                self._flat_seen_at[symbol] = time.perf_counter()
+                self._flat_cond.notify_all()
+
+    def _verify_flat(self, symbols: List[str], started: float) -> Dict[str, Optional[float]]:
+        """
+
+        Wait until positions for symbols are flat.
+
+
+        Uses private stream position pushes when the stream is active,
+
+        otherwise polls /v5/position/list. Symbols without a flat push by
+
+        the timeout are checked once more via REST before being reported.
+
+
+        Returns:
+
+            symbol -> seconds from activation start to flat (None on timeout)
+
+        """
+
+        deadline = time.perf_counter() + self.flat_timeout_seconds
+
+        pending = set(symbols)
+
+        if self.event_bus is not None and self.event_bus.is_active:
+            with self._flat_cond:
+                self._flat_cond.wait_for(
+                    lambda: pending.issubset(self._flat_seen_at),
+                    timeout=max(0.0, deadline - time.perf_counter()),
+                )
+                flat_at = {s: self._flat_seen_at.get(s) for s in symbols}
+            pending = {s for s, t in flat_at.items() if t is None}
+            if pending:
+                # Push lost or stream stalled: REST decides, as without the stream
+                logger.warning(f"No flat push for {sorted(pending)} within timeout, checking via REST")
+                self._confirm_flat_via_rest(pending, flat_at)
+        else:
+            flat_at: Dict[str, Optional[float]] = {s: None for s in symbols}
+            while pending:
+                self._confirm_flat_via_rest(pending, flat_at)
+                now = time.perf_counter()
+                if not pending or now >= deadline:
+                    break
+                time.sleep(min(0.2, max(0.0, deadline - now)))
+
+        return {
+            s: (round(t - started, 4) if t is not None else None)
+            for s, t in flat_at.items()
+        }
+
+    def _confirm_flat_via_rest(self, pending: set, flat_at: Dict[str, Optional[float]]) -> None:
+        """Mark pending symbols without an open REST position as flat (nothing on REST failure)."""
+
+        positions = self._fetch_open_positions(list(pending))
+
+        if positions is None:
+            return
+
+        still_open = {p.get("symbol") for p in positions}
+        now = time.perf_counter()
+        for symbol in pending - still_open:
+            flat_at[symbol] = now
+        pending &= still_open
 
     def _get_open_positions(self, symbols: Optional[List[str]] = None) -> List[Dict]:
         """
@@ -485,10 +678,15 @@ class KillSwitchManager:
 
         Returns:
 
-            List of open positions
+            List of open positions (empty if the request failed)
 
         """
 
+        return self._fetch_open_positions(symbols) or []
+
+    def _fetch_open_positions(self, symbols: Optional[List[str]] = None) -> Optional[List[Dict]]:
+        """Open positions from /v5/position/list, None if the request failed."""
+
         positions: List[Dict] = []
 
         try:
@@ -524,11 +722,14 @@ class KillSwitchManager:
                         positions.append(pos)
             else:
                 logger.error(f"Failed to get positions: {response.get('retMsg', 'Unknown error')}")
+                return None
 
         except Exception as e:
 
             logger.error(f"Failed to get positions: {str(e)}")
 
+            return None
+
         return positions
 
     def _close_position(self, position: Dict) -> Tuple[bool, List[str]]:
@@ -660,6 +861,10 @@ class KillSwitchManager:
 
             "positions_closed": len(self.closed_positions),
 
+            "last_time_to_flat": (
+                self.activation_history[-1].get("time_to_flat", {}) if self.activation_history else {}
+            ),
+
         }
 
     def can_trade(self) -> bool:
@@ -87,6 +87,30 @@ class BybitLiveGateway(IExecutionGateway):
             symbol=symbol,
         )
     
+    def place_orders_batch(
+        self,
+        category: str,
+        orders: List[Dict[str, Any]],
+    ) -> List[OrderResult]:
+        """Разместить ордера через /v5/order/create-batch."""
+        return self.order_manager.create_orders_batch(category=category, orders=orders)
+    
+    def amend_orders_batch(
+        self,
+        category: str,
+        amendments: List[Dict[str, Any]],
+    ) -> List[OrderResult]:
+        """Изменить ордера через /v5/order/amend-batch."""
+        return self.order_manager.amend_orders_batch(category=category, amendments=amendments)
+    
+    def cancel_orders_batch(
+        self,
+        category: str,
+        cancels: List[Dict[str, Any]],
+    ) -> List[OrderResult]:
+        """Отменить ордера через /v5/order/cancel-batch."""
+        return self.order_manager.cancel_orders_batch(category=category, cancels=cancels)
+    
     def get_position(self, category: str, symbol: str) -> Optional[Dict[str, Any]]:
         """Получить позицию через PositionManager."""
         position = self.position_manager.get_position(symbol)
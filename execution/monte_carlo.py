@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo Trade Resampling - E2 EPIC
+
+TradeMetricsCalculator даёт одно детерминированное значение Sharpe/MaxDD
+на прогон. Monte Carlo строит распределение этих метрик, пересобирая
+последовательность сделок бэктеста:
+
+- bootstrap: выборка сделок с возвращением
+- block_bootstrap: выборка блоков подряд идущих сделок (сохраняет серийность)
+- shuffle: перестановка порядка сделок (тот же итоговый PnL, другой путь)
+
+Все пути считаются векторно в NumPy матрицами (paths x trades), по чанкам
+чтобы ограничить память. 10k путей по 1k сделок - секунды.
+
+Результат:
+- Перцентили max drawdown ($ и % от пика), итоговой equity, доходности
+- Вероятность разорения (equity опускается ниже ruin_threshold_percent)
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+METHODS = ("bootstrap", "block_bootstrap", "shuffle")
+
+
+@dataclass
+class MonteCarloConfig:
+    """Конфигурация Monte Carlo симуляции"""
+
+    n_paths: int = 10000
+    method: str = "bootstrap"  # bootstrap, block_bootstrap, shuffle
+    block_size: int = 10  # Для block_bootstrap
+    chunk_size: int = 2000  # Путей за один проход (ограничение памяти)
+    ruin_threshold_percent: float = 50.0  # Разорение = потеря 50% начального капитала
+    percentiles: Tuple[float, ...] = (5.0, 25.0, 50.0, 75.0, 95.0)
+    seed: int = 42
+
+
+@dataclass
+class MonteCarloResult:
+    """Распределения метрик по Monte Carlo путям"""
+
+    method: str
+    n_paths: int
+    n_trades: int
+    initial_balance: float
+    ruin_probability: float = 0.0  # Доля путей, достигших уровня разорения
+    max_drawdown_dollars: Dict[str, float] = field(default_factory=dict)
+    max_drawdown_percent: Dict[str, float] = field(default_factory=dict)  # % от пика equity
+    final_equity: Dict[str, float] = field(default_factory=dict)
+    total_return_percent: Dict[str, float] = field(default_factory=dict)
+    duration_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализовать для JSON"""
+        return {
+            "method": self.method,
+            "n_paths": self.n_paths,
+            "n_trades": self.n_trades,
+            "initial_balance": self.initial_balance,
+            "ruin_probability": self.ruin_probability,
+            "max_drawdown_dollars": self.max_drawdown_dollars,
+            "max_drawdown_percent": self.max_drawdown_percent,
+            "final_equity": self.final_equity,
+            "total_return_percent": self.total_return_percent,
+            "duration_seconds": self.duration_seconds,
+        }
+
+
+class MonteCarloSimulator:
+    """
+    Векторный Monte Carlo по списку сделок.
+
+    Пример:
+        simulator = MonteCarloSimulator(MonteCarloConfig(n_paths=10000))
+        mc = simulator.run_on_trades(result["trades"], Decimal("10000"))
+        print(mc.ruin_probability, mc.max_drawdown_percent["p95"])
+    """
+
+    def __init__(self, config: MonteCarloConfig = None):
+        self.config = config or MonteCarloConfig()
+        if self.config.method not in METHODS:
+            raise ValueError(f"Unknown Monte Carlo method: {self.config.method}")
+
+    def run_on_trades(self, trades: List[Any], initial_balance: Decimal) -> MonteCarloResult:
+        """
+        Прогнать симуляцию по Trade объектам (PaperTradingSimulator.get_trades()).
+
+        Используется pnl_after_commission каждой сделки.
+        """
+        pnl = np.fromiter((float(t.pnl_after_commission) for t in trades), dtype=np.float64)
+        return self.run(pnl, float(initial_balance))
+
+    def run(self, pnl: Sequence[float], initial_balance: float) -> MonteCarloResult:
+        """
+        Прогнать симуляцию по массиву PnL сделок.
+
+        Args:
+            pnl: PnL каждой сделки (после комиссий), в порядке бэктеста
+            initial_balance: Начальный баланс
+
+        Returns:
+            MonteCarloResult с перцентилями и вероятностью разорения
+        """
+        cfg = self.config
+        start = time.perf_counter()
+        pnl = np.asarray(pnl, dtype=np.float64)
+        n_trades = len(pnl)
+
+        result = MonteCarloResult(
+            method=cfg.method,
+            n_paths=cfg.n_paths,
+            n_trades=n_trades,
+            initial_balance=float(initial_balance),
+        )
+        if n_trades == 0 or cfg.n_paths <= 0:
+            return result
+
+        rng = np.random.default_rng(cfg.seed)
+        ruin_level = initial_balance * (1 - cfg.ruin_threshold_percent / 100)
+        max_dd = np.empty(cfg.n_paths)
+        max_dd_pct = np.empty(cfg.n_paths)
+        final = np.empty(cfg.n_paths)
+        ruined = np.empty(cfg.n_paths, dtype=bool)
+
+        for lo in range(0, cfg.n_paths, cfg.chunk_size):
+            hi = min(lo + cfg.chunk_size, cfg.n_paths)
+            idx = self._sample_indices(rng, hi - lo, n_trades)
+            # Equity пути: начальный баланс + накопленный PnL
+            equity = np.cumsum(pnl[idx], axis=1)
+            equity += initial_balance
+            peak = np.maximum.accumulate(equity, axis=1)
+            np.maximum(peak, initial_balance, out=peak)
+            drawdown = peak - equity
+            max_dd[lo:hi] = drawdown.max(axis=1)
+            max_dd_pct[lo:hi] = (drawdown / peak).max(axis=1) * 100
+            final[lo:hi] = equity[:, -1]
+            ruined[lo:hi] = equity.min(axis=1) <= ruin_level
+
+        result.ruin_probability = float(ruined.mean())
+        result.max_drawdown_dollars = self._percentiles(max_dd)
+        result.max_drawdown_percent = self._percentiles(max_dd_pct)
+        result.final_equity = self._percentiles(final)
+        result.total_return_percent = self._percentiles(
+            (final - initial_balance) / initial_balance * 100 if initial_balance else final * 0
+        )
+        result.duration_seconds = time.perf_counter() - start
+
+        logger.info(
+            f"Monte Carlo ({cfg.method}): {cfg.n_paths} paths x {n_trades} trades "
+            f"in {result.duration_seconds:.2f}s, ruin={result.ruin_probability:.2%}, "
+            f"MaxDD p95={result.max_drawdown_percent.get('p95', 0):.2f}%"
+        )
+        return result
+
+    def _sample_indices(self, rng: np.random.Generator, n_paths: int, n_trades: int) -> np.ndarray:
+        """Матрица индексов сделок (n_paths x n_trades) для выбранного метода"""
+        method = self.config.method
+        if method == "bootstrap":
+            return rng.integers(0, n_trades, size=(n_paths, n_trades))
+        if method == "shuffle":
+            return rng.permuted(np.broadcast_to(np.arange(n_trades), (n_paths, n_trades)), axis=1)
+        # block_bootstrap: круговые блоки подряд идущих сделок
+        block = max(1, min(self.config.block_size, n_trades))
+        n_blocks = -(-n_trades // block)
+        starts = rng.integers(0, n_trades, size=(n_paths, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block)) % n_trades
+        return idx.reshape(n_paths, n_blocks * block)[:, :n_trades]
+
+    def _percentiles(self, values: np.ndarray) -> Dict[str, float]:
+        pcts = self.config.percentiles
+        return {
+            f"p{p:g}": float(v) for p, v in zip(pcts, np.percentile(values, pcts))
+        }
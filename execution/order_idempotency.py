@@ -75,6 +75,26 @@ def generate_order_link_id(
     return order_link_id
 
 
+def leg_order_link_id(order_link_id: str, leg: int, max_length: int = 36) -> str:
+    """
+    orderLinkId отдельной ноги пачки ордеров (лесенка входа, частичные TP).
+
+    Все ноги одного решения получают общий стабильный orderLinkId
+    (generate_order_link_id) с суффиксом номера ноги - retry пачки даёт
+    те же orderLinkId для каждой ноги.
+
+    Examples:
+        >>> leg_order_link_id("mean_rev_BTCUSDT_289819200_L", 2)
+        'mean_rev_BTCUSDT_289819200_L_2'
+    """
+    suffix = f"_{leg}"
+    if len(order_link_id) + len(suffix) > max_length:
+        # Обрезка могла бы склеить разные orderLinkId - используем хеш
+        import hashlib
+        order_link_id = hashlib.md5(order_link_id.encode()).hexdigest()[:max_length - len(suffix)]
+    return f"{order_link_id}{suffix}"
+
+
 def normalize_side(side: str) -> str:
     """
     Нормализует сторону сделки к короткому формату.
@@ -11,6 +11,8 @@ Order Manager: создание, отмена, отслеживание орде
 
 - Синхронизация с БД
 
+- Batch create/amend/cancel (один round trip на пачку ордеров)
+
 """
 
 
@@ -18,7 +20,7 @@ import uuid
 
 import time
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from exchange.base_client import BybitRestClient
 
@@ -32,11 +34,15 @@ from logger import setup_logger
 logger = setup_logger(__name__)
 
 
+# Максимум ордеров в одном batch запросе по категориям (Bybit V5)
+BATCH_MAX_ORDERS = {"linear": 20, "inverse": 20, "option": 20, "spot": 10}
+
+
 class OrderManager:
 
     """Управление ордерами"""
 
-    def __init__(self, client: BybitRestClient, db: Database):
+    def __init__(self, client: BybitRestClient, db: Database, event_bus=None):
         """
 
         Args:
@@ -45,12 +51,18 @@ class OrderManager:
 
             db: Database instance
 
+            event_bus: OrderEventBus из PrivateWebSocket (опционально)
+
         """
 
         self.client = client
 
         self.db = db
 
+        # Push-состояние ордеров: при активном стриме заменяет REST запрос
+
+        self.event_bus = event_bus
+
         logger.info("OrderManager initialized")
 
     def create_order(
@@ -246,9 +258,10 @@ class OrderManager:
         """
         Проверяет, существует ли уже ордер с данным orderLinkId.
 
-        Проверка происходит в два этапа:
+        Проверка происходит в три этапа:
         1. Проверка в локальной БД
-        2. Проверка через API (если в БД не найден)
+        2. Проверка по push-событиям private WS (если стрим активен)
+        3. Проверка через API (если ордер неизвестен)
 
         Args:
             order_link_id: Клиентский ID ордера для проверки
@@ -256,25 +269,11 @@ class OrderManager:
         Returns:
             OrderResult существующего ордера или None если ордер не найден
         """
-        # 1. Проверяем в БД
-        db_order = self.db.get_order_by_link_id(order_link_id)
-        if db_order:
-            # Проверяем статус ордера - возвращаем только активные
-            status = db_order.get("status", "")
-            if status in ["New", "PartiallyFilled", "Untriggered"]:
-                logger.debug(f"Active order found in DB: {order_link_id} (status={status})")
-                # Формируем OrderResult из данных БД
-                return OrderResult(
-                    success=True,
-                    order_id=db_order.get("order_id"),
-                    error=None,
-                    raw={"source": "database", "order": db_order}
-                )
-            else:
-                logger.debug(f"Order found in DB but status is {status}, will create new order")
-                return None
+        known, existing = self._check_order_local(order_link_id)
+        if known:
+            return existing
 
-        # 2. Проверяем через API (на случай если БД не синхронизирована)
+        # 3. Проверяем через API (на случай если БД не синхронизирована)
         try:
             # Используем get_orders для поиска по orderLinkId
             # Примечание: Bybit API не позволяет прямой поиск по orderLinkId,
@@ -315,6 +314,49 @@ class OrderManager:
         # Ордер не найден
         return None
 
+    def _check_order_local(self, order_link_id: str) -> Tuple[bool, Optional[OrderResult]]:
+        """
+        Этапы 1-2 check_order_exists (БД и push-события), без REST.
+
+        Returns:
+            (ордер известен локально, OrderResult активного ордера или None)
+        """
+        # 1. Проверяем в БД
+        db_order = self.db.get_order_by_link_id(order_link_id)
+        if db_order:
+            # Проверяем статус ордера - возвращаем только активные
+            status = db_order.get("status", "")
+            if status in ["New", "PartiallyFilled", "Untriggered"]:
+                logger.debug(f"Active order found in DB: {order_link_id} (status={status})")
+                # Формируем OrderResult из данных БД
+                return True, OrderResult(
+                    success=True,
+                    order_id=db_order.get("order_id"),
+                    error=None,
+                    raw={"source": "database", "order": db_order}
+                )
+            else:
+                logger.debug(f"Order found in DB but status is {status}, will create new order")
+                return True, None
+
+        # 2. Проверяем по push-событиям (без REST запроса)
+        if self.event_bus is not None and self.event_bus.is_active:
+            pushed = self.event_bus.get_order_by_link_id(order_link_id)
+            if pushed:
+                order_status = pushed.get("orderStatus", "")
+                if order_status in ["New", "PartiallyFilled", "Untriggered"]:
+                    logger.debug(f"Active order found via WS: {order_link_id} (status={order_status})")
+                    return True, OrderResult(
+                        success=True,
+                        order_id=pushed.get("orderId"),
+                        error=None,
+                        raw={"source": "ws", "order": pushed}
+                    )
+                logger.debug(f"Order found via WS but status is {order_status}, will create new order")
+                return True, None
+
+        return False, None
+
     def cancel_order(
 
         self,
@@ -384,27 +426,7 @@ class OrderManager:
 
                 if order_id:
 
-                    self.db.save_order(
-
-                        {
-
-                            "order_id": order_id,
-
-                            "symbol": symbol,
-
-                            "side": "Unknown",
-
-                            "order_type": "Unknown",
-
-                            "qty": 0,
-
-                            "status": "Cancelled",
-
-                            "updated_time": time.time() * 1000,
-
-                        }
-
-                    )
+                    self._mark_cancelled(order_id)
 
                 # Сохраняем order_id для обратной совместимости
                 if not result.order_id:
@@ -597,3 +619,300 @@ class OrderManager:
         except Exception as e:
             logger.error(f"Cancel trading stop exception: {e}", exc_info=True)
             return OrderResult.error_result(str(e))
+
+    # ==================== Batch операции ====================
+
+    def create_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> List[OrderResult]:
+        """
+        Создать несколько ордеров за один запрос (/v5/order/create-batch).
+
+        Каждый элемент orders - dict с ключами create_order: symbol, side,
+        order_type, qty, price, time_in_force, stop_loss, take_profit,
+        order_link_id, а также reduce_only, trigger_price, trigger_direction.
+
+        Идемпотентность как в create_order: элемент с orderLinkId активного
+        ордера не отправляется, возвращается существующий ордер; повтор
+        orderLinkId внутри пачки отклоняется.
+
+        Args:
+            category: Категория (linear, inverse, spot, option)
+            orders: Описания ордеров
+
+        Returns:
+            OrderResult на каждый элемент orders, в том же порядке
+
+        Docs: https://bybit-exchange.github.io/docs/v5/order/batch-place
+        """
+        results: List[Optional[OrderResult]] = [None] * len(orders)
+        pending: List[int] = []
+        requests: List[Dict[str, Any]] = []
+        link_ids: List[Optional[str]] = [None] * len(orders)
+        unknown_symbols = set()
+
+        # ИДЕМПОТЕНТНОСТЬ: БД и push-события по каждому элементу
+        for i, order in enumerate(orders):
+            link_id = order.get("order_link_id")
+            if not link_id:
+                link_ids[i] = f"order_{uuid.uuid4().hex[:16]}"
+                continue
+            if link_id in link_ids:
+                results[i] = OrderResult.error_result(f"Duplicate orderLinkId in batch: {link_id}")
+                continue
+            link_ids[i] = link_id
+
+            known, existing_order = self._check_order_local(link_id)
+            if existing_order:
+                results[i] = existing_order
+            elif not known:
+                unknown_symbols.add(order["symbol"])
+
+        # Неизвестные локально orderLinkId - один REST запрос на символ
+        active_by_link_id: Dict[str, Dict[str, Any]] = {}
+        for symbol in unknown_symbols:
+            active_by_link_id.update(self._fetch_active_orders(category, symbol))
+
+        for i, order in enumerate(orders):
+            link_id = link_ids[i]
+            if link_id in active_by_link_id and results[i] is None:
+                pushed = active_by_link_id[link_id]
+                results[i] = OrderResult(
+                    success=True, order_id=pushed.get("orderId"), raw={"source": "api", "order": pushed}
+                )
+            if results[i] is not None:
+                if results[i].success:
+                    logger.warning(f"⚠ Order with orderLinkId={link_id} already exists, skipped in batch")
+                continue
+
+            try:
+                requests.append(self._build_batch_create_request(order, link_ids[i]))
+            except ValueError as e:
+                results[i] = OrderResult.error_result(str(e))
+                continue
+            pending.append(i)
+
+        logger.info(f"Creating {len(requests)} orders in batch ({category})")
+
+        for offset, chunk_results in self._post_batch("/v5/order/create-batch", category, requests):
+            for k, result in enumerate(chunk_results):
+                i, request = pending[offset + k], requests[offset + k]
+                if result.success:
+                    self._save_batch_order(orders[i], request, result)
+                    result.raw["order_link_id"] = request["orderLinkId"]
+                results[i] = result
+
+        return results
+
+    def amend_orders_batch(self, category: str, amendments: List[Dict[str, Any]]) -> List[OrderResult]:
+        """
+        Изменить несколько ордеров за один запрос (/v5/order/amend-batch).
+
+        Каждый элемент - dict: symbol, order_id или order_link_id и изменяемые
+        поля qty, price, trigger_price, stop_loss, take_profit.
+
+        Returns:
+            OrderResult на каждый элемент amendments, в том же порядке
+
+        Docs: https://bybit-exchange.github.io/docs/v5/order/batch-amend
+        """
+        field_map = {
+            "qty": "qty",
+            "price": "price",
+            "trigger_price": "triggerPrice",
+            "stop_loss": "stopLoss",
+            "take_profit": "takeProfit",
+        }
+        return self._run_batch("/v5/order/amend-batch", category, amendments, field_map)
+
+    def cancel_orders_batch(self, category: str, cancels: List[Dict[str, Any]]) -> List[OrderResult]:
+        """
+        Отменить несколько ордеров за один запрос (/v5/order/cancel-batch).
+
+        Каждый элемент - dict: symbol, order_id или order_link_id.
+
+        Returns:
+            OrderResult на каждый элемент cancels, в том же порядке
+
+        Docs: https://bybit-exchange.github.io/docs/v5/order/batch-cancel
+        """
+        results = self._run_batch("/v5/order/cancel-batch", category, cancels, {})
+
+        for result in results:
+            if result.success and result.order_id:
+                self._mark_cancelled(result.order_id)
+
+        return results
+
+    def _mark_cancelled(self, order_id: str) -> None:
+        """Статус Cancelled для ордера из БД; неизвестный ордер только логируется"""
+        if self.db.order_exists(order_id):
+            self.db.update_order_status(order_id, "Cancelled")
+        else:
+            logger.warning(f"Cancelled order {order_id} not found in DB, status not saved")
+
+    def _run_batch(
+        self,
+        endpoint: str,
+        category: str,
+        items: List[Dict[str, Any]],
+        field_map: Dict[str, str],
+    ) -> List[OrderResult]:
+        """Amend/cancel batch: элемент идентифицируется orderId или orderLinkId"""
+        results: List[Optional[OrderResult]] = [None] * len(items)
+        pending: List[int] = []
+        requests: List[Dict[str, Any]] = []
+
+        for i, item in enumerate(items):
+            if not item.get("order_id") and not item.get("order_link_id"):
+                results[i] = OrderResult.error_result("Either order_id or order_link_id required")
+                continue
+
+            request = {"symbol": item["symbol"]}
+            if item.get("order_id"):
+                request["orderId"] = item["order_id"]
+            else:
+                request["orderLinkId"] = item["order_link_id"]
+            for key, api_key in field_map.items():
+                if item.get(key) is not None:
+                    request[api_key] = str(item[key])
+
+            requests.append(request)
+            pending.append(i)
+
+        logger.info(f"{endpoint}: {len(requests)} orders ({category})")
+
+        for offset, chunk_results in self._post_batch(endpoint, category, requests):
+            for k, result in enumerate(chunk_results):
+                i = pending[offset + k]
+                if not result.order_id:
+                    result.order_id = items[i].get("order_id")
+                results[i] = result
+
+        return results
+
+    def _fetch_active_orders(self, category: str, symbol: str) -> Dict[str, Dict[str, Any]]:
+        """Активные ордера символа по orderLinkId (все страницы по nextPageCursor)"""
+        active: Dict[str, Dict[str, Any]] = {}
+        params = {"category": category, "symbol": symbol, "limit": 50}
+        try:
+            while True:
+                response = self.client.get("/v5/order/realtime", params=dict(params), signed=True)
+                if response.get("retCode") != 0:
+                    logger.warning(f"Active orders for {symbol} incomplete: {response.get('retMsg')}")
+                    return active
+                result = response.get("result", {})
+                for order in result.get("list", []):
+                    if order.get("orderLinkId") and order.get("orderStatus", "New") in [
+                        "New", "PartiallyFilled", "Untriggered"
+                    ]:
+                        active[order["orderLinkId"]] = order
+                next_cursor = result.get("nextPageCursor")
+                if not next_cursor or not result.get("list"):
+                    return active
+                params["cursor"] = next_cursor
+        except Exception as e:
+            logger.warning(f"Error fetching active orders for {symbol}: {e}")
+            return active
+
+    def _post_batch(self, endpoint: str, category: str, requests: List[Dict[str, Any]]):
+        """
+        Отправить requests пачками по BATCH_MAX_ORDERS[category].
+
+        Yields:
+            (смещение пачки в requests, OrderResult на каждый элемент пачки)
+        """
+        chunk_size = BATCH_MAX_ORDERS.get(category, 10)
+
+        for start in range(0, len(requests), chunk_size):
+            chunk = requests[start:start + chunk_size]
+
+            try:
+                response = self.client.post(endpoint, params={"category": category, "request": chunk})
+            except Exception as e:
+                logger.error(f"Batch request exception ({endpoint}): {e}", exc_info=True)
+                self.db.save_error("order_batch", str(e), metadata={"endpoint": endpoint, "request": chunk})
+                yield start, [OrderResult.error_result(str(e)) for _ in chunk]
+                continue
+
+            yield start, self._parse_batch_response(response, len(chunk))
+
+    @staticmethod
+    def _parse_batch_response(response: Dict[str, Any], count: int) -> List[OrderResult]:
+        """
+        Разобрать ответ batch эндпоинта в OrderResult на элемент.
+
+        result.list[i] - данные ордера, retExtInfo.list[i] - код/сообщение элемента.
+        """
+        if response.get("retCode", -1) != 0:
+            error = response.get("retMsg", "Unknown error")
+            return [OrderResult.error_result(error, raw=response) for _ in range(count)]
+
+        items = (response.get("result") or {}).get("list") or []
+        statuses = (response.get("retExtInfo") or {}).get("list") or []
+
+        results = []
+        for i in range(count):
+            item = items[i] if i < len(items) else {}
+            status = statuses[i] if i < len(statuses) else {"code": 0}
+            raw = {"retCode": status.get("code", 0), "retMsg": status.get("msg", ""), "result": item}
+
+            if status.get("code", 0) == 0 and item:
+                results.append(OrderResult(success=True, order_id=item.get("orderId") or None, raw=raw))
+            else:
+                error = status.get("msg") or "Missing item in batch response"
+                results.append(OrderResult.error_result(error, raw=raw))
+        return results
+
+    @staticmethod
+    def _build_batch_create_request(order: Dict[str, Any], order_link_id: str) -> Dict[str, Any]:
+        """Элемент request для create-batch (те же правила, что в create_order)"""
+        order_type = order.get("order_type", "Market")
+        request = {
+            "symbol": order["symbol"],
+            "side": order["side"],
+            "orderType": order_type,
+            "qty": str(order["qty"]),
+            "orderLinkId": order_link_id,
+        }
+
+        if order_type == "Limit":
+            if not order.get("price"):
+                raise ValueError("Price required for Limit order")
+            request["price"] = str(order["price"])
+            request["timeInForce"] = order.get("time_in_force", "GTC")
+        elif order.get("time_in_force"):
+            request["timeInForce"] = order["time_in_force"]
+
+        if order.get("stop_loss"):
+            request["stopLoss"] = str(order["stop_loss"])
+        if order.get("take_profit"):
+            request["takeProfit"] = str(order["take_profit"])
+        if order.get("reduce_only"):
+            request["reduceOnly"] = True
+        if order.get("trigger_price"):
+            request["triggerPrice"] = str(order["trigger_price"])
+            request["triggerDirection"] = int(order.get("trigger_direction", 1))
+
+        return request
+
+    def _save_batch_order(self, order: Dict[str, Any], request: Dict[str, Any], result: OrderResult) -> None:
+        """Сохранить созданный в batch ордер в БД (как create_order)"""
+        try:
+            self.db.save_order(
+                {
+                    "order_id": result.order_id,
+                    "order_link_id": request["orderLinkId"],
+                    "symbol": request["symbol"],
+                    "side": request["side"],
+                    "order_type": request["orderType"],
+                    "price": order.get("price"),
+                    "qty": order["qty"],
+                    "filled_qty": 0,
+                    "status": "New",
+                    "time_in_force": request.get("timeInForce", "GTC"),
+                    "created_time": time.time() * 1000,
+                    "updated_time": time.time() * 1000,
+                    "metadata": result.raw.get("result", {}),
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to save batch order {result.order_id}: {e}")
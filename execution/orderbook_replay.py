@@ -0,0 +1,632 @@
+# -*- coding: utf-8 -*-
+"""
+Orderbook Replay - E2 EPIC
+
+SlippageModel и PaperTradingSimulator._calculate_filled_price оценивают
+цену заполнения через ATR/volume множители и случайный slippage, не глядя
+на реальную глубину стакана. Этот модуль даёт две части:
+
+1. OrderbookRecorder - пишет стакан из OrderbookStream в компактный
+   бинарный файл: цены и объёмы в целых тиках/лотах, уровни внутри
+   стороны delta-кодированы, время - дельтой от предыдущей записи.
+   Полный snapshot пишется раз в snapshot_interval записей, между ними -
+   только изменённые уровни (qty=0 - удаление уровня).
+
+2. OrderbookReplayEngine - воспроизводит запись и прогоняет через неё
+   ордера:
+   - market: проход по уровням стакана (VWAP, недозаполнение при нехватке глубины)
+   - limit: позиция в очереди (объём перед нами на уровне на момент постановки),
+     уменьшения объёма уровня продвигают очередь (FIFO допущение),
+     пересечение уровня противоположной стороной - полное заполнение
+
+Формат файла:
+    MAGIC(4) VERSION(u8) HEADER_LEN(u32) HEADER(json)
+    записи: KIND(u8) DT_MS(u32) N_BIDS(u16) N_ASKS(u16) [side bids] [side asks]
+    side:   FIRST_TICK(i64) TICK_DIFFS(i32 * (n-1)) LOTS(i64 * n)
+
+Использование:
+    recorder = OrderbookRecorder("storage/orderbook/BTCUSDT.obr", "BTCUSDT",
+                                 tick_size=0.1, qty_step=0.001)
+    recorder.attach(orderbook_stream)  # пишет каждое обновление стакана
+
+    engine = OrderbookReplayEngine.load("storage/orderbook/BTCUSDT.obr")
+    engine.advance_to(ts_ms)
+    fill = engine.simulate_market_order("Buy", 0.5)
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"OBRC"
+VERSION = 1
+KIND_SNAPSHOT = 0
+KIND_DELTA = 1
+
+_FILE_HEADER = struct.Struct("<4sBI")
+_RECORD_HEADER = struct.Struct("<BIHH")
+_FIRST_TICK = struct.Struct("<q")
+
+
+def _encode_side(levels: List[Tuple[int, int]]) -> bytes:
+    """Уровни (tick, lots), отсортированные по tick -> delta-кодированные байты"""
+    if not levels:
+        return b""
+    ticks = np.fromiter((t for t, _ in levels), dtype=np.int64, count=len(levels))
+    lots = np.fromiter((q for _, q in levels), dtype=np.int64, count=len(levels))
+    return (
+        _FIRST_TICK.pack(int(ticks[0]))
+        + np.diff(ticks).astype("<i4").tobytes()
+        + lots.astype("<i8").tobytes()
+    )
+
+
+class OrderbookRecorder:
+    """
+    Запись обновлений стакана в бинарный файл.
+
+    on_orderbook() совместим с callback OrderbookStream: принимает стакан
+    {"bids": [[price, qty], ...], "asks": [...], "timestamp": sec}.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        symbol: str,
+        tick_size: float,
+        qty_step: float,
+        depth: int = 50,
+        snapshot_interval: int = 1000,
+    ):
+        """
+        Args:
+            path: Путь к файлу записи
+            symbol: Символ
+            tick_size: Шаг цены инструмента
+            qty_step: Шаг количества инструмента
+            depth: Глубина стакана (для метаданных)
+            snapshot_interval: Писать полный snapshot каждые N записей
+        """
+        self.path = path
+        self.symbol = symbol
+        self.tick_size = float(tick_size)
+        self.qty_step = float(qty_step)
+        self.depth = depth
+        self.snapshot_interval = max(1, int(snapshot_interval))
+
+        self._file = None
+        self._start_ts_ms: Optional[int] = None
+        self._last_ts_ms = 0
+        self._bids: Dict[int, int] = {}
+        self._asks: Dict[int, int] = {}
+        self._records = 0
+        self.bytes_written = 0
+
+    def attach(self, stream: Any) -> None:
+        """Подключиться к OrderbookStream, сохранив существующий callback"""
+        downstream = stream.on_orderbook
+
+        def on_orderbook(orderbook: Dict[str, Any]) -> None:
+            self.on_orderbook(orderbook)
+            downstream(orderbook)
+
+        stream.on_orderbook = on_orderbook
+
+    def on_orderbook(self, orderbook: Dict[str, Any]) -> None:
+        """Записать очередное состояние стакана"""
+        ts_ms = int(float(orderbook.get("timestamp", time.time())) * 1000)
+        self.record(ts_ms, orderbook.get("bids", []), orderbook.get("asks", []))
+
+    def record(self, ts_ms: int, bids: List[List[Any]], asks: List[List[Any]]) -> None:
+        """
+        Записать стакан на момент ts_ms.
+
+        Args:
+            ts_ms: Время в миллисекундах
+            bids: [[price, qty], ...]
+            asks: [[price, qty], ...]
+        """
+        if self._file is None:
+            self._open(ts_ms)
+
+        bids_now = self._to_levels(bids)
+        asks_now = self._to_levels(asks)
+
+        if self._records % self.snapshot_interval == 0:
+            kind = KIND_SNAPSHOT
+            bid_levels = sorted(bids_now.items())
+            ask_levels = sorted(asks_now.items())
+        else:
+            kind = KIND_DELTA
+            bid_levels = self._diff(self._bids, bids_now)
+            ask_levels = self._diff(self._asks, asks_now)
+            if not bid_levels and not ask_levels:
+                return
+
+        dt = max(0, ts_ms - self._last_ts_ms)
+        payload = (
+            _RECORD_HEADER.pack(kind, min(dt, 0xFFFFFFFF), len(bid_levels), len(ask_levels))
+            + _encode_side(bid_levels)
+            + _encode_side(ask_levels)
+        )
+        self._file.write(payload)
+        self.bytes_written += len(payload)
+
+        self._bids = bids_now
+        self._asks = asks_now
+        self._last_ts_ms = self._last_ts_ms + dt
+        self._records += 1
+
+    def close(self) -> None:
+        """Закрыть файл записи"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(
+                f"Orderbook recording closed: {self.path} "
+                f"({self._records} records, {self.bytes_written} bytes)"
+            )
+
+    def __enter__(self) -> "OrderbookRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _open(self, ts_ms: int) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        header = json.dumps(
+            {
+                "symbol": self.symbol,
+                "tick_size": self.tick_size,
+                "qty_step": self.qty_step,
+                "depth": self.depth,
+                "start_ts_ms": ts_ms,
+            }
+        ).encode()
+        self._file = open(self.path, "wb", buffering=1 << 20)
+        self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, len(header)) + header)
+        self.bytes_written = _FILE_HEADER.size + len(header)
+        self._start_ts_ms = ts_ms
+        self._last_ts_ms = ts_ms
+        logger.info(f"Orderbook recording started: {self.path}")
+
+    def _to_levels(self, levels: List[List[Any]]) -> Dict[int, int]:
+        result = {}
+        for price, qty in levels:
+            lots = int(round(float(qty) / self.qty_step))
+            if lots > 0:
+                result[int(round(float(price) / self.tick_size))] = lots
+        return result
+
+    @staticmethod
+    def _diff(old: Dict[int, int], new: Dict[int, int]) -> List[Tuple[int, int]]:
+        changes = [(tick, lots) for tick, lots in new.items() if old.get(tick) != lots]
+        changes.extend((tick, 0) for tick in old if tick not in new)
+        changes.sort()
+        return changes
+
+
+@dataclass
+class OrderbookRecording:
+    """
+    Декодированная запись в колоночном виде.
+
+    События i описываются ts_ms[i], kind[i]; их уровни - срезы
+    [level_start[i], level_start[i+1]) массивов level_side/level_tick/level_lots
+    (level_side: 0 bids, 1 asks).
+    """
+
+    symbol: str
+    tick_size: float
+    qty_step: float
+    depth: int
+    ts_ms: np.ndarray
+    kind: np.ndarray
+    level_start: np.ndarray
+    level_side: np.ndarray
+    level_tick: np.ndarray
+    level_lots: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts_ms)
+
+    @classmethod
+    def load(cls, path: str) -> "OrderbookRecording":
+        """Прочитать файл OrderbookRecorder"""
+        with open(path, "rb") as f:
+            buf = f.read()
+
+        magic, version, header_len = _FILE_HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an orderbook recording: {path}")
+        pos = _FILE_HEADER.size
+        header = json.loads(buf[pos:pos + header_len])
+        pos += header_len
+
+        # Проход 1: только заголовки записей -> смещения блоков уровней
+        ts_list: List[int] = []
+        kinds: List[int] = []
+        counts: List[int] = []
+        block_pos: List[int] = []
+        block_len: List[int] = []
+        block_side: List[int] = []
+
+        unpack_record = _RECORD_HEADER.unpack_from
+        record_size = _RECORD_HEADER.size
+        ts = header["start_ts_ms"]
+        size = len(buf)
+        while pos < size:
+            kind, dt, n_bids, n_asks = unpack_record(buf, pos)
+            pos += record_size
+            ts += dt
+            ts_list.append(ts)
+            kinds.append(kind)
+            counts.append(n_bids + n_asks)
+            if n_bids:
+                block_pos.append(pos)
+                block_len.append(n_bids)
+                block_side.append(0)
+                pos += 12 * n_bids + 4
+            if n_asks:
+                block_pos.append(pos)
+                block_len.append(n_asks)
+                block_side.append(1)
+                pos += 12 * n_asks + 4
+
+        # Проход 2: векторное декодирование всех уровней
+        raw = np.frombuffer(buf, dtype=np.uint8)
+        positions = np.asarray(block_pos, dtype=np.int64)
+        n_levels = np.asarray(block_len, dtype=np.int64)
+        total = int(n_levels.sum())
+
+        first_in_block = np.zeros(len(n_levels), dtype=np.int64)
+        if len(n_levels):
+            first_in_block[1:] = np.cumsum(n_levels)[:-1]
+        k = np.arange(total, dtype=np.int64) - np.repeat(first_in_block, n_levels)
+        block_of = np.repeat(positions, n_levels)
+        diff_base = block_of + 8
+        lots_base = block_of + 8 + 4 * (np.repeat(n_levels, n_levels) - 1)
+
+        def read(offsets, width, dtype):
+            return raw[offsets[:, None] + np.arange(width)].copy().view(dtype).ravel()
+
+        step = read(np.where(k == 0, block_of, diff_base + 4 * (k - 1)), 4, "<i4").astype(np.int64)
+        heads = k == 0
+        if total:
+            step[heads] = read(block_of[heads], 8, "<i8")
+        running = np.cumsum(step)
+        level_tick = running - np.repeat(running[heads] - step[heads], n_levels)
+        level_lots = read(lots_base + 8 * k, 8, "<i8").astype(np.int64)
+
+        level_start = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=level_start[1:])
+
+        return cls(
+            symbol=header["symbol"],
+            tick_size=header["tick_size"],
+            qty_step=header["qty_step"],
+            depth=header.get("depth", 50),
+            ts_ms=np.asarray(ts_list, dtype=np.int64),
+            kind=np.asarray(kinds, dtype=np.int8),
+            level_start=level_start,
+            level_side=np.repeat(np.asarray(block_side, dtype=np.int8), n_levels),
+            level_tick=level_tick,
+            level_lots=level_lots,
+        )
+
+
+@dataclass
+class ReplayFill:
+    """Заполнение ордера при реплее"""
+
+    order_id: str
+    ts_ms: int
+    side: str
+    price: float
+    qty: float
+    is_maker: bool
+
+
+@dataclass
+class MarketFillResult:
+    """Результат прохода market ордера по стакану"""
+
+    side: str
+    requested_qty: float
+    filled_qty: float
+    avg_price: float
+    worst_price: float
+    mid_price: float
+    slippage_bps: float  # Относительно mid
+    levels_consumed: int
+
+    @property
+    def unfilled_qty(self) -> float:
+        return self.requested_qty - self.filled_qty
+
+
+@dataclass
+class _RestingOrder:
+    order_id: str
+    side: str
+    tick: int
+    remaining_lots: int
+    queue_ahead: int
+
+
+class OrderbookReplayEngine:
+    """
+    Воспроизведение записанного стакана и симуляция заполнений.
+
+    Время двигается только вперёд через advance_to(ts_ms). Пока нет
+    лимитных ордеров в очереди, advance_to перепрыгивает на ближайший
+    snapshot и применяет только последующие дельты.
+    """
+
+    def __init__(self, recording: OrderbookRecording):
+        self.recording = recording
+        self.tick_size = recording.tick_size
+        self.qty_step = recording.qty_step
+
+        self.bids: Dict[int, int] = {}
+        self.asks: Dict[int, int] = {}
+        self.current_ts_ms = int(recording.ts_ms[0]) if len(recording) else 0
+        self._next_event = 0
+        self._resting: Dict[str, _RestingOrder] = {}
+        self._order_counter = 0
+        self._snapshot_idx = np.flatnonzero(recording.kind == KIND_SNAPSHOT)
+
+        # Python списки быстрее numpy скаляров в горячем цикле
+        self._starts = recording.level_start.tolist()
+        self._sides = recording.level_side.tolist()
+        self._ticks = recording.level_tick.tolist()
+        self._lots = recording.level_lots.tolist()
+
+    @classmethod
+    def load(cls, path: str) -> "OrderbookReplayEngine":
+        """Создать движок из файла записи"""
+        return cls(OrderbookRecording.load(path))
+
+    # ==================== Book State ====================
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self._price(max(self.bids)) if self.bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self._price(min(self.asks)) if self.asks else None
+
+    @property
+    def mid_price(self) -> Optional[float]:
+        if not self.bids or not self.asks:
+            return None
+        return (max(self.bids) + min(self.asks)) * self.tick_size / 2
+
+    def advance_to(self, ts_ms: int) -> List[ReplayFill]:
+        """
+        Применить все события с временем <= ts_ms.
+
+        Returns:
+            Заполнения лимитных ордеров, произошедшие за этот интервал
+        """
+        recording = self.recording
+        end = int(np.searchsorted(recording.ts_ms, ts_ms, side="right"))
+        fills: List[ReplayFill] = []
+
+        if end > self._next_event and not self._resting:
+            # Ордеров в очереди нет - начинаем с последнего snapshot до end
+            k = int(np.searchsorted(self._snapshot_idx, end, side="left")) - 1
+            if k >= 0 and self._snapshot_idx[k] > self._next_event:
+                self._next_event = int(self._snapshot_idx[k])
+
+        for i in range(self._next_event, end):
+            self._apply_event(i, fills)
+
+        self._next_event = max(self._next_event, end)
+        self.current_ts_ms = max(self.current_ts_ms, int(ts_ms))
+        return fills
+
+    def replay(self) -> List[ReplayFill]:
+        """Проиграть запись до конца"""
+        if not len(self.recording):
+            return []
+        return self.advance_to(int(self.recording.ts_ms[-1]))
+
+    def _apply_event(self, i: int, fills: List[ReplayFill]) -> None:
+        lo, hi = self._starts[i], self._starts[i + 1]
+        bids, asks = self.bids, self.asks
+        resting = self._resting
+
+        if self.recording.kind[i] == KIND_SNAPSHOT:
+            if resting:
+                old_bids, old_asks = dict(bids), dict(asks)
+            bids.clear()
+            asks.clear()
+            for j in range(lo, hi):
+                (asks if self._sides[j] else bids)[self._ticks[j]] = self._lots[j]
+            if resting:
+                ts = int(self.recording.ts_ms[i])
+                for book, old in ((bids, old_bids), (asks, old_asks)):
+                    for tick in set(old) | set(book):
+                        self._on_level_change(
+                            book is asks, tick, old.get(tick, 0), book.get(tick, 0), ts, fills
+                        )
+                self._check_crossed(ts, fills)
+            return
+
+        ts = int(self.recording.ts_ms[i]) if resting else 0
+        for j in range(lo, hi):
+            book = asks if self._sides[j] else bids
+            tick = self._ticks[j]
+            lots = self._lots[j]
+            if resting:
+                self._on_level_change(self._sides[j] == 1, tick, book.get(tick, 0), lots, ts, fills)
+            if lots:
+                book[tick] = lots
+            else:
+                book.pop(tick, None)
+        if resting:
+            self._check_crossed(ts, fills)
+
+    def _price(self, tick: int) -> float:
+        # Округление убирает артефакты float (500001 * 0.1 = 50000.100000000006)
+        return round(tick * self.tick_size, 10)
+
+    # ==================== Market Orders ====================
+
+    def simulate_market_order(self, side: str, qty: float) -> MarketFillResult:
+        """
+        Пройти market ордером по текущему стакану (стакан не изменяется).
+
+        Args:
+            side: "Buy" (забирает asks) или "Sell" (забирает bids)
+            qty: Количество
+
+        Returns:
+            MarketFillResult; filled_qty < qty если глубины не хватило
+        """
+        remaining = int(round(float(qty) / self.qty_step))
+        levels = self._walk(side, remaining, None)
+        filled_lots = sum(lots for _, lots in levels)
+        mid = self.mid_price or 0.0
+
+        if filled_lots == 0:
+            return MarketFillResult(side, float(qty), 0.0, 0.0, 0.0, mid, 0.0, 0)
+
+        avg_tick = sum(tick * lots for tick, lots in levels) / filled_lots
+        avg_price = avg_tick * self.tick_size
+        sign = 1 if side == "Buy" else -1
+        slippage_bps = sign * (avg_price - mid) / mid * 10000 if mid else 0.0
+
+        return MarketFillResult(
+            side=side,
+            requested_qty=float(qty),
+            filled_qty=filled_lots * self.qty_step,
+            avg_price=avg_price,
+            worst_price=self._price(levels[-1][0]),
+            mid_price=mid,
+            slippage_bps=slippage_bps,
+            levels_consumed=len(levels),
+        )
+
+    def _walk(self, side: str, lots: int, limit_tick: Optional[int]) -> List[Tuple[int, int]]:
+        """Уровни (tick, lots), которые заберёт агрессивный ордер"""
+        if side == "Buy":
+            book = sorted(self.asks.items())
+            allowed = (lambda t: t <= limit_tick) if limit_tick is not None else None
+        else:
+            book = sorted(self.bids.items(), reverse=True)
+            allowed = (lambda t: t >= limit_tick) if limit_tick is not None else None
+
+        taken = []
+        for tick, available in book:
+            if lots <= 0 or (allowed and not allowed(tick)):
+                break
+            take = min(lots, available)
+            taken.append((tick, take))
+            lots -= take
+        return taken
+
+    # ==================== Limit Orders ====================
+
+    def submit_limit_order(self, side: str, price: float, qty: float) -> Tuple[str, List[ReplayFill]]:
+        """
+        Поставить limit ордер.
+
+        Пересекающая спред часть исполняется сразу как taker, остаток
+        встаёт в очередь за текущим объёмом уровня.
+
+        Returns:
+            (order_id, немедленные заполнения)
+        """
+        order_id = f"replay_{self._order_counter}"
+        self._order_counter += 1
+        tick = int(round(float(price) / self.tick_size))
+        lots = int(round(float(qty) / self.qty_step))
+
+        fills = []
+        for level_tick, take in self._walk(side, lots, tick):
+            fills.append(self._fill(order_id, side, level_tick, take, False, self.current_ts_ms))
+            lots -= take
+
+        if lots > 0:
+            own_book = self.bids if side == "Buy" else self.asks
+            self._resting[order_id] = _RestingOrder(
+                order_id=order_id,
+                side=side,
+                tick=tick,
+                remaining_lots=lots,
+                queue_ahead=own_book.get(tick, 0),
+            )
+        return order_id, fills
+
+    def cancel_order(self, order_id: str) -> bool:
+        """Снять лимитный ордер из очереди"""
+        return self._resting.pop(order_id, None) is not None
+
+    def get_queue_position(self, order_id: str) -> Optional[float]:
+        """Объём перед ордером в очереди (в единицах qty)"""
+        order = self._resting.get(order_id)
+        return order.queue_ahead * self.qty_step if order else None
+
+    def open_orders(self) -> List[str]:
+        return list(self._resting)
+
+    def _on_level_change(
+        self, is_ask: bool, tick: int, old: int, new: int, ts: int, fills: List[ReplayFill]
+    ) -> None:
+        """
+        Уменьшение объёма на уровне ордера продвигает очередь (FIFO).
+
+        Запись не содержит сделок, поэтому любое уменьшение считается
+        исполнением с головы очереди: сначала съедается объём перед нами,
+        остаток уменьшения (из объёма, вставшего позже нас) - заполнение.
+        """
+        if new >= old:
+            return
+        decrease = old - new
+        for order in list(self._resting.values()):
+            if order.tick != tick or (order.side == "Sell") != is_ask:
+                continue
+            ahead_consumed = min(decrease, order.queue_ahead)
+            order.queue_ahead -= ahead_consumed
+            self._fill_resting(order, min(decrease - ahead_consumed, order.remaining_lots), ts, fills)
+
+    def _check_crossed(self, ts: int, fills: List[ReplayFill]) -> None:
+        """Противоположная сторона дошла до цены ордера - заполнение целиком"""
+        best_ask = min(self.asks) if self.asks else None
+        best_bid = max(self.bids) if self.bids else None
+        for order in list(self._resting.values()):
+            if order.side == "Buy" and best_ask is not None and best_ask <= order.tick:
+                self._fill_resting(order, order.remaining_lots, ts, fills)
+            elif order.side == "Sell" and best_bid is not None and best_bid >= order.tick:
+                self._fill_resting(order, order.remaining_lots, ts, fills)
+
+    def _fill_resting(self, order: _RestingOrder, lots: int, ts: int, fills: List[ReplayFill]) -> None:
+        if lots <= 0:
+            return
+        fills.append(self._fill(order.order_id, order.side, order.tick, lots, True, ts))
+        order.remaining_lots -= lots
+        if order.remaining_lots <= 0:
+            self._resting.pop(order.order_id, None)
+
+    def _fill(self, order_id: str, side: str, tick: int, lots: int, is_maker: bool, ts: int) -> ReplayFill:
+        return ReplayFill(
+            order_id=order_id,
+            ts_ms=ts,
+            side=side,
+            price=self._price(tick),
+            qty=lots * self.qty_step,
+            is_maker=is_maker,
+        )
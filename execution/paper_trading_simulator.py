@@ -38,7 +38,7 @@ from datetime import datetime
 
 from decimal import Decimal, ROUND_HALF_UP
 
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 
 from enum import Enum
 
@@ -324,7 +324,7 @@ class PaperTradingSimulator:
 
     """
 
-    def __init__(self, config: PaperTradingConfig = None):
+    def __init__(self, config: PaperTradingConfig = None, clock: Optional[Callable[[], datetime]] = None):
         """
 
         Инициализация симулятора.
@@ -334,10 +334,16 @@ class PaperTradingSimulator:
 
             config: PaperTradingConfig с параметрами
 
+            clock: Источник времени fills/сделок (по умолчанию datetime.utcnow;
+
+                бэктест подставляет время текущего бара)
+
         """
 
         self.config = config or PaperTradingConfig()
 
+        self.clock = clock or datetime.utcnow
+
         self.cash = self.config.initial_balance
 
         self.initial_balance = self.config.initial_balance
@@ -362,6 +368,12 @@ class PaperTradingSimulator:
 
         self._rng = np.random.RandomState(self.config.seed)
 
+        # Реплей записанного стакана (OrderbookReplayEngine) для market fills по глубине.
+
+        # Если не задан - используется slippage модель по bps
+
+        self.orderbook_replay = None
+
         self._order_counter = 0
 
         self._trade_counter = 0
@@ -469,7 +481,7 @@ class PaperTradingSimulator:
 
             status=OrderStatus.FILLED,
 
-            filled_at=datetime.utcnow(),
+            filled_at=self.clock(),
 
         )
 
@@ -589,9 +601,17 @@ class PaperTradingSimulator:
 
         """
 
-        # Вычислить цену заполнения с slippage
+        # Вычислить цену заполнения: по записанному стакану или с slippage
+
+        filled_price = None
+
+        if is_market and self.orderbook_replay is not None:
+
+            filled_price = self._calculate_book_filled_price(order.side, order.qty)
 
-        filled_price = self._calculate_filled_price(current_price, order.side, is_market=is_market)
+        if filled_price is None:
+
+            filled_price = self._calculate_filled_price(current_price, order.side, is_market=is_market)
 
         # Вычислить комиссию
 
@@ -623,7 +643,7 @@ class PaperTradingSimulator:
 
         order.status = OrderStatus.FILLED
 
-        order.filled_at = datetime.utcnow()
+        order.filled_at = self.clock()
 
         order.commission_paid = commission
 
@@ -718,6 +738,47 @@ class PaperTradingSimulator:
 
         return filled_price.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
+    def _calculate_book_filled_price(self, side: str, qty: Decimal) -> Optional[Decimal]:
+        """
+
+        Вычислить цену заполнения market ордера проходом по стакану из orderbook_replay.
+
+
+        Недостающая глубина добирается по худшей цене прохода.
+
+
+        Returns:
+
+            Цена заполнения или None если стакан пуст
+
+        """
+
+        fill = self.orderbook_replay.simulate_market_order(side, float(qty))
+
+        if fill.filled_qty <= 0:
+
+            return None
+
+        avg_price = fill.avg_price
+
+        if fill.unfilled_qty > 0:
+
+            logger.debug(
+
+                f"Orderbook depth exhausted: {fill.unfilled_qty:.6f} of {float(qty):.6f} "
+
+                f"priced at worst level {fill.worst_price:.2f}"
+
+            )
+
+            avg_price = (
+
+                fill.avg_price * fill.filled_qty + fill.worst_price * fill.unfilled_qty
+
+            ) / fill.requested_qty
+
+        return Decimal(str(avg_price)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
     def _update_position_on_buy(
 
         self,
@@ -747,7 +808,7 @@ class PaperTradingSimulator:
 
                 entry_commission=commission,
 
-                entry_time=datetime.utcnow(),
+                entry_time=self.clock(),
 
             )
 
@@ -804,7 +865,7 @@ class PaperTradingSimulator:
 
                 entry_commission=commission,
 
-                entry_time=datetime.utcnow(),
+                entry_time=self.clock(),
 
             )
 
@@ -909,7 +970,7 @@ class PaperTradingSimulator:
 
             exit_qty=exit_qty,
 
-            exit_time=datetime.utcnow(),
+            exit_time=self.clock(),
 
             exit_commission=exit_commission,
 
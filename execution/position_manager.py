@@ -282,6 +282,7 @@ class PositionManager:
         r_multiple = profit_distance / risk_distance
         
         # Проверяем каждый уровень partial exit
+        triggered = []
         for r_level, percent_to_close in pos["partial_exit_levels"]:
             # Проверяем, не был ли этот уровень уже закрыт
             already_exited = any(
@@ -306,42 +307,54 @@ class PositionManager:
                     f"R={r_multiple:.2f} >= {r_level}R, "
                     f"closing {percent_to_close*100:.0f}% ({qty_to_close:.6f})"
                 )
-                
-                # Выполняем частичное закрытие через order_manager
-                try:
-                    close_side = "Sell" if pos["side"] == "Buy" else "Buy"
+                triggered.append((r_level, percent_to_close, qty_to_close))
+        
+        if not triggered:
+            return
+        
+        # Выполняем частичное закрытие через order_manager
+        # (несколько уровней сразу - одним batch запросом)
+        try:
+            close_side = "Sell" if pos["side"] == "Buy" else "Buy"
+            orders = [
+                {
+                    "symbol": symbol,
+                    "side": close_side,
+                    "order_type": "Market",
+                    "qty": float(qty_to_close),
+                }
+                for _, _, qty_to_close in triggered
+            ]
+            
+            if len(orders) == 1:
+                results = [self.order_manager.create_order(category="linear", **orders[0])]
+            else:
+                results = self.order_manager.create_orders_batch(category="linear", orders=orders)
+            
+            for (r_level, percent_to_close, qty_to_close), result in zip(triggered, results):
+                if result.success:
+                    # Обновляем размер позиции
+                    new_size = pos["current_size"] - qty_to_close
+                    pos["current_size"] = new_size
                     
-                    result = self.order_manager.create_order(
-                        category="linear",
-                        symbol=symbol,
-                        side=close_side,
-                        order_type="Market",
-                        qty=float(qty_to_close),
+                    # Записываем информацию о partial exit
+                    pos["partial_exits"].append({
+                        "r_level": r_level,
+                        "percent": percent_to_close,
+                        "qty_closed": qty_to_close,
+                        "price": current_price,
+                        "timestamp": time.time(),
+                    })
+                    
+                    logger.info(
+                        f"✓ Partial exit executed: {qty_to_close:.6f} @ {current_price:.2f}, "
+                        f"remaining size: {new_size:.6f}"
                     )
+                else:
+                    logger.error(f"Partial exit failed: {result.error}")
                     
-                    if result.success:
-                        # Обновляем размер позиции
-                        new_size = current_size - qty_to_close
-                        pos["current_size"] = new_size
-                        
-                        # Записываем информацию о partial exit
-                        pos["partial_exits"].append({
-                            "r_level": r_level,
-                            "percent": percent_to_close,
-                            "qty_closed": qty_to_close,
-                            "price": current_price,
-                            "timestamp": time.time(),
-                        })
-                        
-                        logger.info(
-                            f"✓ Partial exit executed: {qty_to_close:.6f} @ {current_price:.2f}, "
-                            f"remaining size: {new_size:.6f}"
-                        )
-                    else:
-                        logger.error(f"Partial exit failed: {result.error}")
-                        
-                except Exception as e:
-                    logger.error(f"Error executing partial exit: {e}", exc_info=True)
+        except Exception as e:
+            logger.error(f"Error executing partial exit: {e}", exc_info=True)
 
     def _check_trailing(self, symbol: str, current_price: float):
         """
@@ -3,18 +3,28 @@ Reconciliation Service for state synchronization with exchange.
 
 Periodically syncs local state (positions, orders, executions) with exchange REST API
 to prevent drift and ensure consistency after restarts.
+
+Each cycle is incremental: only executions newer than a per-symbol cursor
+(last execTime + execIds at that time) are fetched, with pagination, and applied
+in a single DB transaction together with the new cursor. Positions and orders
+are re-checked only for symbols that had new executions. The full snapshot diff
+(all positions, open orders) runs on a slower cadence or when a checksum
+diverges (executions for unknown orders, cursor gaps, fetch errors).
 """
 
 import logging
 import threading
 import time
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from execution.position_manager import PositionManager
 from storage.database import Database
 
 logger = logging.getLogger(__name__)
 
+# /v5/execution/list with only startTime returns [startTime, startTime + 7 days]
+EXECUTION_WINDOW_MS = 7 * 24 * 60 * 60 * 1000 - 60 * 60 * 1000
+
 
 class ReconciliationService:
     """
@@ -33,6 +43,8 @@ class ReconciliationService:
         db: Database,
         symbol: str,
         reconcile_interval: int = 60,
+        full_snapshot_interval: int = 900,
+        max_execution_pages: int = 20,
     ):
         """
         Initialize ReconciliationService.
@@ -43,12 +55,22 @@ class ReconciliationService:
             db: Database for order/execution tracking
             symbol: Trading symbol
             reconcile_interval: Seconds between reconciliations
+            full_snapshot_interval: Seconds between full snapshot diffs
+            max_execution_pages: Max execution pages (100 each) fetched per cycle
         """
         self.client = client
         self.position_manager = position_manager
         self.db = db
         self.symbol = symbol
         self.reconcile_interval = reconcile_interval
+        self.full_snapshot_interval = full_snapshot_interval
+        self.max_execution_pages = max_execution_pages
+        
+        # symbol -> {"time": last execTime (ms), "ids": execIds at that time}
+        self._exec_cursors: Dict[str, Dict[str, Any]] = {}
+        self._last_full_snapshot: Optional[float] = None
+        self._checksum_diverged = False
+        self.last_cycle_stats: Dict[str, Any] = {}
         
         self.running = False
         self.reconciliation_thread: Optional[threading.Thread] = None
@@ -58,16 +80,24 @@ class ReconciliationService:
             f"(interval: {reconcile_interval}s)"
         )
     
-    def reconcile_positions(self) -> None:
+    def reconcile_positions(self, symbols: Optional[Set[str]] = None) -> None:
         """
         Reconcile positions with exchange.
         
         Fetches current positions from exchange and updates local state
         if there's a mismatch.
+        
+        Args:
+            symbols: Only reconcile these symbols (None = all positions)
         """
         try:
             # Fetch positions from exchange
-            exchange_positions = self._fetch_positions_from_exchange()
+            if symbols:
+                exchange_positions = {}
+                for symbol in symbols:
+                    exchange_positions.update(self._fetch_positions_from_exchange(symbol))
+            else:
+                exchange_positions = self._fetch_positions_from_exchange()
             
             for symbol, exchange_pos in exchange_positions.items():
                 local_pos = self.position_manager.positions.get(symbol)
@@ -97,7 +127,9 @@ class ReconciliationService:
                     logger.info(f"Position reconciled for {symbol}")
             
             # Check for positions locally that don't exist on exchange
-            for symbol, local_pos in self.position_manager.positions.items():
+            for symbol, local_pos in list(self.position_manager.positions.items()):
+                if symbols and symbol not in symbols:
+                    continue
                 if symbol not in exchange_positions or exchange_positions[symbol]['size'] == 0:
                     if local_pos.size != 0:
                         logger.warning(
@@ -162,39 +194,194 @@ class ReconciliationService:
         except Exception as e:
             logger.error(f"Error reconciling orders: {e}", exc_info=True)
     
-    def reconcile_executions(self) -> None:
+    def reconcile_executions(self) -> Set[str]:
         """
-        Reconcile executions with exchange.
+        Reconcile executions with exchange incrementally.
         
-        Fetches recent executions and adds any missing ones to local DB.
+        Fetches only executions newer than the stored cursor (paginated) and
+        saves them together with the advanced cursor in one DB transaction.
+        
+        The exchange returns executions newest first, so an incomplete fetch
+        (page cap, error mid-pagination) keeps the cursor and records a gap:
+        the next cycles page backwards with endTime until it closes.
+        
+        Returns:
+            Symbols that had new executions
         """
+        symbol = self.symbol
         try:
-            # Fetch recent executions from exchange (last 50)
-            exchange_execs = self._fetch_executions_from_exchange()
+            cursor = self._load_cursor(symbol)
+            if cursor and time.time() * 1000 - cursor["time"] > EXECUTION_WINDOW_MS:
+                # startTime/endTime span at most 7 days - executions before that are lost
+                logger.warning(f"Execution cursor for {symbol} outside API window, full snapshot scheduled")
+                self._checksum_diverged = True
+                cursor = None
+            
+            executions, complete = self._fetch_new_executions(symbol, cursor)
+            self.last_cycle_stats["executions_fetched"] = len(executions)
             
-            for exec_data in exchange_execs:
-                exec_id = exec_data.get('execId')
-                if exec_id and not self.db.execution_exists(exec_id):
-                    logger.info(f"Adding missed execution: {exec_id}")
-                    self.db.save_execution(exec_data)
+            if complete and cursor and "pending" in cursor:
+                # Gap closed (its executions are all older): continue from the newest seen before it
+                new_cursor = cursor["pending"]
+            elif not executions:
+                return set()
+            elif complete or not cursor:
+                new_cursor = self._advance_cursor(cursor, executions)
+            else:
+                logger.warning(f"Execution cursor gap for {symbol}, older executions fetched next cycle")
+                new_cursor = self._gap_cursor(cursor, executions)
+            
+            inserted = self.db.save_executions(
+                executions,
+                config_updates={self._cursor_key(symbol): new_cursor},
+            )
+            self._exec_cursors[symbol] = new_cursor
+            self.last_cycle_stats["executions_inserted"] = inserted
+            
+            if inserted:
+                logger.info(f"Applied {inserted} new executions for {symbol}")
+            
+            # Checksum: execution for an order we never saw -> local orders drifted
+            order_ids = {e.get("orderId") for e in executions if e.get("orderId")}
+            if any(not self.db.order_exists(order_id) for order_id in order_ids):
+                logger.warning(f"Executions for unknown orders on {symbol}, full snapshot scheduled")
+                self._checksum_diverged = True
+            
+            return {symbol}
         
         except Exception as e:
             logger.error(f"Error reconciling executions: {e}", exc_info=True)
+            self._checksum_diverged = True
+            return set()
     
     def run_reconciliation(self) -> None:
         """
-        Run full reconciliation of all states.
+        Run one reconciliation cycle.
+        
+        Executions are always reconciled incrementally; positions/orders are
+        re-checked for symbols with new executions, and the full snapshot diff
+        runs only when due or when a checksum diverged.
         
         This is called on startup and periodically.
         """
-        logger.info("Starting reconciliation...")
+        started = time.perf_counter()
+        self.last_cycle_stats = {"full_snapshot": False}
+        
+        touched = self.reconcile_executions()
+        
+        if self._full_snapshot_due():
+            self.run_full_reconciliation()
+        elif touched:
+            self.reconcile_positions(symbols=touched)
+            self.reconcile_orders()
+        
+        self.last_cycle_stats["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.debug(f"Reconciliation cycle: {self.last_cycle_stats}")
+    
+    def run_full_reconciliation(self) -> None:
+        """
+        Full snapshot diff of positions and open orders.
+        
+        Called on startup, every full_snapshot_interval seconds and when an
+        incremental checksum diverged.
+        """
+        logger.info("Starting full reconciliation...")
         
         self.reconcile_positions()
         self.reconcile_orders()
-        self.reconcile_executions()
+        
+        self._last_full_snapshot = time.time()
+        self._checksum_diverged = False
+        self.last_cycle_stats["full_snapshot"] = True
         
         logger.info("Reconciliation complete")
     
+    def _full_snapshot_due(self) -> bool:
+        if self._checksum_diverged or self._last_full_snapshot is None:
+            return True
+        return time.time() - self._last_full_snapshot >= self.full_snapshot_interval
+    
+    # ==================== Execution cursor ====================
+    
+    @staticmethod
+    def _cursor_key(symbol: str) -> str:
+        return f"reconciliation.exec_cursor.{symbol}"
+    
+    def _load_cursor(self, symbol: str) -> Optional[Dict[str, Any]]:
+        if symbol not in self._exec_cursors:
+            stored = self.db.get_config(self._cursor_key(symbol))
+            if isinstance(stored, dict) and "time" in stored:
+                self._exec_cursors[symbol] = stored
+        return self._exec_cursors.get(symbol)
+    
+    @classmethod
+    def _gap_cursor(cls, cursor: Dict[str, Any], executions: List[dict]) -> Dict[str, Any]:
+        """
+        Cursor after an incomplete fetch: the lower bound stays, gap_end is the
+        oldest fetched execTime and pending is where to continue once closed
+        """
+        gap_end = min(int(e.get("execTime", 0)) for e in executions)
+        if cursor.get("gap_end") is not None:
+            gap_end = min(gap_end, cursor["gap_end"])
+        pending = cursor.get("pending") or cls._advance_cursor(cursor, executions)
+        return {"time": cursor["time"], "ids": cursor.get("ids", []), "gap_end": gap_end, "pending": pending}
+    
+    @staticmethod
+    def _advance_cursor(cursor: Optional[Dict[str, Any]], executions: List[dict]) -> Dict[str, Any]:
+        """New cursor: max execTime and all execIds seen at that exact time"""
+        last_time = max(int(e.get("execTime", 0)) for e in executions)
+        ids = {e.get("execId") for e in executions if int(e.get("execTime", 0)) == last_time}
+        if cursor and cursor.get("time") == last_time:
+            ids.update(cursor.get("ids", []))
+        return {"time": last_time, "ids": sorted(i for i in ids if i)}
+    
+    def _fetch_new_executions(
+        self,
+        symbol: str,
+        cursor: Optional[Dict[str, Any]],
+    ) -> Tuple[List[dict], bool]:
+        """
+        Fetch executions newer than cursor, following nextPageCursor.
+        
+        Without a cursor (first run) only the latest page is fetched, the
+        same window as the old full reconciliation. A cursor with gap_end
+        fetches only the gap [time, gap_end] left by an incomplete cycle.
+        
+        Returns:
+            (new executions, True if the whole range was fetched)
+        """
+        params: Dict[str, Any] = {"category": "linear", "symbol": symbol, "limit": 100}
+        if cursor:
+            # execTime boundary is inclusive: executions at the same ms are filtered by execId
+            params["startTime"] = int(cursor["time"])
+            if cursor.get("gap_end") is not None:
+                params["endTime"] = int(cursor["gap_end"])
+        else:
+            params["limit"] = 50
+        
+        seen_ids = set(cursor.get("ids", [])) if cursor else set()
+        executions: List[dict] = []
+        
+        for _ in range(self.max_execution_pages):
+            response = self.client.get("/v5/execution/list", params=dict(params))
+            if response.get("retCode") != 0:
+                return executions, False
+            
+            result = response.get("result", {})
+            for exec_data in result.get("list", []):
+                exec_id = exec_data.get("execId")
+                if exec_id in seen_ids:
+                    continue
+                seen_ids.add(exec_id)
+                executions.append(exec_data)
+            
+            next_cursor = result.get("nextPageCursor")
+            if not cursor or not next_cursor or not result.get("list"):
+                return executions, True
+            params["cursor"] = next_cursor
+        
+        return executions, False
+    
     def start_loop(self) -> None:
         """
         Start background reconciliation loop.
@@ -237,19 +424,25 @@ class ReconciliationService:
             except Exception as e:
                 logger.error(f"Error in reconciliation loop: {e}", exc_info=True)
     
-    def _fetch_positions_from_exchange(self) -> Dict[str, dict]:
+    def _fetch_positions_from_exchange(self, symbol: Optional[str] = None) -> Dict[str, dict]:
         """
         Fetch positions from exchange REST API.
         
+        Args:
+            symbol: Fetch only this symbol (None = all USDT positions)
+        
         Returns:
             Dict mapping symbol -> position data
         """
+        params = {"category": "linear"}
+        if symbol:
+            params["symbol"] = symbol
+        else:
+            params["settleCoin"] = "USDT"
+        
         response = self.client.post(
             "/v5/position/list",
-            params={
-                "category": "linear",
-                "settleCoin": "USDT",
-            }
+            params=params,
         )
         
         positions = {}
@@ -294,29 +487,6 @@ class ReconciliationService:
         
         return orders
     
-    def _fetch_executions_from_exchange(self) -> List[dict]:
-        """
-        Fetch recent executions from exchange REST API.
-        
-        Returns:
-            List of execution dicts
-        """
-        response = self.client.get(
-            "/v5/execution/list",
-            params={
-                "category": "linear",
-                "symbol": self.symbol,
-                "limit": 50,
-            }
-        )
-        
-        executions = []
-        if response.get("retCode") == 0:
-            result = response.get("result", {})
-            executions = result.get("list", [])
-        
-        return executions
-    
     def _update_local_position(self, symbol: str, exchange_pos: dict) -> None:
         """
         Update local position from exchange data.
@@ -9,6 +9,7 @@ from dataclasses import dataclass, field
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 import time
+from exchange.instrument_registry import InstrumentSpec
 from logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -169,6 +170,183 @@ class ScaledEntryManager:
         
         return entry_levels
     
+    def build_level_orders(
+        self,
+        position_id: str,
+        symbol: str,
+        total_qty: Decimal,
+        entry_price: Decimal,
+        atr: Decimal,
+        side: str,
+        order_link_id: str,
+        spec: InstrumentSpec,
+    ) -> List[Dict[str, Any]]:
+        """
+        Описания ордеров для всех уровней входа - для одного batch запроса
+        (IExecutionGateway.place_orders_batch / OrderManager.create_orders_batch)
+        
+        - immediate: Market ордер
+        - pullback: Limit ордер на цене отката
+        - confirm_profit: условный Market ордер (triggerPrice) на цене подтверждения
+        
+        Количество и цены уровней нормализуются по правилам инструмента
+        (fit_levels_to_instrument). TradingBot пока входит одним ордером -
+        лесенку размещает вызывающий код.
+        
+        Args:
+            position_id: ID позиции (уровни из calculate_entry_levels)
+            symbol: Символ
+            total_qty: Общее количество для входа
+            entry_price: Цена первого входа
+            atr: Абсолютное значение ATR
+            side: "Long" или "Short"
+            order_link_id: Стабильный orderLinkId решения (generate_order_link_id),
+                           каждый уровень получает суффикс номера уровня
+            spec: Правила инструмента (InstrumentsManager.get_spec)
+        
+        Returns:
+            List[dict]: Ордер на каждый неисполненный уровень, в порядке уровней
+        """
+        from execution.order_idempotency import leg_order_link_id
+        
+        total_qty = Decimal(str(total_qty))
+        entry_price = Decimal(str(entry_price))
+        atr = Decimal(str(atr))
+        order_side = "Buy" if side == "Long" else "Sell"
+        
+        level_qtys = self.fit_levels_to_instrument(position_id, total_qty, entry_price, atr, side, spec)
+        
+        orders = []
+        for level in self._active_entries.get(position_id, []):
+            if level.executed:
+                continue
+            
+            order = {
+                "symbol": symbol,
+                "side": order_side,
+                "order_type": "Market",
+                "qty": float(level_qtys[level.level_number]),
+                "order_link_id": leg_order_link_id(order_link_id, level.level_number),
+            }
+            
+            if level.trigger_condition != "immediate":
+                trigger = spec.round_price(float(self.level_trigger_price(level, entry_price, atr, side)))
+                if level.trigger_condition == "pullback":
+                    order["order_type"] = "Limit"
+                    order["price"] = float(trigger)
+                else:
+                    # Вход после движения в нашу сторону: рост для Long (1), падение для Short (2)
+                    order["trigger_price"] = float(trigger)
+                    order["trigger_direction"] = 1 if side == "Long" else 2
+            
+            orders.append(order)
+        
+        return orders
+    
+    def fit_levels_to_instrument(
+        self,
+        position_id: str,
+        total_qty: Decimal,
+        entry_price: Decimal,
+        atr: Decimal,
+        side: str,
+        spec: InstrumentSpec,
+    ) -> Dict[int, Decimal]:
+        """
+        Количество неисполненных уровней на сетке qtyStep
+        
+        Шаги total_qty (округлённого вниз) делятся по накопленному проценту -
+        сумма уровней не теряет шагов на округлении каждого. Уровень меньше
+        minOrderQty / minNotional (по своей цене) сливается со следующим,
+        остаток после последнего - с последним оставшимся уровнем. Слитые
+        уровни удаляются из активных входов, их процент переходит уровню,
+        который их принял.
+        
+        Returns:
+            Dict[int, Decimal]: level_number -> количество
+        """
+        levels = self._active_entries.get(position_id, [])
+        pending = [l for l in levels if not l.executed]
+        total_steps = spec.qty_steps(float(total_qty))
+        
+        kept: List[EntryLevel] = []
+        steps_by_level: Dict[int, int] = {}
+        cumulative = Decimal("0")
+        allotted = 0
+        carry_steps, carry_percent = 0, 0.0
+        
+        for level in pending:
+            cumulative += Decimal(str(level.percent_of_total))
+            boundary = int(total_steps * cumulative / 100)
+            steps = boundary - allotted + carry_steps
+            allotted = boundary
+            
+            price = self.level_trigger_price(level, entry_price, atr, side)
+            qty_units = steps * spec.step_units
+            price_units = spec.price_ticks(float(price)) * spec.tick_units
+            if qty_units < spec.min_qty_units or price_units * qty_units < spec.min_notional_units:
+                logger.warning(
+                    f"[{position_id}] Level {level.level_number} below instrument minimums "
+                    f"({steps} x qtyStep {spec.qty_step}), merging into next level"
+                )
+                carry_steps, carry_percent = steps, carry_percent + level.percent_of_total
+                continue
+            
+            level.percent_of_total += carry_percent
+            steps_by_level[level.level_number] = steps
+            kept.append(level)
+            carry_steps, carry_percent = 0, 0.0
+        
+        if kept and carry_steps:
+            kept[-1].percent_of_total += carry_percent
+            steps_by_level[kept[-1].level_number] += carry_steps
+        elif not kept and pending:
+            logger.warning(f"[{position_id}] No entry level meets instrument minimums, dropping all")
+        
+        self._active_entries[position_id] = [l for l in levels if l.executed or l.level_number in steps_by_level]
+        
+        return {
+            number: Decimal(steps * spec.step_units).scaleb(-spec.qty_scale)
+            for number, steps in steps_by_level.items()
+        }
+    
+    def assign_level_orders(self, position_id: str, results: List[Any]) -> int:
+        """
+        Сохраняет order_id уровней по результатам batch запроса
+        (results в порядке build_level_orders)
+        
+        Returns:
+            int: Количество успешно размещённых уровней
+        """
+        pending = [l for l in self._active_entries.get(position_id, []) if not l.executed]
+        placed = 0
+        for level, result in zip(pending, results):
+            if result.success:
+                level.order_id = result.order_id
+                placed += 1
+            else:
+                logger.error(f"[{position_id}] Level {level.level_number} order failed: {result.error}")
+        return placed
+    
+    @staticmethod
+    def level_trigger_price(
+        level: EntryLevel,
+        entry_price: Decimal,
+        atr: Decimal,
+        side: str,
+    ) -> Decimal:
+        """Триггерная цена уровня (те же правила, что в get_next_entry_trigger_price)"""
+        if level.trigger_condition == "confirm_profit":
+            sl_distance = atr * Decimal("1.5")  # Предполагаем SL = 1.5 ATR
+            distance = sl_distance * Decimal(str(level.trigger_value or 0.5))
+            return entry_price + distance if side == "Long" else entry_price - distance
+        
+        if level.trigger_condition == "pullback":
+            distance = atr * Decimal(str(abs(level.trigger_value or -0.3)))
+            return entry_price - distance if side == "Long" else entry_price + distance
+        
+        return entry_price
+    
     def get_next_entry_trigger_price(
         self,
         position_id: str,
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Trade Ledger - колоночное хранение сделок для векторного расчёта метрик
+
+Вместо списка Trade объектов с Decimal арифметикой сделки хранятся как
+struct-of-arrays (NumPy): entry/exit ts, side, qty, prices, fees, pnl.
+Ядро compute_metrics_batch считает полный набор TradeMetrics за один
+векторный проход, в том числе сразу для многих ledger'ов (ParameterSweep):
+сделки всех ledger'ов склеиваются, а агрегаты считаются по сегментам
+через np.bincount / reduceat.
+
+Использование:
+    ledger = TradeLedger.from_trades(simulator.get_trades())
+    metrics = compute_metrics(ledger, Decimal("10000"))
+
+    # Много прогонов разом
+    all_metrics = compute_metrics_batch([ledger_a, ledger_b, ...])
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from execution.trade_metrics import TradeMetrics
+
+
+RISK_FREE_RATE = 0.02
+
+
+def _to_ms(value: Any) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if value is None:
+        return 0
+    return int(value)
+
+
+@dataclass
+class TradeLedger:
+    """Сделки в колоночном виде (все массивы одной длины)"""
+
+    entry_ts: np.ndarray  # int64, мс
+    exit_ts: np.ndarray  # int64, мс
+    side: np.ndarray  # int8: +1 long/Buy, -1 short/Sell
+    qty: np.ndarray  # float64
+    entry_price: np.ndarray  # float64
+    exit_price: np.ndarray  # float64
+    fees: np.ndarray  # float64, entry + exit commission
+    pnl: np.ndarray  # float64, PnL после комиссий
+    sl_hit: np.ndarray  # bool
+    tp_hit: np.ndarray  # bool
+    duration: np.ndarray  # float64, секунды
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    @classmethod
+    def empty(cls) -> "TradeLedger":
+        return cls.from_arrays(pnl=np.empty(0))
+
+    @classmethod
+    def from_arrays(cls, pnl: Sequence[float], **columns: Any) -> "TradeLedger":
+        """
+        Создать ledger из массивов. Отсутствующие колонки заполняются нулями.
+
+        Args:
+            pnl: PnL сделок после комиссий
+            **columns: Остальные колонки (entry_ts, side, fees, sl_hit, ...)
+        """
+        pnl = np.asarray(pnl, dtype=np.float64)
+        n = len(pnl)
+        dtypes = {
+            "entry_ts": np.int64,
+            "exit_ts": np.int64,
+            "side": np.int8,
+            "qty": np.float64,
+            "entry_price": np.float64,
+            "exit_price": np.float64,
+            "fees": np.float64,
+            "sl_hit": bool,
+            "tp_hit": bool,
+            "duration": np.float64,
+        }
+        arrays: Dict[str, np.ndarray] = {}
+        for name, dtype in dtypes.items():
+            if name in columns:
+                arrays[name] = np.asarray(columns[name], dtype=dtype)
+            else:
+                arrays[name] = np.zeros(n, dtype=dtype)
+        return cls(pnl=pnl, **arrays)
+
+    @classmethod
+    def from_trades(cls, trades: List[Any]) -> "TradeLedger":
+        """Собрать ledger из Trade объектов (PaperTradingSimulator.get_trades())"""
+        n = len(trades)
+        if n == 0:
+            return cls.empty()
+
+        def column(getter, dtype):
+            return np.fromiter((getter(t) for t in trades), dtype=dtype, count=n)
+
+        return cls(
+            entry_ts=column(lambda t: _to_ms(getattr(t, "entry_time", None)), np.int64),
+            exit_ts=column(lambda t: _to_ms(getattr(t, "exit_time", None)), np.int64),
+            side=column(
+                lambda t: 1 if str(getattr(t, "side", "long")).lower() in ("buy", "long") else -1,
+                np.int8,
+            ),
+            qty=column(lambda t: float(getattr(t, "entry_qty", 0)), np.float64),
+            entry_price=column(lambda t: float(getattr(t, "entry_price", 0)), np.float64),
+            exit_price=column(lambda t: float(getattr(t, "exit_price", 0)), np.float64),
+            fees=column(lambda t: float(t.entry_commission + t.exit_commission), np.float64),
+            pnl=column(lambda t: float(t.pnl_after_commission), np.float64),
+            sl_hit=column(lambda t: bool(t.was_sl_hit), bool),
+            tp_hit=column(lambda t: bool(t.was_tp_hit), bool),
+            duration=column(lambda t: float(getattr(t, "duration_seconds", 0.0) or 0.0), np.float64),
+        )
+
+
+def compute_metrics(
+    ledger: TradeLedger,
+    initial_balance: Decimal,
+    equity_curve: Any = None,
+) -> TradeMetrics:
+    """
+    Вычислить TradeMetrics для одного ledger.
+
+    Args:
+        ledger: TradeLedger
+        initial_balance: Начальный баланс
+        equity_curve: EquityCurve для drawdown/recovery factor (опционально)
+    """
+    metrics = compute_metrics_batch([ledger])[0]
+
+    if metrics.total_trades and equity_curve:
+        max_dd, max_dd_pct = equity_curve.get_max_drawdown(initial_balance)
+        metrics.max_drawdown_dollars = max_dd
+        metrics.max_drawdown_percent = max_dd_pct
+        if max_dd > 0:
+            metrics.recovery_factor = metrics.total_pnl / max_dd
+
+    return metrics
+
+
+def compute_metrics_batch(ledgers: Sequence[TradeLedger]) -> List[TradeMetrics]:
+    """
+    Вычислить TradeMetrics для многих ledger'ов за один векторный проход.
+
+    Drawdown здесь не считается (нужна equity curve) - см. compute_metrics.
+
+    Args:
+        ledgers: Список TradeLedger (например, по одному на набор параметров)
+
+    Returns:
+        Список TradeMetrics в порядке ledgers
+    """
+    n_seg = len(ledgers)
+    if n_seg == 0:
+        return []
+
+    counts = np.fromiter((len(ledger) for ledger in ledgers), dtype=np.int64, count=n_seg)
+    if counts.sum() == 0:
+        return [TradeMetrics() for _ in range(n_seg)]
+
+    pnl = np.concatenate([ledger.pnl for ledger in ledgers])
+    fees = np.concatenate([ledger.fees for ledger in ledgers])
+    duration = np.concatenate([ledger.duration for ledger in ledgers])
+    sl_hit = np.concatenate([ledger.sl_hit for ledger in ledgers])
+    tp_hit = np.concatenate([ledger.tp_hit for ledger in ledgers])
+    seg = np.repeat(np.arange(n_seg), counts)
+
+    def seg_sum(values, mask=None):
+        if mask is None:
+            return np.bincount(seg, weights=values, minlength=n_seg)
+        return np.bincount(seg[mask], weights=values[mask], minlength=n_seg)
+
+    def seg_count(mask):
+        return np.bincount(seg[mask], minlength=n_seg)
+
+    win = pnl > 0
+    loss = pnl < 0
+
+    winning = seg_count(win)
+    losing = seg_count(loss)
+    gross_profit = seg_sum(pnl, win)
+    gross_loss = seg_sum(pnl, loss)
+    total_pnl = seg_sum(pnl)
+    total_fees = seg_sum(fees)
+    total_duration = seg_sum(duration, duration > 0)
+    hit_sl = seg_count(sl_hit)
+    hit_tp = seg_count(tp_hit)
+
+    # Largest win/loss: сегменты непрерывны, reduceat по непустым
+    nonempty = counts > 0
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+    largest_win = np.zeros(n_seg)
+    largest_loss = np.zeros(n_seg)
+    largest_win[nonempty] = np.maximum(np.maximum.reduceat(pnl, offsets), 0.0)
+    largest_loss[nonempty] = np.minimum(np.minimum.reduceat(pnl, offsets), 0.0)
+
+    # Sharpe: (mean - rf) / sample std
+    safe_counts = np.maximum(counts, 1)
+    mean = total_pnl / safe_counts
+    dev = pnl - mean[seg]
+    sample_var = seg_sum(dev * dev) / np.maximum(counts - 1, 1)
+    std = np.sqrt(sample_var)
+
+    # Sortino: (mean - rf) / std нижних отклонений (population, вокруг их среднего)
+    down = pnl < RISK_FREE_RATE
+    down_count = seg_count(down)
+    down_values = pnl - RISK_FREE_RATE
+    down_mean = seg_sum(down_values, down) / np.maximum(down_count, 1)
+    down_dev = np.where(down, down_values - down_mean[seg], 0.0)
+    down_std = np.sqrt(seg_sum(down_dev * down_dev) / np.maximum(down_count, 1))
+
+    results = []
+    for i in range(n_seg):
+        m = TradeMetrics()
+        n = int(counts[i])
+        if n == 0:
+            results.append(m)
+            continue
+
+        m.total_trades = n
+        m.winning_trades = int(winning[i])
+        m.losing_trades = int(losing[i])
+        m.breakeven_trades = n - m.winning_trades - m.losing_trades
+        m.gross_profit = _dec(gross_profit[i])
+        m.gross_loss = _dec(gross_loss[i])
+        m.total_pnl = _dec(total_pnl[i])
+        m.total_commission_paid = _dec(total_fees[i])
+        m.largest_winning_trade = _dec(largest_win[i])
+        m.largest_losing_trade = _dec(largest_loss[i])
+        m.trades_hit_sl = int(hit_sl[i])
+        m.trades_hit_tp = int(hit_tp[i])
+        m.total_trading_duration_seconds = float(total_duration[i])
+
+        m.win_rate = Decimal(m.winning_trades) / Decimal(n) * 100
+        m.avg_pnl_per_trade = m.total_pnl / Decimal(n)
+        m.avg_trade_duration_seconds = m.total_trading_duration_seconds / n
+        m.sl_hit_rate = Decimal(m.trades_hit_sl) / Decimal(n) * 100
+        m.tp_hit_rate = Decimal(m.trades_hit_tp) / Decimal(n) * 100
+
+        if m.gross_loss != 0:
+            m.profit_factor = abs(m.gross_profit / m.gross_loss)
+        elif m.gross_profit > 0:
+            m.profit_factor = Decimal("inf")
+
+        if m.winning_trades > 0:
+            m.avg_winning_trade = m.gross_profit / Decimal(m.winning_trades)
+        if m.losing_trades > 0:
+            m.avg_losing_trade = m.gross_loss / Decimal(m.losing_trades)
+
+        if m.winning_trades > 0 and m.losing_trades > 0:
+            wr = m.winning_trades / n
+            expectancy = wr * float(m.avg_winning_trade) - (1 - wr) * abs(float(m.avg_losing_trade))
+            m.expectancy = _dec(expectancy)
+
+        if m.gross_profit != 0:
+            m.commission_as_percent_of_pnl = m.total_commission_paid / abs(m.gross_profit) * 100
+
+        if n > 1:
+            if std[i] != 0:
+                m.sharpe_ratio = _dec((mean[i] - RISK_FREE_RATE) / std[i])
+            if down_count[i] == 0:
+                m.sortino_ratio = _dec(mean[i] / 0.001 if mean[i] > 0 else 0)
+            elif down_std[i] != 0:
+                m.sortino_ratio = _dec((mean[i] - RISK_FREE_RATE) / down_std[i])
+
+        results.append(m)
+
+    return results
+
+
+def _dec(value: float) -> Decimal:
+    return Decimal(str(float(value)))
@@ -24,16 +24,20 @@ Trade Metrics Calculator - E1 EPIC
 """
 
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 
 from decimal import Decimal
 
+from pathlib import Path
+
 from dataclasses import dataclass
 
 from statistics import mean, stdev
 
 import logging
 
+import numpy as np
+
 
 logger = logging.getLogger(__name__)
 
@@ -120,99 +124,195 @@ class TradeMetrics:
 
 class EquityCurve:
 
-    """Кривая equity через время"""
+    """
+
+    Кривая equity через время.
+
+
+    Хранится в преаллоцированных NumPy массивах (timestamps в int64 мс,
+
+    equity в float64) с амортизированным ростом. Пик, текущий и максимальный
+
+    drawdown поддерживаются инкрементально, поэтому get_max_drawdown - O(1).
 
-    def __init__(self):
 
-        self.timestamps = []
+    Опционально каждая точка дописывается в бинарный файл (append-only,
 
-        self.equity_values = []
+    16 байт на точку), кривую можно восстановить через EquityCurve.load().
 
-        self.cumulative_pnl = []
+    """
+
+    RECORD_DTYPE = np.dtype([("ts", "<i8"), ("equity", "<f8")])
+
+    def __init__(self, capacity: int = 1024, persist_path: Optional[str] = None):
+        """
 
-        self.max_equity = Decimal("0")
+        Args:
+
+            capacity: Начальная ёмкость массивов (растёт x2 при заполнении)
+
+            persist_path: Файл для append-only записи точек (опционально)
+
+        """
+
+        self._ts = np.empty(max(1, capacity), dtype=np.int64)
+
+        self._equity = np.empty(max(1, capacity), dtype=np.float64)
+
+        self._size = 0
+
+        # Инкрементальные метрики
+
+        self.peak = 0.0
+
+        self.current_drawdown = 0.0
+
+        self.max_drawdown = 0.0
 
         self.peak_times = []  # Точки где был новый максимум
 
-    def add_point(self, timestamp: float, equity: Decimal):
-        """Добавить точку на кривую"""
+        self.persist_path = persist_path
+
+        self._persist_file = None
+
+        if persist_path:
+
+            Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+
+            self._persist_file = open(persist_path, "ab")
+
+    def add_point(self, timestamp: int, equity: Decimal):
+        """
+
+        Добавить точку на кривую.
 
-        self.timestamps.append(timestamp)
 
-        self.equity_values.append(float(equity))
+        Args:
+
+            timestamp: Время в миллисекундах (или номер бара в бэктесте)
+
+            equity: Значение equity
+
+        """
+
+        if self._size == len(self._equity):
+
+            self._grow()
+
+        ts = int(timestamp)
+
+        value = float(equity)
+
+        self._ts[self._size] = ts
+
+        self._equity[self._size] = value
+
+        self._size += 1
+
+        # Отслеживать peak (первая точка - стартовый пик)
+
+        if self._size == 1 or value > self.peak:
+
+            self.peak = value
+
+            self.peak_times.append(ts)
 
-        # Отслеживать peak
+        self.current_drawdown = self.peak - value
 
-        if equity > self.max_equity:
+        if self.current_drawdown > self.max_drawdown:
 
-            self.max_equity = equity
+            self.max_drawdown = self.current_drawdown
 
-            self.peak_times.append(timestamp)
+        if self._persist_file is not None:
+
+            self._persist_file.write(np.array([(ts, value)], dtype=self.RECORD_DTYPE).tobytes())
+
+            self._persist_file.flush()
+
+    def _grow(self):
+
+        new_capacity = len(self._equity) * 2
+
+        self._ts = np.resize(self._ts, new_capacity)
+
+        self._equity = np.resize(self._equity, new_capacity)
 
     def __len__(self) -> int:
         """Количество точек на кривой"""
 
-        return len(self.equity_values)
+        return self._size
 
     def __getitem__(self, index: int) -> float:
         """Получить equity значение по индексу"""
 
-        return self.equity_values[index]
+        return float(self._equity[: self._size][index])
 
-    def get_drawdowns(self) -> List[Decimal]:
-        """Получить все drawdowns (от peak к trough)"""
+    @property
+    def timestamps_array(self) -> np.ndarray:
+        """Timestamps (read-only view без копирования)"""
 
-        drawdowns = []
+        view = self._ts[: self._size]
 
-        peak = Decimal("0")
+        view.flags.writeable = False
 
-        for equity in self.equity_values:
+        return view
 
-            if equity > peak:
+    @property
+    def equity_array(self) -> np.ndarray:
+        """Equity значения (read-only view без копирования)"""
 
-                peak = Decimal(str(equity))
+        view = self._equity[: self._size]
 
-            dd = peak - Decimal(str(equity))
+        view.flags.writeable = False
 
-            if dd > 0:
+        return view
 
-                drawdowns.append(dd)
+    @property
+    def timestamps(self) -> List[int]:
+        """Timestamps списком (для JSON)"""
 
-        return drawdowns
+        return self._ts[: self._size].tolist()
 
-    def get_max_drawdown(self, initial_balance: Decimal) -> Tuple[Decimal, Decimal]:
-        """
+    @property
+    def equity_values(self) -> List[float]:
+        """Equity значения списком (для JSON)"""
 
-        Вычислить max drawdown.
+        return self._equity[: self._size].tolist()
 
+    @property
+    def max_equity(self) -> Decimal:
+        """Максимальная equity (пик)"""
 
-        Returns:
+        return Decimal(str(self.peak)) if self._size else Decimal("0")
 
-            (max_dd_dollars, max_dd_percent)
+    def get_drawdowns(self) -> List[Decimal]:
+        """Получить все drawdowns (от peak к trough)"""
 
-        """
+        equity = self._equity[: self._size]
 
-        if not self.equity_values:
+        peak = np.maximum(np.maximum.accumulate(equity), 0.0) if self._size else equity
 
-            return Decimal("0"), Decimal("0")
+        dd = peak - equity
+
+        return [Decimal(str(x)) for x in dd[dd > 0]]
 
-        max_dd = Decimal("0")
+    def get_max_drawdown(self, initial_balance: Decimal) -> Tuple[Decimal, Decimal]:
+        """
 
-        peak = Decimal(str(self.equity_values[0]))
+        Вычислить max drawdown (O(1), поддерживается инкрементально).
 
-        for equity in self.equity_values:
 
-            equity = Decimal(str(equity))
+        Returns:
 
-            if equity > peak:
+            (max_dd_dollars, max_dd_percent)
 
-                peak = equity
+        """
 
-            dd = peak - equity
+        if not self._size:
 
-            if dd > max_dd:
+            return Decimal("0"), Decimal("0")
 
-                max_dd = dd
+        max_dd = Decimal(str(self.max_drawdown))
 
         # Вычислить как % от initial balance
 
@@ -227,11 +327,11 @@ class EquityCurve:
 
         """
 
-        if not self.equity_values or days <= 0:
+        if not self._size or days <= 0:
 
             return Decimal("0")
 
-        final_equity = Decimal(str(self.equity_values[-1]))
+        final_equity = Decimal(str(self[-1]))
 
         years = days / 365.25
 
@@ -243,208 +343,197 @@ class EquityCurve:
 
         return Decimal(str(cagr)) * 100
 
+    def downsample(self, max_points: int = 1000) -> Tuple[List[int], List[float]]:
+        """
 
-class TradeMetricsCalculator:
+        Прореженная кривая для графиков.
 
-    """
 
-    Вычислить все метрики из списка Trade объектов.
+        Каждый бакет представлен своими минимумом и максимумом, поэтому
 
-    """
+        просадки и пики не теряются. Последняя точка всегда включена.
 
-    @staticmethod
-    def calculate(
 
-        trades: List[Any],  # List[Trade]
-
-        initial_balance: Decimal,
+        Returns:
 
-        equity_curve: EquityCurve = None,
+            (timestamps, equity_values)
 
-    ) -> TradeMetrics:
         """
 
-        Вычислить полный набор метрик.
+        n = self._size
 
+        if n <= max_points:
 
-        Args:
+            return self.timestamps, self.equity_values
 
-            trades: Список Trade объектов
-
-            initial_balance: Начальный баланс
-
-            equity_curve: EquityCurve объект (опционально)
-
-
-        Returns:
+        equity = self._equity[:n]
 
-            TradeMetrics с все метрикам
+        n_buckets = max(1, max_points // 2)
 
-        """
+        edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
 
-        metrics = TradeMetrics()
+        indices = []
 
-        if not trades:
+        for lo, hi in zip(edges[:-1], edges[1:]):
 
-            return metrics
+            if hi <= lo:
 
-        # Основные счеты
+                continue
 
-        metrics.total_trades = len(trades)
+            bucket = equity[lo:hi]
 
-        pnl_list = []  # Для вычисления статистики
+            indices.extend(sorted({lo + int(bucket.argmin()), lo + int(bucket.argmax())}))
 
-        for trade in trades:
+        if indices[-1] != n - 1:
 
-            pnl = trade.pnl_after_commission
+            indices.append(n - 1)
 
-            pnl_list.append(float(pnl))
+        idx = np.asarray(indices)
 
-            if pnl > 0:
+        return self._ts[idx].tolist(), equity[idx].tolist()
 
-                metrics.winning_trades += 1
+    def close(self):
+        """Закрыть файл персистентности"""
 
-                metrics.gross_profit += pnl
+        if self._persist_file is not None:
 
-            elif pnl < 0:
+            self._persist_file.close()
 
-                metrics.losing_trades += 1
+            self._persist_file = None
 
-                metrics.gross_loss += pnl
+    @classmethod
+    def load(cls, path: str, persist: bool = False) -> "EquityCurve":
+        """
 
-            else:
+        Восстановить кривую из append-only файла.
 
-                metrics.breakeven_trades += 1
 
-            metrics.total_pnl += pnl
+        Args:
 
-            metrics.total_commission_paid += trade.entry_commission + trade.exit_commission
+            path: Файл, записанный через persist_path
 
-            # Отслеживать largest wins/losses
+            persist: Продолжить дописывать в тот же файл
 
-            if pnl > metrics.largest_winning_trade:
 
-                metrics.largest_winning_trade = pnl
+        Returns:
 
-            if pnl < metrics.largest_losing_trade:
+            EquityCurve с восстановленными точками и метриками
 
-                metrics.largest_losing_trade = pnl
+        """
 
-            # SL/TP stats
+        raw = Path(path).read_bytes() if Path(path).exists() else b""
 
-            if trade.was_sl_hit:
+        # Отбросить недописанную запись (обрыв при записи)
 
-                metrics.trades_hit_sl += 1
+        usable = len(raw) - len(raw) % cls.RECORD_DTYPE.itemsize
 
-            if trade.was_tp_hit:
+        records = np.frombuffer(raw[:usable], dtype=cls.RECORD_DTYPE)
 
-                metrics.trades_hit_tp += 1
+        curve = cls(capacity=max(1024, len(records)))
 
-            # Duration
+        n = len(records)
 
-            if hasattr(trade, "duration_seconds") and trade.duration_seconds > 0:
+        if n:
 
-                metrics.total_trading_duration_seconds += trade.duration_seconds
+            curve._ts[:n] = records["ts"]
 
-        # Вычислить процентные метрики
+            curve._equity[:n] = records["equity"]
 
-        if metrics.total_trades > 0:
+            curve._size = n
 
-            metrics.win_rate = (
+            running_peak = np.maximum.accumulate(curve._equity[:n])
 
-                Decimal(metrics.winning_trades) / Decimal(metrics.total_trades)
+            drawdowns = running_peak - curve._equity[:n]
 
-            ) * 100
+            curve.peak = float(running_peak[-1])
 
-            metrics.avg_pnl_per_trade = metrics.total_pnl / Decimal(metrics.total_trades)
+            curve.current_drawdown = float(drawdowns[-1])
 
-            metrics.avg_trade_duration_seconds = (
+            curve.max_drawdown = float(drawdowns.max())
 
-                metrics.total_trading_duration_seconds / metrics.total_trades
+            new_peak = np.ones(n, dtype=bool)
 
-            )
+            new_peak[1:] = curve._equity[1:n] > running_peak[:-1]
 
-            metrics.sl_hit_rate = (
+            curve.peak_times = curve._ts[:n][new_peak].tolist()
 
-                Decimal(metrics.trades_hit_sl) / Decimal(metrics.total_trades)
+        if persist:
 
-            ) * 100
+            curve.persist_path = path
 
-            metrics.tp_hit_rate = (
+            curve._persist_file = open(path, "ab")
 
-                Decimal(metrics.trades_hit_tp) / Decimal(metrics.total_trades)
+        return curve
 
-            ) * 100
 
-        # Profit Factor
+class TradeMetricsCalculator:
 
-        if metrics.gross_loss != 0:
+    """
 
-            metrics.profit_factor = abs(metrics.gross_profit / metrics.gross_loss)
+    Вычислить все метрики из списка Trade объектов.
 
-        elif metrics.gross_profit > 0:
+    """
 
-            metrics.profit_factor = Decimal("inf")
+    @staticmethod
+    def calculate(
 
-        # Average win/loss
+        trades: List[Any],  # List[Trade]
 
-        if metrics.winning_trades > 0:
+        initial_balance: Decimal,
 
-            metrics.avg_winning_trade = metrics.gross_profit / Decimal(metrics.winning_trades)
+        equity_curve: EquityCurve = None,
 
-        if metrics.losing_trades > 0:
+    ) -> TradeMetrics:
+        """
 
-            metrics.avg_losing_trade = metrics.gross_loss / Decimal(metrics.losing_trades)
+        Вычислить полный набор метрик.
 
-        # Expectancy
 
-        if metrics.winning_trades > 0 and metrics.losing_trades > 0:
+        Args:
 
-            win_rate = float(metrics.win_rate) / 100
+            trades: Список Trade объектов
 
-            avg_win = float(metrics.avg_winning_trade)
+            initial_balance: Начальный баланс
 
-            avg_loss = abs(float(metrics.avg_losing_trade))
+            equity_curve: EquityCurve объект (опционально)
 
-            expectancy = (win_rate * avg_win) - ((1 - win_rate) * avg_loss)
 
-            metrics.expectancy = Decimal(str(expectancy))
+        Returns:
 
-        # Commission impact
+            TradeMetrics с все метрикам
 
-        if metrics.gross_profit != 0:
+        """
 
-            metrics.commission_as_percent_of_pnl = (
+        from execution.trade_ledger import TradeLedger, compute_metrics
 
-                metrics.total_commission_paid / abs(metrics.gross_profit)
+        # Один векторный проход по колоночному представлению сделок
 
-            ) * 100
+        return compute_metrics(TradeLedger.from_trades(trades), initial_balance, equity_curve)
 
-        # Equity curve metrics
+    @staticmethod
+    def calculate_batch(trade_lists: List[List[Any]]) -> List[TradeMetrics]:
+        """
 
-        if equity_curve:
+        Вычислить метрики сразу для многих списков сделок (например, для sweep).
 
-            max_dd, max_dd_pct = equity_curve.get_max_drawdown(initial_balance)
 
-            metrics.max_drawdown_dollars = max_dd
+        Drawdown не считается - для него нужна equity curve каждого прогона.
 
-            metrics.max_drawdown_percent = max_dd_pct
 
-            # Recovery factor
+        Args:
 
-            if max_dd > 0:
+            trade_lists: Список списков Trade объектов
 
-                metrics.recovery_factor = metrics.total_pnl / max_dd
 
-        # Sharpe & Sortino
+        Returns:
 
-        if len(pnl_list) > 1:
+            Список TradeMetrics в том же порядке
 
-            metrics.sharpe_ratio = TradeMetricsCalculator._calculate_sharpe(pnl_list)
+        """
 
-            metrics.sortino_ratio = TradeMetricsCalculator._calculate_sortino(pnl_list)
+        from execution.trade_ledger import TradeLedger, compute_metrics_batch
 
-        return metrics
+        return compute_metrics_batch([TradeLedger.from_trades(trades) for trades in trade_lists])
 
     @staticmethod
     def _calculate_sharpe(pnl_list: List[float], risk_free_rate: float = 0.02) -> Decimal:
@@ -0,0 +1,316 @@
+"""
+Account Ledger - local account state built from private WebSocket pushes.
+
+RiskMonitorService used to rebuild account state from REST on every check
+(wallet balance, positions, last 100 executions, open orders). The ledger
+keeps the same numbers incrementally from the private stream:
+
+1. Wallet balance (wallet topic)
+2. Positions and total unrealized PnL (position topic)
+3. Realized PnL for the day of the ledger's symbol (execution topic,
+   deduplicated by execId) - the same scope as the REST checksum and
+   RiskMonitorService.calculate_daily_realized_pnl
+4. Open orders per symbol (order topic)
+
+All reads are O(1). A periodic REST checksum (reconcile) re-seeds the state
+and reports drift, so a missed push cannot silently corrupt limit checks.
+"""
+
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Set
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+ACTIVE_ORDER_STATUSES = {"New", "PartiallyFilled", "Untriggered"}
+
+
+def _to_decimal(value: Any) -> Decimal:
+    """Convert exchange value to Decimal, treating empty values as zero"""
+    if value is None or value == "" or value == "None":
+        return Decimal("0")
+    try:
+        return Decimal(str(value))
+    except Exception:
+        return Decimal("0")
+
+
+def _day_start_ms() -> int:
+    """Local midnight in ms (same day boundary as RiskMonitorService)"""
+    today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(today_start.timestamp() * 1000)
+
+
+def execution_realized_pnl(exec_data: Dict[str, Any]) -> Decimal:
+    """Realized PnL contribution of one execution: closed PnL minus fee"""
+    closed_pnl = _to_decimal(exec_data.get("closedPnl", exec_data.get("execPnl", 0)))
+    return closed_pnl - abs(_to_decimal(exec_data.get("execFee", 0)))
+
+
+class AccountLedger:
+    """
+    In-memory account state fed by OrderEventBus.
+
+    Usage:
+        ledger = AccountLedger(symbol="BTCUSDT")
+        ledger.attach(private_ws.event_bus)
+        ledger.reconcile(account_client, "BTCUSDT")  # seed from REST
+
+        ledger.equity, ledger.get_realized_pnl_today(), ledger.open_orders_count("BTCUSDT")
+    """
+
+    def __init__(self, coin: str = "USDT", checksum_interval_seconds: int = 300, symbol: Optional[str] = None):
+        """
+        Args:
+            coin: Settlement coin for wallet balance
+            checksum_interval_seconds: How often to re-seed state from REST
+            symbol: Symbol whose realized PnL is tracked (None - taken from the first reconcile)
+        """
+        self.coin = coin
+        self.symbol = symbol
+        self.checksum_interval_seconds = checksum_interval_seconds
+
+        self._lock = threading.RLock()
+        self._reconcile_lock = threading.Lock()
+        self._event_bus = None
+
+        self.wallet_balance = Decimal("0")
+        self.positions: Dict[str, Dict[str, Decimal]] = {}
+        self._unrealized_total = Decimal("0")
+        self._open_orders: Dict[str, Set[str]] = {}
+        self._realized_pnl_today = Decimal("0")
+        self._day_start_ms = _day_start_ms()
+        self._seen_exec_ids: Set[str] = set()
+
+        self.last_checksum_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.last_drift: Dict[str, float] = {}
+
+    # ==================== Feeding ====================
+
+    def attach(self, event_bus) -> None:
+        """Subscribe to order/execution/position/wallet pushes"""
+        self._event_bus = event_bus
+        event_bus.subscribe_wallet(self.on_wallet)
+        event_bus.subscribe_positions(self.on_position)
+        event_bus.subscribe_executions(self.on_execution)
+        event_bus.subscribe_orders(self.on_order)
+
+    def on_wallet(self, wallet_data: Dict[str, Any]) -> None:
+        """Wallet push: one account with per-coin balances"""
+        for coin_info in wallet_data.get("coin", []):
+            if coin_info.get("coin") == self.coin:
+                with self._lock:
+                    self.wallet_balance = _to_decimal(coin_info.get("walletBalance"))
+                    self.last_event_at = time.time()
+
+    def on_position(self, position_data: Dict[str, Any]) -> None:
+        """Position push: replace position, adjust running unrealized total"""
+        symbol = position_data.get("symbol")
+        if not symbol:
+            return
+        with self._lock:
+            self._set_position(symbol, position_data)
+            self.last_event_at = time.time()
+
+    def on_execution(self, exec_data: Dict[str, Any]) -> None:
+        """Execution push: add realized PnL once per execId"""
+        with self._lock:
+            self._roll_day()
+            self._add_execution(exec_data)
+            self.last_event_at = time.time()
+
+    def on_order(self, order_data: Dict[str, Any]) -> None:
+        """Order push: track open order ids per symbol"""
+        order_id = order_data.get("orderId")
+        symbol = order_data.get("symbol")
+        if not order_id or not symbol:
+            return
+        with self._lock:
+            orders = self._open_orders.setdefault(symbol, set())
+            if order_data.get("orderStatus") in ACTIVE_ORDER_STATUSES:
+                orders.add(order_id)
+            else:
+                orders.discard(order_id)
+            self.last_event_at = time.time()
+
+    # ==================== Reads (O(1)) ====================
+
+    @property
+    def is_live(self) -> bool:
+        """Ledger is seeded from REST and the push stream is connected"""
+        return (
+            self.last_checksum_at is not None
+            and self._event_bus is not None
+            and self._event_bus.is_active
+        )
+
+    @property
+    def unrealized_pnl(self) -> Decimal:
+        return self._unrealized_total
+
+    @property
+    def equity(self) -> Decimal:
+        """Equity = wallet balance + unrealized PnL"""
+        return self.wallet_balance + self._unrealized_total
+
+    def get_realized_pnl_today(self) -> Decimal:
+        with self._lock:
+            self._roll_day()
+            return self._realized_pnl_today
+
+    def open_orders_count(self, symbol: str) -> int:
+        return len(self._open_orders.get(symbol, ()))
+
+    def get_position(self, symbol: str) -> Dict[str, Decimal]:
+        """Position info in RiskMonitorService.get_position_info format"""
+        position = self.positions.get(symbol)
+        if position is None:
+            return {
+                "size": Decimal("0"),
+                "leverage": Decimal("0"),
+                "notional": Decimal("0"),
+                "unrealized_pnl": Decimal("0"),
+            }
+        return dict(position)
+
+    def open_positions_count(self) -> int:
+        return len(self.positions)
+
+    def total_entry_notional(self) -> Decimal:
+        """Sum of size * avg price over open positions"""
+        return sum((p["entry_notional"] for p in self.positions.values()), Decimal("0"))
+
+    def needs_checksum(self) -> bool:
+        if self.last_checksum_at is None:
+            return True
+        return time.time() - self.last_checksum_at >= self.checksum_interval_seconds
+
+    # ==================== REST checksum ====================
+
+    def reconcile(self, account_client, symbol: str) -> Dict[str, float]:
+        """
+        Re-seed state from REST and report drift against the pushed state.
+
+        Realized PnL is replaced only when the REST execution window (last 100)
+        covers the whole day; otherwise the running value is kept.
+
+        Returns:
+            Drift per field (REST value - ledger value)
+        """
+        if not self._reconcile_lock.acquire(blocking=False):
+            return self.last_drift  # Another thread is already reconciling
+
+        if self.symbol is None:
+            self.symbol = symbol
+
+        try:
+            wallet = account_client.get_wallet_balance(self.coin)
+            positions = account_client.get_positions(category="linear")
+            orders = account_client.get_open_orders(category="linear", symbol=symbol)
+            executions = account_client.get_executions(category="linear", symbol=self.symbol, limit=100)
+
+            drift: Dict[str, float] = {}
+            with self._lock:
+                self._roll_day()
+
+                if wallet.get("retCode") == 0:
+                    balance = _to_decimal(wallet.get("balance"))
+                    drift["wallet_balance"] = float(balance - self.wallet_balance)
+                    self.wallet_balance = balance
+
+                if positions.get("retCode") == 0:
+                    before = self._unrealized_total
+                    self.positions.clear()
+                    self._unrealized_total = Decimal("0")
+                    for position in positions.get("result", {}).get("list", []):
+                        self._set_position(position["symbol"], position)
+                    drift["unrealized_pnl"] = float(self._unrealized_total - before)
+
+                if orders.get("retCode") == 0:
+                    order_ids = {o.get("orderId") for o in orders.get("result", {}).get("list", [])}
+                    drift["open_orders"] = len(order_ids) - self.open_orders_count(symbol)
+                    self._open_orders[symbol] = order_ids
+
+                if executions.get("retCode") == 0:
+                    drift.update(self._reconcile_executions(executions.get("result", {}).get("list", [])))
+
+                self.last_checksum_at = time.time()
+                self.last_drift = drift
+
+            if any(abs(v) > 0.01 for v in drift.values()):
+                logger.warning(f"Account ledger drift corrected from REST: {drift}")
+            else:
+                logger.debug(f"Account ledger checksum OK: {drift}")
+            return drift
+
+        except Exception as e:
+            logger.error(f"Account ledger reconcile failed: {e}")
+            return self.last_drift
+        finally:
+            self._reconcile_lock.release()
+
+    # ==================== Internals (under lock) ====================
+
+    def _set_position(self, symbol: str, data: Dict[str, Any]) -> None:
+        old = self.positions.pop(symbol, None)
+        if old is not None:
+            self._unrealized_total -= old["unrealized_pnl"]
+
+        size = _to_decimal(data.get("size"))
+        if size == 0:
+            return
+
+        mark_price = _to_decimal(data.get("markPrice"))
+        avg_price = _to_decimal(data.get("avgPrice", data.get("entryPrice")))
+        unrealized = _to_decimal(data.get("unrealisedPnl"))
+        self.positions[symbol] = {
+            "size": size,
+            "leverage": _to_decimal(data.get("leverage")),
+            "notional": size * mark_price,
+            "unrealized_pnl": unrealized,
+            "mark_price": mark_price,
+            "entry_notional": abs(size * avg_price),
+        }
+        self._unrealized_total += unrealized
+
+    def _add_execution(self, exec_data: Dict[str, Any]) -> None:
+        symbol = exec_data.get("symbol")
+        if self.symbol and symbol and symbol != self.symbol:
+            return  # Realized PnL is per symbol, like the REST checksum window
+        exec_id = exec_data.get("execId")
+        if exec_id:
+            if exec_id in self._seen_exec_ids:
+                return
+            self._seen_exec_ids.add(exec_id)
+        if int(exec_data.get("execTime", 0) or 0) < self._day_start_ms:
+            return
+        self._realized_pnl_today += execution_realized_pnl(exec_data)
+
+    def _reconcile_executions(self, executions) -> Dict[str, float]:
+        today = [e for e in executions if int(e.get("execTime", 0) or 0) >= self._day_start_ms]
+        window_covers_day = len(executions) < 100 or len(today) < len(executions)
+
+        # Executions missed by the stream are added in any case
+        before = self._realized_pnl_today
+        for exec_data in today:
+            self._add_execution(exec_data)
+
+        if window_covers_day:
+            rest_total = sum((execution_realized_pnl(e) for e in today), Decimal("0"))
+            drift = float(rest_total - before)
+            self._realized_pnl_today = rest_total
+            return {"realized_pnl_today": drift}
+        return {"realized_pnl_today_missed": float(self._realized_pnl_today - before)}
+
+    def _roll_day(self) -> None:
+        day_start = _day_start_ms()
+        if day_start != self._day_start_ms:
+            self._day_start_ms = day_start
+            self._realized_pnl_today = Decimal("0")
+            self._seen_exec_ids.clear()
@@ -9,6 +9,10 @@ Monitors:
 5. Max orders per symbol
 
 When critical limits violated → trigger kill switch
+
+With an AccountLedger attached (private WebSocket state), checks read the
+ledger instead of calling REST, so they are cheap enough to run on every
+tick; REST is used only for the ledger's periodic checksum.
 """
 
 import threading
@@ -22,6 +26,7 @@ from exchange.account import AccountClient
 from execution.kill_switch import KillSwitchManager
 from storage.database import Database
 from risk.advanced_risk_limits import AdvancedRiskLimits, RiskDecision
+from risk.account_ledger import AccountLedger
 
 
 logger = logging.getLogger(__name__)
@@ -81,6 +86,7 @@ class RiskMonitorService:
         db: Database,
         symbol: str,
         config: Optional[RiskMonitorConfig] = None,
+        account_ledger: Optional[AccountLedger] = None,
     ):
         """
         Initialize Risk Monitor.
@@ -92,6 +98,7 @@ class RiskMonitorService:
             db: Database for historical data
             symbol: Trading symbol
             config: Monitor configuration
+            account_ledger: Push-fed account state (optional, replaces REST reads)
         """
         self.account_client = account_client
         self.kill_switch_manager = kill_switch_manager
@@ -99,6 +106,7 @@ class RiskMonitorService:
         self.db = db
         self.symbol = symbol
         self.config = config or RiskMonitorConfig()
+        self.account_ledger = account_ledger
         
         # Monitoring state
         self.running = False
@@ -119,6 +127,16 @@ class RiskMonitorService:
         logger.info(f"  Monitor Interval: {self.config.monitor_interval_seconds}s")
         logger.info(f"  Auto Kill Switch: {self.config.enable_auto_kill_switch}")
     
+    @property
+    def uses_account_ledger(self) -> bool:
+        """True when checks are served from the live AccountLedger"""
+        return self.account_ledger is not None and self.account_ledger.is_live
+
+    def _refresh_ledger(self) -> None:
+        """Run the ledger REST checksum when due"""
+        if self.account_ledger is not None and self.account_ledger.needs_checksum():
+            self.account_ledger.reconcile(self.account_client, self.symbol)
+
     def calculate_equity(self) -> Decimal:
         """
         Calculate equity = wallet_balance + unrealized_pnl.
@@ -327,11 +345,25 @@ class RiskMonitorService:
         Returns:
             Dict with check results and decision
         """
-        # Calculate real values
-        equity = self.calculate_equity()
-        realized_pnl_today = self.calculate_daily_realized_pnl()
-        position_info = self.get_position_info()
-        order_count = self.count_open_orders()
+        self._refresh_ledger()
+
+        if self.uses_account_ledger:
+            # O(1) reads from push-fed state
+            ledger = self.account_ledger
+            equity = ledger.equity
+            self.last_equity = equity
+            self.last_wallet_balance = ledger.wallet_balance
+            self.last_unrealized_pnl = ledger.unrealized_pnl
+            realized_pnl_today = ledger.get_realized_pnl_today()
+            self.last_realized_pnl_today = realized_pnl_today
+            position_info = ledger.get_position(self.symbol)
+            order_count = ledger.open_orders_count(self.symbol)
+        else:
+            # Calculate real values
+            equity = self.calculate_equity()
+            realized_pnl_today = self.calculate_daily_realized_pnl()
+            position_info = self.get_position_info()
+            order_count = self.count_open_orders()
         
         # Build state for AdvancedRiskLimits
         state = {
@@ -474,19 +506,23 @@ class RiskMonitorService:
             (allowed: bool, reason: str or None)
         """
         try:
-            # Get current positions
-            positions_response = self.account_client.get_positions(category="linear")
-            if positions_response.get("retCode") != 0:
-                logger.error(f"Failed to get positions: {positions_response}")
-                return False, "Failed to fetch current positions"
-            
-            positions = positions_response.get("result", {}).get("list", [])
-            
-            # Count open positions (excluding the current symbol if already open)
-            open_positions_count = sum(
-                1 for p in positions 
-                if float(p.get("size", 0)) > 0
-            )
+            if self.uses_account_ledger:
+                positions = None
+                open_positions_count = self.account_ledger.open_positions_count()
+            else:
+                # Get current positions
+                positions_response = self.account_client.get_positions(category="linear")
+                if positions_response.get("retCode") != 0:
+                    logger.error(f"Failed to get positions: {positions_response}")
+                    return False, "Failed to fetch current positions"
+
+                positions = positions_response.get("result", {}).get("list", [])
+
+                # Count open positions (excluding the current symbol if already open)
+                open_positions_count = sum(
+                    1 for p in positions
+                    if float(p.get("size", 0)) > 0
+                )
             
             # Check max_positions limit
             if open_positions_count >= self.config.max_positions:
@@ -498,11 +534,14 @@ class RiskMonitorService:
                 return False, reason
             
             # Calculate total notional across all positions
-            total_notional = sum(
-                abs(float(p.get("size", 0)) * float(p.get("avgPrice", 0)))
-                for p in positions
-                if float(p.get("size", 0)) > 0
-            )
+            if positions is None:
+                total_notional = float(self.account_ledger.total_entry_notional())
+            else:
+                total_notional = sum(
+                    abs(float(p.get("size", 0)) * float(p.get("avgPrice", 0)))
+                    for p in positions
+                    if float(p.get("size", 0)) > 0
+                )
             
             # Add new position notional
             future_total_notional = total_notional + abs(new_position_notional)
@@ -559,6 +598,15 @@ class RiskMonitorService:
             "last_wallet_balance": float(self.last_wallet_balance),
             "last_unrealized_pnl": float(self.last_unrealized_pnl),
             "last_realized_pnl_today": float(self.last_realized_pnl_today),
+            "account_ledger": (
+                {
+                    "live": self.account_ledger.is_live,
+                    "last_checksum_at": self.account_ledger.last_checksum_at,
+                    "last_drift": self.account_ledger.last_drift,
+                }
+                if self.account_ledger is not None
+                else None
+            ),
             "config": {
                 "max_daily_loss_percent": self.config.max_daily_loss_percent,
                 "max_position_notional": self.config.max_position_notional,
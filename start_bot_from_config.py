@@ -1,6 +1,8 @@
 """
 Запуск бота с использованием настроек из config/bot_settings.json
 Читает режим (paper/live) из конфигурации и запускает соответствующую команду
+
+    --profile  включить sampling profiler (стеки в logs/profiles/)
 """
 import sys
 from config import get_config
@@ -11,6 +13,7 @@ from bot.strategy_builder import StrategyBuilder
 logger = setup_logger(__name__)
 
 def main():
+    profiler = None
     try:
         # Загружаем конфигурацию
         cfg = get_config()
@@ -43,6 +46,12 @@ def main():
         )
         
         logger.info(f"Бот создан в режиме {mode.upper()}")
+
+        if "--profile" in sys.argv[1:]:
+            from utils.profiler import configure_profiler
+            profiler = configure_profiler(cfg)
+            profiler.start()
+
         bot.run()
         
     except KeyboardInterrupt:
@@ -51,6 +60,9 @@ def main():
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        if profiler:
+            profiler.stop()
 
 if __name__ == "__main__":
     main()
@@ -40,12 +40,19 @@ from pathlib import Path
 
 from logger import setup_logger
 
+from utils import metrics
+
 import threading
 
+import time
+
 
 logger = setup_logger(__name__)
 
 
+DB_COMMIT_SECONDS = metrics.histogram("db_commit_duration_seconds", "Длительность commit SQLite")
+
+
 # TASK-003: Глобальный кэш соединений и блокировка для безопасности потоков
 _global_connections: Dict[str, sqlite3.Connection] = {}
 _connections_lock = threading.Lock()
@@ -112,6 +119,12 @@ class Database:
             
             return _global_connections[normalized_path]
 
+    def _commit(self):
+        """commit с замером латентности (db_commit_duration_seconds)"""
+        started = time.perf_counter()
+        self.conn.commit()
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
     def _ensure_cached_connection(self):
         """TASK-003: Убедиться что используется кэшированное соединение"""
         self.conn = self._get_cached_connection(self.db_path)
@@ -425,7 +438,7 @@ class Database:
         """
         )
 
-        self.conn.commit()
+        self._commit()
 
         logger.info("Database schema initialized")
 
@@ -481,7 +494,7 @@ class Database:
 
         )
 
-        self.conn.commit()
+        self._commit()
 
         signal_id = cursor.lastrowid
 
@@ -586,7 +599,7 @@ class Database:
 
             order_id = cursor.lastrowid
 
-        self.conn.commit()
+        self._commit()
 
         logger.debug(f"Order saved: {order_data['order_id']} ({order_data['status']})")
 
@@ -680,7 +693,7 @@ class Database:
 
         )
 
-        self.conn.commit()
+        self._commit()
 
         exec_id = cursor.lastrowid
 
@@ -735,7 +748,7 @@ class Database:
 
         )
 
-        self.conn.commit()
+        self._commit()
 
         pos_id = cursor.lastrowid
 
@@ -774,7 +787,7 @@ class Database:
 
         )
 
-        self.conn.commit()
+        self._commit()
 
         logger.debug(f"Error logged: {error_type}")
 
@@ -788,7 +801,7 @@ class Database:
         """,
             (key, json.dumps(value), datetime.now().isoformat()),
         )
-        self.conn.commit()
+        self._commit()
         logger.debug(f"Config saved: {key}={value}")
 
     def get_config(self, key: str, default: Any = None) -> Any:
@@ -883,7 +896,7 @@ class Database:
 
         )
 
-        self.conn.commit()
+        self._commit()
 
         return cursor.lastrowid
 
@@ -931,7 +944,7 @@ class Database:
 
             return False
 
-        self.conn.commit()
+        self._commit()
 
         return cursor.rowcount > 0
 
@@ -1029,7 +1042,7 @@ class Database:
             """,
             (status, datetime.now().timestamp(), order_id),
         )
-        self.conn.commit()
+        self._commit()
         logger.debug(f"Order {order_id} status updated to {status}")
     
     def order_exists(self, order_id: str) -> bool:
@@ -1098,11 +1111,74 @@ class Database:
                 json.dumps(exec_data.get("metadata", {})),
             ),
         )
-        self.conn.commit()
+        self._commit()
         exec_id = cursor.lastrowid
         logger.debug(f"Execution saved: {exec_data.get('execId')}")
         return exec_id
 
+    def save_executions(
+        self,
+        executions: List[Dict[str, Any]],
+        config_updates: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Сохранить пачку исполнений одной транзакцией.
+        
+        Дубликаты по exec_id игнорируются. config_updates (например, курсор
+        сверки исполнений) пишутся в той же транзакции - курсор не уедет
+        вперёд без сохранённых исполнений.
+        
+        Args:
+            executions: Execution data from exchange (формат save_execution)
+            config_updates: key -> value для таблицы config
+            
+        Returns:
+            Количество новых исполнений
+        """
+        rows = [
+            (
+                exec_data.get("execId"),
+                exec_data.get("orderId"),
+                exec_data.get("orderLinkId"),
+                exec_data.get("symbol"),
+                exec_data.get("side"),
+                float(exec_data.get("execPrice", 0)),
+                float(exec_data.get("execQty", 0)),
+                float(exec_data.get("execFee", 0)),
+                float(exec_data.get("execTime", 0)) / 1000,  # ms to seconds
+                1 if exec_data.get("isMaker") else 0,
+                json.dumps(exec_data.get("metadata", {})),
+            )
+            for exec_data in executions
+        ]
+        cursor = self.conn.cursor()
+        try:
+            before = self.conn.total_changes
+            cursor.executemany(
+                """
+                INSERT OR IGNORE INTO executions
+                (exec_id, order_id, order_link_id, symbol, side, price, qty,
+                 exec_fee, exec_time, is_maker, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            inserted = self.conn.total_changes - before
+            for key, value in (config_updates or {}).items():
+                cursor.execute(
+                    """
+                    INSERT OR REPLACE INTO config (key, value, updated_at)
+                    VALUES (?, ?, ?)
+                    """,
+                    (key, json.dumps(value), datetime.now().isoformat()),
+                )
+            self._commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        logger.debug(f"Executions saved: {inserted} new of {len(rows)}")
+        return inserted
+
     def save_order_intent(self, intent_data: Dict[str, Any]) -> int:
         """
         Сохранить order intent (намерение разместить ордер).
@@ -1170,7 +1246,7 @@ class Database:
                 json.dumps(intent_data.get("metadata", {})),
             ),
         )
-        self.conn.commit()
+        self._commit()
         intent_id = cursor.lastrowid
         logger.debug(f"Order intent saved: {intent_data.get('side')} {intent_data.get('symbol')} (dry_run={intent_data.get('dry_run', True)})")
         return intent_id
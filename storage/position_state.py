@@ -39,6 +39,18 @@ from logger import setup_logger
 logger = setup_logger(__name__)
 
 
+def is_flat_position(position_data: Dict[str, Any]) -> bool:
+    """Позиция биржи (REST или push) закрыта: size 0 или пустой side (Bybit: side "")"""
+
+    return Decimal(str(position_data.get("size") or 0)) == 0 or position_data.get("side") == ""
+
+
+def exchange_entry_price(position_data: Dict[str, Any]) -> Decimal:
+    """Цена входа позиции биржи: avgPrice (REST), entryPrice (WS topic position)"""
+
+    return Decimal(position_data.get("avgPrice") or position_data.get("entryPrice") or 0)
+
+
 class PositionSide(str, Enum):
 
     """Сторона позиции"""
@@ -180,6 +192,66 @@ class PositionStateManager:
 
         self.position: Optional[PositionState] = None
 
+        # Push-обновления позиции из private WS (см. attach_event_bus)
+
+        self.event_bus = None
+
+        self.rest_resync_seconds = 60
+
+    def attach_event_bus(self, event_bus, rest_resync_seconds: int = 60) -> None:
+        """
+
+        Получать обновления позиции из OrderEventBus вместо REST поллинга.
+
+
+        Пока стрим активен, sync_with_exchange ходит в REST только если
+
+        push-обновлений не было дольше rest_resync_seconds.
+
+
+        Args:
+
+            event_bus: OrderEventBus из PrivateWebSocket
+
+            rest_resync_seconds: Максимальный возраст push-состояния
+
+        """
+
+        self.event_bus = event_bus
+
+        self.rest_resync_seconds = rest_resync_seconds
+
+        event_bus.subscribe_positions(self.on_position_update)
+
+    def on_position_update(self, position_data: Dict[str, Any]) -> None:
+        """Обработать push позиции из private WS"""
+
+        if position_data.get("symbol") != self.symbol or self.position is None:
+
+            return
+
+        try:
+
+            # Push закрытия: size 0 / пустой side - позиции больше нет, не обновление
+
+            if is_flat_position(position_data):
+
+                logger.info(
+
+                    f"Position closed on exchange (push): {self.position.side} {self.position.qty} {self.symbol}"
+
+                )
+
+                self.position = None
+
+                return
+
+            self._apply_exchange_position(position_data)
+
+        except Exception as e:
+
+            logger.error(f"Error applying position push: {e}", exc_info=True)
+
     def open_position(
 
         self,
@@ -315,6 +387,16 @@ class PositionStateManager:
 
             return True
 
+        # Свежее push-состояние - REST запрос не нужен
+
+        if self.event_bus is not None and self.event_bus.is_active and self.position.last_sync_at:
+
+            age_ms = int(time.time() * 1000) - self.position.last_sync_at
+
+            if age_ms < self.rest_resync_seconds * 1000:
+
+                return True
+
         try:
 
             # Получаем позицию с биржи
@@ -343,9 +425,9 @@ class PositionStateManager:
 
                     break
 
-            # Если позиции нет на бирже, но она есть локально - ручное закрытие
+            # Если позиции нет на бирже (или она нулевая), но она есть локально - ручное закрытие
 
-            if exchange_position is None:
+            if exchange_position is None or is_flat_position(exchange_position):
 
                 if self.position is not None:
 
@@ -361,55 +443,70 @@ class PositionStateManager:
 
                 return True
 
-            # Проверяем расхождения
+            self._apply_exchange_position(exchange_position)
 
-            self._check_discrepancies(exchange_position)
+            return True
 
-            # Обновляем информацию с биржи
+        except Exception as e:
 
-            self.position.exchange_qty = Decimal(exchange_position.get("size", 0))
+            logger.error(f"Error syncing position with exchange: {e}", exc_info=True)
 
-            self.position.exchange_entry_price = Decimal(exchange_position.get("avgPrice", 0))
+            return False
 
-            self.position.exchange_updated_at = int(time.time() * 1000)
+    def _apply_exchange_position(self, exchange_position: Dict[str, Any]) -> None:
+        """
 
-            self.position.mark_price = Decimal(exchange_position.get("markPrice", 0))
+        Применить данные позиции с биржи (REST или push) к локальному состоянию.
 
-            self.position.pnl = Decimal(exchange_position.get("unrealPnl", 0))
 
-            # Вычисляем PnL в процентах
+        Args:
 
-            if self.position.entry_price != 0:
+            exchange_position: Данные позиции с биржи
 
-                pnl_percent = (
+        """
 
-                    self.position.pnl / (self.position.entry_price * self.position.qty)
+        # Проверяем расхождения
 
-                ) * 100
+        self._check_discrepancies(exchange_position)
 
-                self.position.pnl_percent = pnl_percent
+        # Обновляем информацию с биржи
 
-            self.position.last_sync_at = int(time.time() * 1000)
+        self.position.exchange_qty = Decimal(exchange_position.get("size", 0))
 
-            self.position.sync_count += 1
+        self.position.exchange_entry_price = exchange_entry_price(exchange_position)
 
-            logger.debug(
+        self.position.exchange_updated_at = int(time.time() * 1000)
 
-                f"Position synced: {self.position.side} {self.position.exchange_qty} {self.symbol} "
+        self.position.mark_price = Decimal(exchange_position.get("markPrice", 0))
 
-                f"@ {self.position.exchange_entry_price}, PnL: {self.position.pnl} "
+        # REST (старый формат) unrealPnl, V5 REST и WS topic position: unrealisedPnl
+        self.position.pnl = Decimal(exchange_position.get("unrealPnl") or exchange_position.get("unrealisedPnl") or 0)
 
-                f"({self.position.pnl_percent:.2f}%)"
+        # Вычисляем PnL в процентах
 
-            )
+        if self.position.entry_price != 0:
 
-            return True
+            pnl_percent = (
 
-        except Exception as e:
+                self.position.pnl / (self.position.entry_price * self.position.qty)
 
-            logger.error(f"Error syncing position with exchange: {e}", exc_info=True)
+            ) * 100
 
-            return False
+            self.position.pnl_percent = pnl_percent
+
+        self.position.last_sync_at = int(time.time() * 1000)
+
+        self.position.sync_count += 1
+
+        logger.debug(
+
+            f"Position synced: {self.position.side} {self.position.exchange_qty} {self.symbol} "
+
+            f"@ {self.position.exchange_entry_price}, PnL: {self.position.pnl} "
+
+            f"({self.position.pnl_percent:.2f}%)"
+
+        )
 
     def _check_discrepancies(self, exchange_position: Dict[str, Any]) -> None:
         """
@@ -431,7 +528,7 @@ class PositionStateManager:
 
         exchange_side = exchange_position.get("side", "")
 
-        exchange_avg_price = Decimal(exchange_position.get("avgPrice", 0))
+        exchange_avg_price = exchange_entry_price(exchange_position)
 
         discrepancies = []
 
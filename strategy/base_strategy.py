@@ -9,7 +9,11 @@
 
 from abc import ABC, abstractmethod
 
-from typing import Dict, Any, Optional
+from decimal import Decimal
+
+from typing import Dict, Any, Optional, Set, Tuple
+
+import numpy as np
 
 import pandas as pd
 
@@ -19,10 +23,60 @@ from logger import setup_logger
 logger = setup_logger(__name__)
 
 
+# Коды направления в batch-массивах generate_signals
+
+SIGNAL_NONE = 0
+
+SIGNAL_LONG = 1
+
+SIGNAL_SHORT = -1
+
+SIGNAL_EXIT = 2
+
+_SIGNAL_CODES = {"long": SIGNAL_LONG, "short": SIGNAL_SHORT, "exit": SIGNAL_EXIT}
+
+
+def column_or(df: pd.DataFrame, name: str, default: float) -> np.ndarray:
+    """Колонка как float-массив; если колонки нет - массив default (аналог row.get(name, default))"""
+
+    if name in df.columns:
+
+        return df[name].to_numpy(dtype=float)
+
+    return np.full(len(df), default, dtype=float)
+
+
+def empty_signal_arrays(n: int) -> Dict[str, np.ndarray]:
+    """
+
+    Пустые batch-массивы сигналов длины n.
+
+
+    Ключи: signal (int8, SIGNAL_*), confidence, price (entry_price для входа,
+
+    exit_price для выхода), stop_loss, take_profit. Где сигнала нет - 0 / NaN.
+
+    """
+
+    arrays = {"signal": np.zeros(n, dtype=np.int8)}
+
+    for key in ("confidence", "price", "stop_loss", "take_profit"):
+
+        arrays[key] = np.full(n, np.nan)
+
+    return arrays
+
+
 class BaseStrategy(ABC):
 
     """Абстрактный базовый класс для стратегий"""
 
+    # Колонки признаков, которые читает стратегия (FeaturePipeline.set_required_features).
+
+    # None - набор неизвестен, пайплайн считает все признаки
+
+    REQUIRED_FEATURES: Optional[Tuple[str, ...]] = None
+
     def __init__(self, name: str):
         """
 
@@ -86,6 +140,122 @@ class BaseStrategy(ABC):
 
         pass
 
+    def generate_signals(
+
+        self, df: pd.DataFrame, features: Optional[Dict[str, Any]] = None
+
+    ) -> Dict[str, np.ndarray]:
+        """
+
+        Batch-режим: сигналы для каждого бара df за один проход.
+
+
+        Бар i получает тот же сигнал, что вернул бы generate_signal(df.iloc[:i + 1])
+
+        при последовательном вызове. Базовая реализация так и делает (O(n) вызовов
+
+        на растущем окне); стратегии переопределяют её векторными масками по колонкам.
+
+        Живой цикл продолжает использовать generate_signal.
+
+
+        Args:
+
+            df: DataFrame с OHLCV и признаками за всю историю
+
+            features: Дополнительные признаки (одинаковые для всех баров)
+
+
+        Returns:
+
+            Dict массивов длины len(df), см. empty_signal_arrays
+
+        """
+
+        features = features or {}
+
+        arrays = empty_signal_arrays(len(df))
+
+        for i in range(len(df)):
+
+            signal = self.generate_signal(df.iloc[: i + 1], features)
+
+            if signal:
+
+                self._store_signal(arrays, i, signal)
+
+        return arrays
+
+    @staticmethod
+    def _store_signal(arrays: Dict[str, np.ndarray], i: int, signal: Dict[str, Any]) -> None:
+        """Записать dict-сигнал generate_signal в batch-массивы"""
+
+        code = _SIGNAL_CODES.get(signal.get("signal"), SIGNAL_NONE)
+
+        arrays["signal"][i] = code
+
+        arrays["confidence"][i] = signal.get("confidence", np.nan)
+
+        price_key = "exit_price" if code == SIGNAL_EXIT else "entry_price"
+
+        for key, source in (("price", price_key), ("stop_loss", "stop_loss"), ("take_profit", "take_profit")):
+
+            value = signal.get(source)
+
+            arrays[key][i] = np.nan if value is None else value
+
+    def signal_dict(
+
+        self,
+
+        df: pd.DataFrame,
+
+        features: Optional[Dict[str, Any]] = None,
+
+        qty: Decimal = Decimal("1"),
+
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+
+        Сигналы generate_signals в формате ValidationEngine: {index: {"type", "qty"}}.
+
+
+        Использование: ValidationEngine(lambda df: strategy.signal_dict(df), name)
+
+        """
+
+        arrays = self.generate_signals(df, features)
+
+        types = {SIGNAL_LONG: "long", SIGNAL_SHORT: "short", SIGNAL_EXIT: "close"}
+
+        return {
+
+            df.index[i]: {"type": types[int(code)], "qty": qty}
+
+            for i, code in enumerate(arrays["signal"])
+
+            if code != SIGNAL_NONE
+
+        }
+
+    def required_features(self) -> Optional[Set[str]]:
+        """
+
+        Колонки признаков, нужные стратегии при текущих параметрах.
+
+
+        Returns:
+
+            Набор колонок или None (нужны все признаки)
+
+        """
+
+        if self.REQUIRED_FEATURES is None:
+
+            return None
+
+        return set(self.REQUIRED_FEATURES)
+
     def enable(self):
         """Включить стратегию"""
 
@@ -18,9 +18,25 @@ Breakout + Liquidity Filter Strategy
 
 from typing import Dict, Any, Optional
 
+import numpy as np
+
 import pandas as pd
 
-from strategy.base_strategy import BaseStrategy
+from strategy.base_strategy import (
+
+    BaseStrategy,
+
+    SIGNAL_LONG,
+
+    SIGNAL_SHORT,
+
+    column_or,
+
+    empty_signal_arrays,
+
+)
+
+from data.feature_row import FeatureRow
 
 from logger import setup_logger
 
@@ -32,6 +48,40 @@ class BreakoutStrategy(BaseStrategy):
 
     """Стратегия пробоя диапазона с фильтром ликвидности"""
 
+    REQUIRED_FEATURES = (
+
+        "close",
+
+        "high",
+
+        "low",
+
+        "atr",
+
+        "atr_percent",
+
+        "BBU_20_2.0",
+
+        "BBL_20_2.0",
+
+        "bb_width",
+
+        "bb_width_percentile",
+
+        "atr_percentile",
+
+        "bb_expansion",
+
+        "atr_expansion",
+
+        "volume_percentile",
+
+        "volume_ratio",
+
+        "volume_zscore",
+
+    )
+
     def __init__(
 
         self,
@@ -142,9 +192,9 @@ class BreakoutStrategy(BaseStrategy):
 
             return None
 
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
 
-        prev = df.iloc[-2] if len(df) > 1 else latest
+        prev_pos = -2 if len(df) > 1 else -1
 
         symbol = features.get("symbol", "UNKNOWN")
 
@@ -526,7 +576,7 @@ class BreakoutStrategy(BaseStrategy):
 
         close = latest["close"]
 
-        prev_close = prev["close"]
+        prev_close = df["close"].iat[prev_pos]
 
         # Находим колонки BB
 
@@ -538,9 +588,9 @@ class BreakoutStrategy(BaseStrategy):
 
         bb_lower = latest[bb_lower_col]
 
-        prev_bb_upper = prev[bb_upper_col]
+        prev_bb_upper = df[bb_upper_col].iat[prev_pos]
 
-        prev_bb_lower = prev[bb_lower_col]
+        prev_bb_lower = df[bb_lower_col].iat[prev_pos]
 
         # Пробой вверх
 
@@ -1005,3 +1055,128 @@ class BreakoutStrategy(BaseStrategy):
             }
 
         return None
+
+    def generate_signals(
+
+        self, df: pd.DataFrame, features: Optional[Dict[str, Any]] = None
+
+    ) -> Dict[str, np.ndarray]:
+        """
+
+        Векторный batch-режим для breakout_entry="instant".
+
+        Режим "retest" хранит ожидание ретеста между барами, поэтому идёт по-барно
+
+        через базовую реализацию.
+
+        """
+
+        if self.breakout_entry == "retest":
+
+            return super().generate_signals(df, features)
+
+        features = features or {}
+
+        n = len(df)
+
+        arrays = empty_signal_arrays(n)
+
+        upper_cols = [col for col in df.columns if "BBU_" in col]
+
+        lower_cols = [col for col in df.columns if "BBL_" in col]
+
+        if not self.is_enabled or n == 0 or not (upper_cols and lower_cols):
+
+            return arrays
+
+        # Спред из стакана один на весь прогон
+
+        if features.get("spread_percent", 100) >= 0.5:
+
+            return arrays
+
+        close = df["close"].to_numpy(dtype=float)
+
+        bb_upper = df[upper_cols[0]].to_numpy(dtype=float)
+
+        bb_lower = df[lower_cols[0]].to_numpy(dtype=float)
+
+        # Первый бар сравнивается сам с собой (prev = latest)
+
+        prev_close = np.concatenate((close[:1], close[:-1]))
+
+        prev_bb_upper = np.concatenate((bb_upper[:1], bb_upper[:-1]))
+
+        prev_bb_lower = np.concatenate((bb_lower[:1], bb_lower[:-1]))
+
+        base = np.ones(n, dtype=bool)
+
+        # STR-006: squeeze / expansion / volume
+
+        if self.require_squeeze:
+
+            base &= (column_or(df, "bb_width_percentile", 0.0) == 1.0) | (
+
+                column_or(df, "atr_percentile", 0.0) == 1.0
+
+            )
+
+        if self.require_expansion:
+
+            base &= (column_or(df, "bb_expansion", 0.0) == 1.0) | (
+
+                column_or(df, "atr_expansion", 0.0) == 1.0
+
+            )
+
+        if self.require_volume:
+
+            base &= (column_or(df, "volume_percentile", 0.0) == 1.0) | (
+
+                column_or(df, "volume_ratio", 0.0) >= self.volume_ratio_threshold
+
+            )
+
+        # NaN в фильтрах ниже не отклоняет сигнал (как скалярные сравнения в generate_signal)
+
+        base &= ~(column_or(df, "bb_width", 1.0) > self.bb_width_threshold)
+
+        long_breakout = (prev_close <= prev_bb_upper) & (close > bb_upper)
+
+        short_breakout = ~long_breakout & (prev_close >= prev_bb_lower) & (close < bb_lower)
+
+        confirmed = ~(column_or(df, "volume_zscore", 0) < self.min_volume_zscore)
+
+        if (long_breakout | short_breakout).any():
+
+            # Средний ATR% за 20 свечей, включая текущую
+
+            atr_percent = column_or(df, "atr_percent", 0)
+
+            atr_percent_ma = df["atr_percent"].rolling(20, min_periods=1).mean().to_numpy(dtype=float)
+
+            threshold = atr_percent_ma * self.min_atr_percent_expansion
+
+            confirmed &= ~(atr_percent < (threshold - 1e-9))
+
+        is_long = base & long_breakout & confirmed
+
+        is_short = base & short_breakout & confirmed
+
+        atr = column_or(df, "atr", 0)
+
+        arrays["signal"][is_long] = SIGNAL_LONG
+
+        arrays["signal"][is_short] = SIGNAL_SHORT
+
+        for mask, level, side in ((is_long, bb_upper, 1.0), (is_short, bb_lower, -1.0)):
+
+            arrays["confidence"][mask] = 0.75
+
+            arrays["price"][mask] = close[mask]
+
+            arrays["stop_loss"][mask] = level[mask] - side * atr[mask]
+
+            arrays["take_profit"][mask] = close[mask] + side * 2.5 * atr[mask]
+
+        return arrays
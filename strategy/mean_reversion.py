@@ -16,14 +16,32 @@ Mean Reversion Strategy (только при низкой волатильнос
 """
 
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
+
+import numpy as np
 
 import pandas as pd
 
-from strategy.base_strategy import BaseStrategy
+from strategy.base_strategy import (
+
+    BaseStrategy,
+
+    SIGNAL_EXIT,
+
+    SIGNAL_LONG,
+
+    SIGNAL_SHORT,
+
+    column_or,
+
+    empty_signal_arrays,
+
+)
 
 from strategy.meta_layer import RegimeSwitcher
 
+from data.feature_row import FeatureRow
+
 from logger import setup_logger
 
 from signal_logger import get_signal_logger
@@ -38,6 +56,32 @@ class MeanReversionStrategy(BaseStrategy):
 
     """Стратегия возврата к среднему (только при низкой волатильности)"""
 
+    REQUIRED_FEATURES = (
+
+        "close",
+
+        "timestamp",
+
+        "adx",
+
+        "atr",
+
+        "atr_slope",
+
+        "vol_regime",
+
+        "ema_20",
+
+        "ema_50",
+
+        "rsi",
+
+        "vwap",
+
+        "vwap_distance",
+
+    )
+
     def __init__(
 
         self,
@@ -155,7 +199,7 @@ class MeanReversionStrategy(BaseStrategy):
 
             return None
 
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
 
         current_bar_index = len(df) - 1
 
@@ -463,6 +507,18 @@ class MeanReversionStrategy(BaseStrategy):
 
         }
 
+    def required_features(self) -> Optional[Set[str]]:
+
+        required = super().required_features()
+
+        # STR-004: проверка range режима читает признаки RegimeSwitcher
+
+        if self.require_range_regime:
+
+            required.update(RegimeSwitcher.REQUIRED_FEATURES)
+
+        return required
+
     def generate_signal(
 
         self, df: pd.DataFrame, features: Dict[str, Any]
@@ -474,7 +530,7 @@ class MeanReversionStrategy(BaseStrategy):
 
             return None
 
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
 
         symbol = features.get("symbol", "UNKNOWN")
 
@@ -546,7 +602,7 @@ class MeanReversionStrategy(BaseStrategy):
 
             adx_current = latest.get("adx", 0)
 
-            adx_3bars_ago = df.iloc[-4].get("adx", 0) if len(df) >= 4 else adx_current
+            adx_3bars_ago = (df["adx"].iat[-4] if "adx" in df.columns else 0) if len(df) >= 4 else adx_current
 
             adx_spike = adx_current - adx_3bars_ago
 
@@ -847,3 +903,193 @@ class MeanReversionStrategy(BaseStrategy):
             }
 
         return None
+
+    def generate_signals(
+
+        self, df: pd.DataFrame, features: Optional[Dict[str, Any]] = None
+
+    ) -> Dict[str, np.ndarray]:
+        """
+
+        Векторный batch-режим.
+
+
+        Фильтры входа считаются масками по колонкам; STR-005 сопровождение позиции
+
+        (time/stop/take-profit выход) зависит от предыдущих входов, поэтому идёт
+
+        одним проходом по уже посчитанным массивам. Состояние _active_position
+
+        стратегии не меняется.
+
+        """
+
+        n = len(df)
+
+        arrays = empty_signal_arrays(n)
+
+        if not self.is_enabled or n == 0:
+
+            return arrays
+
+        close = df["close"].to_numpy(dtype=float)
+
+        adx = column_or(df, "adx", 0)
+
+        allowed = np.ones(n, dtype=bool)
+
+        # STR-004: только range режим
+
+        if self.require_range_regime:
+
+            allowed &= RegimeSwitcher.range_mask(df)
+
+        else:
+
+            allowed &= column_or(df, "vol_regime", 0) == -1
+
+        # STR-004: anti-knife (с 4-го бара)
+
+        if self.enable_anti_knife:
+
+            adx_spike = adx - np.concatenate((np.full(min(3, n), np.nan), adx[:-3]))
+
+            is_knife = (adx_spike > self.adx_spike_threshold) | (
+
+                column_or(df, "atr_slope", 0) > self.atr_spike_threshold
+
+            )
+
+            is_knife[:3] = False
+
+            allowed &= ~is_knife
+
+        trend_adx = adx if "adx" in df.columns else column_or(df, "ADX_14", 0)
+
+        allowed &= ~(trend_adx > self.max_adx_for_entry)
+
+        vwap_distance = column_or(df, "vwap_distance", 0)
+
+        rsi = column_or(df, "rsi", 50)
+
+        ema_50 = column_or(df, "ema_50", 0)
+
+        long_setup = (vwap_distance < -self.vwap_distance_threshold) & (rsi < self.rsi_oversold)
+
+        short_setup = ~long_setup & (vwap_distance > self.vwap_distance_threshold) & (rsi > self.rsi_overbought)
+
+        is_long = allowed & long_setup & ~(close < ema_50 * 0.95)
+
+        is_short = allowed & short_setup & ~(close > ema_50 * 1.05)
+
+        atr = column_or(df, "atr", 0)
+
+        vwap = df["vwap"].to_numpy(dtype=float) if "vwap" in df.columns else close
+
+        entries = np.zeros(n, dtype=np.int8)
+
+        entries[is_long] = SIGNAL_LONG
+
+        entries[is_short] = SIGNAL_SHORT
+
+        timestamps = self._timestamps_seconds(df) if self.max_hold_minutes else None
+
+        # STR-005: сопровождение позиции по барам (как _check_exit_conditions)
+
+        closes = close.tolist()
+
+        position = None
+
+        mean_tolerance = 0.001
+
+        for i in range(n):
+
+            price = closes[i]
+
+            if position is not None:
+
+                entry_price, entry_bar, entry_atr, mean_target, side = position
+
+                stop_distance = self.stop_loss_atr_multiplier * entry_atr
+
+                minutes_exit = (
+
+                    timestamps is not None
+
+                    and bool(timestamps[entry_bar])
+
+                    and bool(timestamps[i])
+
+                    and (timestamps[i] - timestamps[entry_bar]) / 60.0 >= self.max_hold_minutes
+
+                )
+
+                if side == SIGNAL_LONG:
+
+                    stop_hit = price <= entry_price - stop_distance
+
+                    target_hit = price >= mean_target * (1 - mean_tolerance)
+
+                else:
+
+                    stop_hit = price >= entry_price + stop_distance
+
+                    target_hit = price <= mean_target * (1 + mean_tolerance)
+
+                if i - entry_bar >= self.max_hold_bars or minutes_exit or stop_hit or target_hit:
+
+                    arrays["signal"][i] = SIGNAL_EXIT
+
+                    arrays["confidence"][i] = 1.0
+
+                    arrays["price"][i] = price
+
+                    position = None
+
+                    continue
+
+            side = entries[i]
+
+            if side == 0:
+
+                continue
+
+            sign = 1.0 if side == SIGNAL_LONG else -1.0
+
+            arrays["signal"][i] = side
+
+            arrays["confidence"][i] = 0.6
+
+            arrays["price"][i] = price
+
+            arrays["stop_loss"][i] = price - sign * atr[i]
+
+            arrays["take_profit"][i] = vwap[i]
+
+            position = (price, i, atr[i], vwap[i], side)
+
+        return arrays
+
+    @staticmethod
+    def _timestamps_seconds(df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Колонка timestamp в секундах (None - нет колонки или формат не поддержан)"""
+
+        if "timestamp" not in df.columns:
+
+            return None
+
+        timestamps = df["timestamp"]
+
+        try:
+
+            if pd.api.types.is_datetime64_any_dtype(timestamps):
+
+                return np.round(timestamps.astype("int64").to_numpy() / 1e9, 6)
+
+            return timestamps.to_numpy(dtype=float)
+
+        except (TypeError, ValueError) as e:
+
+            logger.debug(f"[STR-005] Could not convert timestamps: {e}")
+
+            return None
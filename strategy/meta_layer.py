@@ -20,22 +20,38 @@ Meta Layer: управление стратегиями, режимами рын
 """
 
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from dataclasses import dataclass
 
+import numpy as np
+
 import pandas as pd
 
-from strategy.base_strategy import BaseStrategy
+from strategy.base_strategy import BaseStrategy, column_or
 from strategy.regime_scorer import RegimeScorer, RegimeScores
+from data.feature_row import FEATURE_ROW_KEY, FeatureRow
 from data.timeframe_cache import TimeframeCache
 
 from logger import setup_logger
 
 from signal_logger import get_signal_logger
 
+from utils import metrics
+
 
 logger = setup_logger(__name__)
 
+
+SIGNALS_GENERATED = metrics.counter(
+    "meta_signals_generated_total", "Сигналы стратегий, полученные MetaLayer", ("strategy",)
+)
+SIGNALS_REJECTED = metrics.counter(
+    "meta_signals_rejected_total", "Сигналы, отклонённые MetaLayer, по стратегии и причине", ("strategy", "reason")
+)
+SIGNALS_SELECTED = metrics.counter(
+    "meta_signals_selected_total", "Финальные сигналы MetaLayer по стратегии", ("strategy",)
+)
+
 signal_logger = get_signal_logger()
 
 
@@ -86,6 +102,28 @@ class RegimeSwitcher:
 
     """
 
+    REQUIRED_FEATURES = (
+
+        "close",
+
+        "adx",
+
+        "bb_width",
+
+        "bb_width_pct_change",
+
+        "atr_slope",
+
+        "atr_percent",
+
+        "ema_20",
+
+        "ema_50",
+
+        "vol_regime",
+
+    )
+
     @staticmethod
     def detect_regime(
 
@@ -145,7 +183,7 @@ class RegimeSwitcher:
 
             return "unknown"
 
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df)
 
         # Компонент 1: ADX
 
@@ -301,6 +339,56 @@ class RegimeSwitcher:
 
         return "unknown"
 
+    @staticmethod
+    def range_mask(
+
+        df: pd.DataFrame,
+
+        adx_range_threshold: float = 20.0,
+
+        bb_width_range_threshold: float = 0.03,
+
+        atr_slope_threshold: float = 0.5,
+
+        high_vol_atr_threshold: float = 3.0,
+
+    ) -> np.ndarray:
+        """
+
+        Векторный аналог detect_regime(df.iloc[:i + 1]) == "range" для всех баров сразу.
+
+        """
+
+        adx = column_or(df, "adx" if "adx" in df.columns else "ADX_14", 0)
+
+        bb_width = column_or(df, "bb_width", 1.0)
+
+        atr_percent = column_or(df, "atr_percent", 0.0)
+
+        ema_20 = column_or(df, "ema_20", 0)
+
+        ema_50 = column_or(df, "ema_50", 0)
+
+        known = (ema_20 != 0) & (ema_50 != 0)
+
+        high_vol = (atr_percent > high_vol_atr_threshold) | (
+
+            (column_or(df, "vol_regime", 0) == 1) & (atr_percent > 2.0)
+
+        )
+
+        is_range = (
+
+            (adx < adx_range_threshold)
+
+            & ((bb_width < bb_width_range_threshold) | (column_or(df, "bb_width_pct_change", 0.0) < 0))
+
+            & (column_or(df, "atr_slope", 0.0) < atr_slope_threshold)
+
+        )
+
+        return known & ~high_vol & is_range
+
 
 class SignalArbitrator:
 
@@ -393,6 +481,8 @@ class SignalArbitrator:
 class NoTradeZones:
 
     """Проверка условий для запрета торговли"""
+
+    REQUIRED_FEATURES = ("has_anomaly", "vol_regime", "atr_percent")
     
     def __init__(
         self,
@@ -426,7 +516,7 @@ class NoTradeZones:
 
         """
 
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
 
         # 1. Аномалия данных
 
@@ -581,6 +671,9 @@ class MetaLayer:
         # Кэш последнего regime scoring (для reduce API calls)
         self._last_regime_scores: Optional[RegimeScores] = None
 
+        # FeaturePipeline, которому передаются требования к признакам (attach_feature_pipeline)
+        self.feature_pipeline = None
+
         logger.info(
 
             f"MetaLayer initialized with {len(strategies)} strategies "
@@ -692,6 +785,8 @@ class MetaLayer:
             
             if signal is None:
                 continue
+
+            SIGNALS_GENERATED.inc(strategy=strategy.name)
             
             # Извлекаем confidence
             raw_confidence = signal.get("confidence", 0.0)
@@ -740,7 +835,7 @@ class MetaLayer:
         
         Отклонённые кандидаты помечаются rejected=True + rejection_reasons.
         """
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
         is_testnet = bool(features.get("is_testnet", False))
         allow_anomaly = bool(features.get("allow_anomaly_on_testnet", False))
         
@@ -874,6 +969,9 @@ class MetaLayer:
         # 5. Фильтруем отклонённых
         valid_candidates = [c for c in candidates if not c.rejected]
         rejected_candidates = [c for c in candidates if c.rejected]
+        for candidate in rejected_candidates:
+            reason = candidate.rejection_reasons[0] if candidate.rejection_reasons else "rejected"
+            SIGNALS_REJECTED.inc(strategy=candidate.strategy_name, reason=reason)
         
         # 6. Логируем всех кандидатов
         signal_logger.log_debug_info(
@@ -902,6 +1000,7 @@ class MetaLayer:
         
         # 7. Выбираем лучшего кандидата (max final_score)
         best_candidate = max(valid_candidates, key=lambda c: c.final_score)
+        SIGNALS_SELECTED.inc(strategy=best_candidate.strategy_name)
         
         # 8. Логируем выбор
         signal_logger.log_debug_info(
@@ -974,6 +1073,9 @@ class MetaLayer:
             )
             features["symbol"] = "UNKNOWN"
 
+        # Снимок последнего бара один на весь проход (фильтры, режим, стратегии)
+        features[FEATURE_ROW_KEY] = FeatureRow.latest(df, features)
+
         # 1. No-trade zones
 
         trading_allowed, block_reason = self.no_trade_zones.is_trading_allowed(
@@ -984,6 +1086,8 @@ class MetaLayer:
 
         if not trading_allowed:
 
+            SIGNALS_REJECTED.inc(strategy="MetaLayer", reason="no_trade_zone")
+
             signal_logger.log_signal_rejected(
 
                 strategy_name="MetaLayer",
@@ -1046,6 +1150,8 @@ class MetaLayer:
 
                     signals.append(normalized)
 
+                    SIGNALS_GENERATED.inc(strategy=strategy.name)
+
                     logger.info(
 
                         f"Signal from {strategy.name}: {normalized['signal']} "
@@ -1058,7 +1164,7 @@ class MetaLayer:
 
         if not signals:
 
-            latest = df.iloc[-1]
+            latest = FeatureRow.latest(df, features)
             
             # Безопасное извлечение ema_distance_atr (NaN -> None для JSON)
             import math
@@ -1100,6 +1206,10 @@ class MetaLayer:
 
         if final_signal is None and signals:
 
+            for s in signals:
+
+                SIGNALS_REJECTED.inc(strategy=s.get("strategy", "unknown"), reason="meta_conflict")
+
             signal_logger.log_signal_rejected(
 
                 strategy_name="MetaLayer",
@@ -1206,6 +1316,12 @@ class MetaLayer:
 
                 if not score_passed:
 
+                    SIGNALS_REJECTED.inc(
+
+                        strategy=final_signal.get("strategy", "unknown"), reason="mtf_score_below_threshold"
+
+                    )
+
                     signal_logger.log_signal_rejected(
 
                         strategy_name="MetaLayer",
@@ -1232,6 +1348,10 @@ class MetaLayer:
 
                 final_signal["mtf_score_threshold"] = self.mtf_score_threshold
 
+        if final_signal:
+
+            SIGNALS_SELECTED.inc(strategy=final_signal.get("strategy", "unknown"))
+
         return final_signal
 
     @staticmethod
@@ -1314,7 +1434,7 @@ class MetaLayer:
         if df is None or df.empty:
             return candidates
             
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df)
         ema_dist = latest.get("ema_distance_atr")
         
         # Деградация если метрика не готова
@@ -1382,7 +1502,45 @@ class MetaLayer:
                 strategy.enable()
             else:
                 strategy.disable()
+
+        self._sync_feature_requirements(df)
     
+    def required_features(self) -> Optional[Set[str]]:
+        """
+        Колонки признаков, которые прочитает get_signal при текущем наборе стратегий.
+
+        Weighted routing опрашивает все стратегии, legacy - только включённые.
+
+        Returns:
+            Набор колонок или None (стратегия без REQUIRED_FEATURES - нужны все)
+        """
+        required = set(NoTradeZones.REQUIRED_FEATURES)
+        weighted = self.use_weighted_routing and self.regime_scorer
+        required.update(RegimeScorer.REQUIRED_FEATURES if weighted else RegimeSwitcher.REQUIRED_FEATURES)
+
+        for strategy in self.strategies:
+            if not (weighted or strategy.is_enabled):
+                continue
+            strategy_required = strategy.required_features()
+            if strategy_required is None:
+                return None
+            required.update(strategy_required)
+
+        return required
+
+    def attach_feature_pipeline(self, pipeline) -> None:
+        """Считать в pipeline только признаки, нужные стратегиям (пересчёт при смене стратегий)"""
+        self.feature_pipeline = pipeline
+        pipeline.set_required_features(self.required_features())
+
+    def _sync_feature_requirements(self, df: Optional[pd.DataFrame] = None) -> None:
+        """После переключения стратегий обновить граф признаков и досчитать недостающие колонки"""
+        if self.feature_pipeline is None:
+            return
+        self.feature_pipeline.set_required_features(self.required_features())
+        if df is not None:
+            self.feature_pipeline.extend_features(df)
+
     def _get_legacy_strategy_names(self, regime: str) -> List[str]:
         """Старая логика выбора стратегий по режиму (обратная совместимость)"""
         active = []
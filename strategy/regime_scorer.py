@@ -14,6 +14,7 @@ from typing import Dict, Any, Optional, List
 from dataclasses import dataclass
 import pandas as pd
 import numpy as np
+from data.feature_row import FeatureRow
 from logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -50,6 +51,11 @@ class RegimeScores:
 
 class RegimeScorer:
     """Вычисление режимов рынка через multi-factor scoring"""
+
+    # Колонки признаков, которые читает score_regime (spread/depth берутся из features)
+    REQUIRED_FEATURES = (
+        "close", "adx", "atr_percent", "bb_width", "bb_width_pct_change", "atr_slope", "ema_20", "ema_50", "volume_zscore",
+    )
     
     def __init__(
         self,
@@ -101,7 +107,7 @@ class RegimeScorer:
         if df is None or df.empty:
             return self._neutral_scores("empty_dataframe")
         
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
         
         # Извлекаем индикаторы (с защитой от отсутствия)
         adx = self._safe_get(latest, ["adx", "ADX_14"], 0.0)
@@ -180,6 +186,107 @@ class RegimeScorer:
             values=values,
         )
     
+    def score_regimes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Векторный score_regime для каждого бара истории за один проход.
+        
+        Строка i совпадает с score_regime(df.iloc[:i + 1]) (без orderflow features,
+        которые влияют только на values).
+        
+        Args:
+            df: DataFrame с OHLCV и индикаторами
+        
+        Returns:
+            DataFrame с индексом df: trend_score, range_score, volatility_score,
+            chop_score, regime_label, confidence
+        """
+        columns = ["trend_score", "range_score", "volatility_score", "chop_score", "regime_label", "confidence"]
+        if df is None or df.empty:
+            return pd.DataFrame(columns=columns)
+        
+        adx = self._safe_column(df, ["adx", "ADX_14"], 0.0)
+        atr_percent = self._safe_column(df, ["atr_percent"], 0.0)
+        bb_width = self._safe_column(df, ["bb_width"], 0.0)
+        bb_width_pct_change = self._safe_column(df, ["bb_width_pct_change"], 0.0)
+        atr_slope = self._safe_column(df, ["atr_slope"], 0.0)
+        ema_20 = self._safe_column(df, ["ema_20"], 0.0)
+        ema_50 = self._safe_column(df, ["ema_50"], 0.0)
+        close = self._safe_column(df, ["close"], 0.0)
+        volume_zscore = self._safe_column(df, ["volume_zscore"], 0.0)
+        
+        normalize = self._normalize_array
+        
+        # 1. Trend (как _calculate_trend_score)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ema_diff_pct = np.where(ema_50 > 0, np.abs(ema_20 - ema_50) / ema_50, 0.0)
+        trend_score = np.clip(
+            0.5 * normalize(adx, self.adx_trend_min, self.adx_trend_max) +
+            0.3 * np.minimum(ema_diff_pct / 0.05, 1.0) +
+            0.2 * np.maximum(0, np.minimum(bb_width_pct_change / 0.2, 1.0)),
+            0.0, 1.0,
+        )
+        
+        # 2. Range (как _calculate_range_score)
+        range_score = np.clip(
+            0.4 * (1.0 - normalize(adx, 0, self.adx_range_max)) +
+            0.3 * (1.0 - normalize(bb_width, 0, self.bb_width_range_max)) +
+            0.2 * np.maximum(0, np.minimum(-bb_width_pct_change / 0.2, 1.0)) +
+            0.1 * (1.0 - np.minimum(np.abs(atr_slope) / 1.0, 1.0)),
+            0.0, 1.0,
+        )
+        
+        # 3. Volatility
+        volatility_score = normalize(atr_percent, self.atr_pct_high, self.atr_pct_extreme)
+        
+        # 4. Chop (как _calculate_chop_score)
+        chop_score = np.clip(
+            0.4 * (1.0 - normalize(adx, 0, 25.0)) +
+            0.3 * np.minimum(np.abs(atr_slope) / 2.0, 1.0) +
+            0.2 * np.minimum(np.abs(volume_zscore) / 3.0, 1.0) +
+            0.1 * np.minimum(np.abs(bb_width_pct_change) / 0.3, 1.0),
+            0.0, 1.0,
+        )
+        
+        # Метки в порядке приоритетов _determine_regime_label
+        is_high_vol = volatility_score >= 0.7
+        is_choppy = ~is_high_vol & (chop_score >= 0.6)
+        is_trend = ~is_high_vol & ~is_choppy & (trend_score > range_score)
+        is_range = ~is_high_vol & ~is_choppy & ~is_trend & (range_score >= 0.5)
+        trend_direction = np.where(
+            (ema_20 > ema_50) & (close > ema_50),
+            "trend_up",
+            np.where((ema_20 < ema_50) & (close < ema_50), "trend_down",
+                     np.where(ema_20 > ema_50, "trend_up", "trend_down")),
+        )
+        labels = np.select(
+            [is_high_vol, is_choppy, is_trend, is_range],
+            ["high_vol", "choppy", trend_direction, "range"],
+            default="unknown",
+        )
+        confidence = np.select(
+            [is_high_vol, is_choppy, is_trend, is_range],
+            [volatility_score, chop_score, trend_score, range_score],
+            default=0.5,
+        )
+        
+        # Нет критичных индикаторов -> нейтральные scores
+        missing = (ema_20 == 0) | (ema_50 == 0) | (close == 0)
+        for scores in (trend_score, range_score, volatility_score, chop_score, confidence):
+            scores[missing] = 0.0
+        labels[missing] = "unknown"
+        
+        return pd.DataFrame(
+            {
+                "trend_score": trend_score,
+                "range_score": range_score,
+                "volatility_score": volatility_score,
+                "chop_score": chop_score,
+                "regime_label": labels.astype(object),
+                "confidence": confidence,
+            },
+            index=df.index,
+        )
+    
     def _calculate_trend_score(
         self,
         adx: float,
@@ -365,8 +472,27 @@ class RegimeScorer:
         return min(max(normalized, 0.0), 1.0)
     
     @staticmethod
-    def _safe_get(row: pd.Series, keys: List[str], default: float) -> float:
-        """Безопасное получение значения из Series с fallback"""
+    def _normalize_array(values: np.ndarray, min_val: float, max_val: float) -> np.ndarray:
+        """Векторный _normalize"""
+        if max_val <= min_val:
+            return np.where(values < max_val, 0.0, 1.0)
+        return np.clip((values - min_val) / (max_val - min_val), 0.0, 1.0)
+    
+    @staticmethod
+    def _safe_column(df: pd.DataFrame, keys: List[str], default: float) -> np.ndarray:
+        """Векторный _safe_get: первая конечная величина из колонок keys, иначе default"""
+        result = np.full(len(df), np.nan)
+        for key in keys:
+            if key in df.columns:
+                values = pd.to_numeric(df[key], errors="coerce").to_numpy(dtype=float)
+                fill = np.isnan(result) & np.isfinite(values)
+                result[fill] = values[fill]
+        result[np.isnan(result)] = default
+        return result
+    
+    @staticmethod
+    def _safe_get(row: "FeatureRow | pd.Series", keys: List[str], default: float) -> float:
+        """Безопасное получение значения из снимка бара с fallback"""
         for key in keys:
             value = row.get(key)
             if value is not None and not (isinstance(value, float) and (np.isnan(value) or np.isinf(value))):
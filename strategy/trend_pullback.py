@@ -16,11 +16,27 @@ Trend-Following Pullback Strategy
 """
 
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
+
+import numpy as np
 
 import pandas as pd
 
-from strategy.base_strategy import BaseStrategy
+from strategy.base_strategy import (
+
+    BaseStrategy,
+
+    SIGNAL_LONG,
+
+    SIGNAL_SHORT,
+
+    column_or,
+
+    empty_signal_arrays,
+
+)
+
+from data.feature_row import FeatureRow
 
 from logger import setup_logger
 
@@ -36,6 +52,10 @@ class TrendPullbackStrategy(BaseStrategy):
 
     """Стратегия входа на откате в тренде"""
 
+    REQUIRED_FEATURES = ("close", "ema_20", "ema_50", "adx", "atr", "volume_zscore", "has_anomaly")
+
+    LIQUIDATION_FEATURES = ("liquidation_wick", "candle_range_atr", "wick_ratio")
+
     def __init__(
 
         self,
@@ -141,6 +161,18 @@ class TrendPullbackStrategy(BaseStrategy):
 
         self.volume_z_threshold = volume_z_threshold
 
+    def required_features(self) -> Optional[Set[str]]:
+
+        required = super().required_features()
+
+        # STR-002: колонки детектора ликвидаций нужны только с включённым фильтром
+
+        if self.enable_liquidation_filter:
+
+            required.update(self.LIQUIDATION_FEATURES)
+
+        return required
+
     def generate_signal(
 
         self, df: pd.DataFrame, features: Dict[str, Any]
@@ -154,7 +186,7 @@ class TrendPullbackStrategy(BaseStrategy):
 
         # Берём последнюю строку
 
-        latest = df.iloc[-1]
+        latest = FeatureRow.latest(df, features)
 
         symbol = features.get("symbol", "UNKNOWN")
 
@@ -714,6 +746,99 @@ class TrendPullbackStrategy(BaseStrategy):
 
         return None
 
+    def generate_signals(
+
+        self, df: pd.DataFrame, features: Optional[Dict[str, Any]] = None
+
+    ) -> Dict[str, np.ndarray]:
+        """
+
+        Векторный batch-режим: те же фильтры, что в generate_signal, как маски по колонкам.
+
+        Бар i совпадает с generate_signal(df.iloc[:i + 1]) (см. tests/test_batch_signals.py).
+
+        """
+
+        n = len(df)
+
+        arrays = empty_signal_arrays(n)
+
+        required_cols = ["close", "ema_20", "ema_50", "adx", "atr", "volume_zscore"]
+
+        if not self.is_enabled or n == 0 or not all(col in df.columns for col in required_cols):
+
+            return arrays
+
+        close = df["close"].to_numpy(dtype=float)
+
+        ema_20 = df["ema_20"].to_numpy(dtype=float)
+
+        ema_50 = df["ema_50"].to_numpy(dtype=float)
+
+        adx = df["adx"].to_numpy(dtype=float)
+
+        atr = df["atr"].to_numpy(dtype=float)
+
+        volume_zscore = df["volume_zscore"].to_numpy(dtype=float)
+
+        has_anomaly = column_or(df, "has_anomaly", 0)
+
+        # 1. ADX (NaN -> сравнение False) + общие фильтры
+
+        base = (adx >= self.min_adx) & (atr > 0)
+
+        base &= volume_zscore > self.volume_z_threshold
+
+        base &= has_anomaly == 0
+
+        # STR-002: ликвидационная свеча в последних N барах (включая текущий)
+
+        if self.enable_liquidation_filter and "liquidation_wick" in df.columns:
+
+            recent = df["liquidation_wick"].rolling(self.liquidation_cooldown_bars, min_periods=1).sum()
+
+            base &= ~(recent.to_numpy(dtype=float) > 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+
+            long_distance = (close - ema_20) / atr
+
+            short_distance = (ema_20 - close) / atr
+
+        low, high = self.entry_zone_atr_low, self.entry_zone_atr_high
+
+        is_long = base & (ema_20 > ema_50) & (long_distance >= low) & (long_distance <= high)
+
+        is_short = base & (ema_20 < ema_50) & (short_distance >= low) & (short_distance <= high)
+
+        # STR-003: confirm_close - предыдущее закрытие по другую сторону текущей EMA20
+
+        if self.entry_mode == "confirm_close":
+
+            prev_close = np.concatenate(([np.nan], close[:-1]))
+
+            is_long &= (prev_close < ema_20) & (close > ema_20)
+
+            is_short &= (prev_close > ema_20) & (close < ema_20)
+
+        confidence = np.minimum(adx / 50.0, 1.0)
+
+        arrays["signal"][is_long] = SIGNAL_LONG
+
+        arrays["signal"][is_short] = SIGNAL_SHORT
+
+        for mask, side in ((is_long, 1.0), (is_short, -1.0)):
+
+            arrays["confidence"][mask] = confidence[mask]
+
+            arrays["price"][mask] = close[mask]
+
+            arrays["stop_loss"][mask] = ema_20[mask] - side * 1.5 * atr[mask]
+
+            arrays["take_profit"][mask] = close[mask] + side * 3 * atr[mask]
+
+        return arrays
+
     def _check_entry_confirmation(
 
         self, df: pd.DataFrame, symbol: str, is_long: bool, ema_level: float
@@ -761,13 +886,9 @@ class TrendPullbackStrategy(BaseStrategy):
 
             }
 
-        current = df.iloc[-1]
-
-        previous = df.iloc[-2]
-
-        current_close = current["close"]
+        current_close = FeatureRow.latest(df)["close"]
 
-        prev_close = previous["close"]
+        prev_close = df["close"].iat[-2]
 
         if self.entry_mode == "confirm_close":
 
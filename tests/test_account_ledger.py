@@ -0,0 +1,185 @@
+"""
+Тесты для AccountLedger (состояние аккаунта из private WS)
+
+Проверяем:
+1. Инкрементальные equity / unrealized / realized PnL / open orders из push'ей
+2. Дедупликация исполнений по execId, фильтр по текущему дню и символу
+3. REST checksum: пересев состояния и drift
+4. RiskMonitorService читает ledger без REST запросов
+"""
+
+import time
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from exchange.order_events import OrderEventBus
+from risk.account_ledger import AccountLedger
+from risk.advanced_risk_limits import RiskDecision
+from risk.risk_monitor import RiskMonitorService
+
+
+NOW_MS = int(time.time() * 1000)
+
+
+def make_account_client(balance=1000.0, positions=None, orders=None, executions=None):
+    client = MagicMock()
+    client.get_wallet_balance.return_value = {"retCode": 0, "balance": balance}
+    client.get_positions.return_value = {"retCode": 0, "result": {"list": positions or []}}
+    client.get_open_orders.return_value = {"retCode": 0, "result": {"list": orders or []}}
+    client.get_executions.return_value = {"retCode": 0, "result": {"list": executions or []}}
+    return client
+
+
+def make_live_ledger(client=None):
+    bus = OrderEventBus()
+    bus.set_active(True)
+    ledger = AccountLedger()
+    ledger.attach(bus)
+    ledger.reconcile(client or make_account_client(), "BTCUSDT")
+    return bus, ledger
+
+
+class TestAccountLedger:
+
+    def test_incremental_state_from_pushes(self):
+        bus, ledger = make_live_ledger()
+
+        bus.publish_wallet({"coin": [{"coin": "USDT", "walletBalance": "1200"}]})
+        bus.publish_position({
+            "symbol": "BTCUSDT", "size": "0.1", "avgPrice": "50000",
+            "markPrice": "50500", "leverage": "5", "unrealisedPnl": "50",
+        })
+        bus.publish_order({"orderId": "o1", "symbol": "BTCUSDT", "orderStatus": "New"})
+        bus.publish_order({"orderId": "o2", "symbol": "BTCUSDT", "orderStatus": "New"})
+        bus.publish_order({"orderId": "o1", "symbol": "BTCUSDT", "orderStatus": "Filled"})
+
+        assert ledger.equity == Decimal("1250")
+        assert ledger.get_position("BTCUSDT")["notional"] == Decimal("5050.0")
+        assert ledger.open_orders_count("BTCUSDT") == 1
+
+        # Обновление позиции заменяет unrealized, а не добавляет
+        bus.publish_position({"symbol": "BTCUSDT", "size": "0.1", "markPrice": "50200", "unrealisedPnl": "20"})
+        assert ledger.unrealized_pnl == Decimal("20")
+
+        bus.publish_position({"symbol": "BTCUSDT", "size": "0", "unrealisedPnl": "0"})
+        assert ledger.open_positions_count() == 0
+        assert ledger.equity == Decimal("1200")
+
+    def test_realized_pnl_dedup_and_day_filter(self):
+        bus, ledger = make_live_ledger()
+
+        execution = {"execId": "e1", "execTime": str(NOW_MS), "closedPnl": "30", "execFee": "1"}
+        bus.publish_execution(execution)
+        bus.publish_execution(execution)  # Дубликат (например, после reconnect)
+        bus.publish_execution({"execId": "e0", "execTime": "1000", "closedPnl": "-500", "execFee": "1"})
+
+        assert ledger.get_realized_pnl_today() == Decimal("29")
+
+    def test_realized_pnl_only_for_ledger_symbol(self):
+        executions = [{"execId": "e1", "symbol": "BTCUSDT", "execTime": str(NOW_MS), "closedPnl": "10", "execFee": "0"}]
+        client = make_account_client(executions=executions)
+        bus, ledger = make_live_ledger(client)
+
+        # Исполнение другого символа в push не попадает в PnL - как и в REST checksum по symbol
+        bus.publish_execution({"execId": "x1", "symbol": "ETHUSDT", "execTime": str(NOW_MS), "closedPnl": "-70", "execFee": "1"})
+        bus.publish_execution({"execId": "e2", "symbol": "BTCUSDT", "execTime": str(NOW_MS), "closedPnl": "5", "execFee": "1"})
+        assert ledger.get_realized_pnl_today() == Decimal("14")
+
+        client.get_executions.return_value["result"]["list"] = executions + [
+            {"execId": "e2", "symbol": "BTCUSDT", "execTime": str(NOW_MS), "closedPnl": "5", "execFee": "1"},
+        ]
+        drift = ledger.reconcile(client, "BTCUSDT")
+
+        assert ledger.symbol == "BTCUSDT"
+        assert drift["realized_pnl_today"] == 0.0
+        assert client.get_executions.call_args.kwargs["symbol"] == "BTCUSDT"
+
+    def test_reconcile_corrects_drift(self):
+        executions = [
+            {"execId": "e1", "execTime": str(NOW_MS), "closedPnl": "10", "execFee": "0.5"},
+            {"execId": "e2", "execTime": str(NOW_MS), "closedPnl": "-4", "execFee": "0.5"},
+        ]
+        client = make_account_client(
+            balance=900.0,
+            positions=[{"symbol": "ETHUSDT", "size": "1", "avgPrice": "3000", "markPrice": "2990", "unrealisedPnl": "-10"}],
+            orders=[{"orderId": "o9"}],
+            executions=executions,
+        )
+        bus, ledger = make_live_ledger(make_account_client())
+        bus.publish_execution(executions[0])  # e2 потерян стримом
+
+        drift = ledger.reconcile(client, "BTCUSDT")
+
+        assert ledger.wallet_balance == Decimal("900.0")
+        assert ledger.equity == Decimal("890.0")
+        assert ledger.open_orders_count("BTCUSDT") == 1
+        assert ledger.get_realized_pnl_today() == Decimal("5.0")
+        assert drift["realized_pnl_today"] == -4.5
+
+    def test_not_live_without_checksum_or_stream(self):
+        bus = OrderEventBus()
+        ledger = AccountLedger()
+        ledger.attach(bus)
+        assert not ledger.is_live
+
+        ledger.reconcile(make_account_client(), "BTCUSDT")
+        assert not ledger.is_live  # Стрим не активен
+
+        bus.set_active(True)
+        assert ledger.is_live
+
+
+class TestRiskMonitorWithLedger:
+
+    @staticmethod
+    def make_monitor(ledger, client):
+        risk_limits = MagicMock()
+        risk_limits.evaluate.return_value = (RiskDecision.ALLOW, {"violations": [], "warnings": []})
+        return RiskMonitorService(
+            account_client=client,
+            kill_switch_manager=None,
+            advanced_risk_limits=risk_limits,
+            db=MagicMock(),
+            symbol="BTCUSDT",
+            account_ledger=ledger,
+        )
+
+    def test_checks_use_ledger_without_rest(self):
+        client = make_account_client(balance=1000.0)
+        bus, ledger = make_live_ledger(client)
+        client.reset_mock()
+        monitor = self.make_monitor(ledger, client)
+
+        bus.publish_position({"symbol": "BTCUSDT", "size": "0.1", "markPrice": "50000", "unrealisedPnl": "-25"})
+        result = monitor.run_monitoring_check()
+
+        assert monitor.uses_account_ledger
+        assert result["equity"] == 975.0
+        assert result["position_notional"] == 5000.0
+        client.get_wallet_balance.assert_not_called()
+        client.get_executions.assert_not_called()
+
+    def test_falls_back_to_rest_when_stream_down(self):
+        client = make_account_client(balance=1000.0)
+        bus, ledger = make_live_ledger(client)
+        bus.set_active(False)
+        monitor = self.make_monitor(ledger, client)
+        client.reset_mock()
+
+        monitor.run_monitoring_check()
+
+        assert not monitor.uses_account_ledger
+        client.get_wallet_balance.assert_called()
+
+    def test_can_open_new_position_from_ledger(self):
+        client = make_account_client()
+        bus, ledger = make_live_ledger(client)
+        monitor = self.make_monitor(ledger, client)
+        client.reset_mock()
+        bus.publish_position({"symbol": "BTCUSDT", "size": "1", "avgPrice": "60000", "markPrice": "60000"})
+
+        allowed, reason = monitor.can_open_new_position(50000.0, 100.0)
+
+        assert not allowed
+        assert "notional" in reason
+        client.get_positions.assert_not_called()
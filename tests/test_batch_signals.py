@@ -0,0 +1,121 @@
+"""
+Тесты для batch-режима сигналов (BaseStrategy.generate_signals)
+
+Проверяем:
+1. Паритет: векторные generate_signals совпадают с generate_signal по барам
+   для TrendPullback, Breakout и MeanReversion в разных конфигурациях
+2. Breakout retest идёт через по-барную реализацию
+3. Batch-режим не меняет состояние стратегии
+4. signal_dict отдаёт сигналы в формате ValidationEngine
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks import datasets
+from strategy.base_strategy import SIGNAL_EXIT, SIGNAL_LONG, SIGNAL_SHORT, BaseStrategy
+from strategy.breakout import BreakoutStrategy
+from strategy.mean_reversion import MeanReversionStrategy
+from strategy.trend_pullback import TrendPullbackStrategy
+
+SPREAD = {"symbol": "BTCUSDT", "spread_percent": 0.1}
+
+RELAXED_TREND = dict(min_adx=10, volume_z_threshold=-5, entry_zone_atr_low=-3, entry_zone_atr_high=3)
+RELAXED_BREAKOUT = dict(
+    bb_width_threshold=1.0,
+    min_volume_zscore=-5,
+    min_atr_percent_expansion=0.5,
+    require_squeeze=False,
+    require_expansion=False,
+    require_volume=False,
+)
+RELAXED_MEAN_REVERSION = dict(vwap_distance_threshold=0.2, rsi_oversold=45, rsi_overbought=55, max_adx_for_entry=100)
+
+CASES = {
+    "trend_default": (lambda: TrendPullbackStrategy(), {}),
+    "trend_immediate": (lambda: TrendPullbackStrategy(entry_mode="immediate", **RELAXED_TREND), {}),
+    "trend_confirm_close": (lambda: TrendPullbackStrategy(entry_mode="confirm_close", **RELAXED_TREND), {}),
+    "breakout_default": (lambda: BreakoutStrategy(), SPREAD),
+    "breakout_relaxed": (lambda: BreakoutStrategy(**RELAXED_BREAKOUT), SPREAD),
+    "breakout_wide_spread": (lambda: BreakoutStrategy(**RELAXED_BREAKOUT), {"spread_percent": 1.0}),
+    "mean_reversion_default": (lambda: MeanReversionStrategy(), {}),
+    "mean_reversion_vol_regime": (
+        lambda: MeanReversionStrategy(require_range_regime=False, enable_anti_knife=False, **RELAXED_MEAN_REVERSION),
+        {},
+    ),
+    "mean_reversion_range_short_hold": (
+        lambda: MeanReversionStrategy(adx_spike_threshold=1, max_hold_bars=5, **RELAXED_MEAN_REVERSION),
+        {},
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def feature_df():
+    return datasets.features(400)
+
+
+def assert_same_signals(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key in expected:
+        np.testing.assert_array_equal(actual[key], expected[key], err_msg=key)
+
+
+class TestParity:
+
+    @pytest.mark.parametrize("case", sorted(CASES))
+    def test_batch_matches_per_bar(self, feature_df, case):
+        make, features = CASES[case]
+
+        per_bar = BaseStrategy.generate_signals(make(), feature_df, features)
+        batch = make().generate_signals(feature_df, features)
+
+        assert_same_signals(per_bar, batch)
+
+    def test_relaxed_cases_produce_every_signal_kind(self, feature_df):
+        kinds = set()
+        for make, features in CASES.values():
+            kinds.update(np.unique(make().generate_signals(feature_df, features)["signal"]).tolist())
+
+        assert {SIGNAL_LONG, SIGNAL_SHORT, SIGNAL_EXIT} <= kinds
+
+    def test_disabled_strategy_has_no_signals(self, feature_df):
+        strategy = TrendPullbackStrategy(entry_mode="immediate", **RELAXED_TREND)
+        strategy.disable()
+
+        assert not strategy.generate_signals(feature_df)["signal"].any()
+
+
+class TestBatchMode:
+
+    def test_breakout_retest_uses_per_bar_path(self, feature_df):
+        strategy = BreakoutStrategy(breakout_entry="retest", **RELAXED_BREAKOUT)
+
+        batch = strategy.generate_signals(feature_df, SPREAD)
+        per_bar = BaseStrategy.generate_signals(
+            BreakoutStrategy(breakout_entry="retest", **RELAXED_BREAKOUT), feature_df, SPREAD
+        )
+
+        assert_same_signals(per_bar, batch)
+
+    def test_mean_reversion_state_untouched(self, feature_df):
+        strategy = MeanReversionStrategy(require_range_regime=False, **RELAXED_MEAN_REVERSION)
+
+        strategy.generate_signals(feature_df)
+
+        assert strategy._active_position is None
+
+    def test_signal_dict_for_validation_engine(self, feature_df):
+        from validation.validation_engine import ValidationEngine
+
+        strategy = MeanReversionStrategy(require_range_regime=False, **RELAXED_MEAN_REVERSION)
+        arrays = strategy.generate_signals(feature_df)
+
+        signals = strategy.signal_dict(feature_df)
+
+        assert len(signals) == int((arrays["signal"] != 0).sum())
+        assert {s["type"] for s in signals.values()} == {"long", "short", "close"}
+        metrics = ValidationEngine(lambda df: strategy.signal_dict(df), "MeanReversion").validate_on_data(
+            feature_df, period_type="train"
+        )
+        assert metrics.total_trades > 0
@@ -0,0 +1,94 @@
+"""
+Тесты для harness бенчмарков (benchmarks/)
+
+Проверяем:
+1. Сравнение с baseline: регрессия / ускорение / новые и пропавшие бенчмарки
+2. Нормировка на калибровочный прогон
+3. Запуск benchmarks.run: сохранение baseline и код выхода при регрессии
+"""
+
+import json
+
+from benchmarks import harness
+from benchmarks.run import main
+
+
+def report(calibration_s=1.0, **medians):
+    return {
+        "version": harness.BASELINE_VERSION,
+        "calibration_s": calibration_s,
+        "results": {name.replace("_", "."): {"median_s": value} for name, value in medians.items()},
+    }
+
+
+class TestCompare:
+
+    def test_statuses(self):
+        baseline = report(a_fast=0.010, a_slow=0.010, a_same=0.010, a_gone=0.010)
+        current = report(a_fast=0.005, a_slow=0.020, a_same=0.011, a_new=0.010)
+
+        statuses = {c.name: c.status for c in harness.compare(current, baseline, threshold=0.25)}
+
+        assert statuses == {
+            "a.fast": "improved",
+            "a.slow": "regression",
+            "a.same": "ok",
+            "a.gone": "missing",
+            "a.new": "new",
+        }
+
+    def test_normalized_by_calibration(self):
+        baseline = report(calibration_s=1.0, a_b=0.010)
+        current = report(calibration_s=2.0, a_b=0.020)  # вся машина в 2 раза медленнее
+
+        [normalized] = harness.compare(current, baseline)
+        [raw] = harness.compare(current, baseline, normalize=False)
+
+        assert normalized.status == "ok" and normalized.ratio == 1.0
+        assert raw.status == "regression"
+
+    def test_run_benchmark_excludes_setup(self):
+        calls = []
+
+        def factory():
+            calls.append("setup")
+            return lambda: calls.append("run")
+
+        bench = harness.Benchmark("test.bench", factory, rounds=3, warmup=1)
+        result = harness.run_benchmark(bench)
+
+        assert calls == ["setup"] + ["run"] * 4
+        assert result.rounds == 3
+        assert result.min_s <= result.median_s <= result.max_s
+
+
+class TestRunner:
+
+    def test_save_then_detect_regression(self, tmp_path):
+        baseline_path = str(tmp_path / "baseline.json")
+        args = ["--baseline", baseline_path, "-k", "indicators.calculate_ema_distance", "--rounds", "2"]
+
+        assert main(args + ["--save"]) == 0
+        saved = json.loads(open(baseline_path, encoding="utf-8").read())
+        assert list(saved["results"]) == ["indicators.calculate_ema_distance"]
+        assert main(args + ["--threshold", "100"]) == 0
+
+        # Baseline в 1000 раз быстрее текущего - регрессия
+        saved["results"]["indicators.calculate_ema_distance"]["median_s"] /= 1000
+        open(baseline_path, "w", encoding="utf-8").write(json.dumps(saved))
+        assert main(args) == 1
+
+    def test_all_hot_paths_registered(self):
+        import benchmarks.bench_hot_paths  # noqa: F401
+
+        names = {b.name for b in harness.get_benchmarks()}
+
+        assert {
+            "features.build_features",
+            "indicators.calculate_atr",
+            "meta_layer.get_signal",
+            "orderbook.apply_deltas",
+            "backtest.run_backtest",
+            "validation.validate_on_data",
+            "validation.run_sweep",
+        } <= names
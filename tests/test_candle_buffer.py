@@ -0,0 +1,156 @@
+"""
+Тесты для кольцевого буфера свечей (data.candle_buffer)
+
+Проверяем:
+1. Полная загрузка совпадает с klines_to_frame
+2. merge: формирующийся бар заменяется на месте, новый бар вытесняет
+   самый старый, результат совпадает с полным разбором
+3. fetch_limit: 2-3 свечи в установившемся режиме, полная загрузка при разрыве
+4. Фильтр выбросов только по новым строкам
+5. fetch_klines / TradingBot: маленький limit после первой загрузки
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from benchmarks import datasets
+from data.candle_buffer import CandleRingBuffer, fetch_klines, klines_to_frame
+
+HOUR_MS = 3_600_000
+
+
+def bar(ts, close, volume=10.0):
+    return [str(ts), str(close), str(close + 1), str(close - 1), str(close), str(volume), str(volume * close)]
+
+
+class FakeKlineClient:
+    """get_kline по списку свечей (новые первыми) с учётом limit"""
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.limits = []
+
+    def get_kline(self, symbol, interval="60", limit=200, **kwargs):
+        self.limits.append(limit)
+        return {"retCode": 0, "result": {"list": self.candles[:limit]}}
+
+
+@pytest.fixture
+def candles():
+    return datasets.klines(120)
+
+
+def loaded(candles, capacity=100):
+    buffer = CandleRingBuffer(capacity, "60")
+    buffer.load(candles)
+    return buffer
+
+
+class TestCandleRingBuffer:
+
+    def test_load_matches_full_parse(self, candles):
+        buffer = loaded(candles)
+
+        pd.testing.assert_frame_equal(buffer.to_frame(), klines_to_frame(candles).tail(100), check_freq=False)
+        assert buffer.last_timestamp == int(candles[0][0])
+        assert len(buffer.to_frame(20)) == 20
+
+    def test_merge_replaces_forming_bar_and_evicts_oldest(self, candles):
+        buffer = loaded(candles)
+        last = int(candles[0][0])
+        forming = bar(last, float(candles[0][4]) + 5)
+        new = bar(last + HOUR_MS, float(candles[0][4]) + 6)
+
+        assert buffer.merge([new, forming, candles[1]])
+        updated = [new, forming] + candles[1:]
+
+        pd.testing.assert_frame_equal(buffer.to_frame(), klines_to_frame(updated).tail(100), check_freq=False)
+        assert buffer.merged_rows == 3
+        assert buffer.full_loads == 1
+
+    def test_fetch_limit(self, candles):
+        buffer = loaded(candles)
+        last = buffer.last_timestamp
+
+        assert CandleRingBuffer(100, "60").fetch_limit(last) is None
+        assert buffer.fetch_limit(last + HOUR_MS // 2) == 2
+        assert buffer.fetch_limit(last + HOUR_MS + 1) == 3
+        assert buffer.fetch_limit(last + 100 * HOUR_MS) is None
+
+    def test_merge_without_overlap_needs_reload(self, candles):
+        buffer = loaded(candles)
+        last = buffer.last_timestamp
+
+        assert not buffer.merge([bar(last + 3 * HOUR_MS, 100.0), bar(last + 2 * HOUR_MS, 100.0)])
+        assert buffer.last_timestamp == last
+
+    def test_outlier_in_new_row_replaced_with_previous(self, candles):
+        buffer = loaded(candles)
+        last = buffer.last_timestamp
+        previous_close = buffer.to_frame()["close"].iloc[-1]
+
+        assert buffer.merge([bar(last + HOUR_MS, previous_close * 500), candles[0]])
+        df = buffer.to_frame()
+
+        assert df["close"].iloc[-1] == previous_close
+        assert df["volume"].iloc[-1] == 10.0  # объём фильтром не проверяется
+
+
+class TestFetchKlines:
+
+    def test_small_limit_in_steady_state(self, candles):
+        client = FakeKlineClient(candles[1:])
+        buffer = CandleRingBuffer(100, "60")
+        now = int(candles[1][0]) + 60_000
+
+        fetch_klines(client, "BTCUSDT", buffer, now)
+        client.candles = candles
+        df = fetch_klines(client, "BTCUSDT", buffer, now + HOUR_MS)
+
+        assert client.limits == [100, 3]
+        pd.testing.assert_frame_equal(df, klines_to_frame(candles).tail(100), check_freq=False)
+
+    def test_gap_triggers_full_reload(self, candles):
+        client = FakeKlineClient(candles[10:])
+        buffer = CandleRingBuffer(100, "60")
+        fetch_klines(client, "BTCUSDT", buffer, int(candles[10][0]))
+
+        # Часы отстали: limit считается по 1 новому бару, а биржа ушла на 10
+        client.candles = candles
+        df = fetch_klines(client, "BTCUSDT", buffer, int(candles[10][0]) + HOUR_MS)
+
+        assert client.limits == [100, 3, 100]
+        assert buffer.full_loads == 2
+        assert df.index[-1] == pd.Timestamp(int(candles[0][0]), unit="ms")
+
+    def test_failed_request_returns_none(self):
+        client = MagicMock()
+        client.get_kline.return_value = {"retCode": 10001, "retMsg": "bad"}
+
+        assert fetch_klines(client, "BTCUSDT", CandleRingBuffer(100, "60"), 0, max_retries=0) is None
+
+
+class TestTradingBotCandleBuffer:
+
+    def test_bot_reuses_buffer(self, candles):
+        from bot.trading_bot import TradingBot
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        with patch("bot.trading_bot.Database"), patch("bot.trading_bot.AccountClient"):
+            with patch("bot.trading_bot.MarketDataClient"):
+                bot = TradingBot(mode="paper", strategies=[TrendPullbackStrategy()], symbol="BTCUSDT", testnet=True)
+        bot.meta_layer.use_mtf = False
+        client = FakeKlineClient(candles)
+        bot.market_client = client
+        offset = int(candles[0][0]) + 60_000 - int(time.time() * 1000)
+        bot._server_time_offset_ms = MagicMock(return_value=offset)
+
+        for _ in range(2):
+            bot._fetch_market_data()
+
+        assert client.limits[0] == bot.candle_buffer.capacity
+        assert client.limits[1] == 2
+        assert bot.candle_buffer.full_loads == 1
@@ -0,0 +1,111 @@
+"""
+Тесты для EquityCurve (NumPy-backed)
+
+Проверяем:
+1. Инкрементальные peak / current / max drawdown совпадают с полным пересчётом
+2. Рост массивов сверх начальной ёмкости
+3. Прореживание для графиков сохраняет экстремумы
+4. Append-only персистентность и восстановление
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from execution.trade_metrics import EquityCurve
+
+
+def reference_max_drawdown(values):
+    peak = values[0]
+    max_dd = 0.0
+    for v in values:
+        peak = max(peak, v)
+        max_dd = max(max_dd, peak - v)
+    return max_dd
+
+
+class TestEquityCurve:
+
+    def test_incremental_drawdown_matches_reference(self):
+        values = (10000 + np.cumsum(np.random.default_rng(0).normal(0, 50, 500))).tolist()
+        curve = EquityCurve(capacity=16)
+        for i, v in enumerate(values):
+            curve.add_point(i * 60_000, Decimal(str(v)))
+
+        max_dd, max_dd_pct = curve.get_max_drawdown(Decimal("10000"))
+
+        assert len(curve) == 500
+        assert float(max_dd) == pytest.approx(reference_max_drawdown(values))
+        assert float(max_dd_pct) == pytest.approx(reference_max_drawdown(values) / 100)
+        assert curve.peak == pytest.approx(max(values))
+        assert curve.current_drawdown == pytest.approx(max(values) - values[-1])
+
+    def test_list_compatibility(self):
+        curve = EquityCurve()
+        curve.add_point(1000, Decimal("100"))
+        curve.add_point(2000, Decimal("90"))
+
+        assert curve.timestamps == [1000, 2000]
+        assert curve.equity_values == [100.0, 90.0]
+        assert curve[0] == 100.0
+        assert curve[-1] == 90.0
+        assert curve.max_equity == Decimal("100.0")
+        assert curve.get_drawdowns() == [Decimal("10.0")]
+
+    def test_empty_curve(self):
+        curve = EquityCurve()
+        assert len(curve) == 0
+        assert curve.get_max_drawdown(Decimal("1000")) == (Decimal("0"), Decimal("0"))
+        assert curve.max_equity == Decimal("0")
+
+    def test_arrays_are_read_only_views(self):
+        curve = EquityCurve()
+        curve.add_point(1, Decimal("5"))
+        with pytest.raises(ValueError):
+            curve.equity_array[0] = 1.0
+
+    def test_downsample_keeps_extremes(self):
+        values = np.sin(np.linspace(0, 20, 10_000)) * 100 + 1000
+        values[4321] = 500.0  # резкая просадка
+        curve = EquityCurve()
+        for i, v in enumerate(values):
+            curve.add_point(i, v)
+
+        ts, eq = curve.downsample(max_points=200)
+
+        assert len(eq) <= 201
+        assert min(eq) == 500.0
+        assert ts[-1] == 9999
+        assert ts == sorted(ts)
+
+    def test_persist_and_load(self, tmp_path):
+        path = tmp_path / "equity.bin"
+        curve = EquityCurve(persist_path=str(path))
+        for i, v in enumerate([100, 120, 90, 130, 110]):
+            curve.add_point(i * 1000, Decimal(v))
+        curve.close()
+
+        # Обрыв записи: недописанная запись отбрасывается
+        with open(path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        restored = EquityCurve.load(str(path))
+
+        assert restored.equity_values == curve.equity_values
+        assert restored.timestamps == curve.timestamps
+        assert restored.max_drawdown == curve.max_drawdown == 30.0
+        assert restored.peak_times == curve.peak_times
+        assert restored.current_drawdown == curve.current_drawdown
+
+    def test_load_and_continue_appending(self, tmp_path):
+        path = tmp_path / "equity.bin"
+        curve = EquityCurve(persist_path=str(path))
+        curve.add_point(1, Decimal("100"))
+        curve.close()
+
+        resumed = EquityCurve.load(str(path), persist=True)
+        resumed.add_point(2, Decimal("80"))
+        resumed.close()
+
+        assert EquityCurve.load(str(path)).equity_values == [100.0, 80.0]
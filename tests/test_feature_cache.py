@@ -0,0 +1,142 @@
+"""
+Тесты для FeatureCache
+
+Проверяем:
+1. Повторный build_features на тех же данных не пересчитывает признаки
+2. Изменение данных / параметров / версии кода даёт другой ключ
+3. Дописанные свечи - полный пересчёт, результат равен холодному FeaturePipeline
+4. LRU-вытеснение по бюджету диска
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.feature_cache import FeatureCache
+from data.features import FeaturePipeline
+
+
+def make_ohlcv(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    return pd.DataFrame({
+        "timestamp": np.arange(n, dtype=np.int64) * 60_000,
+        "open": close + rng.normal(0, 0.1, n),
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": rng.uniform(100, 200, n),
+    })
+
+
+class CountingBuild:
+    """build_fn, который считает вызовы и длину входа"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, df):
+        self.calls.append(len(df))
+        out = df.copy()
+        out["close_x2"] = out["close"] * 2
+        out["close_sma3"] = out["close"].rolling(3).mean()
+        return out
+
+
+class TestFeatureCache:
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return FeatureCache(cache_dir=str(tmp_path / "fc"))
+
+    def test_second_call_is_cache_hit(self, cache):
+        df = make_ohlcv(200)
+        build = CountingBuild()
+
+        first = cache.get_or_build(df, build)
+        second = cache.get_or_build(df.copy(), build)
+
+        assert build.calls == [200]
+        assert cache.hits == 1
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+    def test_hit_restores_caller_index(self, cache):
+        df = make_ohlcv(100)
+        build = CountingBuild()
+        cache.get_or_build(df, build)
+
+        shifted = df.copy()
+        shifted.index = shifted.index + 1000
+        result = cache.get_or_build(shifted, build)
+
+        assert list(result.index) == list(shifted.index)
+
+    def test_key_depends_on_data_and_params(self, cache):
+        df = make_ohlcv(100)
+        changed = df.copy()
+        changed.loc[50, "close"] += 0.01
+
+        assert cache.make_key(df) != cache.make_key(changed)
+        assert cache.make_key(df, {"is_testnet": True}) != cache.make_key(df, {"is_testnet": False})
+
+    def test_code_version_invalidates(self, tmp_path):
+        df = make_ohlcv(100)
+        build = CountingBuild()
+
+        FeatureCache(cache_dir=str(tmp_path), code_version="a").get_or_build(df, build)
+        FeatureCache(cache_dir=str(tmp_path), code_version="b").get_or_build(df, build)
+
+        assert build.calls == [100, 100]
+
+    def test_index_persists_between_instances(self, tmp_path):
+        df = make_ohlcv(100)
+        build = CountingBuild()
+
+        FeatureCache(cache_dir=str(tmp_path), code_version="v").get_or_build(df, build)
+        reopened = FeatureCache(cache_dir=str(tmp_path), code_version="v")
+        reopened.get_or_build(df, build)
+
+        assert build.calls == [100]
+        assert reopened.hits == 1
+
+    def test_lru_eviction_by_disk_budget(self, cache):
+        build = CountingBuild()
+        first = make_ohlcv(500, seed=1)
+        cache.get_or_build(first, build)
+        one_entry_bytes = cache.get_stats()["size_mb"] * 1024 * 1024
+
+        # Бюджет на ~2 записи
+        cache.max_bytes = int(one_entry_bytes * 2.5)
+        for seed in (2, 3, 4):
+            cache.get_or_build(make_ohlcv(500, seed=seed), build)
+
+        assert cache.get_stats()["entries"] <= 2
+        assert cache.make_key(first) not in cache._index
+
+    def test_pipeline_uses_cache(self, tmp_path):
+        df = make_ohlcv(300)
+        pipeline = FeaturePipeline(cache=FeatureCache(cache_dir=str(tmp_path)))
+
+        first = pipeline.build_features(df.copy())
+        second = pipeline.build_features(df.copy())
+
+        assert pipeline.cache.hits == 1
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+        uncached = FeaturePipeline().build_features(df.copy())
+        pd.testing.assert_frame_equal(first, uncached, check_dtype=False)
+
+    def test_appended_candles_match_cold_build(self, tmp_path):
+        df = make_ohlcv(400)
+        pipeline = FeaturePipeline(cache=FeatureCache(cache_dir=str(tmp_path)))
+        pipeline.build_features(df.iloc[:380].copy())
+
+        # Квантильный клиппинг ATR, atr_percentile, vol_regime, OBV не каузальны:
+        # новая свеча меняет значения на истории, префикс переиспользовать нельзя
+        cached = pipeline.build_features(df.copy())
+        cold = FeaturePipeline().build_features(df.copy())
+
+        assert pipeline.cache.misses == 2
+        assert list(cached.columns) == list(cold.columns)
+        for column in cold.columns:
+            pd.testing.assert_series_equal(cached[column], cold[column], check_dtype=False, obj=column)
@@ -0,0 +1,193 @@
+"""
+Тесты для ленивого расчёта признаков по графу зависимостей (data.feature_graph)
+
+Проверяем:
+1. FeatureGraph: транзитивное замыкание, порядок узлов, валидация графа
+2. FeaturePipeline.set_required_features: пропуск дорогих узлов, значения
+   совпадают с полным расчётом, extend_features досчитывает недостающее
+3. Требования стратегий и сигналы на ленивом фрейме совпадают с полным
+4. MetaLayer пересчитывает граф при переключении стратегий по режиму
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import datasets
+from data.feature_graph import FeatureGraph, FeatureNode
+from data.features import REQUIRED_COLUMNS, FeaturePipeline
+from strategy.breakout import BreakoutStrategy
+from strategy.mean_reversion import MeanReversionStrategy
+from strategy.meta_layer import MetaLayer, NoTradeZones, RegimeSwitcher
+from strategy.trend_pullback import TrendPullbackStrategy
+
+EXPENSIVE = ("bb_width_percentile", "atr_percentile", "volume_percentile", "liquidation_wick", "structure")
+
+
+def add_column(name, source=None):
+    def compute(df, params):
+        df[name] = df[source] + 1 if source else 1.0
+        return df
+
+    return compute
+
+
+@pytest.fixture(scope="module")
+def full_df():
+    return datasets.features(400)
+
+
+def build(required):
+    pipeline = FeaturePipeline()
+    pipeline.set_required_features(required)
+    return pipeline, pipeline.build_features(datasets.candles(400), is_testnet=True)
+
+
+class TestFeatureGraph:
+
+    def make_graph(self):
+        return FeatureGraph([
+            FeatureNode("a", ("a",), add_column("a")),
+            FeatureNode("b", ("b",), add_column("b", "a"), ("a",)),
+            FeatureNode("c", ("c",), add_column("c")),
+            FeatureNode("d", ("d",), add_column("d", "b"), ("b", "close")),
+        ])
+
+    def test_resolve_transitive_closure_in_graph_order(self):
+        graph = self.make_graph()
+
+        assert [n.name for n in graph.resolve({"d"})] == ["a", "b", "d"]
+        assert [n.name for n in graph.resolve({"c", "a"})] == ["a", "c"]
+        assert [n.name for n in graph.resolve(None)] == ["a", "b", "c", "d"]
+        assert graph.resolve({"close", "timestamp"}) == []  # внешние колонки
+
+    def test_run_computes_only_resolved_nodes(self):
+        graph = self.make_graph()
+        df = pd.DataFrame({"close": [1.0, 2.0]})
+
+        result = graph.run(df, graph.resolve({"d"}))
+
+        assert list(result.columns) == ["close", "a", "b", "d"]
+        assert result["d"].tolist() == [3.0, 3.0]
+
+    def test_invalid_graphs_rejected(self):
+        with pytest.raises(ValueError, match="computed after"):
+            FeatureGraph([FeatureNode("b", ("b",), add_column("b"), ("a",)), FeatureNode("a", ("a",), add_column("a"))])
+        with pytest.raises(ValueError, match="produced by"):
+            FeatureGraph([FeatureNode("a", ("x",), add_column("x")), FeatureNode("b", ("x",), add_column("x"))])
+
+    def test_pipeline_dependency_chain(self):
+        pipeline = FeaturePipeline()
+
+        pipeline.set_required_features({"atr_percentile"})
+
+        assert {"atr", "atr_percentile"} <= set(pipeline.active_nodes)
+        assert "bollinger" not in pipeline.active_nodes
+        assert pipeline.graph.producer("atr_percent").name == "atr"
+
+
+class TestLazyPipeline:
+
+    def test_default_computes_everything(self, full_df):
+        pipeline = FeaturePipeline()
+
+        assert pipeline.active_nodes == [n.name for n in pipeline.graph.nodes]
+        assert set(EXPENSIVE) <= set(full_df.columns)
+
+    def test_subset_skips_expensive_nodes_with_identical_values(self, full_df):
+        _, lazy = build({"vwap_distance"})
+
+        assert not set(EXPENSIVE) & set(lazy.columns)
+        assert set(REQUIRED_COLUMNS) | {"vwap_distance"} <= set(lazy.columns)
+        for column in lazy.columns:
+            pd.testing.assert_series_equal(lazy[column], full_df[column], check_names=False)
+
+    def test_set_required_reports_changes(self):
+        pipeline = FeaturePipeline()
+
+        assert pipeline.set_required_features({"rsi"})
+        assert not pipeline.set_required_features({"rsi", "close"})
+        assert pipeline.set_required_features(None)
+
+    def test_extend_features_fills_missing_columns_in_place(self, full_df):
+        pipeline, df = build({"rsi"})
+        assert "atr_percentile" not in df.columns
+
+        pipeline.set_required_features({"atr_percentile", "has_anomaly"})
+        result = pipeline.extend_features(df)
+
+        assert result is df
+        pd.testing.assert_series_equal(df["atr_percentile"], full_df["atr_percentile"], check_names=False)
+        pd.testing.assert_series_equal(df["has_anomaly"], full_df["has_anomaly"], check_names=False)
+
+
+class TestStrategyRequirements:
+
+    def test_declared_requirements(self):
+        assert TrendPullbackStrategy().required_features() >= {"liquidation_wick", "wick_ratio"}
+        assert "liquidation_wick" not in TrendPullbackStrategy(enable_liquidation_filter=False).required_features()
+        assert set(RegimeSwitcher.REQUIRED_FEATURES) <= MeanReversionStrategy().required_features()
+        assert "bb_width" not in MeanReversionStrategy(require_range_regime=False).required_features()
+
+    @pytest.mark.parametrize(
+        "make, features",
+        [
+            (lambda: TrendPullbackStrategy(entry_mode="immediate", min_adx=10, volume_z_threshold=-5), {}),
+            (lambda: BreakoutStrategy(bb_width_threshold=1.0, require_squeeze=False, require_volume=False),
+             {"spread_percent": 0.1}),
+            (lambda: MeanReversionStrategy(vwap_distance_threshold=0.2, rsi_oversold=45, rsi_overbought=55), {}),
+        ],
+    )
+    def test_signals_on_lazy_frame_match_full_frame(self, full_df, make, features):
+        strategy = make()
+        _, lazy = build(strategy.required_features())
+
+        expected = make().generate_signals(full_df, features)
+        actual = strategy.generate_signals(lazy, features)
+
+        assert len(lazy.columns) < len(full_df.columns)
+        for key in expected:
+            np.testing.assert_array_equal(actual[key], expected[key], err_msg=key)
+
+
+class TestMetaLayerRequirements:
+
+    def test_weighted_routing_requires_all_strategies(self):
+        meta = MetaLayer([TrendPullbackStrategy(), BreakoutStrategy()], use_mtf=False)
+        meta.strategies[1].disable()
+
+        required = meta.required_features()
+
+        assert "bb_width_percentile" in required
+        assert set(NoTradeZones.REQUIRED_FEATURES) <= required
+
+    def test_unknown_strategy_requires_everything(self):
+        class Custom(TrendPullbackStrategy):
+            REQUIRED_FEATURES = None
+
+            def required_features(self):
+                return None
+
+        meta = MetaLayer([TrendPullbackStrategy(), Custom()], use_mtf=False)
+
+        assert meta.required_features() is None
+
+    def test_regime_switch_reevaluates_graph(self, full_df):
+        pipeline = FeaturePipeline()
+        meta = MetaLayer(
+            [TrendPullbackStrategy(enable_liquidation_filter=False), BreakoutStrategy()],
+            use_mtf=False,
+            use_weighted_routing=False,
+        )
+        meta.attach_feature_pipeline(pipeline)
+        assert "bollinger" in pipeline.active_nodes
+
+        meta._adjust_strategies_by_regime("trend_up")
+        assert "bb_width_percentile" not in pipeline.active_nodes
+        df = pipeline.build_features(datasets.candles(400), is_testnet=True)
+        assert "bb_width_percentile" not in df.columns
+
+        meta._adjust_strategies_by_regime("range", df)
+
+        assert "bb_width_percentile" in pipeline.active_nodes
+        pd.testing.assert_series_equal(df["bb_width_percentile"], full_df["bb_width_percentile"], check_names=False)
@@ -0,0 +1,107 @@
+"""
+Тесты для снимка последнего бара (data.feature_row.FeatureRow)
+
+Проверяем:
+1. Доступ как у df.iloc[-1]: get, [], in, атрибуты, hasattr
+2. Снимок только для чтения
+3. Переиспользование для того же фрейма и пересборка после изменений
+4. MetaLayer.get_signal строит снимок один раз за проход
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import datasets
+from data.feature_row import FEATURE_ROW_KEY, FeatureRow
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2026-01-01", periods=3, freq="h"),
+            "close": [100.0, 101.0, 102.5],
+            "adx": [20.0, 21.0, np.nan],
+            "has_anomaly": [0, 0, 1],
+        }
+    )
+
+
+class TestAccess:
+
+    def test_matches_series(self, df):
+        row = FeatureRow(df)
+        series = df.iloc[-1]
+
+        for column in df.columns:
+            assert row[column] == series[column] or (pd.isna(row[column]) and pd.isna(series[column]))
+        assert row.get("missing", 7) == series.get("missing", 7)
+        assert row.close == 102.5
+        assert "adx" in row and "vwap" not in row
+        assert hasattr(row, "timestamp") and not hasattr(row, "vwap")
+        assert row.name == df.index[-1]
+        with pytest.raises(KeyError):
+            row["vwap"]
+
+    def test_read_only(self, df):
+        row = FeatureRow(df)
+
+        with pytest.raises(AttributeError):
+            row.close = 1.0
+
+    def test_empty_frame(self):
+        with pytest.raises(IndexError):
+            FeatureRow(pd.DataFrame({"close": []}))
+
+
+class TestReuse:
+
+    def test_same_frame_reuses_snapshot(self, df):
+        row = FeatureRow.latest(df)
+
+        assert FeatureRow.latest(df) is row
+        assert FeatureRow.latest(df, {FEATURE_ROW_KEY: row}) is row
+        assert FeatureRow.latest(df.copy()) is not row
+
+    def test_rebuilt_after_new_column_or_row(self, df):
+        row = FeatureRow.latest(df)
+
+        df["vwap"] = 101.0
+        with_column = FeatureRow.latest(df)
+        longer = pd.concat([df, df.iloc[[-1]]], ignore_index=True)
+
+        assert with_column is not row and with_column["vwap"] == 101.0
+        assert FeatureRow.latest(longer).name == 3
+
+    def test_stale_feature_row_in_features_ignored(self, df):
+        stale = FeatureRow(df.iloc[:2])
+
+        assert FeatureRow.latest(df, {FEATURE_ROW_KEY: stale})["close"] == 102.5
+
+
+class TestMetaLayer:
+
+    def test_single_snapshot_per_get_signal(self):
+        from strategy.breakout import BreakoutStrategy
+        from strategy.mean_reversion import MeanReversionStrategy
+        from strategy.meta_layer import MetaLayer
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        meta_layer = MetaLayer([TrendPullbackStrategy(), BreakoutStrategy(), MeanReversionStrategy()], use_mtf=False)
+        frame = datasets.features(300)
+        built = []
+        original_init = FeatureRow.__init__
+
+        def counting_init(self, df):
+            built.append(len(df))
+            original_init(self, df)
+
+        features = {"symbol": "BTCUSDT"}
+        with patch.object(FeatureRow, "__init__", counting_init):
+            meta_layer.get_signal(frame, features)
+
+        assert built == [300]
+        assert features[FEATURE_ROW_KEY].matches(frame)
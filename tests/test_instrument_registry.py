@@ -0,0 +1,140 @@
+"""
+Тесты для реестра инструментов с целочисленными шагами (exchange.instrument_registry)
+
+Проверяем:
+1. InstrumentSpec: округление в целых тиках совпадает с Decimal quantize
+2. Проверка минималов на сетке и вне сетки
+3. InstrumentsManager: все страницы instruments-info по nextPageCursor
+4. Реестр на диске: старт без запроса к API, фоновое обновление устаревшего
+"""
+
+import random
+import time
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+from unittest.mock import Mock
+
+import pytest
+
+from exchange.instrument_registry import InstrumentRegistry, InstrumentSpec
+from exchange.instruments import InstrumentsManager
+
+
+def api_item(symbol, tick="0.1", step="0.001", min_qty="0.001", max_qty="100", min_notional="5"):
+    return {
+        "symbol": symbol,
+        "priceFilter": {"tickSize": tick},
+        "lotSizeFilter": {"qtyStep": step, "minOrderQty": min_qty, "maxOrderQty": max_qty, "minNotionalValue": min_notional},
+    }
+
+
+def page(items, cursor=""):
+    return {"retCode": 0, "result": {"list": items, "nextPageCursor": cursor}}
+
+
+@pytest.fixture
+def btc():
+    return InstrumentSpec.from_api(api_item("BTCUSDT"))
+
+
+class TestInstrumentSpec:
+
+    @pytest.mark.parametrize("tick,step", [("0.1", "0.001"), ("0.0001", "1"), ("0.5", "0.01"), ("10", "0.1")])
+    def test_rounding_matches_decimal(self, tick, step):
+        spec = InstrumentSpec.from_params("TESTUSDT", tick, step)
+        rng = random.Random(42)
+        values = [30000.125, 0.12345, 1.5, 0.0] + [round(rng.uniform(0, 50000), rng.randint(0, 6)) for _ in range(300)]
+
+        for value in values:
+            price = (Decimal(str(value)) / Decimal(tick)).quantize(Decimal("1"), rounding=ROUND_HALF_UP) * Decimal(tick)
+            qty = (Decimal(str(value)) / Decimal(step)).quantize(Decimal("1"), rounding=ROUND_DOWN) * Decimal(step)
+            assert spec.round_price(value) == price, value
+            assert spec.round_qty(value) == qty, value
+
+    def test_randomized_parity_with_decimal(self):
+        rng = random.Random(7)
+        specs = [InstrumentSpec.from_params("TESTUSDT", tick, step)
+                 for tick, step in [("0.00001", "0.001"), ("0.0001", "0.1"), ("0.1", "0.00001"), ("0.5", "1")]]
+
+        for _ in range(100_000):
+            spec = rng.choice(specs)
+            value = round(rng.uniform(0, 100_000), rng.randint(0, 9))
+            if rng.random() < 0.1:
+                value = float(Decimal(rng.randint(0, 10**9)) * spec.tick_size / 2)  # середина тика
+            price = (Decimal(repr(value)) / spec.tick_size).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+            qty = (Decimal(repr(value)) / spec.qty_step).quantize(Decimal("1"), rounding=ROUND_DOWN)
+            assert spec.price_ticks(value) == int(price), (value, spec.tick_size)
+            assert spec.qty_steps(value) == int(qty), (value, spec.qty_step)
+
+        assert str(specs[0].round_price(78304.78642494)) == "78304.78642"
+
+    def test_precomputed_units(self, btc):
+        assert (btc.price_scale, btc.tick_units) == (1, 1)
+        assert (btc.qty_scale, btc.step_units, btc.min_qty_units) == (3, 1, 1)
+        assert btc.min_notional_units == 5 * 10**4
+        assert str(btc.round_price(42123.456)) == "42123.5"
+
+    def test_validation_on_and_off_grid(self, btc):
+        assert btc.validate(5000.0, 0.001) == (True, "")  # notional ровно 5
+        assert not btc.validate(4999.9, 0.001)[0]
+        assert "minOrderQty" in btc.validate(30000.0, 0.0009)[1]  # вне сетки - Decimal путь
+        assert "maxOrderQty" in btc.validate(30000.0, 100.001)[1]
+        assert btc.check_units(300000, 1) == (True, "")
+
+
+class TestInstrumentsManagerRegistry:
+
+    def test_follows_page_cursor(self):
+        client = Mock()
+        client.get.side_effect = [
+            page([api_item("BTCUSDT")], cursor="p2"),
+            page([api_item("ETHUSDT", tick="0.01")], cursor="p3"),
+            page([api_item("XRPUSDT", tick="0.0001")]),
+        ]
+        manager = InstrumentsManager(client)
+
+        assert manager.load_instruments()
+        assert sorted(manager.instruments_cache) == ["BTCUSDT", "ETHUSDT", "XRPUSDT"]
+        assert [c.kwargs["params"].get("cursor") for c in client.get.call_args_list] == [None, "p2", "p3"]
+
+    def test_failed_page_keeps_previous_cache(self):
+        client = Mock()
+        client.get.side_effect = [page([api_item("BTCUSDT")]), page([api_item("BTCUSDT")], cursor="p2"),
+                                  {"retCode": 10006, "retMsg": "Too many visits"}]
+        manager = InstrumentsManager(client)
+        manager.load_instruments()
+
+        assert not manager.load_instruments(force_refresh=True)
+        assert manager.get_spec("BTCUSDT") is not None
+
+    def test_starts_from_disk_and_refreshes_in_background(self, tmp_path):
+        path = str(tmp_path / "instruments.json")
+        client = Mock()
+        client.get.return_value = page([api_item("BTCUSDT"), api_item("ETHUSDT", tick="0.01")])
+        InstrumentsManager(client, cache_path=path).load_instruments()
+
+        fresh = Mock()
+        manager = InstrumentsManager(fresh, cache_path=path)
+        assert manager.load_instruments()
+        assert fresh.get.call_count == 0
+        assert manager.normalize_price("ETHUSDT", 1800.456) == Decimal("1800.46")
+
+        # Устаревший реестр: ответ из кэша сразу, обновление - в фоновом потоке
+        registry = InstrumentRegistry.load(path)
+        InstrumentRegistry(registry.specs, loaded_at=time.time() - 7200).save(path)
+        fresh.get.return_value = page([api_item("BTCUSDT", tick="0.5")])
+        stale = InstrumentsManager(fresh, cache_path=path)
+
+        assert stale.load_instruments()
+        assert stale.normalize_price("BTCUSDT", 100.04) == Decimal("100.0")
+        stale._refresh_thread.join(timeout=5)
+        assert fresh.get.call_count == 1
+        assert stale.normalize_price("BTCUSDT", 100.3) == Decimal("100.5")
+        assert InstrumentRegistry.load(path).get("BTCUSDT").tick_size == Decimal("0.5")
+
+    def test_ignores_unreadable_or_foreign_registry(self, tmp_path):
+        path = tmp_path / "instruments.json"
+        path.write_text("{broken")
+        assert InstrumentRegistry.load(path) is None
+
+        InstrumentRegistry({}, category="spot").save(path)
+        assert InstrumentRegistry.load(path, category="linear") is None
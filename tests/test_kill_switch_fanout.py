@@ -0,0 +1,198 @@
+"""
+Тесты для параллельного kill switch (cancel/close fan-out)
+
+Проверяем:
+1. Закрытие N позиций идёт параллельно, а не последовательно
+2. Flat подтверждается push'ами private WS, time-to-flat в истории активаций
+3. REST fallback проверки flat (и после потерянного push), ошибка, если
+   позиция не закрылась или REST недоступен
+4. Приоритетная полоса rate limiter'а BybitRestClient: только на cancel/close,
+   ожидание flat идёт вне её
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+from exchange.base_client import BybitRestClient
+from exchange.order_events import OrderEventBus
+from execution.kill_switch import KillSwitchManager
+
+
+SYMBOLS = [f"COIN{i}USDT" for i in range(10)]
+
+
+def make_client(positions):
+    """REST клиент: /v5/position/list отдаёт текущий список positions"""
+    client = MagicMock()
+    client.get.side_effect = lambda endpoint, params=None, signed=False: {
+        "retCode": 0,
+        "result": {"list": list(positions)},
+    }
+    return client
+
+
+def make_order_manager(on_close=None, delay=0.0):
+    order_manager = MagicMock()
+
+    def create_order(**kwargs):
+        time.sleep(delay)
+        if on_close:
+            on_close(kwargs["symbol"])
+        return MagicMock(success=True, order_id=f"close-{kwargs['symbol']}")
+
+    order_manager.create_order.side_effect = create_order
+    order_manager.cancel_all_orders.side_effect = lambda **kwargs: (time.sleep(delay), MagicMock(success=True))[1]
+    return order_manager
+
+
+def open_positions():
+    return [{"symbol": s, "side": "Buy", "size": "1"} for s in SYMBOLS]
+
+
+class TestParallelFanOut:
+
+    def test_closes_run_in_parallel(self):
+        positions = open_positions()
+        lock = threading.Lock()
+
+        def on_close(symbol):
+            with lock:
+                positions[:] = [p for p in positions if p["symbol"] != symbol]
+
+        order_manager = make_order_manager(on_close, delay=0.2)
+        ks = KillSwitchManager(make_client(positions), order_manager, max_workers=10)
+
+        start = time.perf_counter()
+        result = ks.activate(symbols=SYMBOLS)
+
+        # 20 запросов по 0.2с последовательно заняли бы 4с
+        assert time.perf_counter() - start < 1.5
+        assert result["success"]
+        assert result["positions_closed"] == 10
+        assert set(result["time_to_flat"]) == set(SYMBOLS)
+        assert all(t is not None for t in result["time_to_flat"].values())
+
+    def test_flat_confirmed_by_position_push(self):
+        bus = OrderEventBus()
+        bus.set_active(True)
+        positions = open_positions()[:3]
+        client = make_client(positions)
+
+        def on_close(symbol):
+            threading.Timer(0.05, bus.publish_position, args=({"symbol": symbol, "size": "0"},)).start()
+
+        ks = KillSwitchManager(client, make_order_manager(on_close), event_bus=bus)
+        result = ks.activate(cancel_orders=False)
+
+        assert result["success"]
+        assert all(0 < t < 1.0 for t in result["time_to_flat"].values())
+        assert client.get.call_count == 1  # только исходный список позиций
+        assert ks.get_activation_history()[-1]["time_to_flat"] == result["time_to_flat"]
+        assert ks.get_status()["last_time_to_flat"] == result["time_to_flat"]
+
+    def test_not_flat_reported_as_error(self):
+        positions = open_positions()[:2]
+        ks = KillSwitchManager(make_client(positions), make_order_manager(), flat_timeout_seconds=0.3)
+
+        result = ks.activate(cancel_orders=False)
+
+        assert not result["success"]
+        assert result["positions_closed"] == 2
+        assert result["time_to_flat"] == {s: None for s in SYMBOLS[:2]}
+        assert any("not flat" in e for e in result["errors"])
+        assert ks.is_halted
+
+    def test_lost_push_confirmed_via_rest(self):
+        bus = OrderEventBus()
+        bus.set_active(True)
+        positions = open_positions()[:2]
+
+        def on_close(symbol):
+            positions[:] = [p for p in positions if p["symbol"] != symbol]
+
+        client = make_client(positions)
+        ks = KillSwitchManager(client, make_order_manager(on_close), event_bus=bus, flat_timeout_seconds=0.2)
+        result = ks.activate(cancel_orders=False)
+
+        assert result["success"]
+        assert all(t is not None for t in result["time_to_flat"].values())
+        assert client.get.call_count == 2  # исходный список + проверка после таймаута
+
+    def test_rest_failure_is_not_flat(self):
+        positions = open_positions()[:1]
+        client = make_client(positions)
+        responses = iter([{"retCode": 0, "result": {"list": positions}}])
+        client.get.side_effect = lambda *args, **kwargs: next(responses, {"retCode": 10006, "retMsg": "Too many visits"})
+        ks = KillSwitchManager(client, make_order_manager(), flat_timeout_seconds=0.3)
+
+        result = ks.activate(cancel_orders=False)
+
+        assert not result["success"]
+        assert result["time_to_flat"] == {SYMBOLS[0]: None}
+
+    def test_flat_wait_runs_outside_priority_lane(self):
+        positions = open_positions()[:2]
+        lane_depth = [0]
+        rest_calls_in_lane = []
+
+        @contextmanager
+        def lane():
+            lane_depth[0] += 1
+            try:
+                yield
+            finally:
+                lane_depth[0] -= 1
+
+        def on_close(symbol):
+            positions[:] = [p for p in positions if p["symbol"] != symbol]
+
+        client = make_client(positions)
+        rest = client.get.side_effect
+        client.get.side_effect = lambda *args, **kwargs: (rest_calls_in_lane.append(lane_depth[0] > 0), rest(*args, **kwargs))[1]
+        ks = KillSwitchManager(client, make_order_manager(on_close), max_workers=1)
+        ks._priority_lane = lane
+
+        result = ks.activate(cancel_orders=False)
+
+        assert result["success"]
+        assert rest_calls_in_lane == [True, False]  # список позиций в полосе, проверка flat - вне
+
+
+class TestRateLimiterPriorityLane:
+
+    @staticmethod
+    def make_client():
+        with patch.object(BybitRestClient, "_sync_server_time"):
+            client = BybitRestClient("key", "secret", testnet=True)
+        client._min_request_interval = 0.2
+        return client
+
+    def test_priority_requests_skip_interval(self):
+        client = self.make_client()
+        client._rate_limit_wait()
+
+        start = time.perf_counter()
+        with client.priority_lane():
+            client._rate_limit_wait()
+            client._rate_limit_wait()
+
+        assert time.perf_counter() - start < 0.1
+
+    def test_regular_requests_wait_for_priority_lane(self):
+        client = self.make_client()
+        released_at = []
+
+        def regular_request():
+            client._rate_limit_wait()
+            released_at.append(time.perf_counter())
+
+        with client.priority_lane():
+            worker = threading.Thread(target=regular_request)
+            worker.start()
+            time.sleep(0.3)
+            lane_closed_at = time.perf_counter()
+        worker.join(timeout=5)
+
+        assert released_at and released_at[0] >= lane_closed_at
@@ -0,0 +1,116 @@
+"""
+Тесты для latency tracing (tick-to-order span'ы)
+
+Проверяем:
+1. Выключенный tracer ничего не пишет и отдаёт общий no-op span
+2. Span'ы стадий и перцентили p50/p95/p99 по стадиям и по тику целиком
+3. Кольцевой буфер и автозавершение незавершённого trace
+4. @traced и endpoint /api/metrics/latency
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from utils.tracing import _NOOP_SPAN, LatencyTracer, get_tracer, traced
+
+
+def run_tick(tracer, stages, symbol="BTCUSDT"):
+    tracer.start_trace(symbol)
+    for stage, seconds in stages:
+        with tracer.span(stage):
+            time.sleep(seconds)
+    return tracer.finish_trace()
+
+
+@pytest.fixture
+def global_tracer():
+    tracer = get_tracer()
+    tracer.reset()
+    tracer.configure(True)
+    yield tracer
+    tracer.configure(False)
+    tracer.reset()
+
+
+class TestLatencyTracer:
+
+    def test_disabled_is_noop(self):
+        tracer = LatencyTracer()
+
+        assert tracer.start_trace("BTCUSDT") is None
+        assert tracer.span("build_features") is _NOOP_SPAN
+        assert tracer.finish_trace() is None
+        assert tracer.stage_stats() == {}
+
+    def test_span_outside_trace_is_noop(self):
+        tracer = LatencyTracer(enabled=True)
+
+        assert tracer.span("create_order") is _NOOP_SPAN
+
+    def test_stage_percentiles(self):
+        tracer = LatencyTracer(enabled=True)
+        for _ in range(5):
+            run_tick(tracer, [("build_features", 0.002), ("get_signal", 0.0), ("get_signal", 0.0)])
+
+        stats = tracer.stage_stats()
+
+        assert set(stats) == {"build_features", "get_signal", "total"}
+        assert stats["build_features"]["count"] == 5
+        assert stats["build_features"]["p50_ms"] >= 2.0
+        assert stats["build_features"]["p50_ms"] <= stats["build_features"]["p99_ms"] <= stats["build_features"]["max_ms"]
+        # Повторные span'ы одной стадии в тике складываются
+        assert stats["get_signal"]["count"] == 5
+        assert stats["total"]["p50_ms"] >= stats["build_features"]["p50_ms"]
+
+    def test_ring_buffer_and_auto_finish(self):
+        tracer = LatencyTracer(capacity=3, enabled=True)
+        for _ in range(4):
+            run_tick(tracer, [("fetch_market_data", 0.0)])
+
+        # Тик прервался через continue - завершается следующим start_trace
+        tracer.start_trace("BTCUSDT")
+        with tracer.span("fetch_market_data"):
+            pass
+        tracer.start_trace("BTCUSDT")
+
+        traces = tracer.get_traces()
+        assert len(traces) == 3
+        assert traces[0]["trace_id"] == 5
+        assert traces[0]["spans"][0]["stage"] == "fetch_market_data"
+
+    def test_empty_trace_dropped(self):
+        tracer = LatencyTracer(enabled=True)
+        run_tick(tracer, [])
+
+        assert tracer.get_traces() == []
+
+
+class TestTracingIntegration:
+
+    def test_traced_decorator_uses_global_tracer(self, global_tracer):
+        @traced("wait_for_order_fill")
+        def wait():
+            return True
+
+        global_tracer.start_trace("BTCUSDT")
+        assert wait()
+        trace = global_tracer.finish_trace()
+
+        assert [span[0] for span in trace.spans] == ["wait_for_order_fill"]
+
+    def test_latency_endpoint(self, global_tracer):
+        from api.app import get_latency_metrics, toggle_latency_tracing
+
+        run_tick(global_tracer, [("risk_checks", 0.0), ("create_order", 0.001)])
+
+        response = asyncio.run(get_latency_metrics(limit=5))
+
+        assert response["enabled"]
+        assert response["stages"]["create_order"]["count"] == 1
+        assert response["traces"][0]["symbol"] == "BTCUSDT"
+
+        asyncio.run(toggle_latency_tracing(enabled=False, reset=True))
+        assert not global_tracer.enabled
+        assert global_tracer.get_traces() == []
@@ -0,0 +1,184 @@
+"""
+Тесты для общего сервиса данных и признаков MultiSymbolBot (data.market_data_service)
+
+Проверяем:
+1. FeatureTensor: срез символа совпадает с исходным фреймом (dtype, длины)
+2. Один проход: один get_tickers на все символы, деривативы из тикеров,
+   снимок переиспользуется в пределах max_age_seconds
+3. Признаки совпадают с расчётом TradingBot, неизменные свечи - из кэша
+4. TradingBot читает срез сервиса без своих REST вызовов и пересчёта
+5. MultiSymbolBot подключает сервис и объединяет требования к признакам
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.features import FeaturePipeline
+from data.candle_buffer import klines_to_frame
+from data.market_data_service import FeatureTensor, SharedMarketDataService
+from execution.backtest_runner import HistoricalDataLoader
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "XRPUSDT"]
+
+
+def kline_list(count, scale=1.0):
+    df = HistoricalDataLoader.generate_sample_data(num_candles=count)
+    rows = [
+        [str(int(ts.value // 1_000_000)), str(o * scale), str(h * scale), str(lo * scale), str(c * scale), str(v), "0"]
+        for ts, o, h, lo, c, v in zip(df["timestamp"], df["open"], df["high"], df["low"], df["close"], df["volume"])
+    ]
+    return list(reversed(rows))
+
+
+class FakeMarketClient:
+    """Свечи разной длины по символам, тикеры всех linear инструментов одним ответом"""
+
+    def __init__(self):
+        self.calls = []
+        self.klines = {symbol: kline_list(250 + 20 * i, scale=1 + i) for i, symbol in enumerate(SYMBOLS)}
+
+    def get_tickers(self, symbol=None, category="linear"):
+        self.calls.append(("get_tickers", symbol))
+        tickers = [
+            {"symbol": s, "lastPrice": self.klines[s][0][4], "markPrice": "1.5", "indexPrice": "1.4",
+             "openInterest": "1000", "fundingRate": "0.0001"}
+            for s in SYMBOLS
+        ]
+        return {"retCode": 0, "result": {"list": tickers + [{"symbol": "DOGEUSDT", "lastPrice": "0.1"}]}}
+
+    def get_kline(self, symbol, interval="60", limit=200, **kwargs):
+        self.calls.append(("get_kline", symbol))
+        return {"retCode": 0, "result": {"list": self.klines[symbol]}}
+
+    def get_orderbook(self, symbol, limit=25, **kwargs):
+        self.calls.append(("get_orderbook", symbol))
+        price = float(self.klines[symbol][0][4])
+        return {"retCode": 0, "result": {"b": [[str(price - 1), "2"]], "a": [[str(price + 1), "1"]]}}
+
+    def __getattr__(self, name):
+        if name.startswith("get_"):
+            raise AssertionError(f"unexpected per-symbol call {name}")
+        raise AttributeError(name)
+
+    def count(self, method):
+        return sum(1 for name, _ in self.calls if name == method)
+
+
+@pytest.fixture
+def client():
+    return FakeMarketClient()
+
+
+@pytest.fixture
+def service(client):
+    service = SharedMarketDataService(client, SYMBOLS, max_age_seconds=60)
+    yield service
+    service.close()
+
+
+class TestFeatureTensor:
+
+    def test_slices_round_trip_with_dtypes_and_lengths(self):
+        long = pd.DataFrame({"close": np.arange(5.0), "flag": [1, 0, 1, 0, 1], "ok": [True] * 5})
+        short = pd.DataFrame({"close": [7.0, 8.0], "extra": [0.5, 0.25], "label": ["a", "b"]}, index=[10, 11])
+
+        tensor = FeatureTensor({"A": long, "B": short})
+
+        assert tensor.values.shape == (2, 5, 4)
+        assert np.isnan(tensor.values[1, :3]).all()
+        pd.testing.assert_frame_equal(tensor.frame("A"), long)
+        pd.testing.assert_frame_equal(tensor.frame("B"), short)
+        assert tensor.cross_section("close").to_dict() == {"A": 4.0, "B": 8.0}
+
+
+class TestSharedRefresh:
+
+    def test_single_pass_for_all_symbols(self, client, service):
+        data = {symbol: service.get_market_data(symbol) for symbol in SYMBOLS}
+
+        assert client.count("get_tickers") == 1
+        assert client.count("get_kline") == len(SYMBOLS)
+        assert client.count("get_orderbook") == len(SYMBOLS)
+        assert data["ETHUSDT"]["derivatives_data"] == {
+            "mark_price": 1.5, "index_price": 1.4, "open_interest": 1000.0, "funding_rate": 0.0001, "oi_change": 0,
+        }
+        assert service.get_market_data("DOGEUSDT") is None
+
+    def test_snapshot_reused_until_stale(self, client, service):
+        service.get_market_data("BTCUSDT")
+        first = service.get_market_data("BTCUSDT")
+        first["orderflow_features"]["symbol"] = "BTCUSDT"
+
+        assert client.count("get_tickers") == 1
+        assert "symbol" not in service.get_market_data("BTCUSDT")["orderflow_features"]
+
+        service.max_age_seconds = 0
+        service.get_market_data("BTCUSDT")
+        assert client.count("get_tickers") == 2
+
+    def test_features_match_per_bot_build_and_cache_unchanged_candles(self, client, service):
+        data = service.get_market_data("ETHUSDT")
+
+        df = klines_to_frame(client.klines["ETHUSDT"]).tail(200).copy()
+        expected = FeaturePipeline().build_features(df, orderbook=data["orderbook"], kline_interval_minutes=60)
+
+        pd.testing.assert_frame_equal(data["features"], expected)
+
+        service.refresh()
+        assert service.pipeline.cache.hits == len(SYMBOLS)
+
+    def test_required_features_restrict_pipeline(self, client):
+        service = SharedMarketDataService(client, SYMBOLS, required_features=lambda: {"vwap_distance"})
+
+        features = service.get_market_data("BTCUSDT")["features"]
+        service.close()
+
+        assert "vwap_distance" in features.columns
+        assert "bb_width_percentile" not in features.columns
+
+
+class TestBotIntegration:
+
+    @staticmethod
+    def make_bot(symbol="BTCUSDT"):
+        from bot.trading_bot import TradingBot
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        with patch("bot.trading_bot.Database"), patch("bot.trading_bot.AccountClient"):
+            with patch("bot.trading_bot.MarketDataClient"):
+                bot = TradingBot(mode="paper", strategies=[TrendPullbackStrategy()], symbol=symbol, testnet=True)
+        bot._dry_run_mode = True
+        bot.evaluate_on_bar_close = False
+        return bot
+
+    def test_bot_reads_its_slice_without_rest_calls(self, service):
+        bot = self.make_bot("ETHUSDT")
+        bot.market_client = MagicMock(side_effect=AssertionError("network"))
+        bot.market_data_service = service
+        bot.pipeline.build_features = MagicMock(side_effect=AssertionError("rebuilt"))
+
+        result = asyncio.run(bot.run_single_tick())
+
+        assert result["status"] in ("success", "no_signal")
+        assert bot.market_client.method_calls == []
+
+    def test_multi_symbol_bot_attaches_service(self):
+        from bot.multi_symbol_bot import MultiSymbolBot, MultiSymbolConfig
+
+        bots = {symbol: self.make_bot(symbol) for symbol in SYMBOLS[:2]}
+        orchestrator = MultiSymbolBot(MultiSymbolConfig(symbols=SYMBOLS[:2]))
+
+        with patch("bot.multi_symbol_bot.TradingBot", side_effect=lambda **kwargs: bots[kwargs["symbol"]]):
+            assert orchestrator.initialize()
+
+        service = orchestrator.market_data_service
+        assert all(bot.market_data_service is service for bot in bots.values())
+        assert "liquidation_wick" in orchestrator._required_features()
+
+        bots["ETHUSDT"].meta_layer.feature_pipeline = None  # lazy_features выключен
+        assert orchestrator._required_features() is None
+        service.close()
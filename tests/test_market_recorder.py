@@ -0,0 +1,183 @@
+"""
+Тесты для записи и replay рыночных данных (data.market_recorder)
+
+Проверяем:
+1. Сегменты: length-prefixed сжатые записи, ротация, оборванный хвост
+2. RecordingMarketDataClient пишет ответы и ошибки MarketDataClient
+3. Replay: ответы по тикам, порядок WS сообщений, темп воспроизведения
+4. Запись тиков TradingBot и детерминированный replay без сети
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from data.market_recorder import (
+    MarketDataRecorder,
+    RecordingMarketDataClient,
+    ReplayExhausted,
+    ReplayHarness,
+    ReplayMarketDataClient,
+    read_records,
+)
+from execution.backtest_runner import HistoricalDataLoader
+
+
+def kline_response(offset=0, count=300):
+    df = HistoricalDataLoader.generate_sample_data(num_candles=count + offset).iloc[offset:]
+    rows = [
+        [str(int(ts.value // 1_000_000)), str(o), str(h), str(lo), str(c), str(v), str(v * c)]
+        for ts, o, h, lo, c, v in zip(df["timestamp"], df["open"], df["high"], df["low"], df["close"], df["volume"])
+    ]
+    return {"retCode": 0, "result": {"list": list(reversed(rows))}}
+
+
+class FakeMarketClient:
+    """Публичные данные: свечи сдвигаются на одну с каждым тиком"""
+
+    def __init__(self):
+        self.kline_calls = 0
+
+    def get_kline(self, symbol, interval="1", category="linear", limit=200, start=None, end=None):
+        self.kline_calls += 1
+        return kline_response(offset=self.kline_calls)
+
+    def get_orderbook(self, symbol, category="linear", limit=25):
+        return {"retCode": 0, "result": {"b": [["40000", "1"]], "a": [["40001", "1"]]}}
+
+    def __getattr__(self, name):
+        if name.startswith("get_"):
+            return lambda *args, **kwargs: {"retCode": 0, "result": {"list": []}}
+        raise AttributeError(name)
+
+
+def recorded_ticks(tmp_path, ticks):
+    recorder = MarketDataRecorder(str(tmp_path))
+    client = RecordingMarketDataClient(FakeMarketClient(), recorder)
+    for ws_messages in ticks:
+        recorder.mark_tick("BTCUSDT")
+        client.get_kline("BTCUSDT", interval="1")
+        for message in ws_messages:
+            recorder.record_ws("private", message)
+        client.get_orderbook("BTCUSDT")
+    recorder.close()
+    return list(read_records(str(tmp_path)))
+
+
+class TestSegments:
+
+    def test_round_trip_and_rotation(self, tmp_path):
+        recorder = MarketDataRecorder(str(tmp_path), max_segment_bytes=200)
+        for i in range(20):
+            recorder.record_ws("public/linear", {"topic": "orderbook.50.BTCUSDT", "u": i})
+        recorder.close()
+
+        records = list(read_records(str(tmp_path)))
+
+        assert len(list(tmp_path.glob("segment_*.rec"))) > 1
+        assert [r["message"]["u"] for r in records] == list(range(20))
+        assert [r["seq"] for r in records] == list(range(1, 21))
+
+    def test_truncated_tail_skipped_and_new_segment_appended(self, tmp_path):
+        recorder = MarketDataRecorder(str(tmp_path))
+        recorder.record_ws("private", {"n": 1})
+        recorder.record_ws("private", {"n": 2})
+        recorder.close()
+        segment = next(tmp_path.glob("segment_*.rec"))
+        segment.write_bytes(segment.read_bytes()[:-3])  # crash посреди записи
+
+        recorder = MarketDataRecorder(str(tmp_path))
+        recorder.record_ws("private", {"n": 3})
+        recorder.close()
+
+        assert [r["message"]["n"] for r in read_records(str(tmp_path))] == [1, 3]
+
+    def test_recording_client_records_errors(self, tmp_path):
+        inner = MagicMock()
+        inner.get_tickers.side_effect = ConnectionError("reset")
+        recorder = MarketDataRecorder(str(tmp_path))
+        client = RecordingMarketDataClient(inner, recorder)
+
+        with pytest.raises(ConnectionError):
+            client.get_tickers(symbol="BTCUSDT")
+        recorder.close()
+
+        [record] = read_records(str(tmp_path))
+        assert record["method"] == "get_tickers"
+        assert record["kwargs"] == {"symbol": "BTCUSDT"}
+        assert record["error"] == "reset"
+
+
+class TestReplayClient:
+
+    def test_ticks_served_in_order_with_ws_interleaved(self, tmp_path):
+        records = recorded_ticks(tmp_path, [[{"topic": "order", "n": 1}], [{"topic": "order", "n": 2}]])
+        events = []
+        client = ReplayMarketDataClient(records, ws_handlers={"private": lambda m: events.append(m["n"])})
+
+        assert client.advance_tick()
+        first = client.get_kline("BTCUSDT")
+        assert events == []  # WS сообщение записано после kline
+        client.get_orderbook("BTCUSDT")
+        assert events == [1]
+
+        assert client.advance_tick()
+        assert client.get_kline("BTCUSDT") != first
+        with pytest.raises(ReplayExhausted):
+            client.get_kline("BTCUSDT")
+        assert not client.advance_tick()
+        assert events == [1, 2]
+
+    def test_recorded_speed(self, tmp_path):
+        recorder = MarketDataRecorder(str(tmp_path))
+        for _ in range(2):
+            recorder.mark_tick("BTCUSDT")
+            time.sleep(0.1)
+        recorder.close()
+        records = list(read_records(str(tmp_path)))
+
+        fast = ReplayMarketDataClient(records)
+        start = time.monotonic()
+        while fast.advance_tick():
+            pass
+        assert time.monotonic() - start < 0.05
+
+        paced = ReplayMarketDataClient(records, speed=1.0)
+        start = time.monotonic()
+        while paced.advance_tick():
+            pass
+        assert time.monotonic() - start >= 0.09
+
+
+class TestBotReplay:
+
+    @staticmethod
+    def make_bot():
+        from bot.trading_bot import TradingBot
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        with patch("bot.trading_bot.Database"), patch("bot.trading_bot.AccountClient"):
+            with patch("bot.trading_bot.MarketDataClient", return_value=FakeMarketClient()):
+                bot = TradingBot(mode="paper", strategies=[TrendPullbackStrategy()], symbol="BTCUSDT", testnet=True)
+        bot._dry_run_mode = True
+        bot.evaluate_on_bar_close = False
+        return bot
+
+    def test_recorded_ticks_replay_deterministically(self, tmp_path):
+        import asyncio
+
+        bot = self.make_bot()
+        recorder = MarketDataRecorder(str(tmp_path))
+        bot.market_recorder = recorder
+        bot.market_client = RecordingMarketDataClient(bot.market_client, recorder)
+        live_results = [asyncio.run(bot.run_single_tick()) for _ in range(3)]
+        recorder.close()
+
+        replay_bot = self.make_bot()
+        replay_bot.market_client = MagicMock(side_effect=AssertionError("network"))
+        replayed = ReplayHarness(replay_bot, str(tmp_path)).run()
+
+        assert len(replayed) == 3
+        assert [r["status"] for r in replayed] == [r["status"] for r in live_results]
+        assert [r.get("message") for r in replayed] == [r.get("message") for r in live_results]
@@ -0,0 +1,153 @@
+"""
+Тесты для реестра метрик (Prometheus text format)
+
+Проверяем:
+1. Counter/Gauge/Histogram и экспозиция в text format 0.0.4
+2. Шарды по потокам суммируются при render()
+3. Инструментирование: REST запросы, retry_with_backoff, WS reconnect, DB commit
+4. Endpoint /metrics
+"""
+
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils import metrics
+from utils.metrics import MetricsRegistry
+
+
+class TestRegistry:
+
+    def test_counter_and_gauge_exposition(self):
+        registry = MetricsRegistry()
+        requests_total = registry.counter("requests_total", "Requests", ("endpoint",))
+        inflight = registry.gauge("inflight", "In flight")
+
+        requests_total.inc(endpoint="/v5/order/create")
+        requests_total.inc(2, endpoint="/v5/order/create")
+        requests_total.inc(endpoint='/x"y')
+        inflight.set(3)
+        inflight.dec()
+
+        text = registry.render()
+
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{endpoint="/v5/order/create"} 3' in text
+        assert 'requests_total{endpoint="/x\\"y"} 1' in text
+        assert "# TYPE inflight gauge\ninflight 2\n" in text
+
+    def test_histogram_buckets_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, stage="fetch")
+
+        text = registry.render()
+
+        assert 'latency_seconds_bucket{stage="fetch",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{stage="fetch",le="1"} 3' in text
+        assert 'latency_seconds_bucket{stage="fetch",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{stage="fetch"} 4' in text
+        assert 'latency_seconds_sum{stage="fetch"} 3.65' in text
+
+    def test_thread_shards_summed(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events")
+        histogram = registry.histogram("work_seconds", "Work")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+                histogram.observe(0.002)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert counter.value() == 4000
+        assert histogram.snapshot()["count"] == 4000
+        assert len(counter._shards) == 4
+
+    def test_labels_validated_and_get_or_create(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("orders_total", "Orders", ("side",))
+
+        with pytest.raises(ValueError):
+            counter.inc(symbol="BTCUSDT")
+        assert registry.counter("orders_total", "Orders", ("side",)) is counter
+        with pytest.raises(ValueError):
+            registry.gauge("orders_total", "Orders", ("side",))
+
+
+class TestInstrumentation:
+
+    def test_rest_requests_counted_per_endpoint(self):
+        from exchange.base_client import REST_LATENCY, REST_REQUESTS, BybitRestClient
+
+        with patch.object(BybitRestClient, "_sync_server_time"):
+            client = BybitRestClient("key", "secret", testnet=True)
+        client._min_request_interval = 0
+        response = MagicMock()
+        response.json.return_value = {"retCode": 0, "result": {}}
+        client.session = MagicMock()
+        client.session.get.return_value = response
+        before = REST_REQUESTS.value(method="GET", endpoint="/v5/market/time", status="ok")
+        observed = REST_LATENCY.snapshot(method="GET", endpoint="/v5/market/time")["count"]
+
+        client.get("/v5/market/time")
+
+        assert REST_REQUESTS.value(method="GET", endpoint="/v5/market/time", status="ok") == before + 1
+        assert REST_LATENCY.snapshot(method="GET", endpoint="/v5/market/time")["count"] == observed + 1
+
+    def test_retry_with_backoff_retries_counted(self):
+        from utils.retry import RETRIES, retry_with_backoff
+
+        def flaky_call():
+            flaky_call.calls += 1
+            if flaky_call.calls == 1:
+                raise ConnectionError("reset")
+            return {"retCode": 0}
+
+        flaky_call.calls = 0
+        before = RETRIES.value(func="flaky_call", reason="exception")
+
+        assert retry_with_backoff(flaky_call, initial_delay=0)["retCode"] == 0
+        assert RETRIES.value(func="flaky_call", reason="exception") == before + 1
+
+    def test_ws_reconnect_counted(self):
+        from exchange.websocket_client import WS_RECONNECTS, BybitWebSocketClient
+
+        client = BybitWebSocketClient("wss://stream-testnet.bybit.com/v5/public/linear", on_message=lambda m: None)
+        client.max_reconnect_delay = 0
+        before = WS_RECONNECTS.value(stream="public/linear")
+
+        client._reconnect()
+
+        assert WS_RECONNECTS.value(stream="public/linear") == before + 1
+
+    def test_db_commit_latency_observed(self):
+        from storage.database import DB_COMMIT_SECONDS, Database
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = Database(str(Path(tmpdir) / "test.db"))
+            before = DB_COMMIT_SECONDS.snapshot()["count"]
+            db.save_config("k", {"v": 1})
+            assert DB_COMMIT_SECONDS.snapshot()["count"] == before + 1
+            Database.close_all_cached()
+
+    def test_metrics_endpoint(self):
+        from api.app import prometheus_metrics
+
+        metrics.counter("test_endpoint_total", "Endpoint test").inc()
+
+        response = asyncio.run(prometheus_metrics())
+
+        assert response.media_type.startswith("text/plain; version=0.0.4")
+        assert b"test_endpoint_total 1" in response.body
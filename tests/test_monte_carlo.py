@@ -0,0 +1,158 @@
+"""
+Тесты для Monte Carlo трейд-ресэмплинга
+
+Проверяем:
+1. Shuffle сохраняет итоговый PnL, bootstrap/block_bootstrap дают распределение
+2. Перцентили монотонны, вероятность разорения в [0, 1]
+3. Чанкинг не меняет результат
+4. Интеграция с BacktestMetricsReporter (HTML/JSON)
+"""
+
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from execution.backtest_reporter import BacktestMetricsReporter
+from execution.monte_carlo import MonteCarloConfig, MonteCarloSimulator
+from execution.trade_metrics import EquityCurve, TradeMetricsCalculator
+
+
+def make_trades(pnls):
+    return [
+        SimpleNamespace(
+            pnl_after_commission=Decimal(str(p)),
+            pnl=Decimal(str(p)),
+            entry_commission=Decimal("0"),
+            exit_commission=Decimal("0"),
+            entry_price=Decimal("100"),
+            exit_price=Decimal("100"),
+            entry_qty=Decimal("1"),
+            roi_percent=Decimal("0"),
+            was_sl_hit=False,
+            was_tp_hit=False,
+            duration_seconds=60.0,
+        )
+        for p in pnls
+    ]
+
+
+class TestMonteCarloSimulator:
+
+    def test_shuffle_preserves_final_equity(self):
+        pnl = np.random.default_rng(0).normal(2, 20, 200)
+        mc = MonteCarloSimulator(MonteCarloConfig(n_paths=500, method="shuffle")).run(pnl, 10000)
+
+        expected = 10000 + pnl.sum()
+        for value in mc.final_equity.values():
+            assert value == pytest.approx(expected)
+
+    @pytest.mark.parametrize("method", ["bootstrap", "block_bootstrap", "shuffle"])
+    def test_percentiles_monotonic(self, method):
+        pnl = np.random.default_rng(1).normal(1, 30, 300)
+        mc = MonteCarloSimulator(MonteCarloConfig(n_paths=1000, method=method)).run(pnl, 5000)
+
+        dd = list(mc.max_drawdown_dollars.values())
+        assert dd == sorted(dd)
+        assert 0.0 <= mc.ruin_probability <= 1.0
+        assert mc.n_trades == 300
+
+    def test_chunking_does_not_change_result(self):
+        pnl = np.random.default_rng(2).normal(0, 10, 100)
+        # Разбиение на чанки меняет поток случайных чисел - сравниваем статистически
+        big = MonteCarloSimulator(MonteCarloConfig(n_paths=4000, chunk_size=4000)).run(pnl, 1000)
+        small = MonteCarloSimulator(MonteCarloConfig(n_paths=4000, chunk_size=300)).run(pnl, 1000)
+
+        assert small.max_drawdown_dollars["p50"] == pytest.approx(
+            big.max_drawdown_dollars["p50"], rel=0.1
+        )
+
+    def test_ruin_probability_losing_strategy(self):
+        pnl = np.full(100, -20.0)
+        mc = MonteCarloSimulator(
+            MonteCarloConfig(n_paths=100, ruin_threshold_percent=50)
+        ).run(pnl, 1000)
+
+        assert mc.ruin_probability == 1.0
+
+    def test_max_drawdown_matches_equity_curve_for_original_order(self):
+        pnl = [100, -50, -80, 200, -30]
+        curve = EquityCurve()
+        equity = Decimal("1000")
+        curve.add_point(0, equity)
+        for i, p in enumerate(pnl):
+            equity += Decimal(str(p))
+            curve.add_point(i + 1, equity)
+        expected_dd, _ = curve.get_max_drawdown(Decimal("1000"))
+
+        # Подменяем выборку исходным порядком сделок
+        sim = MonteCarloSimulator(MonteCarloConfig(n_paths=1))
+        sim._sample_indices = lambda rng, n, m: np.arange(m)[None, :]
+        mc = sim.run(pnl, 1000)
+
+        assert mc.max_drawdown_dollars["p50"] == pytest.approx(float(expected_dd))
+
+    def test_empty_trades(self):
+        mc = MonteCarloSimulator().run([], 1000)
+        assert mc.n_trades == 0
+        assert mc.ruin_probability == 0.0
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            MonteCarloSimulator(MonteCarloConfig(method="magic"))
+
+    def test_performance_10k_paths_1k_trades(self):
+        pnl = np.random.default_rng(3).normal(1, 25, 1000)
+        start = time.perf_counter()
+        MonteCarloSimulator(MonteCarloConfig(n_paths=10000)).run(pnl, 10000)
+        assert time.perf_counter() - start < 10.0
+
+
+class TestMonteCarloReporting:
+
+    @staticmethod
+    def make_result():
+        trades = make_trades([50, -20, 30, -10, 70, -40, 15])
+        metrics = TradeMetricsCalculator.calculate(trades, Decimal("10000"))
+        return {
+            "name": "mc_test",
+            "trades": trades,
+            "trades_count": len(trades),
+            "metrics": metrics,
+            "simulator": SimpleNamespace(initial_balance=Decimal("10000")),
+            "start_date": "2023-01-01",
+            "end_date": "2023-02-01",
+            "start_price": Decimal("100"),
+            "end_price": Decimal("110"),
+            "candles_count": 100,
+        }
+
+    def test_export_to_json_includes_monte_carlo(self):
+        result = self.make_result()
+        BacktestMetricsReporter.add_monte_carlo(result, MonteCarloConfig(n_paths=200))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "mc.json")
+            BacktestMetricsReporter.export_to_json(result, path)
+            with open(path) as f:
+                data = json.load(f)
+
+        assert data["monte_carlo"]["n_paths"] == 200
+        assert "p95" in data["monte_carlo"]["max_drawdown_percent"]
+
+    def test_html_report_includes_monte_carlo(self):
+        result = self.make_result()
+        BacktestMetricsReporter.add_monte_carlo(result, MonteCarloConfig(n_paths=200))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            html = BacktestMetricsReporter.generate_html_report(
+                {"mc_test": result}, os.path.join(tmpdir, "report.html")
+            )
+
+        assert "Monte Carlo" in html
+        assert "Ruin probability" in html
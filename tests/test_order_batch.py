@@ -0,0 +1,224 @@
+"""
+Тесты для batch create/amend/cancel ордеров
+
+Проверяем:
+1. create_orders_batch: один запрос на пачку, разбиение по лимиту биржи
+2. Результаты по элементам (retExtInfo) маппятся в OrderResult в исходном порядке
+3. Идемпотентность: активный orderLinkId (все страницы /v5/order/realtime) не
+   отправляется повторно, дубли в пачке отклоняются
+4. amend/cancel batch (статус только у ордеров из БД), BybitLiveGateway и
+   лесенка ScaledEntryManager одним запросом
+5. Уровни лесенки на сетке qtyStep/tickSize, уровни меньше минималов сливаются
+"""
+
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from exchange.instrument_registry import InstrumentSpec
+from execution.live_gateway import BybitLiveGateway
+from execution.order_idempotency import leg_order_link_id
+from execution.order_manager import BATCH_MAX_ORDERS, OrderManager
+from execution.scaled_entry import ScaledEntryManager
+
+BTC_SPEC = InstrumentSpec.from_params("BTCUSDT", "0.1", "0.001", "0.001", "100", "5")
+
+
+def batch_response(request, failed=()):
+    items, statuses = [], []
+    for i, item in enumerate(request):
+        if i in failed:
+            items.append({})
+            statuses.append({"code": 170131, "msg": "Insufficient balance."})
+        else:
+            items.append({"orderId": f"id-{item.get('orderLinkId') or item.get('orderId')}",
+                          "orderLinkId": item.get("orderLinkId", "")})
+            statuses.append({"code": 0, "msg": "OK"})
+    return {"retCode": 0, "retMsg": "OK", "result": {"list": items}, "retExtInfo": {"list": statuses}}
+
+
+def make_manager(failed=(), active_orders=()):
+    client = MagicMock()
+    client.post.side_effect = lambda endpoint, params=None: batch_response(params["request"], failed)
+    client.get.return_value = {"retCode": 0, "result": {"list": list(active_orders)}}
+    db = MagicMock()
+    db.get_order_by_link_id.return_value = None
+    return OrderManager(client, db), client, db
+
+
+def ladder(n, symbol="BTCUSDT"):
+    return [
+        {"symbol": symbol, "side": "Buy", "order_type": "Limit", "qty": 0.01,
+         "price": 50000 - i * 10, "order_link_id": f"ladder_{i}"}
+        for i in range(n)
+    ]
+
+
+class TestCreateOrdersBatch:
+
+    def test_single_round_trip(self):
+        manager, client, db = make_manager()
+
+        results = manager.create_orders_batch("linear", ladder(5))
+
+        assert client.post.call_count == 1
+        endpoint = client.post.call_args[0][0]
+        params = client.post.call_args[1]["params"]
+        assert endpoint == "/v5/order/create-batch"
+        assert params["category"] == "linear"
+        assert [r["orderLinkId"] for r in params["request"]] == [f"ladder_{i}" for i in range(5)]
+        assert params["request"][0]["price"] == "50000"
+        assert [r.order_id for r in results] == [f"id-ladder_{i}" for i in range(5)]
+        assert db.save_order.call_count == 5
+        # Идемпотентность проверена одним REST запросом на символ
+        assert client.get.call_count == 1
+
+    def test_chunked_to_exchange_max(self):
+        manager, client, _ = make_manager()
+
+        results = manager.create_orders_batch("spot", ladder(25))
+
+        sizes = [len(c[1]["params"]["request"]) for c in client.post.call_args_list]
+        assert sizes == [BATCH_MAX_ORDERS["spot"]] * 2 + [5]
+        assert all(r.success for r in results)
+        assert results[24].order_id == "id-ladder_24"
+
+    def test_per_item_errors_mapped(self):
+        manager, _, db = make_manager(failed={1})
+
+        results = manager.create_orders_batch("linear", ladder(3))
+
+        assert [r.success for r in results] == [True, False, True]
+        assert "Insufficient" in results[1].error
+        assert db.save_order.call_count == 2
+
+    def test_existing_and_duplicate_link_ids_not_sent(self):
+        active = [{"orderId": "old-1", "orderLinkId": "ladder_1", "orderStatus": "New"}]
+        manager, client, _ = make_manager(active_orders=active)
+        orders = ladder(3) + [ladder(1)[0]]
+
+        results = manager.create_orders_batch("linear", orders)
+
+        sent = [r["orderLinkId"] for r in client.post.call_args[1]["params"]["request"]]
+        assert sent == ["ladder_0", "ladder_2"]
+        assert results[1].order_id == "old-1"
+        assert not results[3].success and "Duplicate" in results[3].error
+
+    def test_active_orders_followed_across_pages(self):
+        manager, client, _ = make_manager()
+        pages = {
+            None: {"list": [{"orderId": f"o{i}", "orderLinkId": f"old_{i}", "orderStatus": "New"} for i in range(50)],
+                   "nextPageCursor": "p2"},
+            "p2": {"list": [{"orderId": "o50", "orderLinkId": "ladder_1", "orderStatus": "New"}], "nextPageCursor": ""},
+        }
+        client.get.side_effect = lambda endpoint, params=None, signed=False: {
+            "retCode": 0, "result": pages[params.get("cursor")],
+        }
+
+        results = manager.create_orders_batch("linear", ladder(2))
+
+        assert [c.kwargs["params"].get("cursor") for c in client.get.call_args_list] == [None, "p2"]
+        assert [r["orderLinkId"] for r in client.post.call_args[1]["params"]["request"]] == ["ladder_0"]
+        assert results[1].order_id == "o50"
+
+    def test_request_failure_fails_chunk(self):
+        manager, client, _ = make_manager()
+        client.post.side_effect = Exception("timeout")
+
+        results = manager.create_orders_batch("linear", ladder(2))
+
+        assert [r.success for r in results] == [False, False]
+
+
+class TestAmendCancelBatch:
+
+    def test_amend_batch(self):
+        manager, client, _ = make_manager()
+
+        results = manager.amend_orders_batch("linear", [
+            {"symbol": "BTCUSDT", "order_id": "1", "price": 50100},
+            {"symbol": "BTCUSDT", "order_link_id": "tp_2", "qty": 0.5},
+            {"symbol": "BTCUSDT"},
+        ])
+
+        request = client.post.call_args[1]["params"]["request"]
+        assert client.post.call_args[0][0] == "/v5/order/amend-batch"
+        assert request == [
+            {"symbol": "BTCUSDT", "orderId": "1", "price": "50100"},
+            {"symbol": "BTCUSDT", "orderLinkId": "tp_2", "qty": "0.5"},
+        ]
+        assert [r.success for r in results] == [True, True, False]
+
+    def test_cancel_batch_via_gateway(self):
+        manager, client, db = make_manager()
+        db.order_exists.side_effect = lambda order_id: order_id == "id-1"
+        gateway = BybitLiveGateway(manager, MagicMock())
+
+        results = gateway.cancel_orders_batch("linear", [
+            {"symbol": "BTCUSDT", "order_id": "1"},
+            {"symbol": "ETHUSDT", "order_id": "2"},
+        ])
+
+        assert client.post.call_args[0][0] == "/v5/order/cancel-batch"
+        assert [r.order_id for r in results] == ["id-1", "id-2"]
+        # Неизвестный БД ордер id-2 не записывается заглушкой
+        db.update_order_status.assert_called_once_with("id-1", "Cancelled")
+        db.save_order.assert_not_called()
+
+
+class TestScaledEntryBatch:
+
+    def test_ladder_goes_out_in_one_request(self):
+        manager, client, _ = make_manager()
+        gateway = BybitLiveGateway(manager, MagicMock())
+        scaled = ScaledEntryManager()
+        scaled.calculate_entry_levels("pos-1", Decimal("1"), 6.0, Decimal("50000"), Decimal("1000"), "Long")
+
+        orders = scaled.build_level_orders(
+            "pos-1", "BTCUSDT", Decimal("1"), Decimal("50000"), Decimal("1000"), "Long", "trend_BTCUSDT_1_L", BTC_SPEC
+        )
+        results = gateway.place_orders_batch("linear", orders)
+
+        assert client.post.call_count == 1
+        request = client.post.call_args[1]["params"]["request"]
+        assert [r["orderType"] for r in request] == ["Market", "Limit", "Market", "Market"]
+        assert request[1]["price"] == "49500.0"  # откат 0.5 ATR
+        assert request[3]["triggerPrice"] == "51500.0"  # +1R при SL = 1.5 ATR
+        assert request[3]["triggerDirection"] == 1
+        assert [r["orderLinkId"] for r in request] == [leg_order_link_id("trend_BTCUSDT_1_L", n) for n in range(1, 5)]
+        assert scaled.assign_level_orders("pos-1", results) == 4
+
+    def test_levels_rounded_to_qty_step_and_merged_below_minimum(self):
+        scaled = ScaledEntryManager()
+        scaled.calculate_entry_levels("pos-1", Decimal("0.0037"), 6.0, Decimal("50000"), Decimal("1000"), "Long")
+
+        orders = scaled.build_level_orders(
+            "pos-1", "BTCUSDT", Decimal("0.0037"), Decimal("50000.03"), Decimal("1000"), "Long", "link", BTC_SPEC
+        )
+
+        # 3 шага по 0.001: 40% -> 1, 70% -> 2, 90% -> 2 (уровень 3 пуст, сливается с 4-м)
+        assert [o["qty"] for o in orders] == [0.001, 0.001, 0.001]
+        assert orders[1]["price"] == 49500.0  # на сетке tickSize
+        assert [l.level_number for l in scaled._active_entries["pos-1"]] == [1, 2, 4]
+        assert scaled._active_entries["pos-1"][-1].percent_of_total == 30.0
+        assert scaled.assign_level_orders("pos-1", [MagicMock(success=True, order_id=str(i)) for i in range(3)]) == 3
+
+    def test_ladder_below_minimum_is_dropped(self):
+        scaled = ScaledEntryManager()
+        scaled.calculate_entry_levels("pos-1", Decimal("0.0037"), 6.0, Decimal("50000"), Decimal("1000"), "Long")
+        spec = InstrumentSpec.from_params("BTCUSDT", "0.1", "0.001", "0.01")
+
+        orders = scaled.build_level_orders(
+            "pos-1", "BTCUSDT", Decimal("0.0037"), Decimal("50000"), Decimal("1000"), "Long", "link", spec
+        )
+
+        assert orders == []
+        assert scaled.get_entry_summary("pos-1")["total_levels"] == 0
+
+    def test_leg_link_id_stays_within_limit(self):
+        base = "a_very_long_strategy_BTCUSDT_289_L"
+
+        leg = leg_order_link_id(base + "xx", 3)
+
+        assert len(leg) <= 36
+        assert leg == leg_order_link_id(base + "xx", 3)
+        assert leg != leg_order_link_id(base + "yy", 3)
@@ -0,0 +1,206 @@
+"""
+Тесты для OrderEventBus (push-события private WS)
+
+Проверяем:
+1. wait_for_order освобождается push'ем из другого потока за миллисекунды
+2. PrivateWebSocket публикует order/position/execution в шину
+3. OrderManager.check_order_exists и PositionStateManager используют push без REST
+4. TradingBot._wait_for_order_fill: WS путь и REST fallback
+"""
+
+import threading
+import time
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+from bot.trading_bot import TradingBot
+from exchange.order_events import OrderEventBus
+from exchange.private_ws import PrivateWebSocket
+from execution.order_manager import OrderManager
+from storage.position_state import PositionStateManager
+
+
+def push_later(bus, order, delay=0.05):
+    timer = threading.Timer(delay, bus.publish_order, args=(order,))
+    timer.start()
+    return timer
+
+
+class TestOrderEventBus:
+
+    def test_wait_released_by_push(self):
+        bus = OrderEventBus()
+        push_later(bus, {"orderId": "1", "orderStatus": "New"}, 0.01)
+        push_later(bus, {"orderId": "1", "orderStatus": "Filled"}, 0.05)
+
+        start = time.perf_counter()
+        order = bus.wait_for_order("1", timeout=5)
+
+        assert order["orderStatus"] == "Filled"
+        assert time.perf_counter() - start < 1.0
+
+    def test_wait_returns_known_final_state(self):
+        bus = OrderEventBus()
+        bus.publish_order({"orderId": "1", "orderStatus": "Cancelled"})
+
+        assert bus.wait_for_order("1", timeout=0)["orderStatus"] == "Cancelled"
+
+    def test_wait_timeout(self):
+        bus = OrderEventBus()
+        assert bus.wait_for_order("missing", timeout=0.05) is None
+        assert bus._waiters == {}
+
+    def test_lookup_by_link_id(self):
+        bus = OrderEventBus()
+        bus.publish_order({"orderId": "1", "orderLinkId": "link-1", "orderStatus": "New"})
+
+        assert bus.get_order_by_link_id("link-1")["orderId"] == "1"
+        assert bus.get_order_by_link_id("other") is None
+
+    def test_trim_keeps_latest(self):
+        bus = OrderEventBus(max_orders=3)
+        for i in range(5):
+            bus.publish_order({"orderId": str(i), "orderLinkId": f"l{i}", "orderStatus": "New"})
+
+        assert bus.get_order("0") is None
+        assert bus.get_order("4") is not None
+        assert bus.get_order_by_link_id("l1") is None
+
+    def test_listener_errors_are_isolated(self):
+        bus = OrderEventBus()
+        received = []
+        bus.subscribe_positions(lambda data: 1 / 0)
+        bus.subscribe_positions(received.append)
+
+        bus.publish_position({"symbol": "BTCUSDT"})
+
+        assert received == [{"symbol": "BTCUSDT"}]
+
+
+class TestPrivateWebSocketPublishing:
+
+    def test_messages_published_to_bus(self):
+        ws = PrivateWebSocket("key", "secret", on_order=MagicMock(), on_position=MagicMock())
+        executions = []
+        ws.event_bus.subscribe_executions(executions.append)
+
+        ws._handle_message({"op": "auth", "success": True, "ret_msg": ""})
+        ws._handle_message({"topic": "order", "data": [{"orderId": "1", "orderStatus": "Filled"}]})
+        ws._handle_message({"topic": "execution", "data": [{"symbol": "BTCUSDT", "execQty": "1"}]})
+
+        assert ws.event_bus.is_active
+        assert ws.event_bus.get_order("1")["orderStatus"] == "Filled"
+        assert len(executions) == 1
+
+
+class TestConsumers:
+
+    def test_check_order_exists_uses_push_state(self):
+        db = MagicMock()
+        db.get_order_by_link_id.return_value = None
+        client = MagicMock()
+        bus = OrderEventBus()
+        bus.set_active(True)
+        bus.publish_order({"orderId": "1", "orderLinkId": "link-1", "orderStatus": "New"})
+
+        manager = OrderManager(client, db, event_bus=bus)
+        result = manager.check_order_exists("link-1")
+
+        assert result.order_id == "1"
+        assert result.raw["source"] == "ws"
+        client.get.assert_not_called()
+
+    def test_check_order_exists_falls_back_to_rest(self):
+        db = MagicMock()
+        db.get_order_by_link_id.return_value = None
+        client = MagicMock()
+        client.get.return_value = {"retCode": 0, "result": {"list": []}}
+        bus = OrderEventBus()  # стрим неактивен
+
+        OrderManager(client, db, event_bus=bus).check_order_exists("link-1")
+
+        client.get.assert_called_once()
+
+    def test_position_push_updates_state_without_rest(self):
+        account_client = MagicMock()
+        bus = OrderEventBus()
+        bus.set_active(True)
+        manager = PositionStateManager(account_client, "BTCUSDT")
+        manager.attach_event_bus(bus)
+        manager.open_position("Long", Decimal("0.1"), Decimal("50000"), "1", "test")
+
+        # Формат WS topic position: entryPrice / unrealisedPnl (не avgPrice / unrealPnl)
+        bus.publish_position({
+            "category": "linear", "symbol": "BTCUSDT", "side": "Buy", "size": "0.1",
+            "entryPrice": "50000", "markPrice": "50500", "unrealisedPnl": "50", "positionStatus": "Normal",
+        })
+
+        assert manager.position.mark_price == Decimal("50500")
+        assert manager.position.exchange_entry_price == Decimal("50000")
+        assert manager.position.pnl == Decimal("50")
+        assert manager.sync_with_exchange()
+        account_client.get_positions.assert_not_called()
+
+    def test_close_push_removes_position(self):
+        account_client = MagicMock()
+        bus = OrderEventBus()
+        bus.set_active(True)
+        manager = PositionStateManager(account_client, "BTCUSDT")
+        manager.attach_event_bus(bus)
+        manager.open_position("Long", Decimal("0.1"), Decimal("50000"), "1", "test")
+
+        bus.publish_position({
+            "category": "linear", "symbol": "BTCUSDT", "side": "", "size": "0",
+            "entryPrice": "0", "markPrice": "50500", "unrealisedPnl": "0", "positionStatus": "Normal",
+        })
+
+        assert not manager.has_position()
+        assert manager.sync_with_exchange()
+        account_client.get_positions.assert_not_called()
+
+        # REST тоже отдаёт закрытую позицию строкой с size 0
+        manager.open_position("Short", Decimal("0.1"), Decimal("50000"), "2", "test")
+        account_client.get_positions.return_value = {
+            "retCode": 0, "result": {"list": [{"symbol": "BTCUSDT", "side": "", "size": "0"}]},
+        }
+        manager.position.last_sync_at = None
+        assert manager.sync_with_exchange()
+        assert not manager.has_position()
+
+
+class TestWaitForOrderFill:
+
+    @staticmethod
+    def make_bot(bus):
+        bot = TradingBot.__new__(TradingBot)
+        bot.order_event_bus = bus
+        bot.symbol = "BTCUSDT"
+        bot.account_client = MagicMock()
+        return bot
+
+    def test_filled_via_ws(self):
+        bus = OrderEventBus()
+        bus.set_active(True)
+        bot = self.make_bot(bus)
+        push_later(bus, {"orderId": "1", "orderStatus": "Filled"}, 0.02)
+
+        assert bot._wait_for_order_fill("1", timeout_seconds=5)
+        bot.account_client.client.post.assert_not_called()
+
+    def test_cancelled_via_ws(self):
+        bus = OrderEventBus()
+        bus.set_active(True)
+        bot = self.make_bot(bus)
+        bus.publish_order({"orderId": "1", "orderStatus": "Cancelled"})
+
+        assert not bot._wait_for_order_fill("1", timeout_seconds=5)
+
+    def test_rest_fallback_when_stream_inactive(self):
+        bot = self.make_bot(OrderEventBus())
+        bot.account_client.client.post.return_value = {
+            "retCode": 0,
+            "result": {"list": [{"orderId": "1", "orderStatus": "Filled"}]},
+        }
+
+        assert bot._wait_for_order_fill("1", timeout_seconds=5)
+        bot.account_client.client.post.assert_called_once()
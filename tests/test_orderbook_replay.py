@@ -0,0 +1,242 @@
+"""
+Тесты для записи и реплея стакана
+
+Проверяем:
+1. Recorder -> Recording: стакан восстанавливается точно (snapshot + delta)
+2. Market ордер проходит по уровням (VWAP, недозаполнение)
+3. Limit ордер: позиция в очереди, продвижение, заполнение при пересечении
+4. Интеграция с PaperTradingSimulator и BacktestRunner (стакан на время бара)
+"""
+
+import os
+import tempfile
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from execution.backtest_runner import BacktestConfig, BacktestRunner
+from execution.orderbook_replay import OrderbookRecorder, OrderbookRecording, OrderbookReplayEngine
+from execution.paper_trading_simulator import PaperTradingConfig, PaperTradingSimulator
+
+
+T0 = 1_700_000_000_000
+
+
+def book(bids, asks):
+    return [[str(p), str(q)] for p, q in bids], [[str(p), str(q)] for p, q in asks]
+
+
+@pytest.fixture
+def tmp_path_obr():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield os.path.join(tmpdir, "BTCUSDT.obr")
+
+
+def record(path, states, snapshot_interval=1000):
+    with OrderbookRecorder(path, "BTCUSDT", tick_size=0.1, qty_step=0.001,
+                           snapshot_interval=snapshot_interval) as recorder:
+        for ts, bids, asks in states:
+            recorder.record(ts, *book(bids, asks))
+    return OrderbookReplayEngine.load(path)
+
+
+class TestOrderbookRecorder:
+
+    def test_roundtrip_random_book(self, tmp_path_obr):
+        rng = np.random.default_rng(0)
+        bids = {round(100.0 - 0.1 * i, 1): 1.0 for i in range(50)}
+        asks = {round(100.1 + 0.1 * i, 1): 1.0 for i in range(50)}
+        states = []
+        for k in range(500):
+            price = round(100.0 - 0.1 * int(rng.integers(0, 50)), 1)
+            if rng.random() < 0.1:
+                bids.pop(price, None)
+            else:
+                bids[price] = round(float(rng.uniform(0.001, 5)), 3)
+            states.append((T0 + k * 100, list(bids.items()), list(asks.items())))
+
+        engine = record(tmp_path_obr, states, snapshot_interval=64)
+        engine.replay()
+
+        expected = {int(round(p / 0.1)): int(round(q / 0.001)) for p, q in bids.items()}
+        assert engine.bids == expected
+        assert engine.best_ask == 100.1
+
+    def test_deltas_are_compact(self, tmp_path_obr):
+        bids = [(100.0 - 0.1 * i, 1.0) for i in range(50)]
+        asks = [(100.1 + 0.1 * i, 1.0) for i in range(50)]
+        states = [(T0, bids, asks)]
+        for k in range(1, 100):
+            changed = [(bids[0][0], 1.0 + k * 0.001)] + bids[1:]
+            states.append((T0 + k, changed, asks))
+
+        with OrderbookRecorder(tmp_path_obr, "BTCUSDT", 0.1, 0.001) as recorder:
+            for ts, b, a in states:
+                recorder.record(ts, *book(b, a))
+            snapshot_size = 9 + 2 * (8 + 49 * 4 + 50 * 8)
+            # 99 дельт по одному уровню много меньше 99 snapshot'ов
+            assert recorder.bytes_written < snapshot_size + 99 * 40 + 200
+
+        recording = OrderbookRecording.load(tmp_path_obr)
+        assert len(recording) == 100
+        assert recording.ts_ms[-1] == T0 + 99
+
+    def test_attach_keeps_downstream_callback(self, tmp_path_obr):
+        received = []
+
+        class Stream:
+            on_orderbook = staticmethod(received.append)
+
+        stream = Stream()
+        recorder = OrderbookRecorder(tmp_path_obr, "BTCUSDT", 0.1, 0.001)
+        recorder.attach(stream)
+        bids, asks = book([(100.0, 1.0)], [(100.1, 1.0)])
+        stream.on_orderbook({"bids": bids, "asks": asks, "timestamp": T0 / 1000})
+        recorder.close()
+
+        assert len(received) == 1
+        assert len(OrderbookRecording.load(tmp_path_obr)) == 1
+
+
+class TestOrderbookReplayEngine:
+
+    def test_market_order_walks_levels(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [
+            (T0, [(99.9, 1.0)], [(100.1, 1.0), (100.2, 2.0), (100.3, 5.0)]),
+        ])
+        engine.advance_to(T0)
+
+        fill = engine.simulate_market_order("Buy", 2.0)
+
+        assert fill.filled_qty == pytest.approx(2.0)
+        assert fill.avg_price == pytest.approx((100.1 + 100.2) / 2)
+        assert fill.levels_consumed == 2
+        assert fill.slippage_bps > 0
+
+    def test_market_order_insufficient_depth(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [(T0, [(99.9, 0.5)], [(100.1, 1.0)])])
+        engine.advance_to(T0)
+
+        fill = engine.simulate_market_order("Sell", 2.0)
+
+        assert fill.filled_qty == pytest.approx(0.5)
+        assert fill.unfilled_qty == pytest.approx(1.5)
+
+    def test_limit_order_queue_position(self, tmp_path_obr):
+        asks = [(100.1, 1.0)]
+        engine = record(tmp_path_obr, [
+            (T0, [(100.0, 3.0)], asks),
+            (T0 + 100, [(100.0, 2.0)], asks),  # -1.0 перед нами
+            (T0 + 200, [(100.0, 4.0)], asks),  # +2.0 встали за нами
+            (T0 + 300, [(100.0, 1.5)], asks),  # -2.5: очередь пройдена, 0.5 заполнено
+        ])
+        engine.advance_to(T0)
+        order_id, immediate = engine.submit_limit_order("Buy", 100.0, 1.0)
+
+        assert immediate == []
+        assert engine.get_queue_position(order_id) == pytest.approx(3.0)
+
+        assert engine.advance_to(T0 + 100) == []
+        assert engine.get_queue_position(order_id) == pytest.approx(2.0)
+
+        assert engine.advance_to(T0 + 200) == []
+        assert engine.get_queue_position(order_id) == pytest.approx(2.0)
+
+        fills = engine.advance_to(T0 + 300)
+        assert len(fills) == 1
+        assert fills[0].qty == pytest.approx(0.5)
+        assert fills[0].is_maker
+        assert engine.get_queue_position(order_id) == 0
+
+    def test_limit_order_filled_when_crossed(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [
+            (T0, [(100.0, 3.0)], [(100.1, 1.0)]),
+            (T0 + 100, [(99.8, 3.0)], [(99.9, 1.0)]),
+        ])
+        engine.advance_to(T0)
+        order_id, _ = engine.submit_limit_order("Buy", 100.0, 1.0)
+
+        fills = engine.advance_to(T0 + 100)
+
+        assert sum(f.qty for f in fills) == pytest.approx(1.0)
+        assert all(f.price == 100.0 for f in fills)
+        assert engine.open_orders() == []
+
+    def test_marketable_limit_executes_as_taker(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [(T0, [(100.0, 1.0)], [(100.1, 0.4), (100.2, 1.0)])])
+        engine.advance_to(T0)
+
+        order_id, fills = engine.submit_limit_order("Buy", 100.1, 1.0)
+
+        assert fills[0].qty == pytest.approx(0.4)
+        assert not fills[0].is_maker
+        assert engine.get_queue_position(order_id) == 0
+
+    def test_advance_skips_to_snapshot_without_orders(self, tmp_path_obr):
+        asks = [(100.1, 1.0)]
+        states = [(T0 + k, [(100.0, 1.0 + k * 0.001)], asks) for k in range(50)]
+        engine = record(tmp_path_obr, states, snapshot_interval=10)
+
+        engine.advance_to(T0 + 49)
+
+        assert engine.bids == {1000: 1049}
+
+    def test_cancel_order(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [(T0, [(100.0, 1.0)], [(100.1, 1.0)])])
+        engine.advance_to(T0)
+        order_id, _ = engine.submit_limit_order("Sell", 100.5, 1.0)
+
+        assert engine.cancel_order(order_id)
+        assert not engine.cancel_order(order_id)
+
+
+class TestPaperTradingWithReplay:
+
+    def test_market_fill_uses_book_depth(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [
+            (T0, [(49999.9, 1.0)], [(50000.0, 0.1), (50010.0, 1.0)]),
+        ])
+        engine.advance_to(T0)
+
+        sim = PaperTradingSimulator(PaperTradingConfig(initial_balance=Decimal("100000")))
+        sim.orderbook_replay = engine
+        order_id, success, _ = sim.submit_market_order("BTCUSDT", "Buy", Decimal("0.2"), Decimal("50000"))
+
+        assert success
+        assert sim.orders[order_id].avg_filled_price == Decimal("50005.00")
+
+    def test_empty_book_falls_back_to_slippage_model(self, tmp_path_obr):
+        engine = record(tmp_path_obr, [(T0, [(100.0, 1.0)], [(100.1, 1.0)])])
+
+        sim = PaperTradingSimulator(PaperTradingConfig(initial_balance=Decimal("100000")))
+        sim.orderbook_replay = engine  # advance_to не вызывался - стакан пуст
+        order_id, success, _ = sim.submit_market_order("BTCUSDT", "Buy", Decimal("0.1"), Decimal("50000"))
+
+        assert success
+        assert sim.orders[order_id].avg_filled_price == Decimal("50010.00")
+
+    def test_backtest_fills_walk_book_at_bar_time(self, tmp_path_obr):
+        hour = 3_600_000
+        record(tmp_path_obr, [
+            (T0, [(49999.9, 1.0)], [(50000.0, 1.0)]),
+            (T0 + hour - 1, [(59999.9, 1.0)], [(60000.0, 0.001), (60010.0, 1.0)]),
+            (T0 + 2 * hour - 1, [(69999.9, 1.0)], [(70000.0, 1.0)]),
+        ])
+        df = pd.DataFrame({
+            "timestamp": [T0, T0 + hour, T0 + 2 * hour],
+            "open": 50000.0, "high": 50100.0, "low": 49900.0, "close": 50000.0, "volume": 10.0,
+        })
+
+        def enter_on_second_bar(history):
+            return {"signal": "long"} if len(history) == 2 else None
+
+        config = BacktestConfig(initial_balance=Decimal("100000"), orderbook_path=tmp_path_obr)
+        result = BacktestRunner(config).run_backtest(df, enter_on_second_bar)
+        simulator = result["simulator"]
+        (order,) = simulator.orders.values()
+
+        # 0.02 BTC: 0.001 по 60000 и 0.019 по 60010 - стакан на момент второго бара
+        assert order.avg_filled_price == Decimal("60009.50")
+        assert simulator.orderbook_replay.current_ts_ms == T0 + 2 * hour
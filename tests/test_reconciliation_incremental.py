@@ -0,0 +1,226 @@
+"""
+Тесты для инкрементальной сверки исполнений (ReconciliationService)
+
+Проверяем:
+1. Курсор: запрашиваются только исполнения новее курсора, с пагинацией;
+   неполная выборка (лимит страниц, ошибка) не сдвигает курсор - разрыв
+   дочитывается следующими циклами через endTime
+2. Исполнения и курсор пишутся одной транзакцией, курсор переживает рестарт
+3. Полная сверка позиций/ордеров только по расписанию или при расхождении checksum
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from execution.reconciliation import ReconciliationService
+from storage.database import Database
+
+
+NOW_MS = int(time.time() * 1000)
+
+
+def execution(i, ts=None, order_id="o1"):
+    return {
+        "execId": f"e{i}", "orderId": order_id, "symbol": "BTCUSDT", "side": "Buy",
+        "execPrice": "50000", "execQty": "0.01", "execFee": "0.1",
+        "execTime": str(ts if ts is not None else NOW_MS - 100_000 + i),
+    }
+
+
+class FakeExchange:
+    """/v5/execution/list с startTime/endTime и nextPageCursor (новые первыми)"""
+
+    def __init__(self, page_size=100):
+        self.executions = []
+        self.page_size = page_size
+        self.execution_calls = []
+        self.snapshot_calls = 0
+        self.fail_next_pages = False
+
+    def get(self, endpoint, params=None, signed=False):
+        if endpoint == "/v5/execution/list":
+            self.execution_calls.append(dict(params))
+            if self.fail_next_pages and "cursor" in params:
+                return {"retCode": 10006, "retMsg": "Too many visits"}
+            rows = sorted(self.executions, key=lambda e: int(e["execTime"]), reverse=True)
+            if "startTime" in params:
+                rows = [e for e in rows if int(e["execTime"]) >= params["startTime"]]
+            if "endTime" in params:
+                rows = [e for e in rows if int(e["execTime"]) <= params["endTime"]]
+            offset = int(params.get("cursor", 0))
+            limit = min(params["limit"], self.page_size)
+            page = rows[offset:offset + limit]
+            next_cursor = str(offset + limit) if offset + limit < len(rows) else ""
+            return {"retCode": 0, "result": {"list": page, "nextPageCursor": next_cursor}}
+        self.snapshot_calls += 1
+        return {"retCode": 0, "result": {"list": []}}
+
+    def post(self, endpoint, params=None):
+        self.snapshot_calls += 1
+        return {"retCode": 0, "result": {"list": []}}
+
+
+@pytest.fixture
+def db():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database = Database(str(Path(tmpdir) / "test.db"))
+        database.save_order({
+            "order_id": "o1", "symbol": "BTCUSDT", "side": "Buy", "order_type": "Market",
+            "qty": 0.01, "status": "Filled",
+        })
+        yield database
+        Database.close_all_cached()
+
+
+def make_service(exchange, db, **kwargs):
+    position_manager = MagicMock()
+    position_manager.positions = {}
+    return ReconciliationService(exchange, position_manager, db, "BTCUSDT", **kwargs)
+
+
+def count_executions(db):
+    return db.conn.execute("SELECT COUNT(*) FROM executions").fetchone()[0]
+
+
+class TestExecutionCursor:
+
+    def test_only_newer_executions_fetched(self, db):
+        exchange = FakeExchange()
+        exchange.executions = [execution(i) for i in range(3)]
+        service = make_service(exchange, db)
+        service.run_reconciliation()
+        assert count_executions(db) == 3
+
+        exchange.execution_calls.clear()
+        exchange.executions.append(execution(3))
+        service.run_reconciliation()
+
+        assert exchange.execution_calls[0]["startTime"] == NOW_MS - 100_000 + 2
+        assert service.last_cycle_stats["executions_fetched"] == 1
+        assert count_executions(db) == 4
+
+    def test_pagination_and_same_ms_boundary(self, db):
+        exchange = FakeExchange(page_size=2)
+        exchange.executions = [execution(0)]
+        service = make_service(exchange, db)
+        service.run_reconciliation()
+
+        # Ещё одно исполнение в ту же миллисекунду, что и курсор, плюс 4 новых
+        exchange.executions += [execution(10, ts=NOW_MS - 100_000)] + [execution(i) for i in range(1, 5)]
+        service.run_reconciliation()
+
+        assert len(exchange.execution_calls) == 1 + 3  # первый запуск + 3 страницы
+        assert count_executions(db) == 6
+        assert service.last_cycle_stats["executions_fetched"] == 5
+
+    def test_cursor_persisted_with_executions(self, db):
+        exchange = FakeExchange()
+        exchange.executions = [execution(0), execution(1)]
+        make_service(exchange, db).run_reconciliation()
+
+        # Новый экземпляр (рестарт) продолжает с сохранённого курсора
+        exchange.execution_calls.clear()
+        make_service(exchange, db).run_reconciliation()
+
+        assert exchange.execution_calls[0]["startTime"] == NOW_MS - 100_000 + 1
+        assert db.get_config("reconciliation.exec_cursor.BTCUSDT")["ids"] == ["e1"]
+
+    def test_failed_write_keeps_cursor(self, db):
+        exchange = FakeExchange()
+        exchange.executions = [execution(0)]
+        service = make_service(exchange, db)
+        service.run_reconciliation()
+        cursor = db.get_config("reconciliation.exec_cursor.BTCUSDT")
+
+        exchange.executions += [execution(1), dict(execution(2), execPrice="n/a")]  # битая запись
+        service.run_reconciliation()
+
+        assert db.get_config("reconciliation.exec_cursor.BTCUSDT") == cursor
+        assert count_executions(db) == 1
+
+    def test_page_cap_keeps_cursor_and_fills_gap(self, db):
+        exchange = FakeExchange(page_size=2)
+        exchange.executions = [execution(0)]
+        service = make_service(exchange, db, max_execution_pages=2)
+        service.run_reconciliation()
+
+        exchange.executions += [execution(i) for i in range(1, 8)]
+        service.run_reconciliation()
+        cursor = db.get_config("reconciliation.exec_cursor.BTCUSDT")
+
+        # 4 самых новых из 7 сохранены, нижняя граница курсора не сдвинулась
+        assert count_executions(db) == 5
+        assert cursor["time"] == NOW_MS - 100_000
+        assert cursor["gap_end"] == NOW_MS - 100_000 + 4
+
+        service.run_reconciliation()  # e4..e1, снова лимит страниц
+        assert exchange.execution_calls[-1]["endTime"] == NOW_MS - 100_000 + 4
+        assert db.get_config("reconciliation.exec_cursor.BTCUSDT")["gap_end"] == NOW_MS - 100_000 + 1
+
+        service.run_reconciliation()
+        cursor = db.get_config("reconciliation.exec_cursor.BTCUSDT")
+
+        assert count_executions(db) == 8
+        assert cursor == {"time": NOW_MS - 100_000 + 7, "ids": ["e7"]}
+
+    def test_error_on_second_page_keeps_cursor(self, db):
+        exchange = FakeExchange(page_size=2)
+        exchange.executions = [execution(0)]
+        service = make_service(exchange, db)
+        service.run_reconciliation()
+
+        exchange.executions += [execution(i) for i in range(1, 6)]
+        exchange.fail_next_pages = True
+        service.run_reconciliation()
+
+        assert count_executions(db) == 3
+        assert db.get_config("reconciliation.exec_cursor.BTCUSDT")["time"] == NOW_MS - 100_000
+
+        exchange.fail_next_pages = False
+        service.run_reconciliation()
+        service.run_reconciliation()
+
+        assert count_executions(db) == 6
+        assert db.get_config("reconciliation.exec_cursor.BTCUSDT")["time"] == NOW_MS - 100_000 + 5
+        assert exchange.execution_calls[-1]["startTime"] == NOW_MS - 100_000 + 5
+
+
+class TestSnapshotCadence:
+
+    def test_full_snapshot_only_when_due(self, db):
+        exchange = FakeExchange()
+        service = make_service(exchange, db, full_snapshot_interval=3600)
+
+        service.run_reconciliation()
+        assert service.last_cycle_stats["full_snapshot"]
+
+        exchange.snapshot_calls = 0
+        service.run_reconciliation()
+        assert not service.last_cycle_stats["full_snapshot"]
+        assert exchange.snapshot_calls == 0  # нет активности - нет запросов позиций/ордеров
+
+    def test_activity_reconciles_only_touched_symbol(self, db):
+        exchange = FakeExchange()
+        service = make_service(exchange, db, full_snapshot_interval=3600)
+        service.run_reconciliation()
+        exchange.snapshot_calls = 0
+
+        exchange.executions.append(execution(0))
+        service.run_reconciliation()
+
+        assert not service.last_cycle_stats["full_snapshot"]
+        assert exchange.snapshot_calls == 2  # позиция символа + его ордера
+
+    def test_unknown_order_triggers_full_snapshot(self, db):
+        exchange = FakeExchange()
+        service = make_service(exchange, db, full_snapshot_interval=3600)
+        service.run_reconciliation()
+
+        exchange.executions.append(execution(0, order_id="unknown"))
+        service.run_reconciliation()
+
+        assert service.last_cycle_stats["full_snapshot"]
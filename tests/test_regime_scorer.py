@@ -5,6 +5,8 @@ Unit-тесты для RegimeScorer
 1. Trend режим (высокий ADX, согласованность EMA)
 2. Range режим (низкий ADX, узкие BB)
 3. High volatility режим (высокий ATR%)
+4. score_regimes: векторный расчёт по всей истории совпадает со score_regime
+5. Атрибуция сделок бэктеста к режимам (BacktestMetricsReporter)
 """
 
 import pytest
@@ -254,5 +256,119 @@ class TestRegimeScorer:
         assert scorer._safe_get(row, ["nonexistent", "adx"], 0.0) == 30.0
 
 
+
+class TestScoreRegimes:
+    """Векторный расчёт режимов по всей истории"""
+
+    @pytest.fixture
+    def feature_df(self):
+        from benchmarks import datasets
+
+        return datasets.features(300)
+
+    def test_matches_scalar_version_bar_by_bar(self, feature_df):
+        scorer = RegimeScorer()
+
+        vectorized = scorer.score_regimes(feature_df)
+
+        assert list(vectorized.index) == list(feature_df.index)
+        for i in range(len(feature_df)):
+            scores = scorer.score_regime(feature_df.iloc[: i + 1])
+            row = vectorized.iloc[i]
+            assert row["regime_label"] == scores.regime_label, i
+            for column in ("trend_score", "range_score", "volatility_score", "chop_score", "confidence"):
+                assert row[column] == getattr(scores, column), (i, column)
+
+    def test_missing_indicators_and_fallback_columns(self):
+        scorer = RegimeScorer()
+        df = pd.DataFrame({
+            "close": [100.0, 100.0, 100.0],
+            "ADX_14": [35.0, 35.0, 10.0],
+            "adx": [np.nan, 35.0, 10.0],
+            "ema_20": [102.0, 0.0, 100.1],
+            "ema_50": [95.0, 95.0, 100.0],
+            "bb_width": [0.05, 0.05, 0.01],
+        })
+
+        vectorized = scorer.score_regimes(df)
+
+        for i in range(len(df)):
+            scores = scorer.score_regime(df.iloc[: i + 1])
+            assert vectorized["regime_label"].iloc[i] == scores.regime_label
+            assert vectorized["trend_score"].iloc[i] == scores.trend_score
+        assert vectorized["confidence"].iloc[1] == 0.0
+
+    def test_empty_dataframe(self):
+        assert RegimeScorer().score_regimes(pd.DataFrame()).empty
+
+
+class TestRegimeAttribution:
+    """Атрибуция сделок бэктеста к режимам по бару входа"""
+
+    def test_trades_attributed_to_entry_bar(self):
+        from types import SimpleNamespace
+
+        from execution.backtest_reporter import BacktestMetricsReporter
+
+        df = pd.DataFrame({"timestamp": pd.date_range("2026-01-01", periods=4, freq="h")})
+        regimes = pd.DataFrame({"regime_label": ["range", "range", "trend_up", "trend_up"]})
+        trades = [
+            SimpleNamespace(entry_time=df["timestamp"][0], pnl=10.0, pnl_after_commission=9.0),
+            SimpleNamespace(entry_time=df["timestamp"][1] + pd.Timedelta(minutes=30), pnl=-4.0, pnl_after_commission=-5.0),
+            SimpleNamespace(entry_time=df["timestamp"][3], pnl=3.0, pnl_after_commission=2.0),
+        ]
+
+        table = BacktestMetricsReporter.regime_attribution(trades, df, regimes).set_index("Regime")
+
+        assert table.loc["range", "Trades"] == 2
+        assert table.loc["range", "PnL $"] == 4.0
+        assert table.loc["range", "Profit Factor"] == 9.0 / 5.0
+        assert table.loc["trend_up", "Win %"] == 100.0
+        assert table.loc["trend_up", "Bars %"] == 50.0
+
+    def test_backtest_trades_carry_bar_times(self, tmp_path):
+        import json
+
+        from execution.backtest_reporter import BacktestMetricsReporter
+        from execution.backtest_runner import BacktestRunner
+        from benchmarks import datasets
+
+        df = datasets.features(200)
+
+        def alternate(frame):
+            # Каждые 10 баров разворот: long / short закрывают предыдущую позицию
+            return {"signal": "long" if (len(frame) // 10) % 2 else "short"} if len(frame) % 10 == 0 else None
+
+        result = BacktestRunner().run_backtest(df, alternate, name="regimes")
+        attribution = BacktestMetricsReporter.add_regime_attribution(result, df)
+
+        assert result["trades"]
+        assert {trade.entry_time for trade in result["trades"]} <= set(df["timestamp"])
+        assert attribution["Trades"].sum() == len(result["trades"])
+        exported = json.loads(BacktestMetricsReporter.export_to_json(result, str(tmp_path / "r.json")))
+        assert sum(row["Trades"] for row in exported["regime_attribution"]) == len(result["trades"])
+
+    def test_integer_ms_timestamps(self):
+        from execution.backtest_reporter import BacktestMetricsReporter
+        from execution.backtest_runner import BacktestRunner
+        from benchmarks import datasets
+
+        df = datasets.features(200)
+        df_ms = df.assign(timestamp=df["timestamp"].astype("int64") // 1_000_000)
+
+        def alternate(frame):
+            return {"signal": "long" if (len(frame) // 10) % 2 else "short"} if len(frame) % 10 == 0 else None
+
+        result = BacktestRunner().run_backtest(df, alternate)
+        result_ms = BacktestRunner().run_backtest(df_ms, alternate)
+
+        # Часы симулятора - время бара, а не utcnow(); атрибуция не сваливается в последний бар
+        assert [t.entry_time for t in result_ms["trades"]] == [t.entry_time for t in result["trades"]]
+        pd.testing.assert_frame_equal(
+            BacktestMetricsReporter.regime_attribution(result_ms["trades"], df_ms),
+            BacktestMetricsReporter.regime_attribution(result["trades"], df),
+        )
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+"""
+Тесты для sampling profiler (collapsed stacks в logs/profiles/)
+
+Проверяем:
+1. Сэмплирование стеков всех потоков, кроме самого профайлера
+2. Flush в .collapsed файл и ротация старых файлов
+3. Запуск/остановка на лету, настройки из конфига, API toggle
+"""
+
+import asyncio
+import threading
+import time
+
+from utils.profiler import SamplingProfiler, configure_profiler, get_profiler
+
+
+def busy_worker(stop_event):
+    while not stop_event.is_set():
+        sum(range(1000))
+
+
+class TestSampling:
+
+    def test_collapsed_stacks_include_worker_threads(self, tmp_path):
+        profiler = SamplingProfiler(output_dir=str(tmp_path))
+        stop_event = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop_event,), name="reconciliation")
+        worker.start()
+        try:
+            for _ in range(5):
+                profiler.sample()
+        finally:
+            stop_event.set()
+            worker.join()
+
+        lines = profiler.collapsed().splitlines()
+        worker_lines = [line for line in lines if line.startswith("reconciliation;")]
+
+        assert worker_lines
+        assert any("test_sampling_profiler:busy_worker" in line for line in worker_lines)
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in worker_lines) == 5
+
+    def test_pool_worker_names_merged(self, tmp_path):
+        profiler = SamplingProfiler(output_dir=str(tmp_path))
+        stop_event = threading.Event()
+        workers = [
+            threading.Thread(target=busy_worker, args=(stop_event,), name=f"ThreadPoolExecutor-0_{i}")
+            for i in range(2)
+        ]
+        for w in workers:
+            w.start()
+        try:
+            profiler.sample()
+        finally:
+            stop_event.set()
+            for w in workers:
+                w.join()
+
+        assert "ThreadPoolExecutor-0_" not in profiler.collapsed()
+        assert "ThreadPoolExecutor-0;" in profiler.collapsed()
+
+
+class TestOutput:
+
+    def test_flush_and_rotation(self, tmp_path):
+        profiler = SamplingProfiler(output_dir=str(tmp_path), max_files=2)
+        stop_event = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop_event,))
+        worker.start()
+
+        paths = []
+        try:
+            for _ in range(3):
+                profiler.sample()
+                paths.append(profiler.flush())
+        finally:
+            stop_event.set()
+            worker.join()
+
+        files = sorted(p.name for p in tmp_path.glob("profile_*.collapsed"))
+        assert len(files) == 2
+        assert files[-1] in paths[-1]
+        assert profiler.collapsed() == ""
+        assert profiler.flush() is None  # пустой агрегат не пишется
+
+    def test_runtime_start_stop(self, tmp_path):
+        profiler = SamplingProfiler(interval_seconds=0.005, output_dir=str(tmp_path))
+
+        assert profiler.start()
+        assert not profiler.start()
+        time.sleep(0.1)
+        path = profiler.stop()
+
+        assert not profiler.is_running
+        assert profiler.get_status()["total_samples"] > 0
+        assert path and "MainThread;" in open(path, encoding="utf-8").read()
+
+    def test_configure_from_config(self, tmp_path):
+        config = {
+            "observability.profiler_interval_ms": 5,
+            "observability.profiler_output_dir": str(tmp_path),
+            "observability.profiler_max_files": 3,
+        }
+
+        class FakeConfig:
+            def get(self, key, default=None):
+                return config.get(key, default)
+
+        profiler = configure_profiler(FakeConfig())
+        try:
+            assert profiler is get_profiler()
+            assert profiler.interval_seconds == 0.005
+            assert profiler.max_files == 3
+        finally:
+            profiler.configure(interval_seconds=0.01, output_dir="logs/profiles", max_files=20)
+
+    def test_api_toggle(self, tmp_path):
+        from api.app import get_profiler_status, toggle_profiler
+
+        profiler = get_profiler()
+        try:
+            response = asyncio.run(toggle_profiler(enabled=True, interval_ms=5))
+            profiler.configure(output_dir=str(tmp_path))
+            assert response["running"]
+            time.sleep(0.05)
+
+            response = asyncio.run(toggle_profiler(enabled=False))
+            assert not response["running"]
+            assert response["last_file"].startswith(str(tmp_path))
+            assert not asyncio.run(get_profiler_status())["running"]
+        finally:
+            profiler.stop()
+            profiler.configure(interval_seconds=0.01, output_dir="logs/profiles")
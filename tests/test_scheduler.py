@@ -0,0 +1,217 @@
+"""
+Тесты для планировщика главного цикла TradingBot (bot.scheduler)
+
+Проверяем:
+1. BarClock: границы баров по времени биржи со смещением сервера
+2. Задача бара: запуск после закрытия бара, повтор пока нет новой свечи,
+   задержка закрытие -> сигнал в гистограмме
+3. Периодические задачи со своими интервалами, wake() по событию WS
+4. TradingBot.run: задачи планировщика, stop() будит цикл
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bot.scheduler import DAY_MS, MINUTE_MS, SIGNAL_LATENCY_SECONDS, BarClock, LoopScheduler, interval_ms
+
+# 2023-11-14 22:00:00 UTC - ровно граница часового бара
+START = 1_699_999_200.0
+
+
+class FakeTime:
+    """Локальные часы и monotonic с ручной перемоткой"""
+
+    def __init__(self, start=START):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock_time():
+    return FakeTime()
+
+
+def make_scheduler(clock_time, offset_ms=0, interval="60"):
+    clock = BarClock.for_interval(interval, offset_ms=offset_ms, time_fn=clock_time)
+    return LoopScheduler(clock, bar_grace=0.5, bar_retry=1.0, monotonic=clock_time)
+
+
+class TestBarClock:
+
+    def test_intervals(self):
+        assert interval_ms("1") == MINUTE_MS
+        assert interval_ms("240") == 240 * MINUTE_MS
+        assert interval_ms("W") == 7 * DAY_MS
+        with pytest.raises(ValueError):
+            interval_ms("2h")
+
+    def test_boundaries_use_server_offset(self, clock_time):
+        clock_time.advance(59 * 60 + 59.8)  # 22:59:59.800 локально
+        offset = {"ms": 0}
+        clock = BarClock.for_interval("60", offset_ms=lambda: offset["ms"], time_fn=clock_time)
+
+        assert clock.next_close_ms() == int(START * 1000) + 60 * MINUTE_MS
+
+        offset["ms"] = 500  # биржа впереди на 0.5с: бар уже закрылся
+        assert clock.bar_open_ms() == int(START * 1000) + 60 * MINUTE_MS
+
+    def test_weekly_bars_open_on_monday(self):
+        monday = 1_699_833_600_000  # 2023-11-13 00:00 UTC
+        clock = BarClock.for_interval("W", time_fn=lambda: (monday + 3 * DAY_MS) / 1000)
+
+        assert clock.bar_open_ms() == monday
+
+
+class TestBarTask:
+
+    def test_runs_after_bar_close_and_retries_until_new_bar(self, clock_time):
+        scheduler = make_scheduler(clock_time)
+        results = [True, False, False, True]
+        calls = []
+
+        def evaluate():
+            calls.append((clock_time.now, scheduler.bar_close_ms))
+            return results[len(calls) - 1]
+
+        scheduler.add_bar_task("signal", evaluate)
+        clock_time.advance(10)
+
+        assert scheduler.run_pending() == ["signal"]  # стартовая оценка
+        assert calls[0][1] is None
+        assert scheduler.next_wait() == pytest.approx(3600 - 10 + 0.5)
+
+        clock_time.advance(scheduler.next_wait())
+        scheduler.run_pending()
+        for _ in range(2):
+            assert scheduler.next_wait() == pytest.approx(1.0)
+            clock_time.advance(1.0)
+            scheduler.run_pending()
+
+        close_ms = int(START * 1000) + 60 * MINUTE_MS
+        assert [bar for _, bar in calls[1:]] == [close_ms] * 3
+        assert calls[1][0] == pytest.approx(START + 3600.5)
+        assert scheduler.next_wait() == pytest.approx(3600 - 2.0)
+
+    def test_gives_up_retries_when_next_bar_starts(self, clock_time):
+        scheduler = make_scheduler(clock_time, interval="1")
+        scheduler.add_bar_task("signal", lambda: False)
+        scheduler.run_pending()
+        assert scheduler.next_wait() == pytest.approx(1.0)
+
+        clock_time.advance(61)
+        scheduler.run_pending()
+
+        assert scheduler.next_wait() == pytest.approx(60 - 1 + 0.5)
+
+    def test_signal_latency_in_server_time(self, clock_time):
+        scheduler = make_scheduler(clock_time, offset_ms=250)
+        latencies = []
+        scheduler.add_bar_task("signal", lambda: latencies.append(scheduler.record_signal_latency("LATUSDT")) or True)
+
+        scheduler.run_pending()
+        clock_time.advance(scheduler.next_wait() + 0.2)
+        scheduler.run_pending()
+
+        assert latencies[0] is None
+        assert latencies[1] == pytest.approx(0.7, abs=1e-3)
+        assert SIGNAL_LATENCY_SECONDS.snapshot(symbol="LATUSDT")["count"] == 1
+
+
+class TestPeriodicTasks:
+
+    def test_cadences_and_wake_on_event(self, clock_time):
+        scheduler = make_scheduler(clock_time)
+        runs = {"positions": 0, "metrics": 0}
+        scheduler.add_task("positions", 10, lambda: runs.__setitem__("positions", runs["positions"] + 1),
+                           wake_on=("position",), run_immediately=False)
+        scheduler.add_task("metrics", 60, lambda: runs.__setitem__("metrics", runs["metrics"] + 1))
+
+        assert scheduler.run_pending() == ["metrics"]
+        clock_time.advance(3)
+        scheduler.wake("position")
+        scheduler.wake("order")
+
+        assert scheduler.run_pending() == ["positions"]
+        assert scheduler.next_wait() == pytest.approx(10)
+        clock_time.advance(60)
+        assert scheduler.run_pending() == ["positions", "metrics"]
+
+    def test_run_wakes_immediately_from_other_thread(self):
+        scheduler = LoopScheduler(BarClock.for_interval("60"))
+        running = threading.Event()
+        running.set()
+        positions = []
+        scheduler.add_task("positions", 3600, lambda: positions.append(time.monotonic()),
+                           wake_on=("position",), run_immediately=False)
+        thread = threading.Thread(target=scheduler.run, args=(running.is_set,))
+        thread.start()
+
+        started = time.monotonic()
+        scheduler.wake("position")
+        assert_eventually(lambda: positions)
+        running.clear()
+        scheduler.wake("stop")
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert positions[0] - started < 1.0
+
+
+def assert_eventually(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestTradingBotScheduler:
+
+    @staticmethod
+    def make_bot():
+        from bot.trading_bot import TradingBot
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        with patch("bot.trading_bot.Database"), patch("bot.trading_bot.AccountClient"):
+            with patch("bot.trading_bot.MarketDataClient"):
+                bot = TradingBot(mode="paper", strategies=[TrendPullbackStrategy()], symbol="BTCUSDT", testnet=True)
+        bot.kill_switch.check_status = MagicMock(return_value=False)
+        return bot
+
+    def test_run_schedules_tasks_and_stop_wakes_loop(self):
+        bot = self.make_bot()
+        bot.market_client.client.time_offset_ms = 1200
+        bot.market_client.client._sync_server_time = MagicMock()
+        evaluated = threading.Event()
+        bot._evaluate_bar = MagicMock(side_effect=lambda: evaluated.set() or True)
+
+        thread = threading.Thread(target=bot.run)
+        thread.start()
+        assert evaluated.wait(5)
+        bot.stop()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert bot._evaluate_bar.call_count == 1
+        assert set(bot.scheduler.tasks) == {"signal", "positions", "metrics", "time_sync"}
+        assert bot.scheduler.tasks["signal"].interval is None
+        assert bot.scheduler.clock.offset_ms == 1200
+
+    def test_same_bar_is_retried(self):
+        from benchmarks import datasets
+
+        bot = self.make_bot()
+        df = datasets.candles(300).set_index("timestamp")
+        bot._fetch_market_data = MagicMock(return_value={"df": df, "orderbook": None})
+        bot.meta_layer.get_signal = MagicMock(return_value=None)
+
+        assert bot._evaluate_bar() is True
+        assert bot._evaluate_bar() is False
+        assert bot.meta_layer.get_signal.call_count == 1
@@ -0,0 +1,305 @@
+"""
+Тесты для шардированного режима MultiSymbolBot (bot.shard_supervisor)
+
+Проверяем:
+1. Разбиение символов по шардам
+2. Общие kill switch и лимиты риска между шардами (shared memory), в том
+   числе live KillSwitchManager / RiskMonitorService и позиции/PnL из push
+3. ShardDatabase пишет через единственный DatabaseWriter, читает сам
+4. Супервизор перезапускает упавший шард, отчёты и счётчики общие
+   для реальных процессов
+5. MultiSymbolBot в режиме processes агрегирует отчёты шардов
+"""
+
+import os
+import queue
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from bot.multi_symbol_bot import MultiSymbolBot, MultiSymbolConfig
+from bot.shard_supervisor import (
+    WRITE_METHODS,
+    DatabaseWriter,
+    SharedKillSwitch,
+    SharedKillSwitchManager,
+    SharedRiskLimits,
+    SharedRiskState,
+    ShardDatabase,
+    ShardSpec,
+    ShardSupervisor,
+    partition_symbols,
+    share_risk_state,
+    sync_global_kill_switch,
+)
+from risk import KillSwitch, RiskLimits
+from risk.advanced_risk_limits import AdvancedRiskLimits, RiskDecision
+from risk.risk_monitor import RiskMonitorService
+from storage.database import Database
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "XRPUSDT", "SOLUSDT", "DOGEUSDT"]
+TRADE = {"symbol": "BTCUSDT", "size": 0.01, "value": 100.0}
+
+
+def wait_until(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def reporting_shard(spec, channels):
+    """Шард-заглушка: отчёт, запись в БД и сделка; шард 1 падает при первом запуске"""
+    marker = f"{spec.db_path}.shard{spec.shard_id}"
+    first_run = not os.path.exists(marker)
+    open(marker, "a").close()
+    if spec.shard_id == 1 and first_run:
+        raise SystemExit(3)
+
+    db = ShardDatabase(channels.db_requests, channels.db_responses, spec.shard_id, spec.db_path)
+    db.save_error("shard_test", f"shard {spec.shard_id}")
+    SharedRiskLimits(db, channels.shared, spec.shard_id).increment_trade_count()
+    report = {"symbols": {s: {"is_running": True, "error_count": 0, "errors": []} for s in spec.symbols}}
+    channels.status.put((spec.shard_id, os.getpid(), report))
+    channels.stop_event.wait(60)
+
+
+def build_no_strategies():
+    return []
+
+
+def live_bot(db, symbol, realized_pnl_today):
+    """Live компоненты риска бота: RiskMonitorService по REST с заданным PnL за день"""
+    client = MagicMock()
+    client.get_wallet_balance.return_value = {"retCode": 0, "balance": 10_000}
+    client.get_positions.return_value = {"retCode": 0, "result": {"list": []}}
+    client.get_executions.return_value = {"retCode": 0, "result": {"list": [
+        {"execTime": str(int(time.time() * 1000)), "closedPnl": str(realized_pnl_today), "execFee": "0"},
+    ]}}
+    manager = MagicMock(is_halted=False)
+
+    def activate(reason, **kwargs):
+        manager.is_halted = True
+        return {"orders_cancelled": 0, "positions_closed": 1}
+
+    manager.activate.side_effect = activate
+    limits = AdvancedRiskLimits(db)
+    return SimpleNamespace(
+        symbol=symbol,
+        db=db,
+        kill_switch=KillSwitch(db),
+        risk_limits=RiskLimits(db),
+        kill_switch_manager=manager,
+        advanced_risk_limits=limits,
+        risk_monitor=RiskMonitorService(client, manager, limits, db, symbol),
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bot_state.db")
+
+
+@pytest.fixture
+def db(db_path):
+    yield Database(db_path)
+    Database.close_all_cached()
+
+
+def error_rows(db, error_type):
+    rows = db.conn.execute("SELECT message FROM errors WHERE error_type = ? ORDER BY id", (error_type,))
+    return [row[0] for row in rows]
+
+
+class TestPartition:
+
+    def test_round_robin_without_empty_shards(self):
+        assert partition_symbols(SYMBOLS, 2) == [["BTCUSDT", "XRPUSDT", "DOGEUSDT"], ["ETHUSDT", "SOLUSDT"]]
+        assert partition_symbols(SYMBOLS[:2], 8) == [["BTCUSDT"], ["ETHUSDT"]]
+        assert partition_symbols(SYMBOLS, 0) == [SYMBOLS]
+
+
+class TestSharedRiskState:
+
+    def test_limits_count_trades_and_positions_across_shards(self, db):
+        shared = SharedRiskState(2)
+        first = SharedRiskLimits(db, shared, 0, max_trades_per_day=2, max_concurrent_positions=2)
+        second = SharedRiskLimits(db, shared, 1, max_trades_per_day=2, max_concurrent_positions=2)
+
+        first.increment_trade_count()
+        assert second.check_limits(10_000, TRADE)["allowed"]
+        second.increment_trade_count()
+        assert shared.trades_today.value == 2
+        assert not first.check_limits(10_000, TRADE)["allowed"]
+
+        first.reset_daily_stats()
+        first.add_position({"symbol": "BTCUSDT", "value": 100.0})
+        second.add_position({"symbol": "ETHUSDT", "value": 100.0})
+        result = first.check_limits(10_000, TRADE)
+
+        assert shared.open_positions() == 2
+        assert result["violations"] == ["Max concurrent positions exceeded (all shards): 2 >= 2"]
+
+        second.remove_position("ETHUSDT")
+        assert first.check_limits(10_000, TRADE)["allowed"]
+
+    def test_kill_switch_activation_visible_to_other_shards(self, db):
+        shared = SharedRiskState(2)
+        first = SharedKillSwitch(db, shared)
+        second = SharedKillSwitch(db, shared)
+
+        first.activate("exchange down")
+
+        assert second.check_status()
+        assert shared.kill_reason == "exchange down"
+        assert second.reset("RESET")
+        assert not shared.kill_switch_active()
+
+    def test_live_kill_in_one_shard_flattens_the_other(self, db):
+        shared = SharedRiskState(2, symbols=["BTCUSDT", "ETHUSDT"])
+        first, second = live_bot(db, "BTCUSDT", -300), live_bot(db, "ETHUSDT", -300)
+        first_manager, second_manager = first.kill_switch_manager, second.kill_switch_manager
+        share_risk_state(first, shared, 0)
+        share_risk_state(second, shared, 1)
+
+        # Дневной убыток 3% на символ проходит лимит 5%, но не вместе (6%)
+        assert second.risk_monitor.run_monitoring_check()["decision"] == RiskDecision.ALLOW
+        assert first.risk_monitor.run_monitoring_check()["decision"] == RiskDecision.STOP
+
+        assert isinstance(first.risk_monitor.kill_switch_manager, SharedKillSwitchManager)
+        first_manager.activate.assert_called_once()
+        assert shared.kill_switch_active()
+        assert "Daily Loss" in shared.kill_reason
+        assert shared.snapshot()["realized_pnl_today"] == -600
+
+        # Шард B: торговля запрещена, аварийное закрытие своих символов
+        assert second.kill_switch.check_status()
+        assert not second.kill_switch_manager.can_trade()
+        assert sync_global_kill_switch([first, second]) == 1
+        second_manager.activate.assert_called_once_with(f"Global kill switch: {shared.kill_reason}")
+
+    def test_bot_pushes_update_shared_limits(self, db):
+        from bot.trading_bot import TradingBot
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        with patch("bot.trading_bot.Database"), patch("bot.trading_bot.AccountClient"):
+            with patch("bot.trading_bot.MarketDataClient"):
+                bot = TradingBot(mode="paper", strategies=[TrendPullbackStrategy()], symbol="BTCUSDT", testnet=True)
+        shared = SharedRiskState(2)
+        bot.db = db
+        share_risk_state(bot, shared, 1)
+
+        bot._on_position_for_limits({"symbol": "BTCUSDT", "side": "Buy", "size": "0.5", "positionValue": "15000"})
+        bot._on_position_for_limits({"symbol": "ETHUSDT", "side": "Buy", "size": "1", "positionValue": "2000"})
+        assert shared.open_positions() == 1
+        assert bot.risk_limits.current_positions[0]["value"] == 15000.0
+
+        execution = {"symbol": "BTCUSDT", "execId": "e1", "closedPnl": "-40", "execFee": "2"}
+        bot._on_execution_for_limits(execution)
+        bot._on_execution_for_limits(execution)
+        bot._on_position_for_limits({"symbol": "BTCUSDT", "side": "", "size": "0"})
+
+        assert shared.daily_pnl.value == -42.0
+        assert shared.open_positions() == 0
+
+
+class TestShardDatabase:
+
+    def make(self, db, db_path, timeout=5.0):
+        requests, responses = queue.Queue(), {0: queue.Queue()}
+        writer = DatabaseWriter(db, requests, responses)
+        writer.start()
+        return writer, ShardDatabase(requests, responses[0], 0, db_path, timeout=timeout)
+
+    def test_writes_go_through_writer_and_reads_stay_local(self, db, db_path):
+        writer, shard_db = self.make(db, db_path)
+
+        shard_db.save_error("shard_test", "via writer")
+        shard_db.save_config("risk.mode", "shared")
+        writer.stop()
+
+        assert writer.writes == 2
+        assert error_rows(db, "shard_test") == ["via writer"]
+        assert shard_db.get_config("risk.mode") == "shared"
+        assert {"save_error", "save_order_intent", "update_order_status"} <= set(WRITE_METHODS)
+
+    def test_writer_errors_and_timeouts_raise(self, db, db_path):
+        writer, shard_db = self.make(db, db_path, timeout=0.5)
+
+        with pytest.raises(RuntimeError, match="save_sl_tp_levels"):
+            shard_db.save_sl_tp_levels({})
+        writer.stop()
+        with pytest.raises(TimeoutError):
+            shard_db.save_error("shard_test", "nobody listens")
+
+
+class TestShardSupervisor:
+
+    def test_restarts_crashed_shard_and_shares_state(self, db, db_path):
+        specs = [ShardSpec(i, symbols, db_path=db_path) for i, symbols in enumerate(partition_symbols(SYMBOLS, 2))]
+        supervisor = ShardSupervisor(specs, db=db, max_restarts=1, target=reporting_shard)
+
+        supervisor.start()
+        try:
+            crashed = supervisor.shards[1].process
+            assert wait_until(lambda: crashed.exitcode is not None)
+            assert crashed.exitcode == 3
+            assert supervisor.poll() == [1]
+
+            def all_reported():
+                supervisor.poll()
+                return all(report["is_running"] for report in supervisor.symbol_reports().values())
+
+            assert wait_until(all_reported)
+            assert supervisor.shared.trades_today.value == 2
+        finally:
+            supervisor.stop(timeout=10)
+
+        assert sorted(error_rows(db, "shard_test")) == ["shard 0", "shard 1"]
+        shards = supervisor.shard_report()
+        assert shards[1]["restarts"] == 1
+        assert [shard["exitcode"] for shard in shards.values()] == [0, 0]
+        assert not any(report["is_running"] for report in supervisor.symbol_reports().values())
+
+    def test_no_restart_after_global_kill_switch(self, db, db_path):
+        supervisor = ShardSupervisor([ShardSpec(1, ["ETHUSDT"], db_path=db_path)], db=db, target=reporting_shard)
+        supervisor.shared.activate_kill_switch("manual")
+
+        supervisor.start()
+        try:
+            assert wait_until(lambda: supervisor.shards[1].process.exitcode is not None)
+            assert supervisor.poll() == []
+        finally:
+            supervisor.stop(timeout=10)
+
+
+class TestMultiSymbolBotShards:
+
+    def make(self, **kwargs):
+        config = MultiSymbolConfig(symbols=SYMBOLS, execution_mode="processes", num_shards=2)
+        orchestrator = MultiSymbolBot(config, **kwargs)
+        assert orchestrator.initialize()
+        return orchestrator
+
+    def test_report_aggregates_shards(self):
+        orchestrator = self.make(strategy_builder=build_no_strategies)
+        supervisor = orchestrator.supervisor
+        supervisor.shards[0].report = {"symbols": {"BTCUSDT": {"is_running": True, "error_count": 2, "errors": ["x"]}}}
+
+        report = orchestrator.get_report()
+
+        assert orchestrator.bots == {}
+        assert [shard["symbols"] for shard in report["shards"].values()] == partition_symbols(SYMBOLS, 2)
+        assert report["symbols"]["BTCUSDT"] == {"is_running": False, "error_count": 2, "errors": ["x"], "shard": 0}
+        assert report["symbols"]["ETHUSDT"]["shard"] == 1
+        assert report["risk"]["kill_switch_active"] is False
+
+    def test_start_rejects_unpicklable_builder(self):
+        orchestrator = self.make(strategy_builder=lambda: [])
+
+        assert not orchestrator.start()
+        assert not orchestrator.is_running
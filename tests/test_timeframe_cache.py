@@ -0,0 +1,164 @@
+"""
+Тесты для TimeframeCache на кольцевых буферах (data.timeframe_cache)
+
+Проверяем:
+1. add_candle: O(1) замена формирующейся свечи и дописывание, ёмкость
+2. seed: ответ get_kline и DataFrame
+3. Агрегация старших ТФ из младших совпадает с pandas resample
+4. get_latest добавляет ema_20 - check_confluence видит тренд
+5. TradingBot и SharedMarketDataService запрашивают только 1m свечи
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.timeframe_cache import MTF_INTERVALS, TimeframeCache, mtf_fetch_intervals, resample_source
+
+MINUTE_MS = 60_000
+# 2023-11-14 22:00 UTC - граница 4h бара
+START_MS = 1_699_999_200_000
+
+
+def minute_klines(count, start_ms=START_MS, step=1.0):
+    """1m свечи в формате get_kline (новые первыми) с линейным ростом цены"""
+    rows = []
+    for i in range(count):
+        price = 100.0 + step * i
+        rows.append([str(start_ms + i * MINUTE_MS), str(price), str(price + 0.5), str(price - 0.5),
+                     str(price + 0.2), "2", str(2 * price)])
+    return rows[::-1]
+
+
+def candle(ts, close):
+    return {"timestamp": str(ts), "open": close, "high": close, "low": close, "close": close, "volume": 1.0}
+
+
+class TestTimeframeCacheBuffers:
+
+    def test_add_candle_updates_forming_bar_and_appends(self):
+        cache = TimeframeCache(capacity=3)
+
+        cache.add_candle("1", candle(START_MS, 100.0))
+        cache.add_candle("1", candle(START_MS, 101.0))
+        for i in range(1, 4):
+            cache.add_candle("1", candle(START_MS + i * MINUTE_MS, 101.0 + i))
+
+        df = cache.get_dataframe("1")
+        assert list(df["close"]) == [102.0, 103.0, 104.0]
+        assert cache.get_latest("1")["timestamp"] == START_MS + 3 * MINUTE_MS
+
+    def test_seed_from_klines_and_frame(self):
+        cache = TimeframeCache()
+        cache.seed("1", minute_klines(30))
+        frame = cache.get_dataframe("1")
+
+        other = TimeframeCache()
+        other.seed("1", frame.reset_index())
+
+        assert len(frame) == 30
+        pd.testing.assert_frame_equal(other.get_dataframe("1"), frame)
+        assert len(cache.get_dataframe("60")) == 1  # формирующийся 1h бар из 30 минут
+        assert cache.get_dataframe("W") is None
+
+
+class TestResampling:
+
+    def test_matches_pandas_resample_and_drops_partial_first_bar(self):
+        cache = TimeframeCache()
+        cache.seed("1", minute_klines(62, start_ms=START_MS - 3 * MINUTE_MS))
+
+        df_5m = cache.get_dataframe("5")
+        source = cache.get_dataframe("1")
+        expected = source.resample("5min").agg(
+            {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum", "turnover": "sum"}
+        ).iloc[1:]
+
+        pd.testing.assert_frame_equal(df_5m, expected, check_freq=False)
+        assert df_5m.index[0] == pd.Timestamp(START_MS, unit="ms")
+        assert df_5m["volume"].iloc[-1] == 2 * 4  # формирующийся бар: 4 минуты из 5
+
+    def test_uses_coarsest_divisible_source(self):
+        assert resample_source("240", ["1", "60", "D"]) == "60"
+        assert resample_source("15", ["1", "60"]) == "1"
+        assert resample_source("W", ["1", "60"]) is None
+        assert mtf_fetch_intervals(MTF_INTERVALS, "60") == ["1"]
+        assert mtf_fetch_intervals(("5", "15", "240"), "60") == ["5"]
+
+    def test_latest_has_ema_for_confluence(self):
+        cache = TimeframeCache()
+        cache.seed("1", minute_klines(200))
+
+        latest_1m = cache.get_latest("1")
+        latest_5m = cache.get_latest("5")
+        result = cache.check_confluence("long", latest_1m, latest_5m, None)
+
+        assert latest_1m["ema_20"] < latest_1m["close"]
+        assert "ema_20" not in cache.get_latest("240")  # одна агрегированная свеча
+        assert result["details"]["trend_1m"]["trend"] == "up"
+        assert result["details"]["trend_5m"]["trend"] == "up"
+        assert result["score"] == pytest.approx(0.9)
+
+
+class FakeKlineClient:
+    """get_kline: 1h свечи основного ТФ и 1m свечи, с учётом limit"""
+
+    def __init__(self, hourly):
+        self.klines = {"60": hourly, "1": minute_klines(600)}
+        self.calls = []
+
+    def get_kline(self, symbol, interval="60", limit=200, **kwargs):
+        self.calls.append((interval, limit))
+        return {"retCode": 0, "result": {"list": self.klines[interval][:limit]}}
+
+
+class TestMTFFetching:
+
+    def test_bot_fetches_only_minute_candles(self):
+        from benchmarks import datasets
+        from bot.trading_bot import TradingBot
+        from strategy.trend_pullback import TrendPullbackStrategy
+
+        with patch("bot.trading_bot.Database"), patch("bot.trading_bot.AccountClient"):
+            with patch("bot.trading_bot.MarketDataClient"):
+                bot = TradingBot(mode="paper", strategies=[TrendPullbackStrategy()], symbol="BTCUSDT", testnet=True)
+        bot.meta_layer.use_mtf = True
+        bot.meta_layer.timeframe_cache = TimeframeCache()
+        client = FakeKlineClient(datasets.klines(500))
+        client.get_orderbook = MagicMock(return_value={"retCode": 1})
+        bot.market_client = client
+        last_ms = int(client.klines["60"][0][0])
+        bot._server_time_offset_ms = MagicMock(return_value=last_ms + MINUTE_MS - int(time.time() * 1000))
+
+        bot._fetch_market_data()
+        cache = bot.meta_layer.timeframe_cache
+
+        assert sorted({interval for interval, _ in client.calls}) == ["1", "60"]
+        assert cache.buffers["60"] is bot.candle_buffer
+        assert len(cache.get_dataframe("240")) == 125
+        assert len(cache.get_dataframe("15")) == 33  # 1m: минуты 100..599, первый неполный бар отброшен
+        assert cache.get_latest("5")["close"] == pytest.approx(float(client.klines["1"][0][4]))
+
+    def test_shared_service_fetches_only_minute_candles(self):
+        from benchmarks import datasets
+        from data.market_data_service import SharedMarketDataService
+
+        client = FakeKlineClient(datasets.klines(300))
+        client.get_tickers = MagicMock(return_value={"retCode": 0, "result": {"list": []}})
+        client.get_orderbook = MagicMock(return_value={"retCode": 1})
+        service = SharedMarketDataService(client, ["BTCUSDT"], mtf_intervals=MTF_INTERVALS, max_age_seconds=60)
+        try:
+            data = service.get_market_data("BTCUSDT")
+        finally:
+            service.close()
+
+        cache = TimeframeCache()
+        for interval, frame in data["mtf_frames"].items():
+            cache.seed(interval, frame)
+
+        assert sorted(data["mtf_frames"]) == ["1", "60"]
+        assert sorted({interval for interval, _ in client.calls}) == ["1", "60"]
+        assert np.isfinite(cache.get_latest("240")["close"])
@@ -0,0 +1,128 @@
+"""
+Тесты для TradeLedger и векторного расчёта метрик
+
+Проверяем:
+1. Паритет с поштучным расчётом (Decimal) по всем полям TradeMetrics
+2. Batch расчёт == расчёт по одному ledger
+3. Граничные случаи: пустой ledger, только прибыльные сделки
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from execution.trade_ledger import TradeLedger, compute_metrics, compute_metrics_batch
+from execution.trade_metrics import EquityCurve, TradeMetricsCalculator
+
+
+def make_trades(pnls, seed=0):
+    rng = np.random.default_rng(seed)
+    trades = []
+    for p in pnls:
+        fee = Decimal(str(round(float(rng.uniform(0.1, 1.0)), 4)))
+        trades.append(
+            SimpleNamespace(
+                side="Buy" if rng.random() > 0.5 else "Sell",
+                entry_qty=Decimal("0.1"),
+                entry_price=Decimal("50000"),
+                exit_price=Decimal("50100"),
+                entry_commission=fee,
+                exit_commission=fee,
+                pnl_after_commission=Decimal(str(round(p, 6))),
+                was_sl_hit=p < 0 and rng.random() > 0.5,
+                was_tp_hit=p > 0 and rng.random() > 0.5,
+                duration_seconds=float(rng.integers(0, 3600)),
+            )
+        )
+    return trades
+
+
+def reference_metrics(trades):
+    """Поштучный Decimal расчёт (как в исходном TradeMetricsCalculator)"""
+    pnl = [t.pnl_after_commission for t in trades]
+    floats = [float(p) for p in pnl]
+    wins = [p for p in pnl if p > 0]
+    losses = [p for p in pnl if p < 0]
+    return {
+        "total_trades": len(trades),
+        "winning_trades": len(wins),
+        "losing_trades": len(losses),
+        "gross_profit": float(sum(wins, Decimal("0"))),
+        "gross_loss": float(sum(losses, Decimal("0"))),
+        "total_pnl": float(sum(pnl, Decimal("0"))),
+        "total_commission_paid": float(
+            sum((t.entry_commission + t.exit_commission for t in trades), Decimal("0"))
+        ),
+        "largest_winning_trade": max([0.0] + floats),
+        "largest_losing_trade": min([0.0] + floats),
+        "trades_hit_sl": sum(t.was_sl_hit for t in trades),
+        "trades_hit_tp": sum(t.was_tp_hit for t in trades),
+        "total_trading_duration_seconds": sum(
+            t.duration_seconds for t in trades if t.duration_seconds > 0
+        ),
+        "sharpe_ratio": float(TradeMetricsCalculator._calculate_sharpe(floats)),
+        "sortino_ratio": float(TradeMetricsCalculator._calculate_sortino(floats)),
+    }
+
+
+class TestTradeLedger:
+
+    def test_parity_with_scalar_calculation(self):
+        pnls = np.random.default_rng(1).normal(5, 40, 250).tolist()
+        trades = make_trades(pnls)
+
+        metrics = TradeMetricsCalculator.calculate(trades, Decimal("10000"))
+        expected = reference_metrics(trades)
+
+        for field, value in expected.items():
+            assert float(getattr(metrics, field)) == pytest.approx(value, rel=1e-9, abs=1e-9), field
+
+        assert float(metrics.win_rate) == pytest.approx(expected["winning_trades"] / 250 * 100)
+        assert float(metrics.profit_factor) == pytest.approx(
+            abs(expected["gross_profit"] / expected["gross_loss"])
+        )
+
+    def test_batch_matches_single(self):
+        rng = np.random.default_rng(2)
+        ledgers = [
+            TradeLedger.from_trades(make_trades(rng.normal(0, 10, n).tolist(), seed=n))
+            for n in (0, 1, 5, 40, 300)
+        ]
+
+        batch = compute_metrics_batch(ledgers)
+        single = [compute_metrics(ledger, Decimal("1000")) for ledger in ledgers]
+
+        assert batch == single
+        assert batch[0].total_trades == 0
+
+    def test_equity_curve_drawdown(self):
+        trades = make_trades([100.0, -50.0, -80.0, 200.0])
+        curve = EquityCurve()
+        for i, v in enumerate([1000, 1100, 1050, 970, 1170]):
+            curve.add_point(i, Decimal(v))
+
+        metrics = TradeMetricsCalculator.calculate(trades, Decimal("1000"), curve)
+
+        assert metrics.max_drawdown_dollars == Decimal("130.0")
+        assert metrics.recovery_factor == metrics.total_pnl / Decimal("130.0")
+
+    def test_only_winners(self):
+        metrics = compute_metrics(TradeLedger.from_arrays(pnl=[10.0, 20.0]), Decimal("1000"))
+
+        assert metrics.profit_factor == Decimal("inf")
+        assert metrics.expectancy == Decimal("0")
+        assert float(metrics.sortino_ratio) == pytest.approx(15.0 / 0.001)
+
+    def test_empty(self):
+        metrics = TradeMetricsCalculator.calculate([], Decimal("1000"))
+        assert metrics.total_trades == 0
+        assert compute_metrics_batch([]) == []
+
+    def test_calculate_batch(self):
+        lists = [make_trades([1.0, -2.0]), make_trades([3.0])]
+        results = TradeMetricsCalculator.calculate_batch(lists)
+
+        assert [m.total_trades for m in results] == [2, 1]
+        assert results[1].total_pnl == Decimal("3.0")
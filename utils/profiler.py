@@ -0,0 +1,232 @@
+"""
+Sampling profiler для живого бота.
+
+Фоновый поток раз в interval снимает стеки всех потоков процесса
+(sys._current_frames): TradingBot.run, reconciliation, risk monitor,
+WebSocket, пулы kill switch. Стеки агрегируются в collapsed-формат
+(Brendan Gregg, вход для flamegraph.pl / speedscope):
+
+    MainThread;trading_bot:TradingBot.run;features:FeaturePipeline.build_features 42
+
+Раз в flush_interval агрегат пишется в logs/profiles/profile_<ts>.collapsed
+и обнуляется; хранятся последние max_files файлов.
+
+Включение: `python cli.py paper --profile`, `start_bot_from_config.py --profile`
+или на лету через POST /api/profiler/toggle.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from logger import setup_logger
+
+
+logger = setup_logger(__name__)
+
+
+# Номера воркеров пулов (ThreadPoolExecutor-0_3) склеиваются в один стек
+_WORKER_SUFFIX = re.compile(r"_\d+$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{module}:{name}"
+
+
+class SamplingProfiler:
+    """
+    Низкозатратный sampling profiler всех потоков процесса.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 0.01,
+        output_dir: str = "logs/profiles",
+        flush_interval_seconds: float = 60.0,
+        max_files: int = 20,
+        max_depth: int = 64,
+    ):
+        """
+        Args:
+            interval_seconds: Период снятия стеков
+            output_dir: Куда писать .collapsed файлы
+            flush_interval_seconds: Как часто сбрасывать агрегат в файл
+            max_files: Сколько последних файлов хранить (ротация)
+            max_depth: Максимальная глубина стека
+        """
+        self.interval_seconds = interval_seconds
+        self.output_dir = Path(output_dir)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_files = max_files
+        self.max_depth = max_depth
+
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._total_samples = 0
+        self._started_at: Optional[float] = None
+        self._last_file: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def configure(
+        self,
+        interval_seconds: Optional[float] = None,
+        output_dir: Optional[str] = None,
+        flush_interval_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+    ) -> None:
+        """Сменить параметры (интервал подхватывается на лету)"""
+        if interval_seconds:
+            self.interval_seconds = interval_seconds
+        if output_dir:
+            self.output_dir = Path(output_dir)
+        if flush_interval_seconds:
+            self.flush_interval_seconds = flush_interval_seconds
+        if max_files:
+            self.max_files = max_files
+
+    # ==================== Управление ====================
+
+    def start(self) -> bool:
+        """Запустить поток сэмплирования (False, если уже запущен)"""
+        with self._lock:
+            if self.is_running:
+                return False
+            self._stop_event.clear()
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="SamplingProfiler", daemon=True)
+            self._thread.start()
+        logger.info(
+            f"Sampling profiler started: interval={self.interval_seconds * 1000:.0f}ms, output={self.output_dir}"
+        )
+        return True
+
+    def stop(self) -> Optional[str]:
+        """Остановить сэмплирование и сбросить остаток агрегата в файл"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return None
+        self._stop_event.set()
+        thread.join(timeout=5)
+        path = self.flush()
+        logger.info(f"Sampling profiler stopped ({self._total_samples} samples)")
+        return path
+
+    # ==================== Сэмплирование ====================
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval_seconds
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Profiler sample failed: {e}")
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval_seconds
+
+    def sample(self) -> None:
+        """Снять стеки всех потоков (кроме самого профайлера)"""
+        own_ident = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+
+        stacks = []
+        for ident, frame in frames.items():
+            if ident == own_ident:
+                continue
+            labels: List[str] = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            thread_name = _WORKER_SUFFIX.sub("", names.get(ident, f"thread-{ident}"))
+            labels.append(thread_name.replace(";", "_"))
+            stacks.append(";".join(reversed(labels)))
+
+        with self._lock:
+            self._stacks.update(stacks)
+            self._samples += 1
+            self._total_samples += 1
+
+    # ==================== Вывод ====================
+
+    def collapsed(self) -> str:
+        """Текущий агрегат в collapsed-формате"""
+        with self._lock:
+            items = sorted(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def flush(self) -> Optional[str]:
+        """Записать агрегат в новый файл, обнулить и применить ротацию"""
+        with self._lock:
+            if not self._stacks:
+                return None
+            stacks, self._stacks = self._stacks, Counter()
+            self._samples = 0
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = self.output_dir / f"profile_{stamp}.collapsed"
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        self._last_file = str(path)
+        self._rotate()
+        return self._last_file
+
+    def _rotate(self) -> None:
+        files = sorted(self.output_dir.glob("profile_*.collapsed"))
+        for old in files[: max(0, len(files) - self.max_files)]:
+            try:
+                old.unlink()
+            except OSError as e:
+                logger.warning(f"Failed to remove old profile {old}: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "interval_ms": round(self.interval_seconds * 1000, 3),
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "output_dir": str(self.output_dir),
+            "started_at": self._started_at,
+            "pending_samples": self._samples,
+            "total_samples": self._total_samples,
+            "last_file": self._last_file,
+        }
+
+
+# Глобальный профайлер процесса
+_profiler = SamplingProfiler()
+
+
+def get_profiler() -> SamplingProfiler:
+    """Глобальный SamplingProfiler"""
+    return _profiler
+
+
+def configure_profiler(config) -> SamplingProfiler:
+    """Применить настройки observability.profiler_* из конфига"""
+    _profiler.configure(
+        interval_seconds=float(config.get("observability.profiler_interval_ms", 10)) / 1000,
+        output_dir=config.get("observability.profiler_output_dir", "logs/profiles"),
+        flush_interval_seconds=float(config.get("observability.profiler_flush_seconds", 60)),
+        max_files=int(config.get("observability.profiler_max_files", 20)),
+    )
+    return _profiler
@@ -14,10 +14,17 @@ from typing import Callable, TypeVar, Any, Optional, Dict
 
 from logger import setup_logger
 
+from utils import metrics
+
 
 logger = setup_logger(__name__)
 
 
+RETRIES = metrics.counter(
+    "retry_with_backoff_retries_total", "Повторы в retry_with_backoff по функции и причине", ("func", "reason")
+)
+
+
 T = TypeVar("T")
 
 
@@ -74,6 +81,8 @@ def retry_with_backoff(
 
     _last_error = None
 
+    func_name = getattr(func, "__name__", type(func).__name__)
+
     for attempt in range(max_retries):
 
         try:
@@ -102,6 +111,8 @@ def retry_with_backoff(
 
                     if attempt < max_retries - 1:
 
+                        RETRIES.inc(func=func_name, reason="rate_limit")
+
                         logger.warning(
 
                             f"⏳ Rate limit. Retry {attempt + 1}/{max_retries} через {delay:.1f}s"
@@ -144,6 +155,8 @@ def retry_with_backoff(
 
             if attempt < max_retries - 1:
 
+                RETRIES.inc(func=func_name, reason="exception")
+
                 logger.warning(
 
                     f"⏳ Error: {e}. Retry {attempt + 1}/{max_retries} через {delay:.1f}s"
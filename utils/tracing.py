@@ -0,0 +1,225 @@
+"""
+Latency tracing: tick-to-order spans по стадиям сигнального пайплайна.
+
+Один тик TradingBot.run = один trace (trace_id). Стадии оборачиваются в
+span'ы на монотонных часах (time.perf_counter_ns):
+
+    trace = tracer.start_trace(symbol)
+    with tracer.span("build_features"):
+        ...
+    tracer.finish_trace()
+
+Текущий trace хранится в thread-local, поэтому вложенные вызовы
+(OrderManager, _wait_for_order_fill) добавляют span'ы без передачи trace
+через сигнатуры. Завершённые trace'ы лежат в кольцевом буфере последних N.
+
+Выключенный tracer возвращает общий no-op span - ни аллокаций, ни часов.
+"""
+
+import functools
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class _NoopSpan:
+    """Span выключенного tracer'а / вне trace"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Trace одного тика: span'ы (stage, start_ns, duration_ns)"""
+
+    __slots__ = ("trace_id", "symbol", "start_ns", "end_ns", "spans")
+
+    def __init__(self, trace_id: int, symbol: Optional[str]):
+        self.trace_id = trace_id
+        self.symbol = symbol
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.spans: List[tuple] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def stage_durations_ms(self) -> Dict[str, float]:
+        """Суммарная длительность по стадиям (повторные span'ы складываются)"""
+        durations: Dict[str, float] = {}
+        for stage, _, duration_ns in self.spans:
+            durations[stage] = durations.get(stage, 0.0) + duration_ns / 1e6
+        return durations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "symbol": self.symbol,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": [
+                {
+                    "stage": stage,
+                    "offset_ms": round((start_ns - self.start_ns) / 1e6, 3),
+                    "duration_ms": round(duration_ns / 1e6, 3),
+                }
+                for stage, start_ns, duration_ns in self.spans
+            ],
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "stage", "start_ns")
+
+    def __init__(self, trace: Trace, stage: str):
+        self.trace = trace
+        self.stage = stage
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        self.trace.spans.append((self.stage, self.start_ns, end_ns - self.start_ns))
+        self.trace.end_ns = end_ns
+        return False
+
+
+class LatencyTracer:
+    """
+    Сбор trace'ов тиков с кольцевым буфером и перцентилями по стадиям.
+    """
+
+    def __init__(self, capacity: int = 1000, enabled: bool = False):
+        """
+        Args:
+            capacity: Сколько последних trace'ов хранить
+            enabled: Включён ли сбор
+        """
+        self.enabled = enabled
+        self._traces: deque = deque(maxlen=capacity)
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    @property
+    def capacity(self) -> int:
+        return self._traces.maxlen
+
+    def configure(self, enabled: bool, capacity: Optional[int] = None) -> None:
+        """Включить/выключить сбор, при необходимости сменить размер буфера"""
+        if capacity and capacity != self._traces.maxlen:
+            self._traces = deque(self._traces, maxlen=capacity)
+        self.enabled = enabled
+
+    # ==================== Запись ====================
+
+    def start_trace(self, symbol: Optional[str] = None) -> Optional[Trace]:
+        """
+        Начать trace тика в текущем потоке.
+
+        Незавершённый trace предыдущего тика (continue в цикле) завершается
+        по концу его последнего span'а.
+        """
+        if not self.enabled:
+            return None
+        self.finish_trace()
+        trace = Trace(next(self._ids), symbol)
+        self._local.trace = trace
+        return trace
+
+    def span(self, stage: str):
+        """Span стадии в текущем trace (no-op, если выключен или trace нет)"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return _NOOP_SPAN
+        return _Span(trace, stage)
+
+    def finish_trace(self) -> Optional[Trace]:
+        """Завершить trace текущего потока и положить в буфер (пустые отбрасываются)"""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return None
+        self._local.trace = None
+        if trace.spans:
+            self._traces.append(trace)
+        return trace
+
+    def current_trace(self) -> Optional[Trace]:
+        return getattr(self._local, "trace", None)
+
+    # ==================== Чтение ====================
+
+    def get_traces(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Последние trace'ы (новые первыми)"""
+        traces = list(self._traces)[-limit:] if limit else []
+        return [t.to_dict() for t in reversed(traces)]
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        p50/p95/p99/mean/max (мс) по каждой стадии и по trace целиком ("total").
+        """
+        per_stage: Dict[str, List[float]] = {}
+        totals: List[float] = []
+        for trace in list(self._traces):
+            totals.append(trace.duration_ms)
+            for stage, duration in trace.stage_durations_ms().items():
+                per_stage.setdefault(stage, []).append(duration)
+
+        if totals:
+            per_stage["total"] = totals
+
+        stats = {}
+        for stage, values in per_stage.items():
+            arr = np.asarray(values)
+            p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+            stats[stage] = {
+                "count": int(arr.size),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "mean_ms": round(float(arr.mean()), 3),
+                "max_ms": round(float(arr.max()), 3),
+            }
+        return stats
+
+    def reset(self) -> None:
+        self._traces.clear()
+
+
+def traced(stage: str):
+    """Декоратор: вызов функции - span стадии в текущем trace глобального tracer'а"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Глобальный tracer процесса (все боты MultiSymbolBot пишут в него из своих потоков)
+_tracer = LatencyTracer()
+
+
+def get_tracer() -> LatencyTracer:
+    """Глобальный LatencyTracer"""
+    return _tracer